@@ -25,12 +25,15 @@ from .resources import validation
 from .resources import security as security_resources
 from .ws.events import register_socketio_events
 from .utils.rabbitmq import ensure_coordination_bindings
+from .utils.neo4j_client import init_bookmarks, warm_client
+from .utils.ann_index import init_ann_index
 from .errors import register_error_handlers
 from .security.jwt_callbacks import register_jwt_callbacks
 from .metrics import init_metrics
 from .db_metrics import init_sqlalchemy_metrics
 import logging
 from .services.autonomy.agent_lifecycle_manager import AgentLifecycleManager
+from .utils.consciousness_substrate import EnhancedConsciousnessSubstrate
 
 
 def create_app() -> Flask:
@@ -42,10 +45,16 @@ def create_app() -> Flask:
     ma.init_app(app)
     jwt.init_app(app)
     register_jwt_callbacks(jwt)
-    CORS(app, resources={r"/*": {"origins": app.config.get("CORS_ORIGINS", "*")}}, supports_credentials=True)
+    CORS(
+        app,
+        resources={r"/*": {"origins": app.config.get("CORS_ORIGINS", "*")}},
+        supports_credentials=True,
+        expose_headers=["X-Neo4j-Bookmarks"],
+    )
 
     # Metrics and logging
     init_metrics(app)
+    init_bookmarks(app)
     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s %(message)s')
 
     # Root landing page with links to ReDoc and Swagger UI
@@ -159,11 +168,27 @@ def create_app() -> Flask:
         if os.getenv("LIFECYCLE_MANAGER_AUTOSTART", "false").lower() == "true":
             lm.start()
 
+        # Long-lived substrate service backed by the shared Neo4j pool
+        app.extensions["substrate"] = EnhancedConsciousnessSubstrate()
+
+        # In-process ANN fallback for semantic search (memory-mapped from ANN_INDEX_DIR)
+        try:
+            init_ann_index(app)
+        except Exception:
+            logging.getLogger(__name__).warning("ANN index init failed", exc_info=True)
+
     # Best-effort broker setup
     try:
         ensure_coordination_bindings()
     except Exception:
         pass
+
+    # Best-effort Neo4j pool warm-up so the first request skips the bolt handshake
+    if app.config.get("NEO4J_WARMUP", True):
+        try:
+            warm_client()
+        except Exception:
+            pass
     return app
 
 
@@ -24,6 +24,94 @@ class BaseConfig:
     NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
     NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
     NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
+    # Shared driver pool (see api.utils.neo4j_client.get_client)
+    NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", 50))
+    NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", 30))
+    NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", 3600))
+    NEO4J_WARMUP = os.getenv("NEO4J_WARMUP", "true").lower() == "true"
+    # Slow-query log (see api.utils.query_log); PROFILE re-runs read-only slow queries off the request path
+    NEO4J_SLOW_QUERY_MS = float(os.getenv("NEO4J_SLOW_QUERY_MS", 500))
+    NEO4J_SLOW_QUERY_SAMPLE_RATE = float(os.getenv("NEO4J_SLOW_QUERY_SAMPLE_RATE", 1.0))
+    NEO4J_SLOW_QUERY_LOG_SIZE = int(os.getenv("NEO4J_SLOW_QUERY_LOG_SIZE", 200))
+    NEO4J_SLOW_QUERY_PROFILE = os.getenv("NEO4J_SLOW_QUERY_PROFILE", "false").lower() == "true"
+    # Write-behind coalescing of append-only telemetry rows (see api.utils.write_coalescer)
+    NEO4J_COALESCE_ENABLED = os.getenv("NEO4J_COALESCE_ENABLED", "true").lower() == "true"
+    NEO4J_COALESCE_FLUSH_MS = float(os.getenv("NEO4J_COALESCE_FLUSH_MS", 200))
+    NEO4J_COALESCE_MAX_BATCH = int(os.getenv("NEO4J_COALESCE_MAX_BATCH", 500))
+    NEO4J_COALESCE_MAX_BUFFERED = int(os.getenv("NEO4J_COALESCE_MAX_BUFFERED", 10000))
+
+    # /knowledge/query limits (row cap applies to NDJSON streaming; timeout is server-side, seconds)
+    KNOWLEDGE_QUERY_MAX_ROWS = int(os.getenv("KNOWLEDGE_QUERY_MAX_ROWS", 1000000))
+    KNOWLEDGE_QUERY_TIMEOUT = float(os.getenv("KNOWLEDGE_QUERY_TIMEOUT", 60))
+    KNOWLEDGE_QUERY_FETCH_SIZE = int(os.getenv("KNOWLEDGE_QUERY_FETCH_SIZE", 1000))
+
+    # /substrate/entities/bulk (chunk = one UNWIND write transaction)
+    SUBSTRATE_BULK_CHUNK_SIZE = int(os.getenv("SUBSTRATE_BULK_CHUNK_SIZE", 1000))
+    SUBSTRATE_BULK_PARALLELISM = int(os.getenv("SUBSTRATE_BULK_PARALLELISM", 1))
+    SUBSTRATE_BULK_MAX_CHUNK_SIZE = int(os.getenv("SUBSTRATE_BULK_MAX_CHUNK_SIZE", 10000))
+    SUBSTRATE_BULK_MAX_PARALLELISM = int(os.getenv("SUBSTRATE_BULK_MAX_PARALLELISM", 8))
+    # KnowledgeSnapshot content is delta-encoded with a full keyframe every N versions
+    SNAPSHOT_KEYFRAME_INTERVAL = int(os.getenv("SNAPSHOT_KEYFRAME_INTERVAL", 20))
+    # /substrate/traverse: neighbours expanded per frontier node per BFS level
+    TRAVERSE_FANOUT = int(os.getenv("TRAVERSE_FANOUT", 100))
+    # In-process PageRank/Louvain when GDS is not installed (see api.utils.graph_analytics)
+    GRAPH_ANALYTICS_ENABLED = os.getenv("GRAPH_ANALYTICS_ENABLED", "true").lower() == "true"
+    GRAPH_ANALYTICS_MAX_EDGES = int(os.getenv("GRAPH_ANALYTICS_MAX_EDGES", 20_000_000))
+    GRAPH_ANALYTICS_FETCH_SIZE = int(os.getenv("GRAPH_ANALYTICS_FETCH_SIZE", 10000))
+    GRAPH_ANALYTICS_WRITE_BATCH = int(os.getenv("GRAPH_ANALYTICS_WRITE_BATCH", 10000))
+    # Long-lived GDS projections shared by centrality/community calls (see api.utils.gds_projections)
+    GDS_PROJECTIONS_ENABLED = os.getenv("GDS_PROJECTIONS_ENABLED", "true").lower() == "true"
+    GDS_PROJECTION_CHECK_S = float(os.getenv("GDS_PROJECTION_CHECK_S", 5))
+    GDS_PROJECTION_MAX_AGE_S = float(os.getenv("GDS_PROJECTION_MAX_AGE_S", 3600))
+    # In-process ANN index used when the Neo4j vector indexes are unavailable (see api.utils.ann_index)
+    ANN_INDEX_ENABLED = os.getenv("ANN_INDEX_ENABLED", "true").lower() == "true"
+    ANN_INDEX_DIR = os.getenv("ANN_INDEX_DIR", "data/ann")
+    ANN_INDEX_NLIST = int(os.getenv("ANN_INDEX_NLIST", 0))
+    ANN_INDEX_NPROBE = int(os.getenv("ANN_INDEX_NPROBE", 8))
+    ANN_INDEX_BUILD_ON_START = os.getenv("ANN_INDEX_BUILD_ON_START", "false").lower() == "true"
+    # Two-tier (memory + SQLite) embedding cache (see api.utils.embedding_cache); empty path = memory only
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "data/embeddings/cache.sqlite3")
+    EMBEDDING_CACHE_MEMORY_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MEMORY_MAX_BYTES", 32 * 1024 * 1024))
+    EMBEDDING_CACHE_DISK_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_DISK_MAX_BYTES", 1024 * 1024 * 1024))
+    # Embedding backend (see api.utils.embedding_providers): "openai" or the offline "local" hashing model
+    EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai").lower()
+    EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", 1536))
+    EMBEDDING_LOCAL_SEED = int(os.getenv("EMBEDDING_LOCAL_SEED", 0))
+    # Embedding requests: texts per provider call, and coalescing of concurrent single-text calls
+    EMBEDDING_BATCH_MAX = int(os.getenv("EMBEDDING_BATCH_MAX", 256))
+    EMBEDDING_COALESCE_ENABLED = os.getenv("EMBEDDING_COALESCE_ENABLED", "true").lower() == "true"
+    EMBEDDING_COALESCE_MAX_BATCH = int(os.getenv("EMBEDDING_COALESCE_MAX_BATCH", 64))
+    EMBEDDING_COALESCE_WAIT_MS = float(os.getenv("EMBEDDING_COALESCE_WAIT_MS", 5))
+    EMBEDDING_COALESCE_TIMEOUT_S = float(os.getenv("EMBEDDING_COALESCE_TIMEOUT_S", 60))
+    # Background embedding enrichment (see api.services.embedding_enrichment); TPM 0 disables throttling
+    EMBEDDING_ENRICH_TPM = float(os.getenv("EMBEDDING_ENRICH_TPM", 1_000_000))
+    EMBEDDING_ENRICH_PAGE = int(os.getenv("EMBEDDING_ENRICH_PAGE", 1000))
+    # Result cache for /knowledge/search and /substrate/search/semantic (see api.utils.search_cache)
+    SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+    SEARCH_CACHE_TTL_S = float(os.getenv("SEARCH_CACHE_TTL_S", 300))
+    SEARCH_CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    # Near-duplicate detection for /kg_drift/curation/dedup (see api.utils.minhash); bands must divide num_perm
+    DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", 128))
+    DEDUP_LSH_BANDS = int(os.getenv("DEDUP_LSH_BANDS", 32))
+    DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.5))
+    DEDUP_MAX_ENTITIES = int(os.getenv("DEDUP_MAX_ENTITIES", 1000000))
+    # Entity merges: edges moved per transaction, plans run at once, and the neighbourhood size above which a plan runs alone
+    MERGE_BATCH_SIZE = int(os.getenv("MERGE_BATCH_SIZE", 1000))
+    MERGE_PARALLELISM = int(os.getenv("MERGE_PARALLELISM", 4))
+    MERGE_FOOTPRINT_MAX = int(os.getenv("MERGE_FOOTPRINT_MAX", 10000))
+    # /kg_drift/quality is incremental; a full rebuild of its running aggregates runs this often (0 = only on demand)
+    QUALITY_RECONCILE_S = float(os.getenv("QUALITY_RECONCILE_S", 86400))
+    # monitor_consistency runs its checks concurrently, each bounded by this server-side timeout (0 = none)
+    CONSISTENCY_CHECK_TIMEOUT_S = float(os.getenv("CONSISTENCY_CHECK_TIMEOUT_S", 10))
+    CONSISTENCY_CHECK_PARALLELISM = int(os.getenv("CONSISTENCY_CHECK_PARALLELISM", 8))
+    # Full rescan of the write-time contradiction index by kg_integrity_watch (0 = never)
+    CONTRADICTION_RECONCILE_S = float(os.getenv("CONTRADICTION_RECONCILE_S", 86400))
+    # KG consensus: votes per UNWIND transaction, and the cap on one bulk vote / batch resolve request
+    CONSENSUS_VOTE_BATCH = int(os.getenv("CONSENSUS_VOTE_BATCH", 2000))
+    CONSENSUS_BULK_MAX = int(os.getenv("CONSENSUS_BULK_MAX", 20000))
+    # Token claim role allowed to record bulk votes for other voters (service accounts); empty = nobody
+    CONSENSUS_PROXY_VOTE_ROLE = os.getenv("CONSENSUS_PROXY_VOTE_ROLE", "")
 
 
 class DevelopmentConfig(BaseConfig):
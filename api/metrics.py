@@ -76,6 +76,213 @@ database_query_duration = Histogram(
     registry=api_registry,
 )
 
+# Neo4j driver connection pool metrics
+neo4j_pool_connections = Gauge(
+    "neo4j_pool_connections",
+    "Connections held by the shared Neo4j driver pool",
+    ["state"],
+    registry=api_registry,
+)
+neo4j_pool_acquisition_wait = Histogram(
+    "neo4j_pool_acquisition_wait_seconds",
+    "Time spent waiting to acquire a connection from the Neo4j pool",
+    buckets=[0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0],
+    registry=api_registry,
+)
+
+# Per-query Neo4j metrics, labelled by normalized query fingerprint (see api.utils.query_log)
+neo4j_query_duration = Histogram(
+    "neo4j_query_duration_seconds",
+    "Neo4j query duration in seconds by query fingerprint",
+    ["fingerprint", "name"],
+    buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0],
+    registry=api_registry,
+)
+neo4j_query_rows = Histogram(
+    "neo4j_query_rows",
+    "Rows returned per Neo4j query by query fingerprint",
+    ["fingerprint", "name"],
+    buckets=[0, 1, 10, 100, 1000, 10000, 100000],
+    registry=api_registry,
+)
+
+# Write-behind coalescer for append-only Neo4j rows (see api.utils.write_coalescer)
+neo4j_coalesced_rows_total = Counter(
+    "neo4j_coalesced_rows_total",
+    "Rows passed through the Neo4j write coalescer",
+    ["kind", "status"],
+    registry=api_registry,
+)
+neo4j_coalescer_batch_size = Histogram(
+    "neo4j_coalescer_batch_size",
+    "Rows written per coalesced UNWIND statement",
+    ["kind"],
+    buckets=[1, 5, 10, 50, 100, 250, 500, 1000],
+    registry=api_registry,
+)
+neo4j_coalescer_buffered = Gauge(
+    "neo4j_coalescer_buffered_rows",
+    "Rows currently buffered by the Neo4j write coalescer",
+    registry=api_registry,
+)
+
+# In-process ANN fallback index (see api.utils.ann_index)
+ann_search_duration = Histogram(
+    "ann_search_duration_seconds",
+    "In-process ANN index query duration in seconds",
+    ["label"],
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5],
+    registry=api_registry,
+)
+ann_index_vectors = Gauge(
+    "ann_index_vectors",
+    "Live vectors held by the in-process ANN index",
+    ["label"],
+    registry=api_registry,
+)
+
+# Search result cache (see api.utils.search_cache)
+search_cache_requests_total = Counter(
+    "search_cache_requests_total",
+    "Search result cache lookups",
+    ["cache", "result"],
+    registry=api_registry,
+)
+search_cache_evictions_total = Counter(
+    "search_cache_evictions_total",
+    "Search result cache evictions",
+    ["cache", "reason"],
+    registry=api_registry,
+)
+search_cache_bytes = Gauge(
+    "search_cache_bytes",
+    "Estimated bytes held by the search result cache",
+    ["cache"],
+    registry=api_registry,
+)
+
+# Persistent GDS projections (see api.utils.gds_projections)
+gds_projection_age_seconds = Gauge(
+    "gds_projection_age_seconds",
+    "Seconds since the live GDS projection was created",
+    ["projection"],
+    registry=api_registry,
+)
+gds_projection_memory_bytes = Gauge(
+    "gds_projection_memory_bytes",
+    "In-memory size of the live GDS projection as reported by gds.graph.list",
+    ["projection"],
+    registry=api_registry,
+)
+gds_projection_refreshes_total = Counter(
+    "gds_projection_refreshes_total",
+    "GDS projections (re)created or adopted from another worker",
+    ["projection", "reason"],
+    registry=api_registry,
+)
+
+# Embedding cache (see api.utils.embedding_cache)
+embedding_cache_requests_total = Counter(
+    "embedding_cache_requests_total",
+    "Embedding cache lookups by outcome (memory_hit, disk_hit, miss)",
+    ["result"],
+    registry=api_registry,
+)
+embedding_cache_evictions_total = Counter(
+    "embedding_cache_evictions_total",
+    "Embeddings evicted from the cache",
+    ["tier"],
+    registry=api_registry,
+)
+embedding_batch_size = Histogram(
+    "embedding_batch_size",
+    "Texts sent per embeddings provider request",
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048],
+    registry=api_registry,
+)
+embedding_cache_bytes = Gauge(
+    "embedding_cache_bytes",
+    "Bytes held by each embedding cache tier",
+    ["tier"],
+    registry=api_registry,
+)
+
+# Semantic drift (see api.services.knowledge_drift)
+kg_drift_similarity = Histogram(
+    "kg_drift_similarity",
+    "Cosine similarity between stored and freshly computed entity embeddings",
+    buckets=[0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.98, 0.99, 1.0],
+    registry=api_registry,
+)
+
+# Embedding enrichment pipeline (see api.services.embedding_enrichment)
+embedding_enrichment_entities_total = Counter(
+    "embedding_enrichment_entities_total",
+    "Entities handled by the enrichment pipeline by outcome (embedded, skipped)",
+    ["result"],
+    registry=api_registry,
+)
+embedding_enrichment_tokens_total = Counter(
+    "embedding_enrichment_tokens_total",
+    "Estimated provider tokens spent by the enrichment pipeline",
+    registry=api_registry,
+)
+embedding_enrichment_throttled_seconds_total = Counter(
+    "embedding_enrichment_throttled_seconds_total",
+    "Seconds the enrichment pipeline waited on its tokens-per-minute budget",
+    registry=api_registry,
+)
+embedding_enrichment_entities_per_second = Gauge(
+    "embedding_enrichment_entities_per_second",
+    "Entities handled per second by the current enrichment run",
+    ["job"],
+    registry=api_registry,
+)
+embedding_enrichment_remaining_entities = Gauge(
+    "embedding_enrichment_remaining_entities",
+    "Entities still missing an embedding after the job's cursor",
+    ["job"],
+    registry=api_registry,
+)
+
+# Chunked entity merges (see api.services.knowledge_drift.merge_entities)
+kg_merge_batch_seconds = Histogram(
+    "kg_merge_batch_seconds",
+    "Duration of one merge transaction by phase (out, in: rewiring a batch of edges; mark)",
+    ["phase"],
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30],
+    registry=api_registry,
+)
+kg_merge_edges_total = Counter(
+    "kg_merge_edges_total",
+    "RELATED edges rewired from merged duplicates onto their target",
+    ["direction"],
+    registry=api_registry,
+)
+
+# Graph consistency checks (see api.utils.kg_schema.monitor_consistency)
+kg_consistency_check_seconds = Histogram(
+    "kg_consistency_check_seconds",
+    "Duration of each consistency check by outcome (ok, timeout, error)",
+    ["check", "status"],
+    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30],
+    registry=api_registry,
+)
+
+# KG consensus (see api.services.kg_consensus)
+kg_consensus_votes_total = Counter(
+    "kg_consensus_votes_total",
+    "Votes applied to conflict options by result (new, changed, unchanged)",
+    ["result"],
+    registry=api_registry,
+)
+kg_consensus_resolutions_total = Counter(
+    "kg_consensus_resolutions_total",
+    "Conflict resolutions by outcome (resolved, quorum_not_met, no_options)",
+    ["outcome"],
+    registry=api_registry,
+)
+
 # Agent workflow metrics
 agent_workflow_executions_total = Counter(
     "agent_workflow_executions_total",
@@ -122,6 +329,124 @@ def record_database_operation(db_type: str, operation: str, duration_sec: float,
     database_query_duration.labels(database_type=db_type, operation=operation).observe(max(0.0, float(duration_sec)))
 
 
+
+def record_neo4j_acquisition_wait(duration_sec: float) -> None:
+    neo4j_pool_acquisition_wait.observe(max(0.0, float(duration_sec)))
+
+
+def track_neo4j_pool(in_use_fn, idle_fn) -> None:
+    """Bind pool gauges to callables evaluated at scrape time."""
+    neo4j_pool_connections.labels(state="in_use").set_function(in_use_fn)
+    neo4j_pool_connections.labels(state="idle").set_function(idle_fn)
+
+
+def record_neo4j_query(fingerprint: str, name: str, duration_sec: float, rows: int) -> None:
+    neo4j_query_duration.labels(fingerprint=fingerprint, name=name).observe(max(0.0, float(duration_sec)))
+    neo4j_query_rows.labels(fingerprint=fingerprint, name=name).observe(max(0, int(rows)))
+
+
+def record_coalescer_flush(kind: str, rows: int, success: bool = True) -> None:
+    status = "written" if success else "dropped"
+    neo4j_coalesced_rows_total.labels(kind=kind, status=status).inc(rows)
+    if success:
+        neo4j_coalescer_batch_size.labels(kind=kind).observe(rows)
+
+
+def record_coalescer_buffered(rows: int) -> None:
+    neo4j_coalescer_buffered.set(rows)
+
+
+def record_ann_search(label: str, duration_sec: float, size: int) -> None:
+    ann_search_duration.labels(label=label).observe(max(0.0, float(duration_sec)))
+    ann_index_vectors.labels(label=label).set(size)
+
+
+
+def record_search_cache(cache: str, event: str, reason: str = "") -> None:
+    if event == "eviction":
+        search_cache_evictions_total.labels(cache=cache, reason=reason or "lru").inc()
+    else:
+        search_cache_requests_total.labels(cache=cache, result=event).inc()
+
+
+def record_search_cache_bytes(cache: str, size: int) -> None:
+    search_cache_bytes.labels(cache=cache).set(max(0, int(size)))
+
+
+def record_gds_projection(projection: str, created_at: float, size_bytes: int, reason: str) -> None:
+    gds_projection_refreshes_total.labels(projection=projection, reason=reason).inc()
+    gds_projection_memory_bytes.labels(projection=projection).set(max(0, int(size_bytes)))
+    gds_projection_age_seconds.labels(projection=projection).set_function(lambda: time.time() - created_at)
+
+
+def clear_gds_projection(projection: str) -> None:
+    for gauge in (gds_projection_age_seconds, gds_projection_memory_bytes):
+        try:
+            gauge.remove(projection)
+        except KeyError:
+            pass
+
+
+def record_embedding_cache(result: str, count: int = 1) -> None:
+    embedding_cache_requests_total.labels(result=result).inc(count)
+
+
+def record_embedding_cache_eviction(tier: str, count: int = 1) -> None:
+    embedding_cache_evictions_total.labels(tier=tier).inc(count)
+
+
+def record_embedding_batch(size: int) -> None:
+    embedding_batch_size.observe(size)
+
+
+def record_embedding_cache_bytes(tier: str, size: int) -> None:
+    embedding_cache_bytes.labels(tier=tier).set(max(0, int(size)))
+
+
+def record_drift_similarity(similarity: float) -> None:
+    kg_drift_similarity.observe(similarity)
+
+
+def record_enrichment_batch(embedded: int, skipped: int, tokens: int) -> None:
+    if embedded:
+        embedding_enrichment_entities_total.labels(result="embedded").inc(embedded)
+    if skipped:
+        embedding_enrichment_entities_total.labels(result="skipped").inc(skipped)
+    if tokens:
+        embedding_enrichment_tokens_total.inc(tokens)
+
+
+def record_enrichment_throttle(seconds: float) -> None:
+    if seconds > 0:
+        embedding_enrichment_throttled_seconds_total.inc(seconds)
+
+
+def record_enrichment_progress(job: str, per_second: float, remaining: int) -> None:
+    embedding_enrichment_entities_per_second.labels(job=job).set(max(0.0, per_second))
+    embedding_enrichment_remaining_entities.labels(job=job).set(max(0, int(remaining)))
+
+
+def record_merge_batch(phase: str, seconds: float, edges: int) -> None:
+    kg_merge_batch_seconds.labels(phase=phase).observe(seconds)
+    if edges:
+        kg_merge_edges_total.labels(direction=phase).inc(edges)
+
+
+def record_consistency_check(check: str, status: str, seconds: float) -> None:
+    kg_consistency_check_seconds.labels(check=check, status=status).observe(seconds)
+
+
+def record_consensus_votes(new: int, changed: int, unchanged: int) -> None:
+    for result, n in (("new", new), ("changed", changed), ("unchanged", unchanged)):
+        if n:
+            kg_consensus_votes_total.labels(result=result).inc(n)
+
+
+def record_consensus_resolution(outcomes: dict) -> None:
+    for outcome, n in outcomes.items():
+        kg_consensus_resolutions_total.labels(outcome=outcome).inc(n)
+
+
 ess_connections = 0
 
 def record_websocket_connection(connected: bool) -> None:
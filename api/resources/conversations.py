@@ -1,7 +1,7 @@
 from flask import request
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..utils.neo4j_client import get_client
+from ..utils.neo4j_client import get_client, prefer_read_replicas
 from ..utils.rabbitmq import publish_task
 from ..extensions import socketio
 
@@ -43,6 +43,7 @@ delegate_model = ns.model("Delegate", {
 @ns.route("")
 class ConversationCollection(Resource):
     @jwt_required()
+    @prefer_read_replicas
     def get(self):
         user = get_jwt_identity()
         uid = user["id"] if isinstance(user, dict) else user
@@ -77,6 +78,7 @@ class ConversationCollection(Resource):
 @ns.route("/<string:cid>")
 class ConversationItem(Resource):
     @jwt_required()
+    @prefer_read_replicas
     def get(self, cid: str):
         user = get_jwt_identity()
         uid = user["id"] if isinstance(user, dict) else user
@@ -125,6 +127,7 @@ class ConversationMessages(Resource):
 @ns.route("/<string:cid>/messages/search")
 class ConversationMessageSearch(Resource):
     @jwt_required()
+    @prefer_read_replicas
     def get(self, cid: str):
         """Search messages by substring match in content. Query param: q, limit=50"""
         user = get_jwt_identity()
@@ -146,6 +149,7 @@ class ConversationMessageSearch(Resource):
 @ns.route("/<string:cid>/messages")
 class ConversationMessagesList(Resource):
     @jwt_required()
+    @prefer_read_replicas
     def get(self, cid: str):
         """Paginated messages list: limit, offset, optional role, since, until (timestamps)."""
         user = get_jwt_identity()
@@ -207,6 +211,7 @@ participant_model = ns.model("Participant", {
 @ns.route("/<string:cid>/participants")
 class ConversationParticipants(Resource):
     @jwt_required()
+    @prefer_read_replicas
     def get(self, cid: str):
         user = get_jwt_identity()
         uid = user["id"] if isinstance(user, dict) else user
@@ -276,6 +281,7 @@ perm_set_model = ns.model("PermissionSet", {
 @ns.route("/<string:cid>/permissions")
 class ConversationPermissions(Resource):
     @jwt_required()
+    @prefer_read_replicas
     def get(self, cid: str):
         """List participants with roles."""
         user = get_jwt_identity()
@@ -1,6 +1,12 @@
 from flask_restx import Namespace, Resource
 from flask_jwt_extended import jwt_required
-from ..utils.kg_schema import validate_schema, apply_constraints_and_indexes, monitor_consistency
+from ..utils.kg_schema import (
+    validate_schema,
+    apply_constraints_and_indexes,
+    monitor_consistency,
+    contradiction_index_state,
+    reconcile_contradiction_index,
+)
 
 ns = Namespace("kg", description="Knowledge Graph governance & monitoring")
 
@@ -25,3 +31,14 @@ class KGIntegrity(Resource):
     @jwt_required()
     def get(self):
         return monitor_consistency(), 200
+
+
+@ns.route("/monitor/contradictions/reconcile")
+class KGContradictionReconcile(Resource):
+    @jwt_required()
+    def get(self):
+        return contradiction_index_state() or {"reconciled_at": None}, 200
+
+    @jwt_required()
+    def post(self):
+        return reconcile_contradiction_index(), 200
@@ -1,8 +1,11 @@
 from __future__ import annotations
 from flask import request
 from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..utils.neo4j_client import get_client
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from ..config import get_config
+from ..services.kg_consensus import apply_votes, reconcile_vote_tallies, resolve_conflicts, vote_tally_state
+from ..utils.neo4j_client import get_client, prefer_read_replicas
+from ..security.policy import get_user_roles
 from ..utils.audit import audit_event
 from ..utils.kg_schema import monitor_consistency
 
@@ -15,6 +18,18 @@ vote_model = ns.model("KGVote", {
     "value": fields.Integer(required=True, description="1 for approve, -1 for reject", enum=[-1, 1]),
 })
 
+bulk_vote_item = ns.model("KGBulkVoteItem", {
+    "subject_id": fields.String(required=True),
+    "predicate": fields.String(required=True),
+    "object_id": fields.String(required=True),
+    "value": fields.Integer(required=True, enum=[-1, 1]),
+    "voter_id": fields.String(description="Voter to record (default: the caller; others need the proxy-vote role)"),
+})
+
+bulk_vote_model = ns.model("KGBulkVote", {
+    "votes": fields.List(fields.Nested(bulk_vote_item), required=True),
+})
+
 resolve_model = ns.model("KGResolve", {
     "subject_id": fields.String(required=True),
     "predicate": fields.String(required=True),
@@ -22,6 +37,17 @@ resolve_model = ns.model("KGResolve", {
     "quorum": fields.Integer(default=1),
 })
 
+conflict_key = ns.model("KGConflictKey", {
+    "subject_id": fields.String(required=True),
+    "predicate": fields.String(required=True),
+})
+
+resolve_batch_model = ns.model("KGResolveBatch", {
+    "conflicts": fields.List(fields.Nested(conflict_key), required=True),
+    "strategy": fields.String(default="votes", description="votes|confidence"),
+    "quorum": fields.Integer(default=1),
+})
+
 rollback_model = ns.model("KGRollback", {
     "subject_id": fields.String(required=True),
     "predicate": fields.String(required=True),
@@ -29,13 +55,20 @@ rollback_model = ns.model("KGRollback", {
 })
 
 
+def _claimed_roles() -> set:
+    # Only top-level token claims count: /auth/register lets callers pick the identity's role,
+    # while these are set solely by whoever mints the (service-account) token
+    return get_user_roles(get_jwt())
+
+
 @ns.route("/conflicts/open")
 class KGOpenConflicts(Resource):
     @jwt_required()
+    @prefer_read_replicas
     def get(self):
         """List potential contradictions (subject+predicate with multiple objects)."""
         data = monitor_consistency(limit=200)
-        return {"contradictions": data.get("contradictions", [])}
+        return {"contradictions": data.get("contradictions", []), "partial": data.get("partial", False)}
 
 
 @ns.route("/conflicts/vote")
@@ -52,18 +85,8 @@ class KGVote(Resource):
             ns.abort(400, "value must be -1 or 1")
         user = get_jwt_identity()
         voter_id = user["id"] if isinstance(user, dict) else user
-        client = get_client()
-        cypher = (
-            "MERGE (c:Conflict {sid: $sid, pred: $pred}) "
-            "MERGE (o:Option {sid: $sid, pred: $pred, oid: $oid}) "
-            "MERGE (c)-[:OPTION]->(o) "
-            "MERGE (v:Voter {id: $voter}) "
-            "MERGE (v)-[r:VOTED {sid: $sid, pred: $pred, oid: $oid}]->(c) "
-            "SET r.value = $val, r.at = timestamp() "
-            "RETURN c, o"
-        )
         try:
-            client.run_query(cypher, {"sid": sid, "pred": pred, "oid": oid, "voter": str(voter_id), "val": val})
+            apply_votes([{"sid": sid, "pred": pred, "oid": oid, "voter": str(voter_id), "value": val}])
             audit_event("kg.vote", {"sid": sid, "pred": pred, "oid": oid, "value": val}, user)
             return {"ok": True}
         except Exception as e:
@@ -71,6 +94,48 @@ class KGVote(Resource):
             ns.abort(400, f"Vote failed: {e}")
 
 
+@ns.route("/conflicts/votes")
+class KGBulkVote(Resource):
+    @jwt_required()
+    @ns.expect(bulk_vote_model, validate=True)
+    def post(self):
+        """Apply many votes in UNWIND batches; option tallies are updated in the same transactions."""
+        items = (request.get_json() or {}).get("votes") or []
+        if not items:
+            ns.abort(400, "votes must be a non-empty list")
+        if len(items) > get_config().CONSENSUS_BULK_MAX:
+            ns.abort(413, f"at most {get_config().CONSENSUS_BULK_MAX} votes per request")
+        user = get_jwt_identity()
+        caller = str(user["id"] if isinstance(user, dict) else user)
+        votes = []
+        for item in items:
+            val = int(item["value"])
+            if val not in (-1, 1):
+                ns.abort(400, "value must be -1 or 1")
+            votes.append({
+                "sid": item["subject_id"].strip(),
+                "pred": item["predicate"].strip(),
+                "oid": item["object_id"].strip(),
+                "voter": str(item.get("voter_id") or caller),
+                "value": val,
+            })
+        proxied = sorted({v["voter"] for v in votes} - {caller})
+        if proxied:
+            role = get_config().CONSENSUS_PROXY_VOTE_ROLE
+            if not role or role not in _claimed_roles():
+                audit_event("kg.vote.bulk.denied", {"voters": proxied[:50], "received": len(votes)}, user)
+                ns.abort(403, "voter_id other than the caller requires the proxy-vote role")
+        try:
+            res = apply_votes(votes)
+            for voter in proxied:
+                audit_event("kg.vote.proxy", {"voter": voter, "votes": sum(1 for v in votes if v["voter"] == voter)}, user)
+            audit_event("kg.vote.bulk", {"received": len(votes), **res}, user)
+            return res
+        except Exception as e:
+            audit_event("kg.vote.bulk.error", {"error": str(e), "received": len(votes)}, user)
+            ns.abort(400, f"Bulk vote failed: {e}")
+
+
 @ns.route("/conflicts/resolve")
 class KGResolve(Resource):
     @jwt_required()
@@ -82,43 +147,65 @@ class KGResolve(Resource):
         strategy = payload.get("strategy", "votes")
         quorum = int(payload.get("quorum", 1))
         user = get_jwt_identity()
-        client = get_client()
-
-        if strategy == "votes":
-            # Aggregate votes per option
-            agg = client.run_query(
-                "MATCH (c:Conflict {sid: $sid, pred: $pred})<- [r:VOTED]-(:Voter) "
-                "RETURN r.oid AS oid, sum(r.value) AS score",
-                {"sid": sid, "pred": pred},
-            )
-        else:  # confidence
-            agg = client.run_query(
-                "MATCH (s:Entity {id: $sid})-[rel:RELATED {type: $pred}]->(o:Entity) "
-                "RETURN o.id AS oid, coalesce(rel.confidence, 0.0) AS score",
-                {"sid": sid, "pred": pred},
-            )
-        scores = [(r["oid"], r["score"]) for r in agg]
-        if not scores:
-            ns.abort(400, "No options to resolve")
-        scores.sort(key=lambda x: x[1], reverse=True)
-        winner, win_score = scores[0]
-        if quorum and win_score < quorum and strategy == "votes":
-            return {"resolved": False, "reason": "quorum_not_met", "top": {"object_id": winner, "score": win_score}}
-
-        # Promote winner to active, demote others to rejected
-        cypher = (
-            "MATCH (s:Entity {id: $sid})-[r:RELATED {type: $pred}]->(o:Entity) "
-            "WITH r, o, $winner AS winner, timestamp() AS now "
-            "SET r.state = CASE WHEN o.id = winner THEN 'active' ELSE 'rejected' END, "
-            "    r.lastUpdated = now, r.version = coalesce(r.version,0)+1 "
-        )
         try:
-            client.run_query(cypher, {"sid": sid, "pred": pred, "winner": winner})
-            audit_event("kg.resolve", {"sid": sid, "pred": pred, "winner": winner, "strategy": strategy, "score": win_score}, user)
-            return {"resolved": True, "winner": winner}
+            res = resolve_conflicts([{"sid": sid, "pred": pred}], strategy=strategy, quorum=quorum)["results"][0]
         except Exception as e:
             audit_event("kg.resolve.error", {"error": str(e)}, user)
             ns.abort(400, f"Resolve failed: {e}")
+        if not res["resolved"]:
+            if res["reason"] == "no_options":
+                ns.abort(400, "No options to resolve")
+            return {"resolved": False, "reason": res["reason"], "top": res["top"]}
+        audit_event("kg.resolve", {"sid": sid, "pred": pred, "winner": res["winner"], "strategy": strategy, "score": res["score"]}, user)
+        return {"resolved": True, "winner": res["winner"]}
+
+
+@ns.route("/conflicts/resolve_batch")
+class KGResolveBatch(Resource):
+    @jwt_required()
+    @ns.expect(resolve_batch_model, validate=True)
+    def post(self):
+        """Resolve many (subject, predicate) conflicts in one pass; each gets its own result."""
+        payload = request.get_json() or {}
+        conflicts = payload.get("conflicts") or []
+        if not conflicts:
+            ns.abort(400, "conflicts must be a non-empty list")
+        if len(conflicts) > get_config().CONSENSUS_BULK_MAX:
+            ns.abort(413, f"at most {get_config().CONSENSUS_BULK_MAX} conflicts per request")
+        strategy = payload.get("strategy", "votes")
+        quorum = int(payload.get("quorum", 1))
+        keys = [{"sid": c["subject_id"].strip(), "pred": c["predicate"].strip()} for c in conflicts]
+        user = get_jwt_identity()
+        try:
+            res = resolve_conflicts(keys, strategy=strategy, quorum=quorum)
+            audit_event("kg.resolve.batch", {"conflicts": len(res["results"]), "resolved": res["resolved"], "strategy": strategy}, user)
+            return res
+        except Exception as e:
+            audit_event("kg.resolve.batch.error", {"error": str(e)}, user)
+            ns.abort(400, f"Resolve failed: {e}")
+
+
+@ns.route("/tallies/reconcile")
+class KGTallyReconcile(Resource):
+    @jwt_required()
+    @prefer_read_replicas
+    def get(self):
+        return vote_tally_state() or {"reconciled_at": None}, 200
+
+    @jwt_required()
+    def post(self):
+        """Rebuild every option tally from the VOTED relationships (admin only)."""
+        user = get_jwt_identity()
+        if "admin" not in get_user_roles(user):
+            audit_event("kg.tallies.reconcile.denied", {}, user)
+            ns.abort(403, "Admin privileges required")
+        try:
+            res = reconcile_vote_tallies()
+        except Exception as e:
+            audit_event("kg.tallies.reconcile.error", {"error": str(e)}, user)
+            ns.abort(400, f"Reconcile failed: {e}")
+        audit_event("kg.tallies.reconcile", res, user)
+        return res, 200
 
 
 @ns.route("/relations/rollback")
@@ -5,16 +5,28 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from ..services.knowledge_drift import (
     detect_semantic_drift,
+    scan_semantic_drift,
+    get_drift_scan,
     detect_conflicts,
     assess_quality,
+    quality_state,
+    reconcile_quality,
     remediate_conflict,
-    find_dedup_candidates,
+    scan_dedup_candidates,
     merge_entities,
-    enrich_embeddings,
+    merge_entities_batch,
+    get_merge_journal,
     record_quality_snapshot,
     get_quality_trend,
 )
+from ..services.embedding_enrichment import (
+    get_enrichment_job,
+    run_enrichment,
+    start_enrichment,
+    stop_enrichment,
+)
 from ..utils.audit import audit_event
+from ..utils.neo4j_client import prefer_read_replicas
 from ..extensions import socketio
 from ..utils.rabbitmq import publish_exchange
 
@@ -26,6 +38,15 @@ detect_model = ns.model("KGDriftDetect", {
     "sample_limit": fields.Integer(default=100, description="Entities to sample for semantic drift"),
     "similarity_threshold": fields.Float(default=0.80, description="Cosine similarity threshold for drift"),
     "conflict_limit": fields.Integer(default=200, description="Max contradictions to surface"),
+    "incremental": fields.Boolean(default=True, description="Only check entities updated since the previous call"),
+})
+
+scan_model = ns.model("KGDriftScan", {
+    "similarity_threshold": fields.Float(default=0.80, description="Cosine similarity threshold for drift"),
+    "page_size": fields.Integer(default=500, description="Entities per embedding batch / similarity matrix"),
+    "max_entities": fields.Integer(default=10000, description="Entities to process in this call"),
+    "scan_id": fields.String(default="default", description="Independent scans keep separate watermarks"),
+    "reset": fields.Boolean(default=False, description="Restart from the beginning of the graph"),
 })
 
 remediate_model = ns.model("KGDriftRemediate", {
@@ -37,17 +58,27 @@ remediate_model = ns.model("KGDriftRemediate", {
 })
 
 dedup_model = ns.model("KGCurationDedup", {
-    "limit": fields.Integer(default=100)
+    "limit": fields.Integer(default=100),
+    "threshold": fields.Float(description="Min estimated name similarity (default DEDUP_THRESHOLD)"),
 })
 
-merge_model = ns.model("KGCurationMerge", {
+merge_plan_model = ns.model("KGCurationMergePlan", {
     "target_id": fields.String(required=True),
     "duplicate_ids": fields.List(fields.String, required=True),
+})
+
+merge_model = ns.model("KGCurationMerge", {
+    "target_id": fields.String(description="Single plan: entity that survives"),
+    "duplicate_ids": fields.List(fields.String, description="Single plan: entities folded into target_id"),
+    "plans": fields.List(fields.Nested(merge_plan_model), description="Many plans; disjoint ones run in parallel"),
     "dry_run": fields.Boolean(default=True),
 })
 
 enrich_model = ns.model("KGCurationEnrichEmbeddings", {
-    "limit": fields.Integer(default=200)
+    "limit": fields.Integer(default=200, description="Entities to handle; in the background, null means all"),
+    "background": fields.Boolean(default=False, description="Run the job on a background thread and return 202"),
+    "reset": fields.Boolean(default=False, description="Restart the job from the beginning of the graph"),
+    "job_id": fields.String(default="default", description="Independent jobs keep separate cursors"),
 })
 
 approve_model = ns.model("KGResolutionApprove", {
@@ -73,7 +104,11 @@ class KGDriftDetect(Resource):
         similarity_threshold = float(payload.get("similarity_threshold", 0.80))
         conflict_limit = int(payload.get("conflict_limit", 200))
         user = get_jwt_identity()
-        semantic = detect_semantic_drift(sample_limit=sample_limit, similarity_threshold=similarity_threshold)
+        semantic = detect_semantic_drift(
+            sample_limit=sample_limit,
+            similarity_threshold=similarity_threshold,
+            incremental=bool(payload.get("incremental", True)),
+        )
         conflicts = detect_conflicts(limit=conflict_limit)
         audit_event("kg_drift.detect", {
             "semantic": len(semantic),
@@ -98,9 +133,49 @@ class KGDriftDetect(Resource):
         }
 
 
+@ns.route("/scan")
+class KGDriftScan(Resource):
+    @jwt_required()
+    def get(self):
+        return get_drift_scan(request.args.get("scan_id", "default"))
+
+    @jwt_required()
+    @ns.expect(scan_model, validate=True)
+    def post(self):
+        payload = request.get_json() or {}
+        page_size = int(payload.get("page_size", 500))
+        max_entities = int(payload.get("max_entities", 10000))
+        if page_size < 1 or max_entities < 1:
+            ns.abort(400, "page_size and max_entities must be positive")
+        user = get_jwt_identity()
+        result = scan_semantic_drift(
+            similarity_threshold=float(payload.get("similarity_threshold", 0.80)),
+            page_size=page_size,
+            max_entities=max_entities,
+            scan_id=str(payload.get("scan_id") or "default"),
+            reset=bool(payload.get("reset", False)),
+        )
+        signals = result.pop("signals", [])
+        audit_event("kg_drift.scan", {
+            "scan_id": result.get("scan_id"),
+            "scanned": result.get("scanned"),
+            "breaches": len(signals),
+            "done": result.get("done"),
+        }, user)
+        for s in signals:
+            try:
+                publish_exchange("kg.drift", f"drift.{s.kind}", {"signal": s.kind, "severity": s.severity, "details": s.details})
+                socketio.emit("kg_drift:drift", {"signal": s.kind, "severity": s.severity, "details": s.details})
+            except Exception:
+                pass
+        result["semantic"] = [s.__dict__ for s in signals]
+        return result
+
+
 @ns.route("/quality")
 class KGDriftQuality(Resource):
     @jwt_required()
+    @prefer_read_replicas
     def get(self):
         user = get_jwt_identity()
         metrics = assess_quality()
@@ -108,9 +183,30 @@ class KGDriftQuality(Resource):
         return metrics
 
 
+@ns.route("/quality/reconcile")
+class KGDriftQualityReconcile(Resource):
+    @jwt_required()
+    @prefer_read_replicas
+    def get(self):
+        state = quality_state() or {}
+        return {
+            "reconciled_at": state.get("reconciled_at"),
+            "took_ms": state.get("reconcile_took_ms"),
+            "running_since": state.get("reconciling_since"),
+        }
+
+    @jwt_required()
+    def post(self):
+        user = get_jwt_identity()
+        result = reconcile_quality()
+        audit_event("kg_drift.quality.reconcile", result, user)
+        return result
+
+
 @ns.route("/quality/trend")
 class KGDriftQualityTrend(Resource):
     @jwt_required()
+    @prefer_read_replicas
     def get(self):
         limit = int(request.args.get("limit", 50))
         trend = get_quality_trend(limit=limit)
@@ -166,6 +262,7 @@ class KGDriftRemediate(Resource):
 @ns.route("/resolution/requests")
 class KGResolutionRequests(Resource):
     @jwt_required()
+    @prefer_read_replicas
     def get(self):
         from ..utils.neo4j_client import get_client
         client = get_client()
@@ -244,32 +341,56 @@ class KGCurationDedup(Resource):
         payload = request.get_json() or {}
         limit = int(payload.get("limit", 100))
         user = get_jwt_identity()
-        candidates = find_dedup_candidates(limit=limit)
-        audit_event("kg_curation.dedup", {"groups": len(candidates)}, user)
+        threshold = payload.get("threshold")
+        result = scan_dedup_candidates(limit=limit, threshold=threshold)
+        candidates = result.pop("candidates")
+        audit_event("kg_curation.dedup", {"groups": len(candidates), **result.get("stats", {})}, user)
         try:
             socketio.emit("kg_curation:dedup", {"groups": len(candidates)})
         except Exception:
             pass
-        return {"candidates": candidates, "count": len(candidates)}
+        return {"candidates": candidates, "count": len(candidates), **result}
 
 
 @ns.route("/curation/merge")
 class KGCurationMerge(Resource):
+    @jwt_required()
+    @prefer_read_replicas
+    def get(self):
+        journal_id = request.args.get("journal_id", "")
+        journal = get_merge_journal(journal_id) if journal_id else None
+        if journal is None:
+            ns.abort(404, "merge journal not found")
+        return journal
+
     @jwt_required()
     @ns.expect(merge_model, validate=True)
     def post(self):
         payload = request.get_json() or {}
-        target = payload.get("target_id", "").strip()
-        dups = payload.get("duplicate_ids") or []
         dry_run = bool(payload.get("dry_run", True))
-        if not target or not isinstance(dups, list) or not dups:
-            ns.abort(400, "target_id and duplicate_ids are required")
+        plans = payload.get("plans")
+        single = not plans
+        if single:
+            plans = [{"target_id": payload.get("target_id"), "duplicate_ids": payload.get("duplicate_ids")}]
+        for p in plans:
+            p["target_id"] = (p.get("target_id") or "").strip()
+            if not p["target_id"] or not isinstance(p.get("duplicate_ids"), list) or not p["duplicate_ids"]:
+                ns.abort(400, "target_id and duplicate_ids are required")
         user = get_jwt_identity()
         uid = user.get("id") if isinstance(user, dict) else user
-        result = merge_entities(target, dups, dry_run=dry_run, user_id=str(uid) if uid else None)
-        audit_event("kg_curation.merge", {"target": target, "dups": len(dups), "dry_run": dry_run}, user)
+        uid = str(uid) if uid else None
+        if single:
+            target, dups = plans[0]["target_id"], plans[0]["duplicate_ids"]
+            result = merge_entities(target, dups, dry_run=dry_run, user_id=uid)
+            if result.get("reason") == "in_progress":
+                ns.abort(409, "merge already in progress", journal=result.get("journal"))
+        else:
+            result = merge_entities_batch(plans, dry_run=dry_run, user_id=uid)
+            target, dups = None, [d for p in plans for d in p["duplicate_ids"]]
+        info = {"target": target, "plans": len(plans), "dups": len(dups), "dry_run": dry_run}
+        audit_event("kg_curation.merge", info, user)
         try:
-            socketio.emit("kg_curation:merge", {"target": target, "dups": len(dups), "dry_run": dry_run})
+            socketio.emit("kg_curation:merge", info)
         except Exception:
             pass
         return result
@@ -277,16 +398,38 @@ class KGCurationMerge(Resource):
 
 @ns.route("/curation/enrich_embeddings")
 class KGCurationEnrichEmbeddings(Resource):
+    @jwt_required()
+    @prefer_read_replicas
+    def get(self):
+        return get_enrichment_job(request.args.get("job_id", "default"))
+
     @jwt_required()
     @ns.expect(enrich_model, validate=True)
     def post(self):
         payload = request.get_json() or {}
-        limit = int(payload.get("limit", 200))
-        result = enrich_embeddings(limit=limit)
+        job_id = payload.get("job_id") or "default"
+        reset = bool(payload.get("reset", False))
         user = get_jwt_identity()
+        if payload.get("background"):
+            limit = payload.get("limit")
+            job = start_enrichment(job_id, max_entities=int(limit) if limit is not None else None, reset=reset)
+            if job is None:
+                ns.abort(409, "enrichment job already running", job=get_enrichment_job(job_id))
+            audit_event("kg_curation.enrich_embeddings", {"job_id": job_id, "background": True, "reset": reset}, user)
+            return job, 202
+        limit = int(payload.get("limit", 200))
+        result = run_enrichment(job_id, max_entities=limit, reset=reset)
+        if result.get("reason") == "already_running":
+            ns.abort(409, "enrichment job already running", job=result)
         audit_event("kg_curation.enrich_embeddings", {"updated": result.get("updated")}, user)
         try:
             socketio.emit("kg_curation:enrich_embeddings", {"updated": result.get("updated")})
         except Exception:
             pass
         return result
+
+    @jwt_required()
+    def delete(self):
+        job_id = request.args.get("job_id", "default")
+        audit_event("kg_curation.enrich_embeddings.stop", {"job_id": job_id}, get_jwt_identity())
+        return stop_enrichment(job_id)
@@ -1,10 +1,15 @@
-from flask import request
+import json
+from flask import Response, request, stream_with_context
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..utils.neo4j_client import get_client
+from neo4j.exceptions import ClientError
+from ..config import get_config
+from ..utils.neo4j_client import get_client, prefer_read_replicas
+from ..utils.ann_index import ann_available, ann_search, index_embeddings
 from ..utils.audit import audit_event
-from ..utils.embeddings import get_query_embedding, vector_search_enabled
-from ..utils.kg_schema import validate_facts
+from ..utils.search_cache import get_search_cache, invalidate_search_cache, search_key
+from ..utils.embeddings import get_embeddings, get_query_embedding, vector_search_enabled
+from ..utils.kg_schema import CONTRADICTION_INDEX_UPDATE, validate_facts
 
 ns = Namespace("knowledge", description="Knowledge graph access via Neo4j with context preservation")
 
@@ -43,6 +48,7 @@ relation_delete_model = ns.inherit("RelationDelete", relation_key_model, {
 @ns.route("/query")
 class KnowledgeQuery(Resource):
     @jwt_required()
+    @prefer_read_replicas
     @ns.expect(query_model, validate=True)
     def post(self):
         payload = request.get_json() or {}
@@ -54,9 +60,14 @@ class KnowledgeQuery(Resource):
             ns.abort(400, "Only read-only Cypher is allowed in /knowledge/query")
         user = get_jwt_identity()
         params["_user_id"] = user["id"] if isinstance(user, dict) else user
+        cfg = get_config()
+        if "application/x-ndjson" in (request.headers.get("Accept") or ""):
+            return _stream_ndjson(cypher, params, user, cfg)
         client = get_client()
         try:
-            records = client.run_query(cypher, params)
+            records = client.stream_query(
+                cypher, params, fetch_size=cfg.KNOWLEDGE_QUERY_FETCH_SIZE, timeout=cfg.KNOWLEDGE_QUERY_TIMEOUT
+            )
             rows = [r.data() for r in records]
             audit_event("knowledge.query", {"rows": len(rows)}, user)
             return {"results": rows, "count": len(rows)}
@@ -65,6 +76,39 @@ class KnowledgeQuery(Resource):
             ns.abort(400, f"Query failed: {e}")
 
 
+def _stream_ndjson(cypher: str, params: dict, user, cfg) -> Response:
+    """Stream rows as NDJSON while the server produces them, stopping at the configured row cap.
+
+    One JSON object per row; the last line is always {"_meta": {"count", "truncated"[, "error"]}}
+    since status and headers are already sent once streaming starts.
+    """
+    max_rows = cfg.KNOWLEDGE_QUERY_MAX_ROWS
+    records = get_client().stream_query(
+        cypher, params, fetch_size=cfg.KNOWLEDGE_QUERY_FETCH_SIZE, timeout=cfg.KNOWLEDGE_QUERY_TIMEOUT
+    )
+
+    def _generate():
+        count = 0
+        meta = {"truncated": False}
+        try:
+            for r in records:
+                if count >= max_rows:
+                    meta["truncated"] = True
+                    break
+                yield json.dumps(r.data(), default=str) + "\n"
+                count += 1
+            audit_event("knowledge.query.stream", {"rows": count, "truncated": meta["truncated"]}, user)
+        except Exception as e:
+            meta["error"] = str(e)
+            audit_event("knowledge.query.error", {"error": str(e), "rows": count}, user)
+        finally:
+            # Releases the session (and cancels the server-side query) when truncated or aborted
+            records.close()
+        yield json.dumps({"_meta": {"count": count, **meta}}) + "\n"
+
+    return Response(stream_with_context(_generate()), mimetype="application/x-ndjson")
+
+
 @ns.route("/insert")
 class KnowledgeInsert(Resource):
     @jwt_required()
@@ -80,24 +124,26 @@ class KnowledgeInsert(Resource):
         if not ok:
             audit_event("knowledge.insert.validation_failed", {"errors": errors[:10]}, None)
             ns.abort(400, {"message": "Schema validation failed", "errors": errors})
-        # Optional: enrich entities with embeddings for vector search
+        # Optional: enrich entities with embeddings for vector search (one batched request)
         if vector_search_enabled():
+            pending = []
             for f in facts:
-                subj = f.get("subject", {})
-                obj = f.get("object", {})
-                for node in (subj, obj):
+                for node in (f.get("subject", {}), f.get("object", {})):
                     if not isinstance(node, dict):
                         continue
                     props = node.get("props") or {}
                     # Build text from props or fallback to id
                     text = props.get("name") or props.get("description") or node.get("id")
-                    if text and isinstance(text, str):
-                        try:
-                            props["embedding"] = get_query_embedding(text)
-                            node["props"] = props
-                        except Exception as _:
-                            # Do not block insert on embedding failure
-                            pass
+                    if text and isinstance(text, str) and text.strip():
+                        node["props"] = props
+                        pending.append((props, text))
+            if pending:
+                try:
+                    for (props, _), emb in zip(pending, get_embeddings([t for _, t in pending])):
+                        props["embedding"] = emb
+                except Exception as _:
+                    # Do not block insert on embedding failure
+                    pass
         user = get_jwt_identity()
         user_id = user["id"] if isinstance(user, dict) else user
         # Conflict resolution & provenance tracking
@@ -106,8 +152,8 @@ class KnowledgeInsert(Resource):
         # - append provenance record {by, at, source}
         cypher = (
             "UNWIND $facts AS f "
-            "MERGE (s:Entity {id: f.subject.id}) SET s += coalesce(f.subject.props, {}) "
-            "MERGE (o:Entity {id: f.object.id}) SET o += coalesce(f.object.props, {}) "
+            "MERGE (s:Entity {id: f.subject.id}) SET s += coalesce(f.subject.props, {}), s.updatedAt = timestamp() "
+            "MERGE (o:Entity {id: f.object.id}) SET o += coalesce(f.object.props, {}), o.updatedAt = timestamp() "
             "MERGE (s)-[r:RELATED {type: f.predicate}]->(o) "
             "WITH r, f, $userId AS userId, $policy AS policy, timestamp() AS now "
             "SET r.state = coalesce(r.state, 'active'), r.lastUpdated = now, r.updatedBy = userId, r.version = coalesce(r.version, 0) + 1 "
@@ -117,12 +163,17 @@ class KnowledgeInsert(Resource):
             "FOREACH (_ IN CASE WHEN policy='prefer_high_confidence' AND exists(f.confidence) THEN [1] ELSE [] END | "+
             "  SET r.confidence = CASE WHEN r.confidence IS NULL THEN f.confidence ELSE greatest(r.confidence, f.confidence) END ) "
             "FOREACH (_ IN CASE WHEN policy='prefer_latest' AND exists(f.confidence) THEN [1] ELSE [] END | SET r.confidence = f.confidence) "
-            "RETURN count(r) AS relationships"
+            # Keep the (subject, predicate) contradiction index current in the same transaction
+            "WITH count(r) AS relationships, collect(DISTINCT {sid: f.subject.id, pred: f.predicate}) AS keys "
+            + CONTRADICTION_INDEX_UPDATE +
+            "RETURN relationships"
         )
         client = get_client()
         try:
             rows = client.run_query(cypher, {"facts": facts, "userId": user_id, "policy": policy})
             count = rows[0].data().get("relationships", 0) if rows else 0
+            index_embeddings("Entity", _fact_embeddings(facts))
+            invalidate_search_cache()
             audit_event("knowledge.insert", {"inserted": count, "policy": policy}, user)
             return {"inserted": count}, 201
         except Exception as e:
@@ -130,9 +181,29 @@ class KnowledgeInsert(Resource):
             ns.abort(400, f"Insert failed: {e}")
 
 
+def _fact_embeddings(facts):
+    for f in facts:
+        for node in (f.get("subject"), f.get("object")):
+            if isinstance(node, dict):
+                yield node.get("id"), (node.get("props") or {}).get("embedding")
+
+
+def _ann_entity_search(client, embedding, limit):
+    hits = ann_search("Entity", embedding, k=limit)
+    if not hits:
+        return []
+    rows = client.run_query(
+        "MATCH (node:Entity) WHERE node.id IN $ids RETURN node.id AS id, node{.*, labels: labels(node)} AS entity",
+        {"ids": [eid for eid, _ in hits]},
+    )
+    entities = {r["id"]: r["entity"] for r in rows}
+    return [{"entity": entities[eid], "score": score} for eid, score in hits if eid in entities]
+
+
 @ns.route("/search")
 class KnowledgeSearch(Resource):
     @jwt_required()
+    @prefer_read_replicas
     @ns.expect(search_model, validate=True)
     def post(self):
         payload = request.get_json() or {}
@@ -140,33 +211,54 @@ class KnowledgeSearch(Resource):
         limit = int(payload.get("limit", 10))
         if not query:
             ns.abort(400, "query is required")
-        client = get_client()
         user = get_jwt_identity()
+        vector = vector_search_enabled()
+        cache = get_search_cache()
+        key = search_key("knowledge.vector" if vector else "knowledge.fulltext", query=query, limit=limit)
+        result = cache.get(key)
+        cached = result is not None
+        if not cached:
+            generation = cache.generation
+            try:
+                result = _run_search(get_client(), query, limit, vector)
+            except Exception as e:
+                audit_event("knowledge.search.error", {"error": str(e)}, user)
+                ns.abort(400, f"Search failed: {e}")
+            cache.put(key, result, generation=generation)
+        audit_event(
+            f"knowledge.search.{result['mode']}",
+            {"query_len": len(query), "count": result["count"], "cached": cached},
+            user,
+        )
+        return result
+
+
+def _run_search(client, query, limit, vector):
+    if vector:
+        # Compute query embedding and use Neo4j vector index (if configured on :Entity(embedding))
+        embedding = get_query_embedding(query)
         try:
-            if vector_search_enabled():
-                # Compute query embedding and use Neo4j vector index (if configured on :Entity(embedding))
-                embedding = get_query_embedding(query)
-                rows = client.run_query(
-                    "CALL db.index.vector.queryNodes('entityEmbedding', $k, $q) YIELD node, score "
-                    "RETURN node{.*, labels: labels(node)} AS entity, score ORDER BY score DESC LIMIT $limit",
-                    {"k": limit, "q": embedding, "limit": limit},
-                )
-                results = [r.data() for r in rows]
-                audit_event("knowledge.search.vector", {"query_len": len(query), "count": len(results)}, user)
-                return {"results": results, "count": len(results), "mode": "vector"}
-            else:
-                # Fulltext fallback; assumes existence of a fulltext index named 'entityIndex'
-                cypher = (
-                    "CALL db.index.fulltext.queryNodes('entityIndex', $q) YIELD node, score "
-                    "RETURN node{.*, labels: labels(node)} AS entity, score ORDER BY score DESC LIMIT $limit"
-                )
-                rows = client.run_query(cypher, {"q": query, "limit": limit})
-                results = [r.data() for r in rows]
-                audit_event("knowledge.search.fulltext", {"query_len": len(query), "count": len(results)}, user)
-                return {"results": results, "count": len(results), "mode": "fulltext"}
-        except Exception as e:
-            audit_event("knowledge.search.error", {"error": str(e)}, user)
-            ns.abort(400, f"Search failed: {e}")
+            rows = client.run_query(
+                "CALL db.index.vector.queryNodes('entityEmbedding', $k, $q) YIELD node, score "
+                "RETURN node{.*, labels: labels(node)} AS entity, score ORDER BY score DESC LIMIT $limit",
+                {"k": limit, "q": embedding, "limit": limit},
+            )
+        except ClientError:
+            # Vector index missing: answer from the in-process ANN index instead
+            if not ann_available():
+                raise
+            results = _ann_entity_search(client, embedding, limit)
+            return {"results": results, "count": len(results), "mode": "ann"}
+        results = [r.data() for r in rows]
+        return {"results": results, "count": len(results), "mode": "vector"}
+    # Fulltext fallback; assumes existence of a fulltext index named 'entityIndex'
+    cypher = (
+        "CALL db.index.fulltext.queryNodes('entityIndex', $q) YIELD node, score "
+        "RETURN node{.*, labels: labels(node)} AS entity, score ORDER BY score DESC LIMIT $limit"
+    )
+    rows = client.run_query(cypher, {"q": query, "limit": limit})
+    results = [r.data() for r in rows]
+    return {"results": results, "count": len(results), "mode": "fulltext"}
 
 
 @ns.route("/relations/update")
@@ -191,11 +283,14 @@ class KnowledgeRelationUpdate(Resource):
             "WITH r, $attrs AS attrs, $uid AS uid, timestamp() AS now, $source AS source "
             "SET r += attrs, r.lastUpdated = now, r.updatedBy = uid, r.version = coalesce(r.version,0)+1, r.state = coalesce(r.state,'active') "
             "SET r.provenance = coalesce(r.provenance, []) + [{by: uid, at: now, source: source, action: 'update'}] "
+            "WITH r, [{sid: $sid, pred: $pred}] AS keys "
+            + CONTRADICTION_INDEX_UPDATE +
             "RETURN r"
         )
         try:
             rows = get_client().run_query(cypher, {"sid": subj, "oid": obj, "pred": pred, "attrs": attrs, "uid": str(uid), "source": source})
             r = rows[0][0] if rows else {}
+            invalidate_search_cache()
             audit_event("knowledge.relation.update", {"subject": subj, "predicate": pred, "object": obj}, user)
             return {"relation": r}, 200
         except Exception as e:
@@ -228,6 +323,7 @@ class KnowledgeRelationDelete(Resource):
             if not rows:
                 ns.abort(404, "Relation not found")
             r = rows[0][0]
+            invalidate_search_cache()
             audit_event("knowledge.relation.delete", {"subject": subj, "predicate": pred, "object": obj}, user)
             return {"relation": r}, 200
         except Exception as e:
@@ -238,6 +334,7 @@ class KnowledgeRelationDelete(Resource):
 @ns.route("/relations/<string:rid>")
 class KnowledgeRelationItem(Resource):
     @jwt_required()
+    @prefer_read_replicas
     def get(self, rid: str):
         # rid format: subject_id|predicate|object_id (URL-safe)
         try:
@@ -277,6 +374,7 @@ class KnowledgeRelationItem(Resource):
             rows = get_client().run_query(cypher, {"sid": sid, "oid": oid, "pred": pred, "uid": str(uid)})
             if not rows:
                 ns.abort(404, "Relation not found")
+            invalidate_search_cache()
             audit_event("knowledge.relation.delete", {"subject": sid, "predicate": pred, "object": oid}, user)
             return {"message": "Relation deactivated"}, 200
         except Exception as e:
@@ -285,6 +383,7 @@ class KnowledgeRelationItem(Resource):
 @ns.route("/provenance")
 class KnowledgeProvenance(Resource):
     @jwt_required()
+    @prefer_read_replicas
     def get(self):
         entity_id = (request.args.get("entityId") or "").strip()
         predicate = (request.args.get("predicate") or "").strip()
@@ -4,6 +4,7 @@ from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required
 
 from ..security.middleware import require_permission
+from ..utils.neo4j_client import prefer_read_replicas
 from ..services.compliance import ComplianceService
 from ..services.incidents import IncidentService
 from ..services.sandbox import SandboxService
@@ -56,6 +57,7 @@ class ComplianceAssess(Resource):
 @ns.route("/incidents")
 class Incidents(Resource):
     @jwt_required()
+    @prefer_read_replicas
     @require_permission("security", "read")
     @ns.marshal_with(ns.model("IncidentList", {
         "items": fields.List(fields.Nested(incident_model)),
@@ -92,6 +94,7 @@ class Incidents(Resource):
 @ns.route("/incidents/<string:incident_id>")
 class IncidentItem(Resource):
     @jwt_required()
+    @prefer_read_replicas
     @require_permission("security", "read")
     @ns.marshal_with(incident_model)
     def get(self, incident_id: str):
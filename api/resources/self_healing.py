@@ -6,6 +6,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..services.self_healing import SelfHealingService
 import requests
 from ..utils.audit import audit_event
+from ..utils.neo4j_client import prefer_read_replicas
 from ..utils.rabbitmq import publish_exchange
 from ..extensions import socketio
 
@@ -101,6 +102,7 @@ class SHLearning(Resource):
 @ns.route("/metrics/trend")
 class SHMetricTrend(Resource):
     @jwt_required()
+    @prefer_read_replicas
     def get(self):
         metric = request.args.get("metric")
         if not metric:
@@ -113,6 +115,7 @@ class SHMetricTrend(Resource):
 @ns.route("/metrics/forecast")
 class SHMetricForecast(Resource):
     @jwt_required()
+    @prefer_read_replicas
     def get(self):
         metric = request.args.get("metric")
         if not metric:
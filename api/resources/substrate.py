@@ -1,14 +1,19 @@
 from __future__ import annotations
 
-from flask import request
+import json
+
+from flask import current_app, request
 from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import jwt_required
+from flask_jwt_extended import get_jwt_identity, jwt_required
 
 from ..config import get_config
+
 from ..utils.consciousness_substrate import (
     EnhancedConsciousnessSubstrate,
     ConflictError,
+    VersionConflictError,
 )
+from ..utils.search_cache import cached_search, search_key
 from ..metrics import (
     record_knowledge_operation,
     record_consciousness_operation,
@@ -35,6 +40,9 @@ update_entity_model = ns.model(
         "updates": fields.Raw(required=True, description="Properties to set on KnowledgeEntity"),
         "updated_by": fields.String(required=True),
         "strategy": fields.String(default="merge", description="merge|latest_wins|first_wins|strict"),
+        "expected_version": fields.Integer(
+            required=False, description="Compare-and-set: apply only if the entity is still at this version (409 otherwise)"
+        ),
     },
 )
 
@@ -54,6 +62,8 @@ traverse_model = ns.model(
         "max_depth": fields.Integer(default=2),
         "rel_types": fields.List(fields.String, required=False),
         "limit": fields.Integer(default=50),
+        "fanout": fields.Integer(required=False, description="Max neighbours expanded per node per level"),
+        "cursor": fields.String(required=False, description="next_cursor from the previous page"),
     },
 )
 
@@ -62,6 +72,7 @@ centrality_model = ns.model(
     {
         "top_n": fields.Integer(default=20),
         "relationship": fields.String(default="SIMILAR_TO"),
+        "write_property": fields.String(required=False, description="Also store scores on this property (in-process engine)"),
     },
 )
 
@@ -74,8 +85,12 @@ communities_model = ns.model(
 
 
 def _ecs() -> EnhancedConsciousnessSubstrate:
-    cfg = get_config()
-    return EnhancedConsciousnessSubstrate(cfg.NEO4J_URI, cfg.NEO4J_USER, cfg.NEO4J_PASSWORD)
+    """Return the long-lived substrate service registered on the app (shares the pooled driver)."""
+    ecs = current_app.extensions.get("substrate")
+    if ecs is None:
+        ecs = EnhancedConsciousnessSubstrate()
+        current_app.extensions["substrate"] = ecs
+    return ecs
 
 
 @ns.route("/entity")
@@ -86,19 +101,97 @@ class CreateEntity(Resource):
         payload = request.get_json() or {}
         t0 = time.time()
         ecs = _ecs()
+        entity_id = ecs.create_knowledge_entity(
+            content=str(payload.get("content", "")),
+            entity_type=str(payload.get("entity_type", "generic")),
+            created_by=str(payload.get("created_by")),
+            embedding=payload.get("embedding"),
+            metadata=payload.get("metadata") or {},
+        )
+        record_knowledge_operation("create", payload.get("entity_type", "generic"), time.time() - t0, success=True)
+        record_consciousness_operation("create_entity", time.time() - t0, success=True)
+        return {"id": entity_id}, 201
+
+
+def _bulk_rows(default_actor: str, rejected: list):
+    """Yield entity dicts from an NDJSON (streamed line by line) or JSON array body.
+
+    Rows that fail to parse or lack content/entity_type are appended to `rejected` and skipped.
+    """
+    def _check(n: int, raw):
+        if not isinstance(raw, dict):
+            rejected.append({"row": n, "error": "row must be a JSON object"})
+            return None
+        if not raw.get("content") or not raw.get("entity_type"):
+            rejected.append({"row": n, "error": "content and entity_type are required"})
+            return None
+        if not raw.get("created_by"):
+            raw = {**raw, "created_by": default_actor}
+        return raw
+
+    if "ndjson" in (request.mimetype or ""):
+        n = 0
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                raw = json.loads(line)
+            except ValueError as e:
+                rejected.append({"row": n, "error": f"invalid JSON: {e}"})
+                n += 1
+                continue
+            row = _check(n, raw)
+            n += 1
+            if row is not None:
+                yield row
+        return
+
+    body = request.get_json(silent=True)
+    if isinstance(body, dict):
+        body = body.get("entities")
+    if not isinstance(body, list):
+        ns.abort(400, "Body must be a JSON array of entities, {\"entities\": [...]}, or NDJSON")
+    for n, raw in enumerate(body):
+        row = _check(n, raw)
+        if row is not None:
+            yield row
+
+
+@ns.route("/entities/bulk")
+class BulkCreateEntities(Resource):
+    @jwt_required()
+    @ns.doc(params={
+        "chunk_size": "Entities per UNWIND transaction (default SUBSTRATE_BULK_CHUNK_SIZE)",
+        "parallelism": "Chunks written concurrently on separate sessions (default SUBSTRATE_BULK_PARALLELISM)",
+        "return_ids": "Include created ids per chunk (true|false)",
+    })
+    def post(self):
+        """Bulk-create entities from NDJSON (application/x-ndjson) or a JSON array; reports per-chunk results."""
+        cfg = get_config()
         try:
-            entity_id = ecs.create_knowledge_entity(
-                content=str(payload.get("content", "")),
-                entity_type=str(payload.get("entity_type", "generic")),
-                created_by=str(payload.get("created_by")),
-                embedding=payload.get("embedding"),
-                metadata=payload.get("metadata") or {},
-            )
-            record_knowledge_operation("create", payload.get("entity_type", "generic"), time.time() - t0, success=True)
-            record_consciousness_operation("create_entity", time.time() - t0, success=True)
-            return {"id": entity_id}, 201
-        finally:
-            ecs.close()
+            chunk_size = int(request.args.get("chunk_size", cfg.SUBSTRATE_BULK_CHUNK_SIZE))
+            parallelism = int(request.args.get("parallelism", cfg.SUBSTRATE_BULK_PARALLELISM))
+        except ValueError:
+            ns.abort(400, "chunk_size and parallelism must be integers")
+        chunk_size = max(1, min(chunk_size, cfg.SUBSTRATE_BULK_MAX_CHUNK_SIZE))
+        parallelism = max(1, min(parallelism, cfg.SUBSTRATE_BULK_MAX_PARALLELISM))
+        return_ids = (request.args.get("return_ids", "false").lower() == "true")
+        user = get_jwt_identity()
+        actor = str(user["id"] if isinstance(user, dict) else user)
+
+        rejected: list = []
+        t0 = time.time()
+        summary = _ecs().create_knowledge_entities_bulk(
+            _bulk_rows(actor, rejected), chunk_size=chunk_size, parallelism=parallelism, return_ids=return_ids
+        )
+        ok = summary["failed_chunks"] == 0 and not rejected
+        record_knowledge_operation("bulk_create", "mixed", time.time() - t0, success=ok)
+        record_consciousness_operation("bulk_create_entities", time.time() - t0, success=ok)
+        summary["rejected"] = rejected
+        summary["chunk_size"] = chunk_size
+        summary["parallelism"] = parallelism
+        return summary, (200 if ok else 207)
 
 
 @ns.route("/entity/<string:entity_id>")
@@ -110,22 +203,29 @@ class UpdateEntity(Resource):
         t0 = time.time()
         ecs = _ecs()
         try:
-            try:
-                new_version = ecs.update_knowledge_entity(
-                    entity_id=entity_id,
-                    updates=payload.get("updates") or {},
-                    updated_by=str(payload.get("updated_by")),
-                    conflict_resolution=str(payload.get("strategy", "merge")),
-                )
-                record_knowledge_operation("update", payload.get("updates", {}).get("entity_type", "generic"), time.time() - t0, success=True)
-                record_consciousness_operation("update_entity", time.time() - t0, success=True)
-                return {"version": new_version}
-            except ConflictError as ce:
-                record_knowledge_operation("update", payload.get("updates", {}).get("entity_type", "generic"), time.time() - t0, success=False)
-                record_consciousness_operation("update_entity", time.time() - t0, success=False)
-                return {"error": "conflict", "details": str(ce)}, 409
-        finally:
-            ecs.close()
+            new_version = ecs.update_knowledge_entity(
+                entity_id=entity_id,
+                updates=payload.get("updates") or {},
+                updated_by=str(payload.get("updated_by")),
+                conflict_resolution=str(payload.get("strategy", "merge")),
+                expected_version=payload.get("expected_version"),
+            )
+            record_knowledge_operation("update", payload.get("updates", {}).get("entity_type", "generic"), time.time() - t0, success=True)
+            record_consciousness_operation("update_entity", time.time() - t0, success=True)
+            return {"version": new_version}
+        except VersionConflictError as ve:
+            record_knowledge_operation("update", payload.get("updates", {}).get("entity_type", "generic"), time.time() - t0, success=False)
+            record_consciousness_operation("update_entity", time.time() - t0, success=False)
+            return {
+                "error": "version_conflict",
+                "details": str(ve),
+                "expected_version": ve.expected_version,
+                "current_version": ve.current_version,
+            }, 409
+        except ConflictError as ce:
+            record_knowledge_operation("update", payload.get("updates", {}).get("entity_type", "generic"), time.time() - t0, success=False)
+            record_consciousness_operation("update_entity", time.time() - t0, success=False)
+            return {"error": "conflict", "details": str(ce)}, 409
 
 
 @ns.route("/search/semantic")
@@ -136,18 +236,17 @@ class SemanticSearch(Resource):
         payload = request.get_json() or {}
         t0 = time.time()
         ecs = _ecs()
-        try:
-            res = ecs.semantic_search(
-                query_embedding=payload.get("embedding") or [],
-                limit=int(payload.get("limit", 10)),
-                threshold=float(payload.get("threshold", 0.7)),
-            )
-            dur = time.time() - t0
-            record_knowledge_operation("search", "embedding", dur, success=True)
-            record_consciousness_operation("semantic_search", dur, success=True)
-            return {"results": res, "count": len(res)}
-        finally:
-            ecs.close()
+        embedding = payload.get("embedding") or []
+        limit = int(payload.get("limit", 10))
+        threshold = float(payload.get("threshold", 0.7))
+        res = cached_search(
+            search_key("substrate.semantic", embedding=embedding, limit=limit, threshold=threshold),
+            lambda: ecs.semantic_search(query_embedding=embedding, limit=limit, threshold=threshold),
+        )
+        dur = time.time() - t0
+        record_knowledge_operation("search", "embedding", dur, success=True)
+        record_consciousness_operation("semantic_search", dur, success=True)
+        return {"results": res, "count": len(res)}
 
 
 @ns.route("/provenance/<string:entity_id>")
@@ -156,12 +255,9 @@ class Provenance(Resource):
     def get(self, entity_id: str):
         ecs = _ecs()
         t0 = time.time()
-        try:
-            res = ecs.get_knowledge_provenance(entity_id)
-            record_consciousness_operation("provenance", time.time() - t0, success=True)
-            return {"history": res, "count": len(res)}
-        finally:
-            ecs.close()
+        res = ecs.get_knowledge_provenance(entity_id)
+        record_consciousness_operation("provenance", time.time() - t0, success=True)
+        return {"history": res, "count": len(res)}
 
 
 @ns.route("/traverse")
@@ -173,16 +269,18 @@ class Traverse(Resource):
         t0 = time.time()
         ecs = _ecs()
         try:
-            res = ecs.traverse_related(
+            page = ecs.traverse_frontier(
                 start_id=str(payload.get("start_id")),
                 max_depth=int(payload.get("max_depth", 2)),
                 rel_types=payload.get("rel_types"),
                 limit=int(payload.get("limit", 50)),
+                fanout=payload.get("fanout"),
+                cursor=payload.get("cursor"),
             )
-            record_consciousness_operation("traverse", time.time() - t0, success=True)
-            return {"nodes": res, "count": len(res)}
-        finally:
-            ecs.close()
+        except ValueError as e:
+            ns.abort(400, str(e))
+        record_consciousness_operation("traverse", time.time() - t0, success=True)
+        return {"nodes": page["nodes"], "count": len(page["nodes"]), "next_cursor": page["next_cursor"]}
 
 
 @ns.route("/graph/centrality")
@@ -197,11 +295,12 @@ class Centrality(Resource):
             res = ecs.centrality_pagerank(
                 top_n=int(payload.get("top_n", 20)),
                 relationship=str(payload.get("relationship", "SIMILAR_TO")),
+                write_property=payload.get("write_property"),
             )
-            record_consciousness_operation("centrality", time.time() - t0, success=True)
-            return {"scores": res, "count": len(res)}
-        finally:
-            ecs.close()
+        except ValueError as e:
+            ns.abort(400, str(e))
+        record_consciousness_operation("centrality", time.time() - t0, success=True)
+        return {"scores": res, "count": len(res)}
 
 
 @ns.route("/graph/communities")
@@ -216,10 +315,10 @@ class Communities(Resource):
             res = ecs.community_detection_louvain(
                 write_property=str(payload.get("write_property", "communityId"))
             )
-            record_consciousness_operation("communities", time.time() - t0, success=True)
-            return {"result": res}
-        finally:
-            ecs.close()
+        except ValueError as e:
+            ns.abort(400, str(e))
+        record_consciousness_operation("communities", time.time() - t0, success=True)
+        return {"result": res}
 
 
 @ns.route("/temporal/<string:entity_id>")
@@ -230,9 +329,6 @@ class Temporal(Resource):
         until = request.args.get("until")
         ecs = _ecs()
         t0 = time.time()
-        try:
-            res = ecs.temporal_evolution(entity_id, since_iso=since, until_iso=until)
-            record_consciousness_operation("temporal", time.time() - t0, success=True)
-            return {"timeline": res}
-        finally:
-            ecs.close()
+        res = ecs.temporal_evolution(entity_id, since_iso=since, until_iso=until)
+        record_consciousness_operation("temporal", time.time() - t0, success=True)
+        return {"timeline": res}
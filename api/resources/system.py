@@ -2,10 +2,15 @@ import os
 import platform
 import time
 from datetime import datetime
-from flask import Response
+from flask import Response, request
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required
 from ..extensions import db
+from ..utils.embedding_cache import get_embedding_cache
+from ..utils.gds_projections import get_projection_manager
+from ..utils.neo4j_client import get_client
+from ..utils.query_log import get_slow_query_log
+from ..utils.search_cache import get_search_cache
 
 try:
     from neo4j import GraphDatabase  # type: ignore
@@ -181,6 +186,73 @@ class Logs(Resource):
         return {"message": "Logs endpoint not yet integrated with monitoring backend"}
 
 
+@ns.route("/slow_queries")
+class SlowQueries(Resource):
+    @jwt_required()
+    def get(self):
+        """Sampled Neo4j statements over NEO4J_SLOW_QUERY_MS, newest first (parameters redacted)."""
+        try:
+            limit = int(request.args.get("limit", 50))
+        except Exception:
+            limit = 50
+        log = get_slow_query_log()
+        entries = log.entries(limit=max(1, limit), fingerprint=request.args.get("fingerprint"))
+        return {
+            "threshold_ms": log.threshold_ms,
+            "sample_rate": log.sample_rate,
+            "profile": log.profile,
+            "count": len(entries),
+            "entries": entries,
+        }
+
+    @jwt_required()
+    def delete(self):
+        get_slow_query_log().clear()
+        return {"cleared": True}
+
+
+@ns.route("/search_cache")
+class SearchCacheStats(Resource):
+    @jwt_required()
+    def get(self):
+        """Size, budget and generation of this worker's search result cache."""
+        return get_search_cache().stats()
+
+    @jwt_required()
+    def delete(self):
+        get_search_cache().clear()
+        return {"cleared": True}
+
+
+@ns.route("/embedding_cache")
+class EmbeddingCacheStats(Resource):
+    @jwt_required()
+    def get(self):
+        """Entries and bytes per embedding cache tier (memory is per worker, disk per host)."""
+        return get_embedding_cache().stats()
+
+    @jwt_required()
+    def delete(self):
+        get_embedding_cache().clear()
+        return {"cleared": True}
+
+
+@ns.route("/gds_projections")
+class GdsProjections(Resource):
+    @jwt_required()
+    def get(self):
+        """Live GDS projections held by this worker: age, size and calls using them."""
+        return {"projections": get_projection_manager().stats()}
+
+    @jwt_required()
+    def delete(self):
+        """Drop the live projections; the next centrality/community call projects afresh."""
+        try:
+            return {"dropped": get_projection_manager().drop_all(get_client().driver)}
+        except Exception as e:
+            ns.abort(503, f"Neo4j unavailable: {e}")
+
+
 @ns.route("/metrics")
 class Metrics(Resource):
     @jwt_required(optional=True)
@@ -17,8 +17,18 @@ except Exception:  # pragma: no cover
     openai = None
 
 from ...utils import neo4j_client
+from ...utils.write_coalescer import coalesce_write
 from ...utils.rabbitmq import publish_exchange
 
+_AGENT_METRICS_WRITE = (
+    "UNWIND $rows AS row\n"
+    "MATCH (a:Agent {agent_id: row.agent_id})\n"
+    "MERGE (m:AgentMetrics {metric_id: row.metric_id})\n"
+    "ON CREATE SET m.agent_id=row.agent_id, m.timestamp=row.timestamp, m.cpu=row.cpu, m.mem=row.mem, "
+    "m.latency_ms=row.latency_ms, m.success_rate=row.success_rate, m.throughput=row.throughput, m.metadata=row.metadata\n"
+    "MERGE (a)-[:HAS_METRIC]->(m)"
+)
+
 
 class AgentState(Enum):
     INITIALIZING = "initializing"
@@ -272,20 +282,8 @@ class AutonomousAgentBase:
             },
         }
         publish_exchange("agents.health", "health.metrics", payload)
-        # persist minimal metric node
-        client = neo4j_client.get_client()
-        try:
-            client.run_queries_atomic([
-                (
-                    "MATCH (a:Agent {agent_id: $agent_id})\n"
-                    "MERGE (m:AgentMetrics {metric_id: $metric_id})\n"
-                    "ON CREATE SET m.agent_id=$agent_id, m.timestamp=$timestamp, m.cpu=$cpu, m.mem=$mem, m.latency_ms=$latency_ms, m.success_rate=$success_rate, m.throughput=$throughput, m.metadata=$metadata\n"
-                    "MERGE (a)-[:HAS_METRIC]->(m)",
-                    payload | {"agent_id": self.agent_id},
-                )
-            ])
-        finally:
-            client.close()
+        # persist minimal metric node (batched with other agents' metrics; fire-and-forget)
+        coalesce_write("AgentMetrics", _AGENT_METRICS_WRITE, payload, client_factory=neo4j_client.get_client, wait=False)
 
     def _emit_drift_alert(self, alert: KnowledgeDriftAlert) -> None:
         payload = {
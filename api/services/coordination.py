@@ -7,6 +7,13 @@ import uuid
 from ..utils.rabbitmq import publish_exchange_profiled
 from ..utils.audit import audit_event
 from ..utils.neo4j_client import get_client
+from ..utils.write_coalescer import coalesce_write
+
+_TASK_ASSIGNMENT_WRITE = (
+    "UNWIND $rows AS row "
+    "CREATE (ta:TaskAssignment {id: row.id, at: row.at, taskId: row.task_id, taskType: row.type, "
+    "priority: row.prio, agentId: row.agent})"
+)
 
 
 @dataclass
@@ -79,13 +86,20 @@ class CoordinationService:
             return sla_weight * (a.perf_score + role_bonus) - 0.5 * a.workload - 0.3 * predicted
         chosen = max(candidates, key=score)
         # Record assignment
-        client = get_client()
         assignment_id = str(uuid.uuid4())
-        client.run_query(
-            """
-            CREATE (ta:TaskAssignment {id: $id, at: timestamp(), taskId: $task_id, taskType: $type, priority: $prio, agentId: $agent})
-            """,
-            {"id": assignment_id, "task_id": task.id, "type": task.type, "prio": task.priority, "agent": chosen.id},
+        # Group-committed with concurrent allocations; still waits so failures surface to the caller
+        coalesce_write(
+            "TaskAssignment",
+            _TASK_ASSIGNMENT_WRITE,
+            {
+                "id": assignment_id,
+                "at": int(time.time() * 1000),
+                "task_id": task.id,
+                "type": task.type,
+                "prio": task.priority,
+                "agent": chosen.id,
+            },
+            client_factory=get_client,
         )
         evt = {"task": task.__dict__, "agent": chosen.__dict__}
         publish_exchange_profiled("coordination", "task.allocated", evt, profile="medium")
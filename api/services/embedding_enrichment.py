@@ -0,0 +1,331 @@
+"""
+Resumable embedding enrichment: fill `Entity.embedding` for every entity that lacks one.
+
+A run pages entities missing an embedding in `id` order. Each page is embedded in
+provider-sized batches (EMBEDDING_BATCH_MAX texts per request, cache hits are free), and each
+batch is written back with one UNWIND. Before each request the batch's estimated tokens
+(UTF-8 bytes / 4) are taken from a token bucket refilled at EMBEDDING_ENRICH_TPM per minute.
+
+Progress is checkpointed on `(:EnrichmentJob {id})` after every batch: the id cursor, counts,
+estimated tokens, status and a heartbeat. A restarted run continues after the cursor. A run
+must claim the job first. The claim succeeds unless another worker holds it with a heartbeat
+younger than _HEARTBEAT_STALE_MS, and every checkpoint is conditional on still owning it. Setting
+status to "stopping" (from any worker) makes the owner stop after its current batch and
+leave the job "paused". A batch that still fails after _RETRIES attempts stops the run as
+"failed"; its cursor is unchanged, so the next run retries it.
+
+Exported: embedding_enrichment_entities_total{result}, embedding_enrichment_tokens_total,
+embedding_enrichment_throttled_seconds_total and, per job, the gauges
+embedding_enrichment_entities_per_second and embedding_enrichment_remaining_entities.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from ..config import get_config
+from ..metrics import record_enrichment_batch, record_enrichment_progress, record_enrichment_throttle
+from ..utils.ann_index import index_embeddings
+from ..utils.embedding_cache import normalize_text
+from ..utils.embeddings import cached_embeddings, embed_uncached, vector_search_enabled
+from ..utils.neo4j_client import WRITE_ACCESS, get_client
+from ..utils.search_cache import invalidate_search_cache
+
+logger = logging.getLogger(__name__)
+
+_HEARTBEAT_STALE_MS = 300_000
+_RETRIES = 3
+_BACKOFF_S = 1.0
+# Longer texts are cut before embedding, so one huge description cannot exceed provider limits
+_MAX_TEXT_CHARS = 8000
+_COUNTS = ("embedded", "skipped", "tokens")
+
+# Stop events of the runs started by this process, by job id
+_running: Dict[str, threading.Event] = {}
+_running_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text.encode("utf-8")) // 4)
+
+
+class TokenBucket:
+    """Tokens-per-minute budget; `acquire` blocks until `n` tokens are available."""
+
+    def __init__(
+        self,
+        tokens_per_minute: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = max(0.0, float(tokens_per_minute)) / 60.0
+        self.capacity = max(0.0, float(tokens_per_minute))
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._at = clock()
+
+    def acquire(self, n: int, stop: Optional[threading.Event] = None) -> float:
+        """Take `n` tokens (capped at one minute's budget); returns seconds spent waiting."""
+        if self.rate <= 0:
+            return 0.0
+        need = min(float(n), self.capacity)
+        waited = 0.0
+        while True:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._at) * self.rate)
+            self._at = now
+            if self._tokens >= need:
+                self._tokens -= need
+                return waited
+            if stop is not None and stop.is_set():
+                return waited
+            delay = min(1.0, (need - self._tokens) / self.rate)
+            self._sleep(delay)
+            waited += delay
+
+
+def get_enrichment_job(job_id: str = "default") -> Dict[str, Any]:
+    rows = get_client().run_query(
+        "MATCH (j:EnrichmentJob {id: $id}) RETURN properties(j) AS j", {"id": job_id}
+    )
+    job = dict(rows[0]["j"]) if rows else {"id": job_id, "status": "idle"}
+    job.setdefault("cursor", "")
+    for k in ("embedded", "skipped", "tokens"):
+        job.setdefault(k, 0)
+    return job
+
+
+def _claim(client, job_id: str, owner: str, reset: bool) -> Optional[Dict[str, Any]]:
+    now = int(time.time() * 1000)
+    rows = client.run_query(
+        """
+        MERGE (j:EnrichmentJob {id: $id})
+        WITH j
+        WHERE coalesce(j.status, '') <> 'running' OR coalesce(j.heartbeat, 0) < $stale
+        SET j.status = 'running', j.owner = $owner, j.heartbeat = $now, j.error = null,
+            j.started_at = CASE WHEN $reset OR j.started_at IS NULL OR j.completed_at IS NOT NULL
+                                THEN $now ELSE j.started_at END
+        FOREACH (_ IN CASE WHEN $reset OR j.completed_at IS NOT NULL THEN [1] ELSE [] END |
+            SET j.cursor = '', j.embedded = 0, j.skipped = 0, j.tokens = 0, j.completed_at = null)
+        RETURN properties(j) AS j
+        """,
+        {"id": job_id, "owner": owner, "now": now, "stale": now - _HEARTBEAT_STALE_MS, "reset": bool(reset)},
+        access_mode=WRITE_ACCESS,
+    )
+    return dict(rows[0]["j"]) if rows else None
+
+
+def _checkpoint(client, job_id: str, owner: str, props: Dict[str, Any]) -> Optional[str]:
+    """Save progress if we still own the job; returns its status, or None if ownership was lost."""
+    rows = client.run_query(
+        """
+        MATCH (j:EnrichmentJob {id: $id}) WHERE j.owner = $owner
+        SET j += $props, j.heartbeat = timestamp()
+        RETURN j.status AS status
+        """,
+        {"id": job_id, "owner": owner, "props": props},
+        access_mode=WRITE_ACCESS,
+    )
+    return rows[0]["status"] if rows else None
+
+
+def _remaining(client, cursor: str) -> int:
+    rows = client.run_query(
+        "MATCH (e:Entity) WHERE e.embedding IS NULL AND e.id > $after RETURN count(e) AS c", {"after": cursor}
+    )
+    return int(rows[0]["c"]) if rows else 0
+
+
+def _embed_with_retry(texts: List[str], stop: threading.Event, sleep: Callable[[float], None]) -> List[List[float]]:
+    for attempt in range(_RETRIES):
+        try:
+            return embed_uncached(texts)
+        except Exception:
+            if attempt == _RETRIES - 1 or stop.is_set():
+                raise
+            logger.warning("embedding batch failed (attempt %d/%d)", attempt + 1, _RETRIES, exc_info=True)
+            sleep(_BACKOFF_S * (2 ** attempt))
+    raise RuntimeError("unreachable")
+
+
+def _owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _run(
+    client,
+    job: Dict[str, Any],
+    owner: str,
+    max_entities: Optional[int],
+    stop: threading.Event,
+    tokens_per_minute: Optional[float],
+    page_size: Optional[int],
+    sleep: Callable[[float], None],
+) -> Dict[str, Any]:
+    cfg = get_config()
+    job_id = job["id"]
+    bucket = TokenBucket(cfg.EMBEDDING_ENRICH_TPM if tokens_per_minute is None else tokens_per_minute, sleep=sleep)
+    page = max(1, int(page_size or cfg.EMBEDDING_ENRICH_PAGE))
+    step = max(1, int(cfg.EMBEDDING_BATCH_MAX))
+    cursor = job.get("cursor") or ""
+    totals = {k: int(job.get(k) or 0) for k in _COUNTS}
+    embedded_before = totals["embedded"]
+    remaining = _remaining(client, cursor)
+    record_enrichment_progress(job_id, 0.0, remaining)
+    t0 = time.monotonic()
+    handled = 0
+    status, error = "running", None
+
+    while status == "running":
+        limit = page if max_entities is None else min(page, max_entities - handled)
+        if limit <= 0:
+            status = "paused"
+            break
+        rows = client.run_query(
+            """
+            MATCH (e:Entity) WHERE e.id > $after AND e.embedding IS NULL
+            WITH e ORDER BY e.id LIMIT $limit
+            RETURN e.id AS id, coalesce(e.name, e.description, e.id) AS text
+            """,
+            {"after": cursor, "limit": limit},
+        )
+        page_written = False
+        for start in range(0, len(rows), step):
+            batch = rows[start:start + step]
+            items = [
+                (r["id"], normalize_text(r["text"])[:_MAX_TEXT_CHARS].strip())
+                for r in batch
+                if isinstance(r["text"], str)
+            ]
+            items = [(eid, text) for eid, text in items if text]
+            texts = list(dict.fromkeys(text for _, text in items))
+            found = dict(zip(texts, cached_embeddings(texts)))
+            missing = [t for t, v in found.items() if v is None]
+            # Only cache misses reach the provider, so only they count against the budget
+            tokens = sum(estimate_tokens(t) for t in missing)
+            record_enrichment_throttle(bucket.acquire(tokens, stop))
+            if stop.is_set():
+                status = "paused"
+                break
+            try:
+                if missing:
+                    found.update(zip(missing, _embed_with_retry(missing, stop, sleep)))
+            except Exception as e:
+                logger.exception("embedding enrichment job %s failed after %s", job_id, cursor or "start")
+                status, error = "failed", str(e)
+                break
+            written = [{"id": eid, "emb": found[text]} for eid, text in items]
+            if written:
+                client.run_query(
+                    """
+                    UNWIND $items AS item
+                    MATCH (e:Entity {id: item.id})
+                    SET e.embedding = item.emb, e.updatedAt = timestamp()
+                    """,
+                    {"items": written},
+                    access_mode=WRITE_ACCESS,
+                )
+                index_embeddings("Entity", [(w["id"], w["emb"]) for w in written])
+                page_written = True
+            cursor = batch[-1]["id"]
+            handled += len(batch)
+            totals["embedded"] += len(written)
+            totals["skipped"] += len(batch) - len(written)
+            totals["tokens"] += tokens
+            record_enrichment_batch(len(written), len(batch) - len(written), tokens)
+            record_enrichment_progress(
+                job_id, handled / max(1e-9, time.monotonic() - t0), max(0, remaining - handled)
+            )
+            current = _checkpoint(client, job_id, owner, {"cursor": cursor, **totals})
+            if current is None:
+                status, error = "lost", "job was claimed by another worker"
+                break
+            if current == "stopping":
+                status = "paused"
+                break
+        if page_written:
+            invalidate_search_cache()
+        if status == "running" and len(rows) < limit:
+            status = "done"
+
+    final: Dict[str, Any] = {"status": status, "error": error, "cursor": cursor, **totals}
+    if status == "done":
+        final["completed_at"] = int(time.time() * 1000)
+        record_enrichment_progress(job_id, handled / max(1e-9, time.monotonic() - t0), 0)
+    if status != "lost":
+        _checkpoint(client, job_id, owner, final)
+    return {"id": job_id, "updated": totals["embedded"] - embedded_before, "handled": handled, **final}
+
+
+def run_enrichment(
+    job_id: str = "default",
+    max_entities: Optional[int] = None,
+    reset: bool = False,
+    stop: Optional[threading.Event] = None,
+    tokens_per_minute: Optional[float] = None,
+    page_size: Optional[int] = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Dict[str, Any]:
+    """Run (or resume) the job in the calling thread until done, `max_entities` are handled, or stopped."""
+    if not vector_search_enabled():
+        return {"id": job_id, "status": "idle", "updated": 0, "reason": "embeddings_disabled"}
+    client = get_client()
+    owner = _owner()
+    job = _claim(client, job_id, owner, reset)
+    if job is None:
+        state = get_enrichment_job(job_id)
+        state.update(updated=0, reason="already_running")
+        return state
+    job["id"] = job_id
+    return _run(client, job, owner, max_entities, stop or threading.Event(), tokens_per_minute, page_size, sleep)
+
+
+def start_enrichment(
+    job_id: str = "default", max_entities: Optional[int] = None, reset: bool = False
+) -> Optional[Dict[str, Any]]:
+    """Claim the job and run it on a daemon thread; None if it is already running anywhere."""
+    if not vector_search_enabled():
+        return {"id": job_id, "status": "idle", "reason": "embeddings_disabled"}
+    client = get_client()
+    owner = _owner()
+    job = _claim(client, job_id, owner, reset)
+    if job is None:
+        return None
+    job["id"] = job_id
+    stop = threading.Event()
+    with _running_lock:
+        _running[job_id] = stop
+
+    def _target() -> None:
+        try:
+            _run(client, job, owner, max_entities, stop, None, None, time.sleep)
+        except Exception as e:
+            logger.exception("embedding enrichment job %s crashed", job_id)
+            _checkpoint(client, job_id, owner, {"status": "failed", "error": str(e)})
+        finally:
+            with _running_lock:
+                if _running.get(job_id) is stop:
+                    del _running[job_id]
+
+    threading.Thread(target=_target, name=f"embedding-enrichment-{job_id}", daemon=True).start()
+    return job
+
+
+def stop_enrichment(job_id: str = "default") -> Dict[str, Any]:
+    """Ask a running job to pause after its current batch, whichever worker owns it."""
+    with _running_lock:
+        stop = _running.get(job_id)
+    if stop is not None:
+        stop.set()
+    get_client().run_query(
+        "MATCH (j:EnrichmentJob {id: $id}) WHERE j.status = 'running' SET j.status = 'stopping'",
+        {"id": job_id},
+        access_mode=WRITE_ACCESS,
+    )
+    return get_enrichment_job(job_id)
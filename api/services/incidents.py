@@ -5,6 +5,13 @@ import uuid
 from typing import Any, Dict, List, Optional
 from ..utils.neo4j_client import get_client
 from ..utils.audit import audit_event
+from ..utils.write_coalescer import coalesce_write
+
+_INCIDENT_WRITE = (
+    "UNWIND $rows AS row "
+    "CREATE (i:SecurityIncident {id: row.id, kind: row.kind, severity: row.sev, message: row.msg, "
+    "context: row.ctx, at: row.at})"
+)
 
 class IncidentService:
     def __init__(self) -> None:
@@ -22,10 +29,13 @@ class IncidentService:
         audit_event("security.incident.recorded", item, None)
         if os.getenv("INCIDENT_PERSIST_DISABLED", "false").lower() != "true":
             try:
-                q = (
-                    "CREATE (i:SecurityIncident {id:$id, kind:$kind, severity:$sev, message:$msg, context:$ctx, at:$at}) RETURN i"
+                coalesce_write(
+                    "SecurityIncident",
+                    _INCIDENT_WRITE,
+                    {"id": item["id"], "kind": kind, "sev": severity, "msg": message, "ctx": item["context"], "at": item["at"]},
+                    client_factory=get_client,
+                    wait=False,
                 )
-                get_client().run_query(q, {"id": item["id"], "kind": kind, "sev": severity, "msg": message, "ctx": item["context"], "at": item["at"]})
             except Exception:
                 pass
         return item
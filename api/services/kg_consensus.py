@@ -0,0 +1,197 @@
+"""
+KG consensus: vote tallies and conflict resolution for contradictory (subject, predicate) edges.
+
+Votes are `(:Voter)-[:VOTED {sid, pred, oid, value}]->(:Conflict {sid, pred})`, with one
+`(:Option {sid, pred, oid})` per candidate object. Each Option carries a running tally
+(`score` = sum of values, `up`, `down`), which is updated in the same transaction as the vote.
+A vote write-locks its Option before reading the voter's previous value, so a changed vote
+moves the tally by the difference. Concurrent votes on one option are applied one after
+another.
+
+Votes are applied in UNWIND batches of CONSENSUS_VOTE_BATCH, one managed write transaction
+each (retried on deadlocks). Within a request the last vote per (voter, option) wins, and
+votes are sorted by option so concurrent batches lock options in the same order.
+
+Tallies are trusted once `reconcile_vote_tallies()` has recomputed them from the VOTED
+relationships. That has to happen at least once for Options created before tallies existed.
+Until then, resolve aggregates the votes instead. `(:VoteTallyState {id})` records when it last ran.
+
+Exported: kg_consensus_votes_total{result} and kg_consensus_resolutions_total{outcome}.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..config import get_config
+from ..metrics import record_consensus_resolution, record_consensus_votes
+from ..utils.neo4j_client import WRITE_ACCESS, get_client
+
+_TALLY_STATE_ID = "default"
+
+# One row per vote in $votes ({sid, pred, oid, voter, value}). Locks the Option, then compares
+# the stored vote with the new one and moves the tally by the difference.
+_VOTE_QUERY = """/* kg.consensus.vote */
+UNWIND $votes AS v
+MERGE (c:Conflict {sid: v.sid, pred: v.pred})
+MERGE (o:Option {sid: v.sid, pred: v.pred, oid: v.oid})
+MERGE (c)-[:OPTION]->(o)
+SET o._tallyLock = true REMOVE o._tallyLock
+WITH c, o, v
+MERGE (voter:Voter {id: v.voter})
+MERGE (voter)-[r:VOTED {sid: v.sid, pred: v.pred, oid: v.oid}]->(c)
+WITH o, r, v, coalesce(r.value, 0) AS old
+SET r.value = v.value, r.at = timestamp()
+SET o.score = coalesce(o.score, 0) + v.value - old,
+    o.up = coalesce(o.up, 0) + CASE WHEN v.value = 1 THEN 1 ELSE 0 END - CASE WHEN old = 1 THEN 1 ELSE 0 END,
+    o.down = coalesce(o.down, 0) + CASE WHEN v.value = -1 THEN 1 ELSE 0 END - CASE WHEN old = -1 THEN 1 ELSE 0 END,
+    o.tallyAt = timestamp()
+RETURN sum(CASE WHEN old = 0 THEN 1 ELSE 0 END) AS new,
+       sum(CASE WHEN old <> 0 AND old <> v.value THEN 1 ELSE 0 END) AS changed,
+       sum(CASE WHEN old = v.value THEN 1 ELSE 0 END) AS unchanged
+"""
+
+_TALLY_QUERY = """/* kg.consensus.tallies */
+UNWIND $keys AS k
+MATCH (:Conflict {sid: k.sid, pred: k.pred})-[:OPTION]->(o:Option)
+RETURN k.sid AS sid, k.pred AS pred, o.oid AS oid, coalesce(o.score, 0) AS score
+"""
+
+# Before the first reconcile: aggregate VOTED per option, as resolve always used to
+_VOTE_SCAN_QUERY = """/* kg.consensus.vote_scan */
+UNWIND $keys AS k
+MATCH (:Conflict {sid: k.sid, pred: k.pred})<-[r:VOTED]-(:Voter)
+RETURN k.sid AS sid, k.pred AS pred, r.oid AS oid, sum(r.value) AS score
+"""
+
+_CONFIDENCE_QUERY = """/* kg.consensus.confidence */
+UNWIND $keys AS k
+MATCH (s:Entity {id: k.sid})-[rel:RELATED {type: k.pred}]->(o:Entity)
+RETURN k.sid AS sid, k.pred AS pred, o.id AS oid, coalesce(rel.confidence, 0.0) AS score
+"""
+
+# Promote each winner to active and demote the other objects of its (subject, predicate)
+_APPLY_QUERY = """/* kg.consensus.apply */
+UNWIND $winners AS w
+MATCH (s:Entity {id: w.sid})-[r:RELATED {type: w.pred}]->(o:Entity)
+WITH r, o, w, timestamp() AS now
+SET r.state = CASE WHEN o.id = w.oid THEN 'active' ELSE 'rejected' END,
+    r.lastUpdated = now, r.version = coalesce(r.version, 0) + 1
+"""
+
+
+def _votes_tx(tx, votes: List[Dict[str, Any]]) -> Dict[str, int]:
+    row = tx.run(_VOTE_QUERY, {"votes": votes}).single()
+    return {k: int((row or {}).get(k) or 0) for k in ("new", "changed", "unchanged")}
+
+
+def apply_votes(votes: Iterable[Dict[str, Any]], batch: Optional[int] = None) -> Dict[str, int]:
+    """Apply votes ({sid, pred, oid, voter, value}) and update the option tallies in the same transactions."""
+    latest: Dict[Tuple[str, str, str, str], Dict[str, Any]] = {}
+    for v in votes:
+        latest[(v["sid"], v["pred"], v["oid"], v["voter"])] = v
+    ordered = [latest[k] for k in sorted(latest)]
+    size = max(1, int(batch or get_config().CONSENSUS_VOTE_BATCH))
+    client = get_client()
+    totals = {"applied": 0, "new": 0, "changed": 0, "unchanged": 0, "batches": 0}
+    for i in range(0, len(ordered), size):
+        chunk = ordered[i : i + size]
+        res = client.write_tx(_votes_tx, chunk)
+        for k, n in res.items():
+            totals[k] += n
+        totals["applied"] += len(chunk)
+        totals["batches"] += 1
+    record_consensus_votes(totals["new"], totals["changed"], totals["unchanged"])
+    return totals
+
+
+def vote_tally_state() -> Optional[Dict[str, Any]]:
+    rows = get_client().run_query(
+        "MATCH (s:VoteTallyState {id: $id}) RETURN properties(s) AS s", {"id": _TALLY_STATE_ID}
+    )
+    return dict(rows[0]["s"]) if rows else None
+
+
+def reconcile_vote_tallies(batch: int = 1000) -> Dict[str, Any]:
+    """Recompute every Option tally from its VOTED relationships, one option per locked update."""
+    client = get_client()
+    started = int(time.time() * 1000)
+    client.run_query(
+        """/* kg.consensus.tally_reconcile */
+        MATCH (o:Option)
+        CALL {
+            WITH o
+            SET o._tallyLock = true REMOVE o._tallyLock
+            WITH o
+            OPTIONAL MATCH (:Conflict {sid: o.sid, pred: o.pred})<-[r:VOTED]-(:Voter) WHERE r.oid = o.oid
+            WITH o, sum(coalesce(r.value, 0)) AS score,
+                 count(CASE WHEN r.value = 1 THEN 1 END) AS up,
+                 count(CASE WHEN r.value = -1 THEN 1 END) AS down
+            SET o.score = score, o.up = up, o.down = down, o.tallyAt = timestamp()
+        } IN TRANSACTIONS OF $batch ROWS
+        """,
+        {"batch": batch},
+        access_mode=WRITE_ACCESS,
+    )
+    rows = client.run_query(
+        """
+        MATCH (o:Option) WITH count(o) AS options
+        MERGE (s:VoteTallyState {id: $id})
+        SET s.reconciled_at = $gen, s.options = options, s.took_ms = timestamp() - $gen
+        RETURN options
+        """,
+        {"id": _TALLY_STATE_ID, "gen": started},
+        access_mode=WRITE_ACCESS,
+    )
+    options = int(rows[0]["options"]) if rows else 0
+    return {"options": options, "reconciled_at": started, "took_ms": int(time.time() * 1000) - started}
+
+
+def _scores(keys: List[Dict[str, str]], strategy: str) -> Tuple[Dict[Tuple[str, str], List[Tuple[str, float]]], str]:
+    if strategy == "votes":
+        source = "tally" if vote_tally_state() is not None else "scan"
+        query = _TALLY_QUERY if source == "tally" else _VOTE_SCAN_QUERY
+    else:
+        source, query = "confidence", _CONFIDENCE_QUERY
+    grouped: Dict[Tuple[str, str], List[Tuple[str, float]]] = {}
+    for r in get_client().run_query(query, {"keys": keys}):
+        grouped.setdefault((r["sid"], r["pred"]), []).append((r["oid"], r["score"]))
+    return grouped, source
+
+
+def resolve_conflicts(
+    conflicts: List[Dict[str, str]], strategy: str = "votes", quorum: int = 1
+) -> Dict[str, Any]:
+    """Settle many (sid, pred) conflicts: one read for all scores, one write for all winners.
+
+    The highest-scoring option wins (ties go to the smallest object id). With the votes
+    strategy a winner below `quorum` is reported as quorum_not_met and left unapplied.
+    """
+    keys, seen = [], set()
+    for c in conflicts:
+        key = (c["sid"], c["pred"])
+        if key not in seen:
+            seen.add(key)
+            keys.append({"sid": key[0], "pred": key[1]})
+    grouped, source = _scores(keys, strategy)
+    results: List[Dict[str, Any]] = []
+    winners: List[Dict[str, str]] = []
+    for k in keys:
+        scores = sorted(grouped.get((k["sid"], k["pred"]), []), key=lambda s: (-s[1], s[0]))
+        res: Dict[str, Any] = {"subject_id": k["sid"], "predicate": k["pred"]}
+        if not scores:
+            res.update(resolved=False, reason="no_options")
+        elif quorum and strategy == "votes" and scores[0][1] < quorum:
+            res.update(resolved=False, reason="quorum_not_met", top={"object_id": scores[0][0], "score": scores[0][1]})
+        else:
+            res.update(resolved=True, winner=scores[0][0], score=scores[0][1])
+            winners.append({"sid": k["sid"], "pred": k["pred"], "oid": scores[0][0]})
+        results.append(res)
+    if winners:
+        get_client().run_query(_APPLY_QUERY, {"winners": winners}, access_mode=WRITE_ACCESS)
+    outcomes: Dict[str, int] = {}
+    for res in results:
+        outcome = "resolved" if res["resolved"] else res["reason"]
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    record_consensus_resolution(outcomes)
+    return {"results": results, "resolved": len(winners), "source": source}
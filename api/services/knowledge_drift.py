@@ -1,11 +1,49 @@
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import socket
 import time
+import uuid
 
-from ..utils.neo4j_client import get_client
-from ..utils.embeddings import get_query_embedding, vector_search_enabled
-from ..utils.kg_schema import monitor_consistency
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+
+from ..config import get_config
+from ..metrics import record_drift_similarity, record_merge_batch
+from ..utils.ann_index import remove_embedding
+from ..utils.search_cache import invalidate_search_cache
+from ..utils.neo4j_client import WRITE_ACCESS, get_client
+from ..utils.embeddings import get_embeddings, vector_search_enabled
+from ..utils.kg_schema import (
+    indexed_contradictions,
+    missing_required_props,
+    monitor_consistency,
+    refresh_contradiction_keys,
+)
+from ..utils.minhash import (
+    MinHasher,
+    candidate_pairs,
+    group_pairs,
+    minhash_available,
+    normalize_for_shingles,
+    stored_signature,
+)
+from .embedding_enrichment import run_enrichment
+
+logger = logging.getLogger(__name__)
+
+
+# Similarity histogram resolution for drift scans (bins over [0, 1])
+SIMILARITY_BINS = 20
+# DriftScan node holding detect_semantic_drift's incremental watermark
+_RECENT_DRIFT_ID = "recent"
 
 
 @dataclass
@@ -34,51 +72,232 @@ def recent_entity_texts(limit: int = 200) -> List[Tuple[str, str]]:
     return [(r["id"], r["text"]) for r in rows if (r.get("text") or "").strip()]
 
 
-def detect_semantic_drift(sample_limit: int = 100, similarity_threshold: float = 0.80) -> List[DriftSignal]:
+def _similarities(stored: List[Any], fresh: List[List[float]]) -> List[Optional[float]]:
+    """Row-wise cosine similarity; None where the stored vector is missing or a different size."""
+    dim = len(fresh[0]) if fresh else 0
+    ok = [i for i, v in enumerate(stored) if isinstance(v, (list, tuple)) and len(v) == dim and dim]
+    out: List[Optional[float]] = [None] * len(stored)
+    if not ok:
+        return out
+    if np is not None:
+        a = np.asarray([stored[i] for i in ok], dtype=np.float32)
+        b = np.asarray([fresh[i] for i in ok], dtype=np.float32)
+        norms = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+        sims = (np.einsum("ij,ij->i", a, b) / (norms + 1e-9)).tolist()
+    else:  # pragma: no cover
+        sims = []
+        for i in ok:
+            dot = sum(x * y for x, y in zip(stored[i], fresh[i]))
+            na = sum(x * x for x in stored[i]) ** 0.5
+            nb = sum(y * y for y in fresh[i]) ** 0.5
+            sims.append(dot / (na * nb + 1e-9))
+    for i, sim in zip(ok, sims):
+        out[i] = float(sim)
+    return out
+
+
+def _histogram(sims: List[float], bins: int = SIMILARITY_BINS) -> List[int]:
+    """Counts over `bins` equal-width bins on [0, 1]; negative similarities land in the first."""
+    counts = [0] * bins
+    for sim in sims:
+        counts[min(bins - 1, max(0, int(sim * bins)))] += 1
+    return counts
+
+
+def _drift_page(rows: List[Any], similarity_threshold: float) -> Tuple[List[DriftSignal], List[float], int]:
+    """Embed one page of (id, emb, text) rows in one batch; returns (signals, similarities, skipped)."""
+    samples = [(r["id"], r["emb"], str(r.get("text") or r["id"])) for r in rows]
+    samples = [s for s in samples if s[2].strip()]
+    if not samples:
+        return [], [], len(rows)
+    fresh = get_embeddings([text for _, _, text in samples])
+    sims = _similarities([emb for _, emb, _ in samples], fresh)
+    signals: List[DriftSignal] = []
+    scored: List[float] = []
+    for (eid, _, _), sim in zip(samples, sims):
+        if sim is None:
+            # Malformed or other-model embedding
+            continue
+        scored.append(sim)
+        record_drift_similarity(sim)
+        if sim < similarity_threshold:
+            signals.append(
+                DriftSignal(
+                    kind="embedding_shift",
+                    severity="medium" if sim > 0.6 else "high",
+                    details={"entity_id": eid, "similarity": sim, "threshold": similarity_threshold},
+                )
+            )
+    return signals, scored, len(rows) - len(scored)
+
+
+def detect_semantic_drift(
+    sample_limit: int = 100, similarity_threshold: float = 0.80, incremental: bool = True
+) -> List[DriftSignal]:
     """Detect potential semantic drift by comparing stored embeddings vs fresh embeddings.
+    Incremental by default: checks up to `sample_limit` entities updated since the previous call,
+    oldest first, and advances an (updatedAt, id) watermark on `(:DriftScan {id: "recent"})`.
+    `incremental=False` samples the most recently updated entities instead. Entities without
+    updatedAt are only reached by `scan_semantic_drift`.
     If vector search is disabled or embeddings unavailable, returns empty list.
     """
-    signals: List[DriftSignal] = []
     if not vector_search_enabled():
-        return signals
+        return []
 
     client = get_client()
-    # Pull entities that have an existing embedding
+    if not incremental:
+        # Pull entities that have an existing embedding
+        rows = client.run_query(
+            """
+            MATCH (e:Entity)
+            WHERE e.embedding IS NOT NULL
+            WITH e, coalesce(e.updatedAt, e.lastUpdated, 0) AS ts
+            RETURN e.id AS id, e.embedding AS emb, coalesce(e.name, e.description, e.id) AS text
+            ORDER BY ts DESC LIMIT $limit
+            """,
+            {"limit": sample_limit},
+        )
+        try:
+            signals, _, _ = _drift_page(rows, similarity_threshold)
+        except Exception:
+            return []
+        return signals
+
+    state = get_drift_scan(_RECENT_DRIFT_ID)
+    after_ts = int(state.get("updated_after") or 0)
+    after_id = state.get("id_after") or ""
     rows = client.run_query(
         """
         MATCH (e:Entity)
-        WHERE e.embedding IS NOT NULL
-        WITH e, coalesce(e.updatedAt, e.lastUpdated, 0) AS ts
-        RETURN e.id AS id, e.embedding AS emb, coalesce(e.name, e.description, e.id) AS text
-        ORDER BY ts DESC LIMIT $limit
+        WHERE e.embedding IS NOT NULL AND e.updatedAt >= $ts AND (e.updatedAt > $ts OR e.id > $id)
+        WITH e ORDER BY e.updatedAt, e.id LIMIT $limit
+        RETURN e.id AS id, e.updatedAt AS ts, e.embedding AS emb, coalesce(e.name, e.description, e.id) AS text
         """,
-        {"limit": sample_limit},
+        {"ts": after_ts, "id": after_id, "limit": sample_limit},
+    )
+    if not rows:
+        return []
+    try:
+        signals, _, _ = _drift_page(rows, similarity_threshold)
+    except Exception:
+        # Leave the watermark where it is; the same entities are retried next time
+        return []
+    client.run_query(
+        "MERGE (s:DriftScan {id: $id}) SET s.updated_after = $ts, s.id_after = $after, s.updated_at = $now",
+        {"id": _RECENT_DRIFT_ID, "ts": int(rows[-1]["ts"]), "after": rows[-1]["id"], "now": _now_ms()},
     )
-    for r in rows:
-        try:
-            eid = r["id"]
-            stored = r["emb"]
-            text = r.get("text") or eid
-            fresh = get_query_embedding(text)
-            # cosine similarity
-            dot = sum((a * b) for a, b in zip(stored, fresh))
-            na = sum((a * a) for a in stored) ** 0.5
-            nb = sum((b * b) for b in fresh) ** 0.5
-            sim = dot / (na * nb + 1e-9)
-            if sim < similarity_threshold:
-                signals.append(
-                    DriftSignal(
-                        kind="embedding_shift",
-                        severity="medium" if sim > 0.6 else "high",
-                        details={"entity_id": eid, "similarity": sim, "threshold": similarity_threshold},
-                    )
-                )
-        except Exception:
-            # Skip entities with malformed embeddings
-            continue
     return signals
 
 
+def get_drift_scan(scan_id: str = "default") -> Dict[str, Any]:
+    """Progress of a whole-graph drift scan (see `scan_semantic_drift`)."""
+    rows = get_client().run_query(
+        "MATCH (s:DriftScan {id: $id}) RETURN properties(s) AS s", {"id": scan_id}
+    )
+    state = dict(rows[0]["s"]) if rows else {"id": scan_id}
+    state.setdefault("watermark", "")
+    state.setdefault("scanned", 0)
+    state.setdefault("breaches", 0)
+    state.setdefault("skipped", 0)
+    state.setdefault("histogram", [0] * SIMILARITY_BINS)
+    return state
+
+
+def scan_semantic_drift(
+    similarity_threshold: float = 0.80,
+    page_size: int = 500,
+    max_entities: int = 10000,
+    scan_id: str = "default",
+    reset: bool = False,
+    max_signals: int = 500,
+) -> Dict[str, Any]:
+    """Scan every embedded Entity in id order, resuming from a persisted watermark.
+
+    Each call processes up to `max_entities` (one batched embedding request and one matrix
+    operation per page of `page_size`) and stores the watermark, counts and similarity
+    histogram on a `DriftScan` node. When the end of the graph is reached, the totals are
+    copied to `last_*` properties and the watermark resets for the next pass.
+    """
+    if not vector_search_enabled():
+        return {"scan_id": scan_id, "scanned": 0, "reason": "embeddings_disabled"}
+    client = get_client()
+    state = {"id": scan_id} if reset else get_drift_scan(scan_id)
+    watermark = state.get("watermark") or ""
+    histogram = list(state.get("histogram") or [0] * SIMILARITY_BINS)
+    totals = {k: int(state.get(k) or 0) for k in ("scanned", "breaches", "skipped")}
+    if not watermark:
+        histogram = [0] * SIMILARITY_BINS
+        totals = {"scanned": 0, "breaches": 0, "skipped": 0}
+        state["started_at"] = _now_ms()
+    signals: List[DriftSignal] = []
+    call_hist = [0] * SIMILARITY_BINS
+    scanned = 0
+    done = False
+    while scanned < max_entities:
+        limit = min(page_size, max_entities - scanned)
+        rows = client.run_query(
+            """
+            MATCH (e:Entity)
+            WHERE e.embedding IS NOT NULL AND e.id > $after
+            WITH e ORDER BY e.id LIMIT $limit
+            RETURN e.id AS id, e.embedding AS emb, coalesce(e.name, e.description, e.id) AS text
+            """,
+            {"after": watermark, "limit": limit},
+        )
+        if not rows:
+            done = True
+            break
+        page_signals, sims, skipped = _drift_page(rows, similarity_threshold)
+        for i, c in enumerate(_histogram(sims)):
+            histogram[i] += c
+            call_hist[i] += c
+        signals.extend(page_signals)
+        totals["scanned"] += len(sims)
+        totals["breaches"] += len(page_signals)
+        totals["skipped"] += skipped
+        scanned += len(rows)
+        watermark = rows[-1]["id"]
+        if len(rows) < limit:
+            done = True
+            break
+        _save_drift_scan(client, scan_id, state, watermark, totals, histogram, done=False)
+    _save_drift_scan(client, scan_id, state, watermark, totals, histogram, done=done)
+    return {
+        "scan_id": scan_id,
+        "scanned": scanned,
+        "done": done,
+        "watermark": None if done else watermark,
+        "totals": totals,
+        "histogram": {
+            "edges": [i / SIMILARITY_BINS for i in range(SIMILARITY_BINS + 1)],
+            "counts": call_hist,
+            "scan_counts": histogram,
+        },
+        "signals": signals[:max_signals],
+        "signals_truncated": len(signals) > max_signals,
+    }
+
+
+def _save_drift_scan(client, scan_id, state, watermark, totals, histogram, done: bool) -> None:
+    props: Dict[str, Any] = {
+        "watermark": "" if done else watermark,
+        "histogram": histogram,
+        "updated_at": _now_ms(),
+        **totals,
+    }
+    if state.get("started_at"):
+        props["started_at"] = state["started_at"]
+    if done:
+        props.update(
+            completed_at=props["updated_at"],
+            last_scanned=totals["scanned"],
+            last_breaches=totals["breaches"],
+            last_skipped=totals["skipped"],
+            last_histogram=histogram,
+        )
+    client.run_query("MERGE (s:DriftScan {id: $id}) SET s += $props", {"id": scan_id, "props": props})
+
+
 def detect_conflicts(limit: int = 200) -> List[DriftSignal]:
     """Use `monitor_consistency()` contradictions as conflict signals."""
     cons = monitor_consistency(limit=limit)
@@ -92,25 +311,302 @@ def detect_conflicts(limit: int = 200) -> List[DriftSignal]:
     return signals
 
 
+# ------------- Incremental quality assessment -------------
+#
+# `assess_quality` keeps running aggregates on a (:QualityState) node and, on each call, reads
+# only what changed since its watermarks:
+#
+#   relations  RELATED edges with lastUpdated >= rel_watermark - _WATERMARK_LAG_MS
+#   entities   Entity nodes with updatedAt >= ent_watermark - _WATERMARK_LAG_MS
+#
+# Each processed edge is stamped with qaSeen (the lastUpdated it was counted at) and
+# qaConfidence (its contribution to confidence_sum); entities get qaSeen as well. Re-reading the
+# lag window, which catches writes that commit after a later timestamp was already processed,
+# is therefore idempotent, and an updated edge moves the sum by the difference. Orphan status
+# is re-checked for changed entities and both ends of changed edges and kept as a :QualityOrphan
+# label on the entity, so the orphan count is a label count and a pass never reads or rewrites
+# a membership list. Contradictions are not tracked here: they are read from the write-time
+# ContradictionKey index (kg_schema), the same source as /kg/monitor/integrity and
+# /kg_consensus/conflicts/open. Entity and relation totals come from the count store.
+#
+# Merges delete edges the aggregates already counted. Rather than lock the state node in every
+# rewire batch (which would serialise otherwise independent merges), each batch adds the removed
+# qaConfidence to its own (:MergeJournal) and labels it :QualityPending; the next delta pass
+# subtracts and clears every pending journal, and a reconcile clears them unread.
+#
+# The full rebuild (`reconcile_quality`) is a maintenance job: it rewrites the stamps on every
+# edge, so it runs from kg_integrity_watch every QUALITY_RECONCILE_S or via POST
+# /kg_drift/quality/reconcile, never from the GET. One reconcile runs at a time (a claim on the
+# state node); missing_props is refreshed only then. Until the first reconcile there are no
+# aggregates, so the GET computes them from the graph as it used to; it reports `stale` until then
+# and once the last reconcile is older than QUALITY_RECONCILE_S.
+
+_QUALITY_STATE_ID = "default"
+_WATERMARK_LAG_MS = 60_000
+# Changed edges (and entities) handled per write transaction
+_QUALITY_PAGE = 2000
+# A reconcile claim older than this is considered abandoned
+_QUALITY_RECONCILE_STALE_MS = 3_600_000
+
+
+def _quality_state(client) -> Optional[Dict[str, Any]]:
+    rows = client.run_query(
+        "MATCH (q:QualityState {id: $id}) RETURN properties(q) AS q", {"id": _QUALITY_STATE_ID}
+    )
+    return dict(rows[0]["q"]) if rows else None
+
+
+def quality_state() -> Optional[Dict[str, Any]]:
+    """The (:QualityState) aggregates, or None before the first reconcile."""
+    return _quality_state(get_client())
+
+
+def _lock_quality_state(tx) -> Dict[str, Any]:
+    # Writing the node takes its lock, so passes serialise; merges never take it
+    rec = tx.run(
+        "MERGE (q:QualityState {id: $id}) SET q.lockedAt = timestamp() RETURN properties(q) AS q",
+        {"id": _QUALITY_STATE_ID},
+    ).single()
+    return dict(rec["q"]) if rec else {}
+
+
+def _save_quality_state(tx, props: Dict[str, Any]) -> None:
+    tx.run("MATCH (q:QualityState {id: $id}) SET q += $props", {"id": _QUALITY_STATE_ID, "props": props})
+
+
+def _quality_delta_tx(tx, page: int) -> Tuple[Dict[str, Any], int, int]:
+    state = _lock_quality_state(tx)
+    rel_wm = int(state.get("rel_watermark") or 0)
+    ent_wm = int(state.get("ent_watermark") or 0)
+    merged = tx.run(
+        """/* kg.quality.delta.merges */
+        MATCH (j:QualityPending)
+        WITH j, coalesce(j.qa_removed_sum, 0.0) AS removed_sum, coalesce(j.qa_removed_count, 0) AS removed_count
+        SET j.qa_removed_sum = 0.0, j.qa_removed_count = 0
+        REMOVE j:QualityPending
+        RETURN sum(removed_sum) AS removed_sum, sum(removed_count) AS removed_count
+        """
+    ).single()
+    removed_sum = float((merged or {}).get("removed_sum") or 0.0)
+    removed_count = int((merged or {}).get("removed_count") or 0)
+    rels = list(tx.run(
+        """/* kg.quality.delta.relations */
+        MATCH (s)-[r:RELATED]->(o)
+        WHERE r.lastUpdated >= $after AND (r.qaSeen IS NULL OR r.qaSeen <> r.lastUpdated)
+        WITH s, r, o ORDER BY r.lastUpdated LIMIT $page
+        WITH s, r, o, r.qaConfidence AS prev, coalesce(r.confidence, 0.0) AS c
+        SET r.qaConfidence = c, r.qaSeen = r.lastUpdated
+        RETURN s.id AS sid, o.id AS oid, r.lastUpdated AS ts, c, prev
+        """,
+        {"after": max(0, rel_wm - _WATERMARK_LAG_MS), "page": page},
+    ))
+    ents = list(tx.run(
+        """/* kg.quality.delta.entities */
+        MATCH (e:Entity)
+        WHERE e.updatedAt >= $after AND (e.qaSeen IS NULL OR e.qaSeen <> e.updatedAt)
+        WITH e ORDER BY e.updatedAt LIMIT $page
+        SET e.qaSeen = e.updatedAt
+        RETURN e.id AS id, e.updatedAt AS ts
+        """,
+        {"after": max(0, ent_wm - _WATERMARK_LAG_MS), "page": page},
+    ))
+    if not rels and not ents and not removed_count:
+        return state, 0, 0
+
+    conf_sum = float(state.get("confidence_sum") or 0.0) - removed_sum
+    conf_count = int(state.get("confidence_count") or 0) - removed_count
+    for r in rels:
+        if r["prev"] is None:
+            conf_sum += float(r["c"])
+            conf_count += 1
+        else:
+            conf_sum += float(r["c"]) - float(r["prev"])
+
+    ids = {e["id"] for e in ents} | {r["sid"] for r in rels} | {r["oid"] for r in rels}
+    if ids:
+        tx.run(
+            """/* kg.quality.delta.orphans */
+            UNWIND $ids AS id
+            MATCH (e:Entity {id: id})
+            WITH e, NOT (e)--() AS orphan
+            FOREACH (_ IN CASE WHEN orphan THEN [1] ELSE [] END | SET e:QualityOrphan)
+            FOREACH (_ IN CASE WHEN orphan THEN [] ELSE [1] END | REMOVE e:QualityOrphan)
+            """,
+            {"ids": sorted(ids)},
+        )
+
+    rel_ts = max((int(r["ts"]) for r in rels), default=0)
+    props = {
+        "rel_watermark": max(rel_wm, rel_ts),
+        "ent_watermark": max(ent_wm, max((int(e["ts"]) for e in ents), default=0)),
+        "last_update_ms": max(int(state.get("last_update_ms") or 0), rel_ts),
+        "confidence_sum": conf_sum,
+        "confidence_count": conf_count,
+        "updated_at": _now_ms(),
+    }
+    _save_quality_state(tx, props)
+    state.update(props)
+    return state, len(rels), len(ents)
+
+
+def _rebuild_quality_tx(tx, missing_props: List[Dict[str, Any]], started: int) -> Dict[str, Any]:
+    state = _lock_quality_state(tx)
+    # The sums below already exclude edges merges deleted, so their pending adjustments are void
+    tx.run(
+        """/* kg.quality.rebuild.merges */
+        MATCH (j:QualityPending)
+        SET j.qa_removed_sum = 0.0, j.qa_removed_count = 0
+        REMOVE j:QualityPending
+        """
+    )
+    agg = tx.run(
+        """/* kg.quality.rebuild */
+        MATCH ()-[r:RELATED]->()
+        RETURN count(r.qaConfidence) AS n, sum(r.qaConfidence) AS total, max(coalesce(r.lastUpdated, 0)) AS mx
+        """
+    ).single()
+    ent = tx.run("MATCH (e:Entity) RETURN max(coalesce(e.updatedAt, 0)) AS mx").single()
+    now = _now_ms()
+    props = {
+        "rel_watermark": int(agg["mx"] or 0),
+        "ent_watermark": int(ent["mx"] or 0),
+        "last_update_ms": int(agg["mx"] or 0),
+        "confidence_sum": float(agg["total"] or 0.0),
+        "confidence_count": int(agg["n"] or 0),
+        # Membership lists from earlier versions; orphans are labels, contradictions are keys
+        "orphans": None,
+        "contradictions": None,
+        "missing_props": json.dumps(missing_props),
+        "reconciled_at": now,
+        "reconcile_took_ms": now - started,
+        "reconciling_since": None,
+        "updated_at": now,
+    }
+    _save_quality_state(tx, props)
+    state.update(props)
+    return state
+
+
+def _claim_quality_reconcile(client, now: int) -> bool:
+    rows = client.run_query(
+        """
+        MERGE (q:QualityState {id: $id})
+        WITH q WHERE coalesce(q.reconciling_since, 0) < $stale
+        SET q.reconciling_since = $now
+        RETURN q.id AS id
+        """,
+        {"id": _QUALITY_STATE_ID, "now": now, "stale": now - _QUALITY_RECONCILE_STALE_MS},
+        access_mode=WRITE_ACCESS,
+    )
+    return bool(rows)
+
+
+def reconcile_quality(limit: int = 500) -> Dict[str, Any]:
+    """Rebuild the quality aggregates and orphan labels from the whole graph (O(graph)).
+
+    Maintenance only; see the notes above. Returns {"status": "running"} without doing anything
+    while another reconcile holds the claim.
+    """
+    client = get_client()
+    started = _now_ms()
+    if not _claim_quality_reconcile(client, started):
+        return {"status": "running"}
+    try:
+        # Stamp edges and entities first, in server-side batches; the aggregate read below then
+        # sums the stamps, which stays consistent with any delta pass that runs in between
+        client.run_query(
+            """
+            MATCH ()-[r:RELATED]->()
+            WHERE r.qaSeen IS NULL OR r.qaSeen <> coalesce(r.lastUpdated, 0)
+               OR r.qaConfidence <> coalesce(r.confidence, 0.0)
+            CALL { WITH r SET r.qaConfidence = coalesce(r.confidence, 0.0), r.qaSeen = coalesce(r.lastUpdated, 0) }
+            IN TRANSACTIONS OF 10000 ROWS
+            """,
+            access_mode=WRITE_ACCESS,
+            name="kg.quality.reconcile.relations",
+        )
+        client.run_query(
+            """
+            MATCH (e:Entity)
+            WHERE e.updatedAt IS NOT NULL AND (e.qaSeen IS NULL OR e.qaSeen <> e.updatedAt)
+            CALL { WITH e SET e.qaSeen = e.updatedAt } IN TRANSACTIONS OF 10000 ROWS
+            """,
+            access_mode=WRITE_ACCESS,
+            name="kg.quality.reconcile.entities",
+        )
+        client.run_query(
+            """
+            MATCH (e:Entity)
+            WITH e, NOT (e)--() AS orphan
+            WHERE orphan <> (e:QualityOrphan)
+            CALL {
+                WITH e, orphan
+                FOREACH (_ IN CASE WHEN orphan THEN [1] ELSE [] END | SET e:QualityOrphan)
+                FOREACH (_ IN CASE WHEN orphan THEN [] ELSE [1] END | REMOVE e:QualityOrphan)
+            } IN TRANSACTIONS OF 10000 ROWS
+            """,
+            access_mode=WRITE_ACCESS,
+            name="kg.quality.reconcile.orphans",
+        )
+        state = client.write_tx(_rebuild_quality_tx, missing_required_props(limit), started)
+    except Exception:
+        client.run_query(
+            "MATCH (q:QualityState {id: $id}) WHERE q.reconciling_since = $now SET q.reconciling_since = null",
+            {"id": _QUALITY_STATE_ID, "now": started},
+            access_mode=WRITE_ACCESS,
+        )
+        raise
+    return {"status": "done", "reconciled_at": state["reconciled_at"], "took_ms": state["reconcile_took_ms"]}
+
+
 def assess_quality(limit: int = 500) -> Dict[str, Any]:
-    """Compute simple quality metrics and a composite score [0..1]."""
+    """Compute simple quality metrics and a composite score [0..1].
+
+    Incremental: only edges and entities changed since the previous call are read (see the
+    notes above). Never rebuilds: `reconciled_at` and `stale` say how current the last
+    `reconcile_quality` is. Before the first reconcile there are no aggregates or orphan labels
+    yet, so confidence, freshness, orphans and missing_props are computed directly from the graph
+    (O(graph), as this call always used to) and `source` is "full" instead of "incremental".
+    Contradictions come from the ContradictionKey index; `limit` caps the groups listed, and
+    the counts cover the whole graph.
+    """
     client = get_client()
-    # Totals
+    state = _quality_state(client) or {}
+    reconciled_at = int(state.get("reconciled_at") or 0)
+    processed = {"relations": 0, "entities": 0}
+    if reconciled_at:
+        while True:
+            state, n_rels, n_ents = client.write_tx(_quality_delta_tx, _QUALITY_PAGE)
+            processed["relations"] += n_rels
+            processed["entities"] += n_ents
+            if n_rels < _QUALITY_PAGE and n_ents < _QUALITY_PAGE:
+                break
+    reconcile_ms = get_config().QUALITY_RECONCILE_S * 1000
+    stale = not reconciled_at or (reconcile_ms > 0 and _now_ms() - reconciled_at > reconcile_ms)
+
+    # Totals (count store lookups, O(1))
     ent_total = client.run_query("MATCH (e:Entity) RETURN count(e) AS c")[0]["c"]
     rel_total = client.run_query("MATCH ()-[r:RELATED]->() RETURN count(r) AS c")[0]["c"]
+    contradiction_count, contradictions = indexed_contradictions(limit)
 
-    # Orphans, contradictions, missing props
-    cons = monitor_consistency(limit=limit)
-    orphan_count = len(cons.get("orphans", []))
-    contradictions = cons.get("contradictions", []) or []
-    missing_props = cons.get("missing_props", []) or []
-
-    # Average confidence and freshness
-    avg_conf_rows = client.run_query("MATCH ()-[r:RELATED]->() RETURN avg(coalesce(r.confidence,0.0)) AS avgc")
-    avg_conf = float(avg_conf_rows[0]["avgc"] or 0.0)
+    if reconciled_at:
+        orphan_count = client.run_query("MATCH (e:QualityOrphan) RETURN count(e) AS c")[0]["c"]
+        try:
+            missing_props = json.loads(state.get("missing_props") or "[]")
+        except ValueError:
+            missing_props = []
+        conf_count = int(state.get("confidence_count") or 0)
+        avg_conf = float(state.get("confidence_sum") or 0.0) / conf_count if conf_count else 0.0
+        last_upd = int(state.get("last_update_ms") or 0)
+    else:
+        # No aggregates yet: read the graph rather than report zeros
+        orphan_count = client.run_query("MATCH (e:Entity) WHERE NOT (e)--() RETURN count(e) AS c")[0]["c"]
+        missing_props = missing_required_props(limit=limit)
+        avg_conf_rows = client.run_query("MATCH ()-[r:RELATED]->() RETURN avg(coalesce(r.confidence,0.0)) AS avgc")
+        avg_conf = float(avg_conf_rows[0]["avgc"] or 0.0)
+        last_upd_rows = client.run_query("MATCH ()-[r:RELATED]->() RETURN max(coalesce(r.lastUpdated,0)) AS mx")
+        last_upd = int(last_upd_rows[0]["mx"] or 0)
     # Last update recency (ms)
-    last_upd_rows = client.run_query("MATCH ()-[r:RELATED]->() RETURN max(coalesce(r.lastUpdated,0)) AS mx")
-    last_upd = int(last_upd_rows[0]["mx"] or 0)
     age_ms = max(0, _now_ms() - last_upd)
 
     # Composite score: start from 1.0, subtract normalized penalties
@@ -118,7 +614,7 @@ def assess_quality(limit: int = 500) -> Dict[str, Any]:
     if ent_total:
         score -= min(0.3, 0.3 * (orphan_count / max(1, ent_total)))
     if rel_total:
-        score -= min(0.4, 0.4 * (len(contradictions) / max(1, rel_total / 10)))
+        score -= min(0.4, 0.4 * (contradiction_count / max(1, rel_total / 10)))
     score -= min(0.2, 0.2 * (1.0 - min(1.0, avg_conf)))
     # Freshness penalty: if older than 24h, degrade up to 0.1
     day_ms = 24 * 3600 * 1000
@@ -130,11 +626,16 @@ def assess_quality(limit: int = 500) -> Dict[str, Any]:
         "relations": rel_total,
         "orphans": orphan_count,
         "contradictions": contradictions,
+        "contradiction_count": contradiction_count,
         "missing_props": missing_props,
         "avg_confidence": round(avg_conf, 4),
         "last_update_ms": last_upd,
         "age_ms": age_ms,
         "quality_score": round(max(0.0, min(1.0, score)), 4),
+        "processed": processed,
+        "source": "incremental" if reconciled_at else "full",
+        "reconciled_at": reconciled_at or None,
+        "stale": stale,
     }
 
 
@@ -232,8 +733,7 @@ def remediate_conflict(
 
 # ------------- Batch curation utilities -------------
 
-def find_dedup_candidates(limit: int = 100) -> List[Dict[str, Any]]:
-    """Return groups of entities with same normalized name as dedup candidates."""
+def _exact_name_groups(limit: int) -> List[Dict[str, Any]]:
     client = get_client()
     rows = client.run_query(
         """
@@ -247,69 +747,386 @@ def find_dedup_candidates(limit: int = 100) -> List[Dict[str, Any]]:
     return [dict(key=r["key"], ids=r["ids"]) for r in rows]
 
 
-def merge_entities(target_id: str, duplicate_ids: List[str], dry_run: bool = True, user_id: str | None = None) -> Dict[str, Any]:
-    """Merge duplicates into target by rewiring relationships and marking duplicates as merged.
-    When dry_run, return a plan only.
+def scan_dedup_candidates(limit: int = 100, threshold: Optional[float] = None, page_size: int = 2000) -> Dict[str, Any]:
+    """Near-duplicate entity groups by MinHash/LSH over name shingles (description when unnamed).
+
+    Entities are paged by id. Each signature is stored on its node (`minhash`, plus `minhashKey`
+    naming the parameters and normalised text it was computed from), so later runs only hash
+    new or changed entities. Merged duplicates are skipped. Groups are connected components
+    of candidate pairs whose estimated Jaccard similarity is at least `threshold`; each
+    carries the lowest pair similarity that joined it. Without numpy this falls back to
+    exact lowercased-name groups.
     """
-    plan = {
-        "target": target_id,
-        "duplicates": duplicate_ids,
-        "actions": [
-            "Rewire incoming and outgoing RELATED edges from duplicates to target",
-            "Mark duplicates with mergedInto",
-        ],
-    }
-    if dry_run:
-        return {"merged": 0, "plan": plan, "dry_run": True}
+    if not minhash_available():
+        return {"candidates": _exact_name_groups(limit), "method": "exact_name"}
+    cfg = get_config()
+    threshold = cfg.DEDUP_THRESHOLD if threshold is None else float(threshold)
+    hasher = MinHasher(num_perm=cfg.DEDUP_NUM_PERM)
     client = get_client()
-    now = _now_ms()
-    uid = str(user_id) if user_id is not None else None
-    # Rewire OUTGOING
-    client.run_query(
-        """
-        UNWIND $dups AS dup
-        MATCH (d:Entity {id: dup})-[r:RELATED]->(o:Entity)
-        WITH r, o
+    ids: List[str] = []
+    names: List[str] = []
+    sigs: List[Any] = []
+    stats: Dict[str, Any] = {"entities": 0, "hashed": 0, "reused": 0, "truncated": False}
+    after = ""
+    while True:
+        rows = client.run_query(
+            """
+            MATCH (e:Entity) WHERE e.id > $after
+            WITH e ORDER BY e.id LIMIT $page
+            RETURN e.id AS id, coalesce(e.name, e.description) AS text, e.minhash AS sig,
+                   e.minhashKey AS key, e.mergedInto IS NOT NULL AS merged
+            """,
+            {"after": after, "page": page_size},
+        )
+        if not rows:
+            break
+        after = rows[-1]["id"]
+        live = [r for r in rows if not r["merged"] and isinstance(r["text"], str) and normalize_for_shingles(r["text"])]
+        live = live[: max(0, cfg.DEDUP_MAX_ENTITIES - len(ids))]
+        keys = [hasher.text_key(r["text"]) for r in live]
+        page_sigs = np.empty((len(live), hasher.num_perm), dtype=np.uint32)
+        stale = []
+        for i, (r, key) in enumerate(zip(live, keys)):
+            sig = stored_signature(r["sig"], hasher.num_perm) if r["key"] == key else None
+            if sig is None:
+                stale.append(i)
+            else:
+                page_sigs[i] = sig
+        if stale:
+            page_sigs[stale] = hasher.signatures([live[i]["text"] for i in stale])
+            client.run_query(
+                "UNWIND $rows AS row MATCH (e:Entity {id: row.id}) SET e.minhash = row.sig, e.minhashKey = row.key",
+                {"rows": [{"id": live[i]["id"], "sig": page_sigs[i].tolist(), "key": keys[i]} for i in stale]},
+                access_mode=WRITE_ACCESS,
+            )
+        stats["hashed"] += len(stale)
+        stats["reused"] += len(live) - len(stale)
+        ids.extend(r["id"] for r in live)
+        names.extend(r["text"] for r in live)
+        sigs.append(page_sigs)
+        if len(ids) >= cfg.DEDUP_MAX_ENTITIES:
+            stats["truncated"] = True
+            break
+        if len(rows) < page_size:
+            break
+    stats["entities"] = len(ids)
+
+    matrix = np.concatenate(sigs) if sigs else np.zeros((0, hasher.num_perm), dtype=np.uint32)
+    pairs = candidate_pairs(matrix, cfg.DEDUP_LSH_BANDS)
+    scores = (matrix[pairs[:, 0]] == matrix[pairs[:, 1]]).mean(axis=1) if len(pairs) else np.zeros(0)
+    keep = scores >= threshold
+    groups = group_pairs(pairs[keep].tolist(), scores[keep].tolist())
+    groups.sort(key=lambda g: (-g[1], -len(g[0])))
+    stats.update(pairs=int(len(pairs)), accepted=int(keep.sum()), groups=len(groups))
+    candidates = [
+        dict(
+            key=normalize_for_shingles(names[members[0]]),
+            ids=[ids[i] for i in members],
+            names=[names[i] for i in members],
+            similarity=round(score, 4),
+        )
+        for members, score in groups[:limit]
+    ]
+    return {"candidates": candidates, "method": "minhash", "threshold": threshold, "stats": stats}
+
+
+def find_dedup_candidates(limit: int = 100) -> List[Dict[str, Any]]:
+    """Return groups of near-duplicate entities as dedup candidates (see `scan_dedup_candidates`)."""
+    return scan_dedup_candidates(limit=limit)["candidates"]
+
+
+# Per-direction statements moving up to $batch RELATED edges of one duplicate onto the target.
+# Each returns the deleted edge's qaConfidence, so the quality aggregates can be adjusted, and
+# the (subject, predicate) key the moved edge now belongs to, for the contradiction index.
+_REWIRE = {
+    "out": """
+        MATCH (d:Entity {id: $dup})-[r:RELATED]->(o:Entity)
+        WITH r, o LIMIT $batch
         MATCH (t:Entity {id: $target})
         MERGE (t)-[nr:RELATED {type: r.type}]->(o)
+        WITH r, nr, nr.qaConfidence AS qaConfidence, nr.qaSeen AS qaSeen
         SET nr += properties(r)
         SET nr.version = coalesce(nr.version,0)+1,
-            nr.lastUpdated = $now,
+            nr.lastUpdated = timestamp(),
             nr.updatedBy = $uid,
-            nr.provenance = coalesce(nr.provenance, []) + [{by: $uid, at: $now, action: 'merge_rewire_out'}]
+            nr.provenance = coalesce(nr.provenance, []) + [{by: $uid, at: timestamp(), action: 'merge_rewire_out'}],
+            nr.qaConfidence = qaConfidence, nr.qaSeen = qaSeen
+        WITH r, r.qaConfidence AS counted, r.type AS pred
         DELETE r
-        """,
-        {"dups": duplicate_ids, "target": target_id, "now": now, "uid": uid},
-    )
-    # Rewire INCOMING
-    client.run_query(
-        """
-        UNWIND $dups AS dup
-        MATCH (s:Entity)-[r:RELATED]->(d:Entity {id: dup})
-        WITH r, s
+        RETURN counted, pred, $target AS sid
+    """,
+    "in": """
+        MATCH (s:Entity)-[r:RELATED]->(d:Entity {id: $dup})
+        WITH r, s LIMIT $batch
         MATCH (t:Entity {id: $target})
         MERGE (s)-[nr:RELATED {type: r.type}]->(t)
+        WITH r, nr, nr.qaConfidence AS qaConfidence, nr.qaSeen AS qaSeen
         SET nr += properties(r)
         SET nr.version = coalesce(nr.version,0)+1,
-            nr.lastUpdated = $now,
+            nr.lastUpdated = timestamp(),
             nr.updatedBy = $uid,
-            nr.provenance = coalesce(nr.provenance, []) + [{by: $uid, at: $now, action: 'merge_rewire_in'}]
+            nr.provenance = coalesce(nr.provenance, []) + [{by: $uid, at: timestamp(), action: 'merge_rewire_in'}],
+            nr.qaConfidence = qaConfidence, nr.qaSeen = qaSeen
+        WITH r, r.qaConfidence AS counted, r.type AS pred, s.id AS sid
         DELETE r
+        RETURN counted, pred, sid
+    """,
+}
+# A journal whose owner has not written for this long is considered abandoned and can be resumed
+_MERGE_STALE_MS = 300_000
+
+
+class MergeOwnershipLost(RuntimeError):
+    """Another worker took over the merge journal (ours looked abandoned)."""
+
+
+def merge_journal_id(target_id: str, duplicate_ids: List[str]) -> str:
+    """Journal key of a merge plan; the same target and duplicate set always map to the same journal."""
+    key = "\0".join([target_id, *sorted(set(duplicate_ids))])
+    return "merge-" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def get_merge_journal(journal_id: str) -> Optional[Dict[str, Any]]:
+    rows = get_client().run_query(
+        "MATCH (j:MergeJournal {id: $id}) RETURN properties(j) AS j", {"id": journal_id}
+    )
+    return dict(rows[0]["j"]) if rows else None
+
+
+def _claim_merge(client, journal_id: str, target_id: str, dups: List[str], owner: str, uid: str | None, now: int):
+    rows = client.run_query(
+        """
+        MERGE (j:MergeJournal {id: $id})
+        ON CREATE SET j.target = $target, j.duplicates = $dups, j.createdBy = $uid, j.created_at = $now
+        WITH j
+        WHERE coalesce(j.status, '') <> 'running' OR coalesce(j.heartbeat, 0) < $stale
+        FOREACH (_ IN CASE WHEN j.status IS NULL OR j.status = 'done' THEN [1] ELSE [] END |
+            SET j.done = [], j.moved_out = 0, j.moved_in = 0, j.batches = 0,
+                j.started_at = $now, j.mergeAt = $now, j.completed_at = null)
+        SET j.status = 'running', j.owner = $owner, j.heartbeat = $now, j.error = null
+        RETURN properties(j) AS j
         """,
-        {"dups": duplicate_ids, "target": target_id, "now": now, "uid": uid},
+        {
+            "id": journal_id, "target": target_id, "dups": dups, "uid": uid, "owner": owner,
+            "now": now, "stale": now - _MERGE_STALE_MS,
+        },
+        access_mode=WRITE_ACCESS,
     )
-    # Mark duplicates
-    client.run_query(
+    return dict(rows[0]["j"]) if rows else None
+
+
+def _journal_tx(tx, journal_id: str, owner: str, props: Dict[str, Any], moved_out: int = 0, moved_in: int = 0,
+                qa_sum: float = 0.0, qa_count: int = 0) -> None:
+    rec = tx.run(
+        """
+        MATCH (j:MergeJournal {id: $id}) WHERE j.owner = $owner
+        SET j += $props, j.heartbeat = timestamp(), j.batches = j.batches + 1,
+            j.moved_out = j.moved_out + $out, j.moved_in = j.moved_in + $in,
+            j.qa_removed_sum = coalesce(j.qa_removed_sum, 0.0) + $qa_sum,
+            j.qa_removed_count = coalesce(j.qa_removed_count, 0) + $qa_count
+        FOREACH (_ IN CASE WHEN $qa_count > 0 THEN [1] ELSE [] END | SET j:QualityPending)
+        RETURN j.id AS id
+        """,
+        {
+            "id": journal_id, "owner": owner, "props": props, "out": moved_out, "in": moved_in,
+            "qa_sum": qa_sum, "qa_count": qa_count,
+        },
+    ).single()
+    if rec is None:
+        # Raising rolls the whole batch back, so nothing moves without being journaled
+        raise MergeOwnershipLost(journal_id)
+
+
+def _rewire_batch_tx(tx, journal_id: str, owner: str, direction: str, dup: str, target_id: str,
+                     batch: int, uid: str | None) -> int:
+    rows = list(tx.run(
+        _REWIRE[direction], {"dup": dup, "target": target_id, "batch": batch, "uid": uid}
+    ))
+    # Deleted edges the quality aggregates already counted; the next delta pass subtracts them
+    counted = [float(r["counted"]) for r in rows if r["counted"] is not None]
+    keys = {(r["sid"], r["pred"]) for r in rows}
+    if direction == "out":
+        keys |= {(dup, r["pred"]) for r in rows}
+    refresh_contradiction_keys(tx, [{"sid": sid, "pred": pred} for sid, pred in sorted(keys)])
+    moved = {"out": 0, "in": 0}
+    moved[direction] = len(rows)
+    _journal_tx(tx, journal_id, owner, {"current": dup}, moved["out"], moved["in"], sum(counted), len(counted))
+    return len(rows)
+
+
+def _mark_merged_tx(tx, journal_id: str, owner: str, dup: str, target_id: str, uid: str | None) -> None:
+    tx.run(
+        """
+        MATCH (d:Entity {id: $dup})
+        SET d.mergedAt = CASE WHEN d.mergedInto = $target THEN coalesce(d.mergedAt, timestamp()) ELSE timestamp() END,
+            d.mergedInto = $target,
+            d.mergedBy = $uid,
+            d.updatedAt = timestamp()
+        """,
+        {"dup": dup, "target": target_id, "uid": uid},
+    )
+    tx.run(
+        "MATCH (j:MergeJournal {id: $id}) SET j.done = coalesce(j.done, []) + $dup",
+        {"id": journal_id, "dup": dup},
+    )
+    _journal_tx(tx, journal_id, owner, {"current": None})
+
+
+def _execute_merge(target_id: str, duplicate_ids: List[str], user_id: str | None) -> Dict[str, Any]:
+    cfg = get_config()
+    client = get_client()
+    batch = max(1, int(cfg.MERGE_BATCH_SIZE))
+    dups = list(dict.fromkeys(d for d in duplicate_ids if d and d != target_id))
+    uid = str(user_id) if user_id is not None else None
+    journal_id = merge_journal_id(target_id, dups)
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    journal = _claim_merge(client, journal_id, target_id, dups, owner, uid, _now_ms())
+    if journal is None:
+        return {"merged": 0, "journal": journal_id, "status": "running", "reason": "in_progress"}
+    # Batches are stamped with their own commit-time timestamp() rather than the journal's
+    # mergeAt, so the quality delta pass (which trails its watermark by _WATERMARK_LAG_MS) still
+    # sees edges rewired, and duplicates emptied, long after the merge started or resumed
+    done = set(journal.get("done") or [])
+    resumed = bool(done) or bool(journal.get("batches"))
+    try:
+        for dup in dups:
+            if dup in done:
+                continue
+            for direction in ("out", "in"):
+                while True:
+                    t0 = time.perf_counter()
+                    moved = client.write_tx(
+                        _rewire_batch_tx, journal_id, owner, direction, dup, target_id, batch, uid
+                    )
+                    record_merge_batch(direction, time.perf_counter() - t0, moved)
+                    if moved < batch:
+                        break
+            t0 = time.perf_counter()
+            client.write_tx(_mark_merged_tx, journal_id, owner, dup, target_id, uid)
+            record_merge_batch("mark", time.perf_counter() - t0, 0)
+            # A merged duplicate must stop answering ANN fallback searches
+            remove_embedding("Entity", dup)
+            done.add(dup)
+    except MergeOwnershipLost:
+        return {"merged": len(done), "journal": journal_id, "status": "running", "reason": "in_progress"}
+    except Exception as e:
+        logger.exception("merge %s into %s failed", journal_id, target_id)
+        client.run_query(
+            "MATCH (j:MergeJournal {id: $id}) WHERE j.owner = $owner SET j.status = 'failed', j.error = $error",
+            {"id": journal_id, "owner": owner, "error": str(e)},
+            access_mode=WRITE_ACCESS,
+        )
+        return {"merged": len(done), "journal": journal_id, "status": "failed", "error": str(e)}
+    rows = client.run_query(
+        """
+        MATCH (j:MergeJournal {id: $id}) WHERE j.owner = $owner
+        SET j.status = 'done', j.completed_at = timestamp(), j.heartbeat = timestamp()
+        RETURN j.moved_out AS moved_out, j.moved_in AS moved_in, j.batches AS batches
+        """,
+        {"id": journal_id, "owner": owner},
+        access_mode=WRITE_ACCESS,
+    )
+    # Cached searches may still return the duplicates or their old edges
+    invalidate_search_cache()
+    stats = rows[0] if rows else {}
+    return {
+        "merged": len(dups),
+        "journal": journal_id,
+        "status": "done",
+        "resumed": resumed,
+        "moved": {"out": int(stats.get("moved_out") or 0), "in": int(stats.get("moved_in") or 0)},
+        "batches": int(stats.get("batches") or 0),
+    }
+
+
+def merge_entities(target_id: str, duplicate_ids: List[str], dry_run: bool = True, user_id: str | None = None) -> Dict[str, Any]:
+    """Merge duplicates into target by rewiring relationships and marking duplicates as merged.
+    When dry_run, return a plan only.
+
+    Edges move in MERGE_BATCH_SIZE batches per duplicate and direction. Each batch runs in its
+    own write transaction, together with a progress update on the plan's `(:MergeJournal)`, so a
+    hub with 100k edges never needs one huge transaction and an interrupted merge leaves only
+    whole batches behind. The journal also collects the confidence of deleted edges for the next
+    quality delta pass, so merges never contend on the shared (:QualityState). Rewired edges are deleted from
+    the duplicate, so calling again with the same plan resumes where it stopped; a journal held
+    by a live worker yields status "running" instead.
+    """
+    plan = {
+        "target": target_id,
+        "duplicates": duplicate_ids,
+        "actions": [
+            "Rewire incoming and outgoing RELATED edges from duplicates to target",
+            "Mark duplicates with mergedInto",
+        ],
+    }
+    if dry_run:
+        return {"merged": 0, "plan": plan, "dry_run": True}
+    return {**_execute_merge(target_id, duplicate_ids, user_id), "plan": plan}
+
+
+def _merge_footprint(client, target_id: str, duplicate_ids: List[str], cap: int) -> Optional[set]:
+    """Entity ids a merge writes or locks; None when the neighbourhood is larger than `cap`."""
+    rows = client.run_query(
         """
-        UNWIND $dups AS dup
-        MATCH (d:Entity {id: dup})
-        SET d.mergedInto = $target,
-            d.mergedAt = $now,
-            d.mergedBy = $uid
+        MATCH (d:Entity) WHERE d.id IN $dups
+        MATCH (d)-[:RELATED]-(n:Entity)
+        RETURN DISTINCT n.id AS id LIMIT $cap
         """,
-        {"dups": duplicate_ids, "target": target_id, "now": now, "uid": uid},
+        {"dups": duplicate_ids, "cap": cap + 1},
     )
-    return {"merged": len(duplicate_ids), "plan": plan}
+    if len(rows) > cap:
+        return None
+    return {target_id, *duplicate_ids, *(r["id"] for r in rows)}
+
+
+def _merge_waves(footprints: List[Optional[set]]) -> List[List[int]]:
+    """Group plan indexes into waves of disjoint footprints, never ahead of an overlapping earlier plan."""
+    waves: List[List[int]] = []
+    used: List[Optional[set]] = []
+    for i, fp in enumerate(footprints):
+        last = -1
+        for w, u in enumerate(used):
+            if fp is None or u is None or u & fp:
+                last = w
+        if last + 1 < len(waves):
+            waves[last + 1].append(i)
+            used[last + 1] |= fp  # type: ignore[operator]
+        else:
+            waves.append([i])
+            used.append(None if fp is None else set(fp))
+    return waves
+
+
+def merge_entities_batch(plans: List[Dict[str, Any]], dry_run: bool = True, user_id: str | None = None) -> Dict[str, Any]:
+    """Run many merge plans ({target_id, duplicate_ids}); plans whose neighbourhoods do not overlap run in parallel.
+
+    Footprints (target, duplicates and their neighbours) are read once up front; a plan whose
+    footprint exceeds MERGE_FOOTPRINT_MAX runs alone. Edges added while the batch runs can make
+    plans contend for locks; Neo4j then reports a transient deadlock and write_tx retries.
+    """
+    if dry_run:
+        results = [merge_entities(p["target_id"], p["duplicate_ids"], dry_run=True) for p in plans]
+        return {"results": results, "waves": 0, "dry_run": True}
+    cfg = get_config()
+    client = get_client()
+    footprints = [
+        _merge_footprint(client, p["target_id"], p["duplicate_ids"], int(cfg.MERGE_FOOTPRINT_MAX)) for p in plans
+    ]
+    waves = _merge_waves(footprints)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(plans)
+
+    def _run(i: int) -> None:
+        results[i] = merge_entities(plans[i]["target_id"], plans[i]["duplicate_ids"], dry_run=False, user_id=user_id)
+
+    workers = max(1, int(cfg.MERGE_PARALLELISM))
+    for wave in waves:
+        if workers == 1 or len(wave) == 1:
+            for i in wave:
+                _run(i)
+            continue
+        with ThreadPoolExecutor(max_workers=min(workers, len(wave)), thread_name_prefix="kg-merge") as pool:
+            list(pool.map(_run, wave))
+    return {"results": results, "waves": len(waves)}
 
 
 def record_quality_snapshot(metrics: Dict[str, Any], user_id: str | None = None) -> None:
@@ -351,31 +1168,9 @@ def get_quality_trend(limit: int = 50) -> List[Dict[str, Any]]:
 
 
 def enrich_embeddings(limit: int = 200) -> Dict[str, Any]:
-    """Compute embeddings for entities missing them (no-op if embeddings disabled)."""
-    if not vector_search_enabled():
-        return {"updated": 0, "reason": "embeddings_disabled"}
-    client = get_client()
-    rows = client.run_query(
-        """
-        MATCH (e:Entity) WHERE e.embedding IS NULL
-        WITH e, coalesce(e.name, e.description, e.id) AS text
-        WHERE text IS NOT NULL AND text <> ''
-        RETURN e.id AS id, text LIMIT $limit
-        """,
-        {"limit": limit},
-    )
-    updated = 0
-    for r in rows:
-        try:
-            emb = get_query_embedding(r["text"])
-            client.run_query(
-                """
-                MATCH (e:Entity {id: $id})
-                SET e.embedding = $emb, e.updatedAt = timestamp()
-                """,
-                {"id": r["id"], "emb": emb},
-            )
-            updated += 1
-        except Exception:
-            continue
-    return {"updated": updated}
+    """Embed up to `limit` entities missing an embedding, continuing the default enrichment job.
+
+    See api.services.embedding_enrichment for the checkpointed, rate-limited pipeline; long
+    backlogs should go through start_enrichment or scripts/maintenance/enrich_embeddings.py.
+    """
+    return run_enrichment(max_entities=limit)
@@ -16,6 +16,18 @@ except Exception:  # pragma: no cover
 from ..utils.audit import audit_event
 from ..utils.rabbitmq import publish_exchange
 from ..utils.neo4j_client import get_client
+from ..utils.write_coalescer import coalesce_write
+
+# Append-only telemetry, written in batches by the write coalescer
+_METRIC_SNAPSHOT_WRITE = (
+    "UNWIND $rows AS row "
+    "CREATE (m:MetricSnapshot {id: row.id, at: row.at, metrics: row.metrics})"
+)
+_ANOMALY_WRITE = (
+    "UNWIND $rows AS row "
+    "CREATE (a:AnomalyEvent {id: row.id, at: row.at, metric: row.metric, value: row.value, "
+    "baseline: row.baseline, zscore: row.z, severity: row.sev, hint: row.hint})"
+)
 
 
 @dataclass
@@ -431,22 +443,21 @@ class SelfHealingService:
         return st["level"] + steps * st["trend"]
 
     def record_metrics_snapshot(self, metrics: Dict[str, float]) -> None:
-        client = get_client()
-        client.run_query(
-            """
-            CREATE (m:MetricSnapshot {id: $id, at: timestamp(), metrics: $metrics})
-            """,
-            {"id": str(uuid.uuid4()), "metrics": metrics},
+        coalesce_write(
+            "MetricSnapshot",
+            _METRIC_SNAPSHOT_WRITE,
+            {"id": str(uuid.uuid4()), "at": int(time.time() * 1000), "metrics": metrics},
+            client_factory=get_client,
+            wait=False,
         )
 
     def record_anomaly(self, anomaly: Anomaly) -> None:
-        client = get_client()
-        client.run_query(
-            """
-            CREATE (a:AnomalyEvent {id: $id, at: timestamp(), metric: $metric, value: $value, baseline: $baseline, zscore: $z, severity: $sev, hint: $hint})
-            """,
+        coalesce_write(
+            "AnomalyEvent",
+            _ANOMALY_WRITE,
             {
                 "id": str(uuid.uuid4()),
+                "at": int(time.time() * 1000),
                 "metric": anomaly.metric,
                 "value": anomaly.value,
                 "baseline": anomaly.baseline,
@@ -454,6 +465,8 @@ class SelfHealingService:
                 "sev": anomaly.severity,
                 "hint": anomaly.hint,
             },
+            client_factory=get_client,
+            wait=False,
         )
 
     def get_metric_trend(self, metric: str, limit: int = 100) -> List[Tuple[int, float]]:
@@ -0,0 +1,651 @@
+"""
+In-process approximate nearest-neighbour index over entity embeddings.
+
+Semantic search normally goes through the Neo4j vector indexes (`knowledge_embeddings` on
+KnowledgeEntity.embedding, `entityEmbedding` on Entity.embedding). When those are missing
+(Community edition, a fresh database, an index still populating) the search paths fall back
+to this index, one per label.
+
+The index is IVF-flat over L2-normalised float32 vectors, so the dot product is the cosine
+similarity. Vectors are partitioned into `nlist` spherical k-means cells; a query ranks the
+centroids and scans only the `nprobe` closest cells. Small indexes (< 1024 vectors) use a
+single cell, i.e. exact brute force.
+
+On disk, ANN_INDEX_DIR/<label>/ holds one generation of files named by `manifest.json`:
+
+    vectors-<gen>.npy    float32 [n, dim], opened with mmap_mode="r"
+    assign-<gen>.npy     int32 [n] cell of each row
+    centroids-<gen>.npy  float32 [nlist, dim]
+    ids-<gen>.json       entity id of each row
+
+The manifest is replaced atomically, so a reader never sees a mix of generations even when
+several workers save. Writes after load go to an in-memory tail that is scanned exactly and
+folded into the base on `compact()`/`save()`; replaced and removed base rows are masked out.
+
+Each worker also logs its own upserts and removals since load. At exit it writes them as a
+`segment-<gen>.npz` next to the manifest instead of rewriting the base, so concurrent workers
+never overwrite each other's updates. `load()` replays every segment in timestamp order;
+`save()` folds them into a new generation and deletes them. Loads, segment writes and saves
+serialise on an flock of `<label>/.lock` where fcntl exists.
+NumPy is optional: without it `ann_available()` is False and callers keep their old path.
+"""
+from __future__ import annotations
+
+import atexit
+import contextlib
+import glob
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+
+try:
+    import fcntl  # type: ignore
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore
+
+from ..config import get_config
+from ..metrics import record_ann_search
+
+logger = logging.getLogger(__name__)
+
+# Label -> name of the Neo4j vector index this index stands in for
+LABELS = {"KnowledgeEntity": "knowledge_embeddings", "Entity": "entityEmbedding"}
+
+_FLAT_BELOW = 1024
+_KMEANS_ITERS = 10
+_TRAIN_SAMPLE_PER_CELL = 64
+_ASSIGN_CHUNK = 65536
+_MAX_SEGMENTS = 16
+_generations = itertools.count()
+
+# (timestamp, entity id, unit vector or None for a removal)
+Change = Tuple[float, str, Optional["np.ndarray"]]
+
+
+def _normalize(mat: "np.ndarray") -> "np.ndarray":
+    mat = np.asarray(mat, dtype=np.float32)
+    norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+def _top_k(scores: "np.ndarray", k: int) -> "np.ndarray":
+    if k >= scores.shape[0]:
+        return np.argsort(-scores, kind="stable")
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+def _assign(vectors: "np.ndarray", centroids: "np.ndarray") -> "np.ndarray":
+    out = np.empty(vectors.shape[0], dtype=np.int32)
+    for start in range(0, vectors.shape[0], _ASSIGN_CHUNK):
+        chunk = np.asarray(vectors[start:start + _ASSIGN_CHUNK], dtype=np.float32)
+        out[start:start + chunk.shape[0]] = np.argmax(chunk @ centroids.T, axis=1)
+    return out
+
+
+def train_centroids(vectors: "np.ndarray", nlist: int, seed: int = 0) -> "np.ndarray":
+    """Spherical k-means on a sample of at most nlist * 64 rows."""
+    rng = np.random.default_rng(seed)
+    n = vectors.shape[0]
+    sample_n = min(n, nlist * _TRAIN_SAMPLE_PER_CELL)
+    sample = np.asarray(vectors[np.sort(rng.choice(n, sample_n, replace=False))], dtype=np.float32)
+    centroids = sample[rng.choice(sample_n, nlist, replace=False)].copy()
+    for _ in range(_KMEANS_ITERS):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=nlist)
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = sample[rng.choice(sample_n, int(empty.sum()), replace=False)]
+        centroids = _normalize(sums)
+    return centroids
+
+
+class AnnIndex:
+    """IVF-flat cosine index keyed by entity id. Thread-safe; see module docstring."""
+
+    def __init__(self, dim: Optional[int] = None, nlist: int = 0, nprobe: int = 8) -> None:
+        if np is None:
+            raise RuntimeError("numpy is required for the in-process ANN index")
+        self.dim = dim
+        self.nlist_hint = int(nlist)
+        self.nprobe = max(1, int(nprobe))
+        self._lock = threading.RLock()
+        self._base = np.zeros((0, dim or 0), dtype=np.float32)
+        self._base_ids: List[str] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._centroids: Optional["np.ndarray"] = None
+        self._cells: List["np.ndarray"] = []
+        self._trained_on = 0
+        self._rows: Dict[str, int] = {}
+        self._tail: Dict[str, "np.ndarray"] = {}
+        self._tail_cache: Optional[Tuple[List[str], "np.ndarray"]] = None
+        # Upserts/removals since load, persisted as this worker's segment
+        self._changes: Dict[str, Tuple[float, Optional["np.ndarray"]]] = {}
+        # Set by build(): segment changes older than this are already in the source
+        self.built_at: Optional[float] = None
+        self.dirty = False
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._alive.sum()) + len(self._tail)
+
+    def __contains__(self, entity_id: str) -> bool:
+        with self._lock:
+            return entity_id in self._tail or entity_id in self._rows
+
+    # -----------------------------
+    # Build / incremental updates
+    # -----------------------------
+    def build(self, ids: Sequence[str], vectors: Any) -> "AnnIndex":
+        """Replace the contents with (ids, vectors) and retrain the cells; later ids win."""
+        mat = np.asarray(vectors, dtype=np.float32)
+        if mat.ndim != 2 or mat.shape[0] != len(ids):
+            raise ValueError("vectors must be a [len(ids), dim] matrix")
+        last: Dict[str, int] = {}
+        for i, eid in enumerate(ids):
+            last[str(eid)] = i
+        keep = np.fromiter(last.values(), dtype=np.int64, count=len(last))
+        with self._lock:
+            self._set_base(list(last.keys()), _normalize(mat[keep]) if len(keep) else mat[:0])
+            self._tail.clear()
+            self._tail_cache = None
+            self._changes.clear()
+            if self.built_at is None:
+                self.built_at = time.time()
+            self.dirty = True
+        return self
+
+    def upsert(self, entity_id: str, vector: Sequence[float]) -> None:
+        vec = _normalize(np.asarray(vector, dtype=np.float32).reshape(-1))
+        with self._lock:
+            self._upsert_unit(entity_id, vec)
+            self._changes[entity_id] = (time.time(), vec)
+
+    def _upsert_unit(self, entity_id: str, vec: "np.ndarray") -> None:
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vec.shape[0])
+                self._base = np.zeros((0, self.dim), dtype=np.float32)
+            if vec.shape[0] != self.dim:
+                raise ValueError(f"expected a {self.dim}-dimensional vector, got {vec.shape[0]}")
+            row = self._rows.pop(entity_id, None)
+            if row is not None:
+                self._alive[row] = False
+            self._tail[entity_id] = vec
+            self._tail_cache = None
+            self.dirty = True
+            if len(self._tail) > max(_FLAT_BELOW, len(self._base_ids) // 10):
+                self.compact()
+
+    def remove(self, entity_id: str) -> bool:
+        with self._lock:
+            found = self._remove(entity_id)
+            if found:
+                self._changes[entity_id] = (time.time(), None)
+            return found
+
+    def _remove(self, entity_id: str) -> bool:
+        row = self._rows.pop(entity_id, None)
+        if row is not None:
+            self._alive[row] = False
+        found = self._tail.pop(entity_id, None) is not None or row is not None
+        if found:
+            self._tail_cache = None
+            self.dirty = True
+        return found
+
+    def _apply(self, changes: Iterable[Change], newer_than: Optional[float] = None) -> None:
+        """Replay persisted changes in order; ones this index has since superseded are skipped."""
+        for ts, eid, vec in changes:
+            if newer_than is not None and ts <= newer_than:
+                continue
+            own = self._changes.get(eid)
+            if own is not None and own[0] >= ts:
+                continue
+            if vec is None:
+                self._remove(eid)
+            elif self.dim is None or vec.shape[0] == self.dim:
+                self._upsert_unit(eid, vec)
+
+    def compact(self) -> None:
+        """Fold the tail into the base and drop masked rows; retrain once the base has doubled."""
+        with self._lock:
+            live = np.flatnonzero(self._alive)
+            ids = [self._base_ids[i] for i in live] + list(self._tail.keys())
+            parts = [np.asarray(self._base[live], dtype=np.float32)]
+            if self._tail:
+                parts.append(np.stack(list(self._tail.values())))
+            mat = np.concatenate(parts) if len(parts) > 1 else parts[0]
+            retrain = self._centroids is None or len(ids) >= 2 * max(self._trained_on, 1)
+            self._set_base(ids, mat, centroids=None if retrain else self._centroids)
+            self._tail.clear()
+            self._tail_cache = None
+
+    def _set_base(self, ids: List[str], mat: "np.ndarray", centroids: Optional["np.ndarray"] = None) -> None:
+        n = len(ids)
+        if n and self.dim is None:
+            self.dim = int(mat.shape[1])
+        self._base = mat
+        self._base_ids = ids
+        self._alive = np.ones(n, dtype=bool)
+        self._rows = {eid: i for i, eid in enumerate(ids)}
+        if centroids is None:
+            nlist = self.nlist_hint or (1 if n < _FLAT_BELOW else int(np.sqrt(n)))
+            nlist = max(1, min(nlist, n))
+            centroids = train_centroids(mat, nlist) if n and nlist > 1 else None
+            self._trained_on = n
+        self._centroids = centroids
+        self._cells = self._split(_assign(mat, centroids)) if centroids is not None and n else []
+
+    def _split(self, assign: "np.ndarray") -> List["np.ndarray"]:
+        order = np.argsort(assign, kind="stable")
+        bounds = np.cumsum(np.bincount(assign, minlength=self._centroids.shape[0]))[:-1]
+        return np.split(order, bounds)
+
+    # -----------------------------
+    # Query
+    # -----------------------------
+    def search(
+        self,
+        query: Sequence[float],
+        k: int = 10,
+        threshold: Optional[float] = None,
+        nprobe: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """Top-k (entity_id, cosine similarity) pairs, best first; scores <= threshold are dropped."""
+        if k <= 0:
+            return []
+        q = _normalize(np.asarray(query, dtype=np.float32).reshape(-1))
+        with self._lock:
+            if self.dim is None or q.shape[0] != self.dim:
+                return []
+            ids: List[str] = []
+            scores: List["np.ndarray"] = []
+
+            rows = self._candidate_rows(q, nprobe or self.nprobe)
+            if rows.shape[0]:
+                ids.extend(self._base_ids[i] for i in rows)
+                scores.append(np.asarray(self._base[rows], dtype=np.float32) @ q)
+            if self._tail:
+                if self._tail_cache is None:
+                    self._tail_cache = (list(self._tail.keys()), np.stack(list(self._tail.values())))
+                tail_ids, tail_mat = self._tail_cache
+                ids.extend(tail_ids)
+                scores.append(tail_mat @ q)
+        if not ids:
+            return []
+        all_scores = np.concatenate(scores)
+        out = []
+        for i in _top_k(all_scores, k):
+            s = float(all_scores[i])
+            if threshold is not None and s <= threshold:
+                break
+            out.append((ids[i], s))
+        return out
+
+    def _candidate_rows(self, q: "np.ndarray", nprobe: int) -> "np.ndarray":
+        if not self._base_ids:
+            return np.zeros(0, dtype=np.int64)
+        if self._centroids is None:
+            rows = np.arange(len(self._base_ids))
+        else:
+            cells = _top_k(self._centroids @ q, min(nprobe, self._centroids.shape[0]))
+            rows = np.sort(np.concatenate([self._cells[c] for c in cells]))
+        return rows[self._alive[rows]]
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def save(self, path: str) -> None:
+        """Fold in other workers' segments, compact and write a new generation under `path`."""
+        os.makedirs(path, exist_ok=True)
+        with _dir_lock(path), self._lock:
+            segments = _segment_files(path)
+            self._apply(_read_segments(segments), newer_than=self.built_at)
+            self._write_generation(path)
+            self._changes.clear()
+            self.built_at = None
+        for name in segments:
+            _remove_quietly(name)
+
+    def save_tail(self, path: str) -> None:
+        """Persist this worker's changes since load as a new segment; the base is untouched."""
+        os.makedirs(path, exist_ok=True)
+        with _dir_lock(path), self._lock:
+            if not self._changes:
+                self.dirty = False
+                return
+            gen = f"{int(time.time() * 1000)}-{os.getpid()}-{next(_generations)}"
+            items = sorted(self._changes.items(), key=lambda kv: kv[1][0])
+            dim = self.dim or 0
+            vectors = np.zeros((len(items), dim), dtype=np.float32)
+            for i, (_, (_, vec)) in enumerate(items):
+                if vec is not None:
+                    vectors[i] = vec
+            tmp = os.path.join(path, f".segment-{gen}.tmp.npz")
+            np.savez(
+                tmp,
+                ids=np.array([eid for eid, _ in items], dtype=str),
+                ts=np.array([ts for _, (ts, _) in items], dtype=np.float64),
+                live=np.array([vec is not None for _, (_, vec) in items], dtype=bool),
+                vectors=vectors,
+            )
+            os.replace(tmp, os.path.join(path, f"segment-{gen}.npz"))
+            self._changes.clear()
+            self.dirty = False
+
+    def _write_generation(self, path: str) -> None:
+        with self._lock:
+            self.compact()
+            gen = f"{int(time.time() * 1000)}-{os.getpid()}-{next(_generations)}"
+            files = {
+                "vectors": f"vectors-{gen}.npy",
+                "assign": f"assign-{gen}.npy",
+                "centroids": f"centroids-{gen}.npy",
+                "ids": f"ids-{gen}.json",
+            }
+            n = len(self._base_ids)
+            assign = np.zeros(n, dtype=np.int32)
+            for c, rows in enumerate(self._cells):
+                assign[rows] = c
+            np.save(os.path.join(path, files["vectors"]), np.asarray(self._base, dtype=np.float32))
+            np.save(os.path.join(path, files["assign"]), assign)
+            centroids = self._centroids if self._centroids is not None else np.zeros((0, self.dim or 0), np.float32)
+            np.save(os.path.join(path, files["centroids"]), centroids)
+            with open(os.path.join(path, files["ids"]), "w", encoding="utf-8") as f:
+                json.dump(self._base_ids, f)
+            manifest = {"files": files, "dim": self.dim, "count": n, "trained_on": self._trained_on, "saved_at": time.time()}
+            tmp = os.path.join(path, f"manifest.json.{gen}")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            previous = _read_manifest(path)
+            os.replace(tmp, os.path.join(path, "manifest.json"))
+            self._base = np.load(os.path.join(path, files["vectors"]), mmap_mode="r")
+            self.dirty = False
+        if previous:
+            for name in previous["files"].values():
+                if name not in files.values():
+                    _remove_quietly(os.path.join(path, name))
+
+    @classmethod
+    def load(cls, path: str, nprobe: int = 8, nlist: int = 0) -> Optional["AnnIndex"]:
+        """Open the current generation under `path` (vectors memory-mapped) and replay segments.
+
+        None if nothing was ever saved there.
+        """
+        with _dir_lock(path):
+            manifest = _read_manifest(path)
+            segments = _segment_files(path)
+            if not manifest and not segments:
+                return None
+            idx = cls._load_generation(path, manifest, nprobe=nprobe, nlist=nlist)
+            idx._apply(_read_segments(segments))
+        idx.dirty = False
+        return idx
+
+    @classmethod
+    def _load_generation(cls, path: str, manifest: Optional[Dict[str, Any]], nprobe: int, nlist: int) -> "AnnIndex":
+        if not manifest:
+            return cls(nlist=nlist, nprobe=nprobe)
+        files = manifest["files"]
+        vectors = np.load(os.path.join(path, files["vectors"]), mmap_mode="r")
+        assign = np.load(os.path.join(path, files["assign"]))
+        centroids = np.load(os.path.join(path, files["centroids"]))
+        with open(os.path.join(path, files["ids"]), encoding="utf-8") as f:
+            ids = json.load(f)
+        if vectors.shape[0] != len(ids) or assign.shape[0] != len(ids):
+            raise ValueError(f"ANN index at {path} is inconsistent")
+        idx = cls(dim=manifest.get("dim") or (int(vectors.shape[1]) if vectors.ndim == 2 else None), nlist=nlist, nprobe=nprobe)
+        idx._base = vectors
+        idx._base_ids = ids
+        idx._alive = np.ones(len(ids), dtype=bool)
+        idx._rows = {eid: i for i, eid in enumerate(ids)}
+        idx._trained_on = int(manifest.get("trained_on") or len(ids))
+        if centroids.shape[0]:
+            idx._centroids = np.asarray(centroids, dtype=np.float32)
+            idx._cells = idx._split(assign)
+        return idx
+
+
+def _read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _segment_files(path: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(path, "segment-*.npz")))
+
+
+def _read_segments(files: Sequence[str]) -> List[Change]:
+    """All changes in `files`, oldest first; unreadable segments are skipped."""
+    out: List[Change] = []
+    for name in files:
+        try:
+            with np.load(name) as seg:
+                ids, ts, live, vectors = seg["ids"], seg["ts"], seg["live"], seg["vectors"]
+        except (OSError, ValueError, KeyError):
+            logger.warning("skipping unreadable ANN segment %s", name, exc_info=True)
+            continue
+        for i in range(len(ids)):
+            out.append((float(ts[i]), str(ids[i]), np.asarray(vectors[i], dtype=np.float32) if live[i] else None))
+    out.sort(key=lambda c: c[0])
+    return out
+
+
+def _remove_quietly(name: str) -> None:
+    try:
+        os.remove(name)
+    except OSError:
+        pass
+
+
+@contextlib.contextmanager
+def _dir_lock(path: str) -> Iterator[None]:
+    """Exclusive flock on `<path>/.lock` across processes; a no-op without fcntl or the directory."""
+    if fcntl is None or not os.path.isdir(path):
+        yield
+        return
+    with open(os.path.join(path, ".lock"), "a+") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+# -----------------------------
+# Process-wide indexes
+# -----------------------------
+_indexes: Dict[str, AnnIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def ann_available() -> bool:
+    return np is not None and bool(get_config().ANN_INDEX_ENABLED)
+
+
+def index_path(label: str) -> str:
+    return os.path.join(get_config().ANN_INDEX_DIR, label)
+
+
+def get_ann_index(label: str) -> Optional[AnnIndex]:
+    """The index for `label`, loaded from disk on first use (empty if nothing was saved)."""
+    if not ann_available():
+        return None
+    idx = _indexes.get(label)
+    if idx is None:
+        with _indexes_lock:
+            idx = _indexes.get(label)
+            if idx is None:
+                cfg = get_config()
+                try:
+                    idx = AnnIndex.load(index_path(label), nprobe=cfg.ANN_INDEX_NPROBE, nlist=cfg.ANN_INDEX_NLIST)
+                except Exception:
+                    logger.exception("failed to load ANN index for %s; starting empty", label)
+                    idx = None
+                if idx is None:
+                    idx = AnnIndex(nlist=cfg.ANN_INDEX_NLIST, nprobe=cfg.ANN_INDEX_NPROBE)
+                _indexes[label] = idx
+    return idx
+
+
+def ann_search(label: str, query: Sequence[float], k: int = 10, threshold: Optional[float] = None) -> List[Tuple[str, float]]:
+    """Top-k (entity_id, score) pairs scored like a Neo4j cosine vector index.
+
+    Neo4j reports cosine similarity as (1 + cos) / 2, so scores and `threshold` use that scale
+    and a fallback search filters the same hits as the primary one.
+    """
+    idx = get_ann_index(label)
+    if idx is None:
+        return []
+    t0 = time.perf_counter()
+    hits = idx.search(query, k=k)
+    record_ann_search(label, time.perf_counter() - t0, len(idx))
+    out = []
+    for eid, cos in hits:
+        score = (1.0 + cos) / 2.0
+        if threshold is not None and score <= threshold:
+            break
+        out.append((eid, score))
+    return out
+
+
+def index_embedding(label: str, entity_id: Optional[str], embedding: Optional[Sequence[float]]) -> None:
+    """Best-effort incremental update after an entity write; never raises."""
+    if not entity_id or not embedding:
+        return
+    try:
+        idx = get_ann_index(label)
+        if idx is not None:
+            idx.upsert(str(entity_id), embedding)
+    except Exception:
+        logger.debug("ANN index update skipped for %s %s", label, entity_id, exc_info=True)
+
+
+def index_embeddings(label: str, items: Iterable[Tuple[Optional[str], Optional[Sequence[float]]]]) -> None:
+    for entity_id, embedding in items:
+        index_embedding(label, entity_id, embedding)
+
+
+def remove_embedding(label: str, entity_id: str) -> None:
+    try:
+        idx = _indexes.get(label)
+        if idx is not None:
+            idx.remove(str(entity_id))
+    except Exception:
+        logger.debug("ANN index removal skipped for %s %s", label, entity_id, exc_info=True)
+
+
+def build_from_neo4j(label: str, client: Any = None, page_size: int = 5000) -> AnnIndex:
+    """Rebuild the index for `label` from `<label>.embedding`, paging by id, and install it."""
+    if label not in LABELS:
+        raise ValueError(f"unsupported label {label!r}")
+    if client is None:
+        from .neo4j_client import get_client
+
+        client = get_client()
+    cfg = get_config()
+    started = time.time()
+    ids: List[str] = []
+    vectors: List[List[float]] = []
+    after = ""
+    while True:
+        rows = client.run_query(
+            f"/* ann.build.{label} */ MATCH (n:{label}) WHERE n.embedding IS NOT NULL AND n.id > $after "
+            "RETURN n.id AS id, n.embedding AS embedding ORDER BY n.id LIMIT $limit",
+            {"after": after, "limit": page_size},
+        )
+        if not rows:
+            break
+        for r in rows:
+            ids.append(r["id"])
+            vectors.append(r["embedding"])
+        after = rows[-1]["id"]
+        if len(rows) < page_size:
+            break
+    dims = {len(v) for v in vectors}
+    if len(dims) > 1:
+        common = max(dims, key=lambda d: sum(1 for v in vectors if len(v) == d))
+        keep = [i for i, v in enumerate(vectors) if len(v) == common]
+        logger.warning("ANN build for %s skipped %d vectors with mismatched dimensions", label, len(vectors) - len(keep))
+        ids = [ids[i] for i in keep]
+        vectors = [vectors[i] for i in keep]
+    idx = AnnIndex(nlist=cfg.ANN_INDEX_NLIST, nprobe=cfg.ANN_INDEX_NPROBE)
+    # Segment changes from before the first page was read are already reflected in Neo4j
+    idx.built_at = started
+    if ids:
+        idx.build(ids, vectors)
+    with _indexes_lock:
+        _indexes[label] = idx
+    return idx
+
+
+def save_all() -> None:
+    """Persist each index: a full generation if it was built here, else this worker's segment."""
+    for label, idx in list(_indexes.items()):
+        if not idx.dirty:
+            continue
+        try:
+            if idx.built_at is not None:
+                idx.save(index_path(label))
+            else:
+                idx.save_tail(index_path(label))
+        except Exception:
+            logger.exception("failed to save ANN index for %s", label)
+
+
+def init_ann_index(app) -> None:
+    """Open the on-disk indexes at startup; optionally rebuild missing ones in the background."""
+    if not ann_available():
+        return
+    missing = []
+    for label in LABELS:
+        idx = get_ann_index(label)
+        if idx is None:
+            continue
+        if not len(idx) and _read_manifest(index_path(label)) is None:
+            missing.append(label)
+        elif len(_segment_files(index_path(label))) > _MAX_SEGMENTS:
+            # Fold accumulated worker segments into a fresh generation so loads stay cheap
+            try:
+                idx.save(index_path(label))
+            except Exception:
+                logger.warning("ANN segment compaction for %s failed", label, exc_info=True)
+    if missing and app.config.get("ANN_INDEX_BUILD_ON_START", False):
+
+        def _build() -> None:
+            for label in missing:
+                try:
+                    build_from_neo4j(label).save(index_path(label))
+                except Exception:
+                    logger.warning("ANN index build for %s failed", label, exc_info=True)
+
+        threading.Thread(target=_build, name="ann-index-build", daemon=True).start()
+
+
+def _reset_after_fork() -> None:
+    # The mmapped base is shared read-only; each child keeps its own tail from here on
+    global _indexes_lock
+    _indexes_lock = threading.Lock()
+    for idx in _indexes.values():
+        idx._lock = threading.RLock()
+
+
+atexit.register(save_all)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -2,11 +2,32 @@ from __future__ import annotations
 
 import json
 import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional
 
 from neo4j import GraphDatabase, Driver, Transaction
+from neo4j.exceptions import ClientError
+
+from ..config import get_config
+from .ann_index import ann_available, ann_search, index_embedding, index_embeddings
+from .graph_analytics import (
+    GraphTooLargeError,
+    analytics_available,
+    identifier,
+    load_graph,
+    louvain,
+    pagerank,
+    top_n as top_n_scores,
+    write_node_property,
+)
+from .gds_projections import get_projection_manager
+from .graph_traversal import decode_cursor, encode_cursor, frontier_bfs, rel_pattern
+from .neo4j_client import READ_ACCESS, WRITE_ACCESS, get_client, session_config
+from .search_cache import invalidate_search_cache
+from .snapshot_codec import plan_snapshot, reconstruct
 
 
 @dataclass
@@ -22,18 +43,45 @@ class ConflictError(Exception):
     """Exception raised when knowledge conflicts cannot be resolved"""
 
 
+class VersionConflictError(ConflictError):
+    """Raised when a compare-and-set update finds the entity at a different version"""
+
+    def __init__(self, entity_id: str, expected_version: int, current_version: int) -> None:
+        super().__init__(
+            f"Knowledge entity {entity_id} is at version {current_version}, expected {expected_version}"
+        )
+        self.entity_id = entity_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+
 class EnhancedConsciousnessSubstrate:
     """
     High-level utility for advanced knowledge operations on the Neo4j consciousness substrate.
     Requires Neo4j 5.x (vector index optional but recommended).
+
+    Without explicit connection details the substrate borrows the process-wide pooled
+    driver from `api.utils.neo4j_client.get_client()`, so one long-lived instance can
+    serve every request.
     """
 
-    def __init__(self, uri: str, user: str, password: str) -> None:
-        self.driver: Driver = GraphDatabase.driver(uri, auth=(user, password))
+    def __init__(self, uri: Optional[str] = None, user: Optional[str] = None, password: Optional[str] = None) -> None:
+        self._driver: Optional[Driver] = GraphDatabase.driver(uri, auth=(user, password)) if uri else None
+
+    @property
+    def driver(self) -> Driver:
+        if self._driver is not None:
+            return self._driver
+        return get_client().driver
 
     def close(self) -> None:
-        if self.driver:
-            self.driver.close()
+        # Only a privately owned driver is closed; the shared pool outlives this instance
+        if self._driver:
+            self._driver.close()
+
+    def _session(self, access_mode: str):
+        # Reads route to followers/replicas; the request's bookmarks keep them causally after its writes
+        return self.driver.session(**session_config(access_mode))
 
     # -----------------------------
     # Knowledge CRUD with provenance
@@ -91,8 +139,152 @@ class EnhancedConsciousnessSubstrate:
             rec = result.single()
             return rec["entity_id"] if rec else entity_id
 
-        with self.driver.session() as session:
-            return session.execute_write(_tx)
+        with self._session(WRITE_ACCESS) as session:
+            created = session.execute_write(_tx)
+        index_embedding("KnowledgeEntity", created, embedding)
+        invalidate_search_cache()
+        return created
+
+    def create_knowledge_entities_bulk(
+        self,
+        entities: Iterable[Dict[str, Any]],
+        chunk_size: int = 1000,
+        parallelism: int = 1,
+        return_ids: bool = False,
+    ) -> Dict[str, Any]:
+        """Create many knowledge entities (with provenance) in chunked UNWIND write transactions.
+
+        Each entity dict needs content, entity_type and created_by; id, embedding and metadata
+        are optional. The load only creates: a supplied id that already exists (or repeats within
+        a chunk) is left untouched, gets no provenance or index entry, and is counted as
+        `existing`; use update_knowledge_entity to change it. Reloading a file is therefore
+        idempotent. Chunks commit independently, so a failing chunk is reported and the rest of
+        the load continues. With parallelism > 1
+        chunks run concurrently on separate sessions; `entities` is consumed lazily, keeping at
+        most 2 * parallelism chunks in memory.
+        """
+        chunk_size = max(1, int(chunk_size))
+        parallelism = max(1, int(parallelism))
+        now_iso = datetime.now(timezone.utc).isoformat()
+        # Resolved once here: worker threads have no request context for routing/bookmarks
+        cfg = session_config(WRITE_ACCESS)
+
+        def _tx(tx: Transaction, rows: List[Dict[str, Any]]) -> List[str]:
+            # The per-chunk load id tells rows this statement created from ones that existed
+            rec = tx.run(
+                """
+                UNWIND $rows AS row
+                MERGE (k:KnowledgeEntity { id: row.id })
+                ON CREATE SET k.content = row.content,
+                              k.entity_type = row.entity_type,
+                              k.created_at = datetime($timestamp),
+                              k.updated_at = datetime($timestamp),
+                              k.version = 1,
+                              k.embedding = row.embedding,
+                              k.metadata = row.metadata,
+                              k._bulkLoad = $load
+                WITH k, row, coalesce(k._bulkLoad = $load, false) AS created
+                REMOVE k._bulkLoad
+                FOREACH (_ IN CASE WHEN created THEN [1] ELSE [] END |
+                    MERGE (p:Provenance { id: row.prov_id })
+                    ON CREATE SET p.source = 'api',
+                                  p.evidence = 'create',
+                                  p.actor_id = row.created_by,
+                                  p.created_at = datetime($timestamp),
+                                  p.metadata = row.prov_details
+                    MERGE (k)-[:HAS_PROVENANCE]->(p))
+                RETURN collect(CASE WHEN created THEN row.id END) AS created
+                """,
+                {"rows": rows, "timestamp": now_iso, "load": uuid.uuid4().hex},
+            ).single()
+            return list(rec["created"]) if rec else []
+
+        def _rows(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            out, seen = [], set()
+            for e in batch:
+                content = str(e.get("content") or "")
+                entity_type = str(e.get("entity_type") or "generic")
+                entity_id = str(e.get("id") or uuid.uuid4())
+                created_by = str(e.get("created_by"))
+                if entity_id in seen:
+                    # One MERGE pass cannot tell a repeat from the row that created it
+                    continue
+                seen.add(entity_id)
+                out.append({
+                    "id": entity_id,
+                    "content": content,
+                    "entity_type": entity_type,
+                    "created_by": created_by,
+                    "embedding": e.get("embedding"),
+                    "metadata": e.get("metadata") or {},
+                    "prov_id": str(uuid.uuid5(uuid.NAMESPACE_OID, f"bulk:{entity_id}")),
+                    "prov_details": {
+                        "action": "create",
+                        "bulk": True,
+                        "content_length": len(content),
+                        "entity_type": entity_type,
+                    },
+                })
+            return out
+
+        def _run_chunk(index: int, offset: int, batch: List[Dict[str, Any]]) -> Dict[str, Any]:
+            rows = _rows(batch)
+            result: Dict[str, Any] = {"chunk": index, "offset": offset, "count": len(batch)}
+            try:
+                with self.driver.session(**cfg) as session:
+                    created = set(session.execute_write(_tx, rows))
+                result["ok"] = True
+                result["written"] = len(created)
+                result["existing"] = len(batch) - len(created)
+                index_embeddings(
+                    "KnowledgeEntity", ((r["id"], r["embedding"]) for r in rows if r["id"] in created and r["embedding"])
+                )
+                if return_ids:
+                    result["ids"] = [r["id"] for r in rows if r["id"] in created]
+                    result["existing_ids"] = [str(e["id"]) for e in batch if e.get("id") and str(e["id"]) not in created]
+            except Exception as e:
+                result["ok"] = False
+                result["error"] = str(e)
+            return result
+
+        it = iter(entities)
+
+        def _next_chunk(index: int, offset: int):
+            batch = list(islice(it, chunk_size))
+            return (index, offset, batch) if batch else None
+
+        results: List[Dict[str, Any]] = []
+        index = offset = 0
+        if parallelism == 1:
+            while (nxt := _next_chunk(index, offset)) is not None:
+                results.append(_run_chunk(*nxt))
+                index += 1
+                offset += len(nxt[2])
+        else:
+            with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="substrate-bulk") as pool:
+                pending = set()
+                while True:
+                    while len(pending) < parallelism * 2 and (nxt := _next_chunk(index, offset)) is not None:
+                        pending.add(pool.submit(_run_chunk, *nxt))
+                        index += 1
+                        offset += len(nxt[2])
+                    if not pending:
+                        break
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    results.extend(f.result() for f in done)
+            results.sort(key=lambda r: r["chunk"])
+
+        ok = [r for r in results if r["ok"]]
+        if any(r["written"] for r in ok):
+            invalidate_search_cache()
+        return {
+            "chunks": results,
+            "total": sum(r["count"] for r in results),
+            "written": sum(r.get("written", 0) for r in ok),
+            "existing": sum(r.get("existing", 0) for r in ok),
+            "failed_chunks": len(results) - len(ok),
+            "failed_rows": sum(r["count"] for r in results if not r["ok"]),
+        }
 
     def update_knowledge_entity(
         self,
@@ -100,31 +292,18 @@ class EnhancedConsciousnessSubstrate:
         updates: Dict[str, Any],
         updated_by: str,
         conflict_resolution: str = "merge",
+        expected_version: Optional[int] = None,
     ) -> int:
-        """Update knowledge entity with conflict detection and resolution. Returns new version."""
-        now_iso = datetime.now(timezone.utc).isoformat()
+        """Update knowledge entity with conflict detection and resolution. Returns new version.
 
-        def _read_version(tx: Transaction):
-            rec = tx.run(
-                """
-                MATCH (k:KnowledgeEntity {id: $id})
-                RETURN k.version AS version, k.updated_at AS last_update
-                """,
-                {"id": entity_id},
-            ).single()
-            return rec
+        Runs in a single write transaction: the entity is write-locked first, so the version
+        check, the conflict scan over recent Provenance and the versioned write all see the same
+        state. With `expected_version` set the update is a compare-and-set and raises
+        VersionConflictError if another writer got there first.
+        """
+        now_iso = datetime.now(timezone.utc).isoformat()
 
-        def _detect_conflicts(tx: Transaction) -> List[ConflictRecord]:
-            recent = tx.run(
-                """
-                MATCH (k:KnowledgeEntity {id: $id})-[:HAS_PROVENANCE]->(p:Provenance)
-                WHERE p.created_at > datetime() - duration('PT5M') AND coalesce(p.metadata.action,'') = 'update'
-                RETURN p.actor_id AS agent, p.metadata AS details, p.created_at AS ts
-                ORDER BY p.created_at DESC
-                LIMIT 20
-                """,
-                {"id": entity_id},
-            ).data()
+        def _detect_conflicts(recent: List[Dict[str, Any]]) -> List[ConflictRecord]:
             conflicts: List[ConflictRecord] = []
             for upd in recent:
                 details = upd.get("details") or {}
@@ -160,8 +339,37 @@ class EnhancedConsciousnessSubstrate:
                 pass
             return resolved
 
-        def _write_update(tx: Transaction, new_updates: Dict[str, Any], conflicts_list: List[ConflictRecord]) -> int:
-            # bump version atomically and write provenance + optional snapshot
+        def _lock_and_read(tx: Transaction) -> Optional[Dict[str, Any]]:
+            # Writing a throwaway property takes the entity's write lock before anything is read,
+            # so concurrent updaters serialize here instead of racing on a stale version.
+            # The 5-minute window is filtered per HAS_PROVENANCE edge while expanding from k, so
+            # its cost scales with the entity's provenance fan-out, not with any index.
+            return tx.run(
+                """
+                MATCH (k:KnowledgeEntity {id: $id})
+                SET k._update_lock = true
+                WITH k
+                OPTIONAL MATCH (k)-[:HAS_PROVENANCE]->(p:Provenance)
+                WHERE p.created_at > datetime() - duration('PT5M') AND coalesce(p.metadata.action,'') = 'update'
+                WITH k, p ORDER BY p.created_at DESC LIMIT 20
+                RETURN coalesce(k.version, 0) AS version,
+                       k.content AS content,
+                       EXISTS {
+                           (k)-[:HAS_SNAPSHOT]->(:KnowledgeSnapshot {version: coalesce(k.version, 0)})
+                       } AS has_prev_snapshot,
+                       collect(CASE WHEN p IS NULL THEN null
+                               ELSE {agent: p.actor_id, details: p.metadata, ts: p.created_at} END) AS recent
+                """,
+                {"id": entity_id},
+            ).single()
+
+        def _write_update(
+            tx: Transaction,
+            new_updates: Dict[str, Any],
+            conflicts_list: List[ConflictRecord],
+            snapshot: Dict[str, Any],
+        ) -> int:
+            # bump version atomically and write provenance + snapshot (keyframe or delta)
             conflicts_payload = [c.__dict__ for c in conflicts_list]
             prov_id = str(uuid.uuid4())
             snap_id = str(uuid.uuid4())
@@ -172,6 +380,7 @@ class EnhancedConsciousnessSubstrate:
                 SET k += $updates,
                     k.updated_at = datetime($timestamp),
                     k.version = coalesce(k.version, 0) + 1
+                REMOVE k._update_lock
                 WITH k
                 MERGE (p:Provenance { id: $prov_id })
                 ON CREATE SET p.source = 'api',
@@ -184,7 +393,10 @@ class EnhancedConsciousnessSubstrate:
                 MERGE (s:KnowledgeSnapshot { id: $snap_id })
                 ON CREATE SET s.entity_id = k.id,
                               s.version = k.version,
-                              s.content = k.content,
+                              s.encoding = $snap_encoding,
+                              s.content = CASE WHEN $snap_encoding = 'full' THEN k.content ELSE null END,
+                              s.delta = $snap_delta,
+                              s.base_version = $snap_base_version,
                               s.created_at = datetime($timestamp),
                               s.metadata = k.metadata
                 MERGE (k)-[:HAS_SNAPSHOT]->(s)
@@ -204,22 +416,44 @@ class EnhancedConsciousnessSubstrate:
                         "resolution_strategy": conflict_resolution,
                     },
                     "snap_id": snap_id,
+                    "snap_encoding": snapshot["encoding"],
+                    "snap_delta": snapshot["delta"],
+                    "snap_base_version": snapshot["base_version"],
                 },
             ).single()
             return int(result["version"]) if result else 0
 
-        with self.driver.session() as session:
-            # check entity exists and get version
-            cur = session.execute_read(_read_version)
+        def _tx(tx: Transaction) -> int:
+            cur = _lock_and_read(tx)
             if not cur:
                 raise ValueError(f"Knowledge entity {entity_id} not found")
+            if expected_version is not None and int(cur["version"]) != int(expected_version):
+                raise VersionConflictError(entity_id, int(expected_version), int(cur["version"]))
 
-            conflicts = session.execute_read(_detect_conflicts)
+            conflicts = _detect_conflicts(cur["recent"] or [])
             if conflicts and conflict_resolution == "strict":
                 raise ConflictError(f"Conflicts detected: {[c.__dict__ for c in conflicts]}")
 
-            resolved_updates = _resolve_conflicts(conflicts)
-            return session.execute_write(_write_update, resolved_updates, conflicts)
+            resolved = _resolve_conflicts(conflicts)
+            applied["updates"] = resolved
+            new_version = int(cur["version"]) + 1
+            snapshot = plan_snapshot(
+                new_version,
+                resolved.get("content", cur["content"]),
+                cur["content"],
+                bool(cur["has_prev_snapshot"]),
+                int(get_config().SNAPSHOT_KEYFRAME_INTERVAL),
+            )
+            return _write_update(tx, resolved, conflicts, snapshot)
+
+        applied: Dict[str, Any] = {}
+        with self._session(WRITE_ACCESS) as session:
+            version = session.execute_write(_tx)
+        invalidate_search_cache()
+        embedding = applied.get("updates", {}).get("embedding")
+        if embedding:
+            index_embedding("KnowledgeEntity", entity_id, embedding)
+        return version
 
     # -----------------------------
     # Vector semantic search
@@ -230,36 +464,72 @@ class EnhancedConsciousnessSubstrate:
         limit: int = 10,
         threshold: float = 0.7,
     ) -> List[Dict[str, Any]]:
-        with self.driver.session() as session:
-            result = session.run(
-                """
-                CALL db.index.vector.queryNodes('knowledge_embeddings', $limit, $query_embedding)
-                YIELD node, score
-                WHERE score > $threshold
-                RETURN node.id AS id, node.content AS content, node.entity_type AS entity_type, score
-                ORDER BY score DESC
-                """,
-                {
-                    "query_embedding": query_embedding,
-                    "limit": limit,
-                    "threshold": threshold,
-                },
-            )
-            return [
-                {
-                    "id": r["id"],
-                    "content": r["content"],
-                    "entity_type": r["entity_type"],
-                    "similarity": r["score"],
-                }
-                for r in result
-            ]
+        """Top matches from the `knowledge_embeddings` vector index.
+
+        If Neo4j rejects the call (index or vector procedures missing), the in-process ANN
+        index (api.utils.ann_index) answers instead and the matches are hydrated by id.
+        """
+        try:
+            with self._session(READ_ACCESS) as session:
+                result = session.run(
+                    """
+                    CALL db.index.vector.queryNodes('knowledge_embeddings', $limit, $query_embedding)
+                    YIELD node, score
+                    WHERE score > $threshold
+                    RETURN node.id AS id, node.content AS content, node.entity_type AS entity_type, score
+                    ORDER BY score DESC
+                    """,
+                    {
+                        "query_embedding": query_embedding,
+                        "limit": limit,
+                        "threshold": threshold,
+                    },
+                )
+                return [
+                    {
+                        "id": r["id"],
+                        "content": r["content"],
+                        "entity_type": r["entity_type"],
+                        "similarity": r["score"],
+                    }
+                    for r in result
+                ]
+        except ClientError:
+            if not ann_available():
+                raise
+        return self._ann_semantic_search(query_embedding, limit, threshold)
+
+    def _ann_semantic_search(self, query_embedding: List[float], limit: int, threshold: float) -> List[Dict[str, Any]]:
+        hits = ann_search("KnowledgeEntity", query_embedding, k=limit, threshold=threshold)
+        if not hits:
+            return []
+        with self._session(READ_ACCESS) as session:
+            rows = {
+                r["id"]: r
+                for r in session.run(
+                    """
+                    MATCH (k:KnowledgeEntity) WHERE k.id IN $ids
+                    RETURN k.id AS id, k.content AS content, k.entity_type AS entity_type
+                    """,
+                    {"ids": [eid for eid, _ in hits]},
+                )
+            }
+        return [
+            {
+                "id": eid,
+                "content": rows[eid]["content"],
+                "entity_type": rows[eid]["entity_type"],
+                "similarity": score,
+            }
+            for eid, score in hits
+            if eid in rows
+        ]
 
     # -----------------------------
     # Provenance
     # -----------------------------
     def get_knowledge_provenance(self, entity_id: str) -> List[Dict[str, Any]]:
-        with self.driver.session() as session:
+        with self._session(READ_ACCESS) as session:
             result = session.run(
                 """
                 MATCH (k:KnowledgeEntity {id: $id})-[:HAS_PROVENANCE]->(p:Provenance)
@@ -306,24 +576,76 @@ class EnhancedConsciousnessSubstrate:
         max_depth: int = 2,
         rel_types: Optional[List[str]] = None,
         limit: int = 50,
+        fanout: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
         """Breadth traversal from an entity with optional relationship filter."""
-        rel = "|".join(rel_types) if rel_types else "SIMILAR_TO|HAS_PROVENANCE|HAS_CONFLICT|HAS_SNAPSHOT"
-        with self.driver.session() as session:
-            result = session.run(
-                f"""
-                MATCH path = (k:KnowledgeEntity {{id: $id}})-[:{rel}*1..{max_depth}]-(n)
-                WITH nodes(path) AS ns, relationships(path) AS rs
-                UNWIND ns AS node
-                WITH DISTINCT node LIMIT $limit
-                RETURN node.id AS id, labels(node) AS labels, node AS props
+        return self.traverse_frontier(start_id, max_depth, rel_types, limit, fanout=fanout)["nodes"]
+
+    def traverse_frontier(
+        self,
+        start_id: str,
+        max_depth: int = 2,
+        rel_types: Optional[List[str]] = None,
+        limit: int = 50,
+        fanout: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """One page of a frontier BFS (see api.utils.graph_traversal).
+
+        Each level is a single query over the whole frontier, with at most `fanout` neighbours
+        per frontier node (default TRAVERSE_FANOUT). Returns {"nodes", "next_cursor"}; pass
+        next_cursor back to continue deeper. Raises ValueError for bad rel types or cursors.
+        """
+        rel = rel_pattern(rel_types, "SIMILAR_TO|HAS_PROVENANCE|HAS_CONFLICT|HAS_SNAPSHOT")
+        fanout = max(1, int(fanout or get_config().TRAVERSE_FANOUT))
+        limit = max(1, int(limit))
+        scope = (start_id, rel, int(max_depth), fanout)
+        depth, offset = decode_cursor(cursor, scope) if cursor else (0, 0)
+
+        def _node(r) -> Dict[str, Any]:
+            return {"eid": r["eid"], "id": r["id"], "labels": r["labels"], "props": dict(r["props"])}
+
+        with self._session(READ_ACCESS) as session:
+            start = session.run(
+                """
+                /* substrate.traverse.start */
+                MATCH (k:KnowledgeEntity {id: $id})
+                RETURN elementId(k) AS eid, k.id AS id, labels(k) AS labels, k AS props
                 """,
-                {"id": start_id, "limit": limit},
+                {"id": start_id},
+            ).single()
+            if start is None:
+                return {"nodes": [], "next_cursor": None}
+
+            def _expand(frontier: List[str], exclude: List[str]) -> List[Dict[str, Any]]:
+                result = session.run(
+                    f"""
+                    /* substrate.traverse.level */
+                    UNWIND $frontier AS fid
+                    MATCH (f) WHERE elementId(f) = fid
+                    CALL {{
+                        WITH f
+                        MATCH (f)-[:{rel}]-(n)
+                        WHERE NOT elementId(n) IN $exclude
+                        WITH DISTINCT n
+                        ORDER BY elementId(n)
+                        LIMIT $fanout
+                        RETURN n
+                    }}
+                    WITH DISTINCT n
+                    RETURN elementId(n) AS eid, n.id AS id, labels(n) AS labels, n AS props
+                    ORDER BY eid
+                    """,
+                    {"frontier": frontier, "exclude": exclude, "fanout": fanout},
+                )
+                return [_node(r) for r in result]
+
+            nodes, position = frontier_bfs(
+                _node(start), _expand, max_depth=int(max_depth), limit=limit, depth=depth, offset=offset
             )
-            return [
-                {"id": r["id"], "labels": r["labels"], "props": dict(r["props"]) }
-                for r in result
-            ]
+        for n in nodes:
+            n.pop("eid", None)
+        return {"nodes": nodes, "next_cursor": encode_cursor(scope, *position) if position else None}
 
     def community_detection_louvain(
         self,
@@ -331,69 +653,139 @@ class EnhancedConsciousnessSubstrate:
         write_property: str = "communityId",
     ) -> Dict[str, Any]:
         """Run Louvain via GDS if available. Returns summary. Does not fail hard if GDS absent."""
-        with self.driver.session() as session:
-            # Try anonymous graph creation
-            try:
-                gname = f"kg_tmp_{uuid.uuid4().hex[:8]}"
-                session.run(
-                    """
-                    CALL gds.graph.project($gname, 'KnowledgeEntity', {
-                      SIMILAR_TO: {orientation: 'UNDIRECTED'}
-                    })
-                    """,
-                    {"gname": gname},
-                ).consume()
-                res = session.run(
-                    """
-                    CALL gds.louvain.write($gname, {writeProperty: $prop, sampleRate: 1.0})
-                    YIELD communityCount, nodePropertiesWritten
-                    RETURN communityCount AS communities, nodePropertiesWritten AS written
-                    """,
-                    {"gname": gname, "prop": write_property},
-                ).single()
-                # drop
-                session.run("CALL gds.graph.drop($gname)", {"gname": gname}).consume()
-                return {"communities": res["communities"], "written": res["written"]} if res else {"communities": 0, "written": 0}
-            except Exception:
-                # Fallback no-op
-                return {"communities": 0, "written": 0, "note": "GDS not available"}
+        def _louvain(session, gname: str):
+            return session.run(
+                """
+                CALL gds.louvain.write($gname, {writeProperty: $prop, sampleRate: 1.0})
+                YIELD communityCount, nodePropertiesWritten
+                RETURN communityCount AS communities, nodePropertiesWritten AS written
+                """,
+                {"gname": gname, "prop": write_property},
+            ).single()
+
+        try:
+            res = get_projection_manager().run(self.driver, "SIMILAR_TO", _louvain)
+            return {"communities": res["communities"], "written": res["written"]} if res else {"communities": 0, "written": 0}
+        except Exception:
+            pass
+        # GDS not available: in-process Louvain over the same undirected projection
+        if not (analytics_available() and get_config().GRAPH_ANALYTICS_ENABLED):
+            return {"communities": 0, "written": 0, "note": "GDS not available"}
+        try:
+            graph = self._analytics_graph("SIMILAR_TO")
+        except GraphTooLargeError as e:
+            return {"communities": 0, "written": 0, "note": str(e)}
+        membership, q, levels = louvain(graph)
+        written = write_node_property(
+            self.driver,
+            session_config(WRITE_ACCESS),
+            graph,
+            membership,
+            write_property,
+            batch_size=int(get_config().GRAPH_ANALYTICS_WRITE_BATCH),
+        )
+        return {
+            "communities": int(membership.max()) + 1 if graph.n else 0,
+            "written": written,
+            "modularity": q,
+            "levels": levels,
+            "engine": "in-process",
+        }
+
+    def _analytics_graph(self, relationship: str):
+        cfg = get_config()
+        return load_graph(
+            self.driver,
+            session_config(READ_ACCESS),
+            relationship=relationship,
+            fetch_size=int(cfg.GRAPH_ANALYTICS_FETCH_SIZE),
+            max_edges=int(cfg.GRAPH_ANALYTICS_MAX_EDGES),
+        )
 
     def centrality_pagerank(
         self,
         top_n: int = 20,
         relationship: str = "SIMILAR_TO",
+        write_property: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
-        """Compute approximate PageRank centrality over KnowledgeEntity graph using GDS or Cypher fallback."""
-        with self.driver.session() as session:
+        """PageRank over the KnowledgeEntity graph via GDS, else in-process, else degree centrality.
+
+        `write_property` (in-process engine only) also stores every node's score.
+        """
+        identifier(relationship, "relationship type")
+
+        def _pagerank(session, gname: str):
+            res = session.run(
+                """
+                CALL gds.pageRank.stream($gname)
+                YIELD nodeId, score
+                RETURN gds.util.asNode(nodeId).id AS id, score
+                ORDER BY score DESC LIMIT $top
+                """,
+                {"gname": gname, "top": top_n},
+            )
+            return [{"id": r["id"], "score": r["score"]} for r in res]
+
+        try:
+            return get_projection_manager().run(self.driver, relationship, _pagerank)
+        except Exception:
+            pass
+        if analytics_available() and get_config().GRAPH_ANALYTICS_ENABLED:
             try:
-                gname = f"kg_pr_{uuid.uuid4().hex[:8]}"
-                session.run(
-                    "CALL gds.graph.project($gname, 'KnowledgeEntity', $rel)",
-                    {"gname": gname, "rel": {relationship: {"orientation": "UNDIRECTED"}}},
-                ).consume()
-                res = session.run(
-                    """
-                    CALL gds.pageRank.stream($gname)
-                    YIELD nodeId, score
-                    RETURN gds.util.asNode(nodeId).id AS id, score
-                    ORDER BY score DESC LIMIT $top
-                    """,
-                    {"gname": gname, "top": top_n},
-                )
-                out = [{"id": r["id"], "score": r["score"]} for r in res]
-                session.run("CALL gds.graph.drop($gname)", {"gname": gname}).consume()
-                return out
-            except Exception:
-                # fallback: degree centrality
-                res = session.run(
-                    f"""
-                    MATCH (k:KnowledgeEntity)-[:{relationship}]-(n)
-                    RETURN k.id AS id, count(n) AS degree
-                    ORDER BY degree DESC LIMIT $top
-                    """,
-                    {"top": top_n},
-                )
-                return [{"id": r["id"], "score": float(r["degree"]) } for r in res]
+                graph = self._analytics_graph(relationship)
+            except GraphTooLargeError:
+                graph = None
+            if graph is not None:
+                scores = pagerank(graph)
+                if write_property:
+                    write_node_property(
+                        self.driver,
+                        session_config(WRITE_ACCESS),
+                        graph,
+                        scores,
+                        write_property,
+                        batch_size=int(get_config().GRAPH_ANALYTICS_WRITE_BATCH),
+                    )
+                return top_n_scores(graph, scores, top_n)
+        with self._session(READ_ACCESS) as session:
+            # fallback: degree centrality
+            res = session.run(
+                f"""
+                MATCH (k:KnowledgeEntity)-[:{relationship}]-(n)
+                RETURN k.id AS id, count(n) AS degree
+                ORDER BY degree DESC LIMIT $top
+                """,
+                {"top": top_n},
+            )
+            return [{"id": r["id"], "score": float(r["degree"]) } for r in res]
+
+    def snapshot_at(self, entity_id: str, version: int) -> Optional[Dict[str, Any]]:
+        """Reconstruct one snapshot version, reading only from the nearest keyframe at or before it."""
+        with self._session(READ_ACCESS) as session:
+            rows = session.run(
+                """
+                MATCH (k:KnowledgeEntity {id: $id})-[:HAS_SNAPSHOT]->(key:KnowledgeSnapshot)
+                WHERE key.version <= $version AND coalesce(key.encoding, 'full') = 'full'
+                WITH k, max(key.version) AS from_version
+                MATCH (k)-[:HAS_SNAPSHOT]->(s:KnowledgeSnapshot)
+                WHERE s.version >= from_version AND s.version <= $version
+                RETURN s ORDER BY s.version ASC
+                """,
+                {"id": entity_id, "version": int(version)},
+            )
+            decoded = reconstruct(dict(rec["s"]) for rec in rows)
+        if not decoded or decoded[-1][0].get("version") != int(version):
+            return None
+        snap, content, error = decoded[-1]
+        out = {
+            "version": snap.get("version"),
+            "timestamp": snap.get("created_at"),
+            "content": content,
+            "metadata": snap.get("metadata", {}),
+        }
+        if error:
+            out["error"] = error
+        return out
 
     def temporal_evolution(
         self,
@@ -402,7 +794,7 @@ class EnhancedConsciousnessSubstrate:
         until_iso: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """Return temporal snapshots and provenance events for an entity between bounds."""
-        with self.driver.session() as session:
+        with self._session(READ_ACCESS) as session:
             params = {"id": entity_id}
             where = []
             if since_iso:
@@ -435,21 +827,22 @@ class EnhancedConsciousnessSubstrate:
             snaps = session.run(
                 """
                 MATCH (k:KnowledgeEntity {id: $id})-[:HAS_SNAPSHOT]->(s:KnowledgeSnapshot)
-                RETURN s ORDER BY s.created_at ASC
+                RETURN s ORDER BY s.version ASC, s.created_at ASC
                 """,
                 {"id": entity_id},
             )
+            # Deltas are decoded against the previous version; keyframes restart the chain
             snaps_out = []
-            for rec in snaps:
-                s = rec["s"]
-                snaps_out.append(
-                    {
-                        "version": s.get("version"),
-                        "timestamp": s.get("created_at"),
-                        "content": s.get("content"),
-                        "metadata": s.get("metadata", {}),
-                    }
-                )
+            for s, content, error in reconstruct(dict(rec["s"]) for rec in snaps):
+                event = {
+                    "version": s.get("version"),
+                    "timestamp": s.get("created_at"),
+                    "content": content,
+                    "metadata": s.get("metadata", {}),
+                }
+                if error:
+                    event["error"] = error
+                snaps_out.append(event)
 
             return [
                 {"type": "provenance", "events": prov_out},
@@ -0,0 +1,120 @@
+"""
+Micro-batching for single-text embedding requests.
+
+Concurrent `get_query_embedding` calls from different greenlets/threads are merged into
+one provider call. The first caller to arrive opens a batch and becomes its leader. The
+leader waits up to EMBEDDING_COALESCE_WAIT_MS for more texts, or until the batch holds
+EMBEDDING_COALESCE_MAX_BATCH texts. It then embeds the batch with a single call and wakes
+every waiter. Texts arriving while a batch is in flight open the next batch, so under load
+batch size grows with request rate, and a lone request pays at most the wait window.
+
+There is no background thread: under gevent the primitives below are monkey-patched into
+their greenlet equivalents, and the leader is always a caller that would otherwise block
+on its own HTTP request anyway. If the leader is killed or times out mid-batch, it still
+closes the batch and fails it, so followers never wait on a leader that is gone. Followers
+also give up after EMBEDDING_COALESCE_TIMEOUT_S unless the caller passes its own timeout.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+from ..config import get_config
+
+EmbedMany = Callable[[Sequence[str]], List[List[float]]]
+
+
+class _Batch:
+    __slots__ = ("texts", "full", "done", "results", "error")
+
+    def __init__(self) -> None:
+        self.texts: Dict[str, None] = {}
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results: Dict[str, List[float]] = {}
+        self.error: Optional[BaseException] = None
+
+
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        max_batch: int = 64,
+        max_wait_ms: float = 5,
+        enabled: bool = True,
+        follower_timeout: Optional[float] = 60.0,
+    ) -> None:
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait_ms) / 1000.0)
+        self.follower_timeout = follower_timeout
+        self.enabled = enabled and self.max_batch > 1
+        self._open: Optional[_Batch] = None
+        self._lock = threading.Lock()
+
+    def embed(self, text: str, embed_many: EmbedMany, timeout: Optional[float] = None) -> List[float]:
+        """Embedding of `text`, computed together with whatever else arrives in the same window."""
+        if not self.enabled:
+            return embed_many([text])[0]
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            batch.texts[text] = None
+            if len(batch.texts) >= self.max_batch:
+                self._open = None
+                batch.full.set()
+        if leader:
+            try:
+                batch.full.wait(self.max_wait)
+                with self._lock:
+                    if self._open is batch:
+                        self._open = None
+                texts = list(batch.texts)
+                batch.results = dict(zip(texts, embed_many(texts)))
+            except Exception as e:
+                batch.error = e
+            finally:
+                # Also reached when the leader itself is killed (GreenletExit, gevent Timeout)
+                with self._lock:
+                    if self._open is batch:
+                        self._open = None
+                if batch.error is None and len(batch.results) < len(batch.texts):
+                    batch.error = RuntimeError("embedding batch abandoned by its leader")
+                batch.done.set()
+        else:
+            timeout = self.follower_timeout if timeout is None else timeout
+            if not batch.done.wait(timeout):
+                raise TimeoutError(f"embedding batch not completed within {timeout}s")
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[text]
+
+
+_batcher: Optional[EmbeddingBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                cfg = get_config()
+                _batcher = EmbeddingBatcher(
+                    max_batch=cfg.EMBEDDING_COALESCE_MAX_BATCH,
+                    max_wait_ms=cfg.EMBEDDING_COALESCE_WAIT_MS,
+                    enabled=cfg.EMBEDDING_COALESCE_ENABLED,
+                    follower_timeout=cfg.EMBEDDING_COALESCE_TIMEOUT_S or None,
+                )
+    return _batcher
+
+
+def _reset_after_fork() -> None:
+    global _batcher, _batcher_lock
+    _batcher = None
+    _batcher_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,316 @@
+"""
+Content-addressed embedding cache: an in-memory LRU in front of a SQLite store on disk.
+
+Keys are sha256(model, normalized text), where normalization collapses whitespace. The
+embedding is always computed from the normalized text, so a key maps to exactly one vector
+per model. Vectors are stored as packed float32 (4 bytes per dimension).
+
+    memory  OrderedDict LRU, bounded by EMBEDDING_CACHE_MEMORY_MAX_BYTES
+    disk    SQLite at EMBEDDING_CACHE_PATH (WAL, shared by every worker on the host),
+            bounded by EMBEDDING_CACHE_DISK_MAX_BYTES; the least recently used rows are
+            deleted down to 90% of the budget when it is exceeded
+
+Embeddings are deterministic for a given model, so entries never expire. Switching provider
+or model simply starts a new key space. Lookups land in
+`embedding_cache_requests_total{result}` (memory_hit, disk_hit, miss).
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from ..config import get_config
+from ..metrics import record_embedding_cache, record_embedding_cache_bytes, record_embedding_cache_eviction
+
+# last_used is only rewritten when older than this, so disk hits rarely write
+_TOUCH_INTERVAL_S = 3600
+# Other workers write to the same file; the cached byte count is re-read this often
+_RECOUNT_INTERVAL_S = 60
+_ROW_OVERHEAD = 64
+
+
+def normalize_text(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+def embedding_cache_key(model: str, text: str) -> bytes:
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).digest()
+
+
+def _pack(vector: Sequence[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    vec = array("f")
+    vec.frombytes(blob)
+    return vec.tolist()
+
+
+class MemoryTier:
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self.bytes = 0
+        self._data: "OrderedDict[bytes, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        with self._lock:
+            blob = self._data.get(key)
+            if blob is not None:
+                self._data.move_to_end(key)
+            return blob
+
+    def put(self, key: bytes, blob: bytes) -> None:
+        size = len(blob) + len(key)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old) + len(key)
+            self._data[key] = blob
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                k, v = self._data.popitem(last=False)
+                self.bytes -= len(v) + len(k)
+                record_embedding_cache_eviction("memory")
+        record_embedding_cache_bytes("memory", self.bytes)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+        record_embedding_cache_bytes("memory", 0)
+
+
+class DiskTier:
+    def __init__(self, path: str, max_bytes: int) -> None:
+        self.path = path
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._bytes: Optional[int] = None
+        self._counted_at = 0.0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key BLOB PRIMARY KEY, model TEXT NOT NULL, vec BLOB NOT NULL, last_used INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings(last_used)")
+            self._conn = conn
+        return self._conn
+
+    def _size(self, db: sqlite3.Connection) -> int:
+        if self._bytes is None or time.time() - self._counted_at > _RECOUNT_INTERVAL_S:
+            row = db.execute("SELECT coalesce(sum(length(vec)), 0), count(*) FROM embeddings").fetchone()
+            self._bytes = int(row[0]) + int(row[1]) * _ROW_OVERHEAD
+            self._counted_at = time.time()
+        return self._bytes
+
+    @contextmanager
+    def _transaction(self, db: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, bytes]:
+        if not keys:
+            return {}
+        now = int(time.time())
+        out: Dict[bytes, bytes] = {}
+        with self._lock:
+            db = self._db()
+            stale = []
+            for start in range(0, len(keys), 500):
+                chunk = list(keys[start:start + 500])
+                marks = ",".join("?" * len(chunk))
+                for key, vec, last_used in db.execute(
+                    f"SELECT key, vec, last_used FROM embeddings WHERE key IN ({marks})", chunk
+                ):
+                    out[bytes(key)] = bytes(vec)
+                    if now - last_used > _TOUCH_INTERVAL_S:
+                        stale.append((now, key))
+            if stale:
+                with self._transaction(db):
+                    db.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", stale)
+        return out
+
+    def put_many(self, model: str, items: Dict[bytes, bytes]) -> None:
+        if not items:
+            return
+        now = int(time.time())
+        with self._lock:
+            db = self._db()
+            size = self._size(db)
+            with self._transaction(db):
+                for key, blob in items.items():
+                    cur = db.execute(
+                        "INSERT OR IGNORE INTO embeddings(key, model, vec, last_used) VALUES (?, ?, ?, ?)",
+                        (key, model, blob, now),
+                    )
+                    if cur.rowcount:
+                        size += len(blob) + _ROW_OVERHEAD
+            self._bytes = size
+            if size > self.max_bytes:
+                self._evict(db)
+            record_embedding_cache_bytes("disk", self._bytes or 0)
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        # Another worker may have written since we last looked; recount before deleting
+        self._bytes = None
+        target = int(self.max_bytes * 0.9)
+        size = self._size(db)
+        while size > target:
+            rows = db.execute(
+                "SELECT key, length(vec) FROM embeddings ORDER BY last_used ASC LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                break
+            victims = []
+            for key, length in rows:
+                victims.append((key,))
+                size -= int(length) + _ROW_OVERHEAD
+                if size <= target:
+                    break
+            with self._transaction(db):
+                db.executemany("DELETE FROM embeddings WHERE key = ?", victims)
+            record_embedding_cache_eviction("disk", len(victims))
+        self._bytes = size
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            db = self._db()
+            count = db.execute("SELECT count(*) FROM embeddings").fetchone()[0]
+            return {"entries": int(count), "bytes": self._size(db), "max_bytes": self.max_bytes}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db().execute("DELETE FROM embeddings")
+            self._bytes = 0
+        record_embedding_cache_bytes("disk", 0)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class EmbeddingCache:
+    def __init__(self, memory: MemoryTier, disk: Optional[DiskTier], enabled: bool = True) -> None:
+        self.memory = memory
+        self.disk = disk
+        self.enabled = enabled
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Cached vector per text, or None; disk hits are promoted to memory."""
+        if not self.enabled:
+            return [None] * len(texts)
+        keys = [embedding_cache_key(model, t) for t in texts]
+        blobs: Dict[bytes, bytes] = {}
+        for key in keys:
+            blob = self.memory.get(key)
+            if blob is not None:
+                blobs[key] = blob
+        missing = list(dict.fromkeys(k for k in keys if k not in blobs))
+        from_disk: Dict[bytes, bytes] = {}
+        if missing and self.disk is not None:
+            try:
+                from_disk = self.disk.get_many(missing)
+            except (sqlite3.Error, OSError):
+                from_disk = {}
+            for key, blob in from_disk.items():
+                self.memory.put(key, blob)
+            blobs.update(from_disk)
+        out: List[Optional[List[float]]] = []
+        counts = {"memory_hit": 0, "disk_hit": 0, "miss": 0}
+        for key in keys:
+            blob = blobs.get(key)
+            counts["miss" if blob is None else "disk_hit" if key in from_disk else "memory_hit"] += 1
+            out.append(_unpack(blob) if blob is not None else None)
+        for result, n in counts.items():
+            if n:
+                record_embedding_cache(result, n)
+        return out
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        if not self.enabled:
+            return
+        items = {embedding_cache_key(model, t): _pack(v) for t, v in zip(texts, vectors)}
+        for key, blob in items.items():
+            self.memory.put(key, blob)
+        if self.disk is not None:
+            try:
+                self.disk.put_many(model, items)
+            except (sqlite3.Error, OSError):
+                pass
+
+    def contains(self, model: str, texts: Iterable[str]) -> List[bool]:
+        return [v is not None for v in self.get_many(model, list(texts))]
+
+    def stats(self) -> Dict[str, object]:
+        out: Dict[str, object] = {
+            "enabled": self.enabled,
+            "memory": {"entries": len(self.memory), "bytes": self.memory.bytes, "max_bytes": self.memory.max_bytes},
+        }
+        if self.disk is not None:
+            try:
+                out["disk"] = {"path": self.disk.path, **self.disk.stats()}
+            except (sqlite3.Error, OSError) as e:
+                out["disk"] = {"path": self.disk.path, "error": str(e)}
+        return out
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                cfg = get_config()
+                path = cfg.EMBEDDING_CACHE_PATH
+                _cache = EmbeddingCache(
+                    MemoryTier(cfg.EMBEDDING_CACHE_MEMORY_MAX_BYTES),
+                    DiskTier(path, cfg.EMBEDDING_CACHE_DISK_MAX_BYTES) if path else None,
+                    enabled=cfg.EMBEDDING_CACHE_ENABLED,
+                )
+    return _cache
+
+
+def _reset_after_fork() -> None:
+    # SQLite connections must not cross a fork; the child opens its own
+    global _cache, _cache_lock
+    _cache = None
+    _cache_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,196 @@
+"""
+Embedding providers behind `api.utils.embeddings`.
+
+EMBEDDING_PROVIDER selects the backend:
+
+    openai  OpenAI embeddings API (OPENAI_API_KEY, OPENAI_EMBEDDING_MODEL); the default
+    local   HashingEmbeddingProvider: offline, deterministic, needs only NumPy
+
+The local backend lowercases the text and takes byte n-grams (n = 3..5) over it, padded
+with a space. Each n-gram is hashed with a vectorised polynomial hash plus a splitmix64
+finalizer. It is then projected into EMBEDDING_DIM dimensions by a sparse random projection:
+every n-gram adds ±1 at `nnz` hashed coordinates. That is the same as multiplying the
+(huge, sparse) n-gram count vector by a random ±1 matrix with `nnz` non-zeros per row,
+without ever materialising the matrix. The result is L2-normalised, so cosine similarity
+tracks character n-gram overlap. That is good enough for dedup, drift checks and exercising
+the vector paths in CI, but it is not a semantic model.
+
+The model name includes the dimension and seed, so cached vectors from different providers
+or settings never collide (see api.utils.embedding_cache).
+"""
+from __future__ import annotations
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence
+
+from ..config import get_config
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+
+# Optional OpenAI embeddings; gracefully degrade if not configured
+try:
+    from openai import OpenAI  # type: ignore
+except Exception:  # pragma: no cover
+    OpenAI = None  # type: ignore
+
+
+class EmbeddingProvider(ABC):
+    name = "none"
+
+    @property
+    @abstractmethod
+    def model(self) -> str:
+        """Cache namespace for this provider's vectors."""
+
+    def available(self) -> bool:
+        return False
+
+    @abstractmethod
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """One vector per text, in order."""
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None) -> None:
+        self._api_key = api_key
+        self._model = model
+        self._client = None
+
+    @property
+    def model(self) -> str:
+        return self._model or os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+
+    def client(self):
+        if self._client is not None:
+            return self._client
+        api_key = self._api_key or os.getenv("OPENAI_API_KEY")
+        if OpenAI is None or not api_key:
+            return None
+        self._client = OpenAI(api_key=api_key)
+        return self._client
+
+    def available(self) -> bool:
+        return self.client() is not None
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        client = self.client()
+        if client is None:
+            raise RuntimeError("Embeddings not configured")
+        res = client.embeddings.create(model=self.model, input=list(texts))
+        return [d.embedding for d in sorted(res.data, key=lambda d: d.index)]  # type: ignore
+
+
+_P = 0x100000001B3
+_M1 = 0xBF58476D1CE4E5B9
+_M2 = 0x94D049BB133111EB
+_CHUNK_BYTES = 1 << 20
+
+
+def _mix(x: "np.ndarray") -> "np.ndarray":
+    # splitmix64 finalizer; uint64 arithmetic wraps, which is what we want
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(_M1)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(_M2)
+    return x ^ (x >> np.uint64(31))
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    name = "local"
+
+    def __init__(self, dim: int = 1536, seed: int = 0, ngrams: Sequence[int] = (3, 4, 5), nnz: int = 4) -> None:
+        self.dim = int(dim)
+        self.seed = int(seed)
+        self.ngrams = tuple(sorted(int(n) for n in ngrams))
+        self.nnz = max(1, int(nnz))
+
+    @property
+    def model(self) -> str:
+        return f"local-hash-v1-d{self.dim}-s{self.seed}"
+
+    def available(self) -> bool:
+        return np is not None and self.dim > 0
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        if np is None:
+            raise RuntimeError("local embeddings need numpy")
+        encoded = [(" " + " ".join(str(t).lower().split()) + " ").encode("utf-8") for t in texts]
+        out = np.zeros((len(encoded), self.dim), dtype=np.float32)
+        start = 0
+        while start < len(encoded):
+            # Bound temporaries to about _CHUNK_BYTES of text per pass
+            end, size = start, 0
+            while end < len(encoded) and (end == start or size + len(encoded[end]) <= _CHUNK_BYTES):
+                size += len(encoded[end])
+                end += 1
+            out[start:end] = self._embed_chunk(encoded[start:end])
+            start = end
+        return out.tolist()
+
+    def _embed_chunk(self, encoded: List[bytes]) -> "np.ndarray":
+        n_docs = len(encoded)
+        lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=n_docs)
+        buf = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+        doc = np.repeat(np.arange(n_docs, dtype=np.int64), lengths)
+        keys, signs = [], []
+        for n in self.ngrams:
+            m = buf.shape[0] - n + 1
+            if m <= 0:
+                continue
+            h = np.full(m, np.uint64((n * 0x9E3779B97F4A7C15 + self.seed) & 0xFFFFFFFFFFFFFFFF))
+            for j in range(n):
+                h = h * np.uint64(_P) + buf[j:j + m]
+            # Keep n-grams that start and end inside the same text
+            inside = doc[:m] == doc[n - 1:]
+            h, d = _mix(h[inside]), doc[:m][inside]
+            for k in range(self.nnz):
+                hk = _mix(h ^ np.uint64((k + 1) * _M2 & 0xFFFFFFFFFFFFFFFF))
+                keys.append(d * self.dim + (hk >> np.uint64(1)) % np.uint64(self.dim))
+                signs.append(1.0 - 2.0 * (hk & np.uint64(1)).astype(np.float64))
+        if not keys:
+            return np.zeros((n_docs, self.dim), dtype=np.float32)
+        vec = np.bincount(
+            np.concatenate(keys).astype(np.int64), weights=np.concatenate(signs), minlength=n_docs * self.dim
+        ).reshape(n_docs, self.dim)
+        norms = np.linalg.norm(vec, axis=1, keepdims=True)
+        return (vec / np.maximum(norms, 1e-12)).astype(np.float32)
+
+
+_provider: Optional[EmbeddingProvider] = None
+_provider_lock = threading.Lock()
+
+
+def build_embedding_provider(name: str) -> EmbeddingProvider:
+    name = (name or "openai").strip().lower()
+    if name == "openai":
+        return OpenAIEmbeddingProvider()
+    if name == "local":
+        cfg = get_config()
+        return HashingEmbeddingProvider(dim=cfg.EMBEDDING_DIM, seed=cfg.EMBEDDING_LOCAL_SEED)
+    raise ValueError(f"unknown EMBEDDING_PROVIDER: {name!r} (expected 'openai' or 'local')")
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = build_embedding_provider(get_config().EMBEDDING_PROVIDER)
+    return _provider
+
+
+def _reset_after_fork() -> None:
+    global _provider, _provider_lock
+    _provider = None
+    _provider_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
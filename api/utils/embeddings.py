@@ -1,36 +1,81 @@
 import os
-from typing import List
+from typing import Any, Dict, Iterable, List, Optional, Sequence
 
-# Optional OpenAI embeddings; gracefully degrade if not configured
-try:
-    from openai import OpenAI  # type: ignore
-except Exception:  # pragma: no cover
-    OpenAI = None  # type: ignore
+from ..config import get_config
+from ..metrics import record_embedding_batch
+from .embedding_batcher import get_embedding_batcher
+from .embedding_cache import get_embedding_cache, normalize_text
+from .embedding_providers import get_embedding_provider
 
-_client = None
 
-
-def _get_client():
-    global _client
-    if _client is not None:
-        return _client
-    if OpenAI is None:
-        return None
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return None
-    _client = OpenAI(api_key=api_key)
-    return _client
+def _model() -> str:
+    return get_embedding_provider().model
 
 
 def vector_search_enabled() -> bool:
-    return _get_client() is not None and bool(os.getenv("ENABLE_VECTOR_SEARCH", "true").lower() == "true")
+    return get_embedding_provider().available() and bool(os.getenv("ENABLE_VECTOR_SEARCH", "true").lower() == "true")
 
 
-def get_query_embedding(text: str) -> List[float]:
-    client = _get_client()
-    if client is None:
+def _embed_uncached(model: str, texts: Sequence[str]) -> List[List[float]]:
+    """One provider request per EMBEDDING_BATCH_MAX texts; results are cached."""
+    provider = get_embedding_provider()
+    if not provider.available():
         raise RuntimeError("Embeddings not configured")
-    model = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
-    res = client.embeddings.create(model=model, input=text)
-    return res.data[0].embedding  # type: ignore
+    step = max(1, int(get_config().EMBEDDING_BATCH_MAX))
+    out: List[List[float]] = []
+    for start in range(0, len(texts), step):
+        batch = list(texts[start:start + step])
+        vectors = provider.embed(batch)
+        record_embedding_batch(len(batch))
+        get_embedding_cache().put_many(model, batch, vectors)
+        out.extend(vectors)
+    return out
+
+
+def get_embeddings(texts: Sequence[str]) -> List[List[float]]:
+    """Embeddings for `texts` in order: cached ones are free, the rest go out in batched requests.
+
+    Texts are whitespace-normalized first; empty texts raise ValueError.
+    """
+    model = _model()
+    norm = [normalize_text(t) for t in texts]
+    if not all(norm):
+        raise ValueError("cannot embed empty text")
+    found = dict(zip(norm, get_embedding_cache().get_many(model, norm)))
+    missing = [t for t, v in found.items() if v is None]
+    if missing:
+        found.update(zip(missing, _embed_uncached(model, missing)))
+    return [found[t] for t in norm]
+
+
+def cached_embeddings(texts: Sequence[str]) -> List[Optional[List[float]]]:
+    """Cached vector per normalized text, or None; never calls the provider."""
+    return get_embedding_cache().get_many(_model(), texts)
+
+
+def embed_uncached(texts: Sequence[str]) -> List[List[float]]:
+    """Provider embeddings for normalized texts known to be uncached (see cached_embeddings)."""
+    return _embed_uncached(_model(), texts)
+
+
+def get_query_embedding(text: str) -> List[float]:
+    """Embedding of one text. Cache misses are coalesced with concurrent callers into one request."""
+    model = _model()
+    text = normalize_text(text)
+    if not text:
+        raise ValueError("cannot embed empty text")
+    cached = get_embedding_cache().get_many(model, [text])[0]
+    if cached is not None:
+        return cached
+    return get_embedding_batcher().embed(text, lambda batch: _embed_uncached(model, batch))
+
+
+def warm_embedding_cache(texts: Iterable[str], batch_size: int = 100) -> Dict[str, Any]:
+    """Embed every text not yet cached, `batch_size` texts per API request."""
+    model = _model()
+    unique = list(dict.fromkeys(t for t in (normalize_text(x) for x in texts if isinstance(x, str)) if t))
+    missing = [t for t, v in zip(unique, get_embedding_cache().get_many(model, unique)) if v is None]
+    step = max(1, int(batch_size))
+    for start in range(0, len(missing), step):
+        get_embeddings(missing[start:start + step])
+    return {"model": model, "texts": len(unique), "already_cached": len(unique) - len(missing), "embedded": len(missing)}
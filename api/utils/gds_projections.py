@@ -0,0 +1,285 @@
+"""
+Long-lived GDS graph projections shared across algorithm calls.
+
+Projecting the KnowledgeEntity graph dominates the runtime of PageRank and Louvain on
+large graphs, so a projection is kept in the GDS catalog and reused until the graph
+changes. Its name encodes what it was projected from:
+
+    kgp.<label>.<relationship>.<signature>.<epoch>
+
+The signature is the write generation of the projected graph: node and relationship counts
+read from the count store, which is O(1). Creates and deletes change it. Rewires that keep
+both counts the same are picked up when the epoch rolls over (GDS_PROJECTION_MAX_AGE_S). The
+signature is rechecked at most every GDS_PROJECTION_CHECK_S seconds.
+
+Other workers compute the same name for the same graph, so they adopt a projection that is
+already in the catalog instead of projecting it again. Calls that arrive during a refresh
+wait on the refresh and then share the new projection. A stale projection is dropped once
+no call in this worker is still using it. A call in another worker can lose its graph to
+that drop; `run()` retries such a call once on the current projection.
+
+Set GDS_PROJECTIONS_ENABLED=false to go back to a throwaway projection per call.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..config import get_config
+from ..metrics import clear_gds_projection, record_gds_projection
+from .graph_analytics import identifier
+from .neo4j_client import WRITE_ACCESS, session_config
+
+_PREFIX = "kgp"
+
+
+@dataclass
+class Projection:
+    name: str
+    label: str
+    relationship: str
+    signature: Tuple[int, int]
+    created_at: float
+    checked_at: float
+    size_bytes: int
+    users: int = 0
+    retired: bool = False
+
+    @property
+    def key(self) -> str:
+        return f"{self.label}.{self.relationship}"
+
+
+def _missing_graph(exc: Exception) -> bool:
+    msg = str(exc).lower()
+    return "does not exist" in msg or "not found" in msg
+
+
+class GdsProjectionManager:
+    def __init__(self, check_s: float = 5.0, max_age_s: float = 3600.0, enabled: bool = True) -> None:
+        self.check_s = float(check_s)
+        self.max_age_s = float(max_age_s)
+        self.enabled = enabled
+        self._current: Dict[str, Projection] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _name(self, label: str, relationship: str, signature: Tuple[int, int], now: float) -> str:
+        digest = hashlib.sha1(repr(signature).encode("ascii")).hexdigest()[:10]
+        epoch = int(now // self.max_age_s) if self.max_age_s > 0 else 0
+        return f"{_PREFIX}.{label}.{relationship}.{digest}.{epoch}"
+
+    @staticmethod
+    def _signature(session, label: str, relationship: str) -> Tuple[int, int]:
+        rec = session.run(
+            f"""
+            /* gds.projection.signature */
+            CALL {{ MATCH (n:{label}) RETURN count(n) AS nodes }}
+            CALL {{ MATCH ()-[r:{relationship}]->() RETURN count(r) AS rels }}
+            RETURN nodes, rels
+            """
+        ).single()
+        return (int(rec["nodes"]), int(rec["rels"])) if rec else (0, 0)
+
+    @staticmethod
+    def _catalog_entry(session, name: str) -> Optional[Dict[str, Any]]:
+        rec = session.run(
+            "CALL gds.graph.list($name) YIELD sizeInBytes, creationTime "
+            "RETURN sizeInBytes AS size, creationTime.epochMillis AS created_ms",
+            {"name": name},
+        ).single()
+        return dict(rec) if rec else None
+
+    @staticmethod
+    def _project(session, name: str, label: str, relationship: str) -> None:
+        try:
+            session.run(
+                "CALL gds.graph.project($name, $label, $rels) YIELD graphName RETURN graphName",
+                {"name": name, "label": label, "rels": {relationship: {"orientation": "UNDIRECTED"}}},
+            ).consume()
+        except Exception as e:
+            # Another worker projected the same graph first; use theirs
+            if "already exists" not in str(e).lower():
+                raise
+
+    @staticmethod
+    def _drop(session, name: str) -> None:
+        session.run("CALL gds.graph.drop($name, false) YIELD graphName RETURN graphName", {"name": name}).consume()
+
+    def _drop_others(self, session, label: str, relationship: str, keep: List[str]) -> None:
+        # Leftovers from earlier signatures/epochs, whichever worker projected them
+        session.run(
+            """
+            CALL gds.graph.list() YIELD graphName
+            WITH graphName WHERE graphName STARTS WITH $prefix AND NOT graphName IN $keep
+            CALL gds.graph.drop(graphName, false) YIELD graphName AS dropped
+            RETURN count(dropped) AS dropped
+            """,
+            {"prefix": f"{_PREFIX}.{label}.{relationship}.", "keep": keep},
+        ).consume()
+
+    def acquire(self, driver, label: str, relationship: str, force: bool = False) -> Projection:
+        """Current projection for (label, relationship), refreshed first if the graph changed."""
+        identifier(label, "label")
+        identifier(relationship, "relationship type")
+        key = f"{label}.{relationship}"
+        with self._key_lock(key):
+            current = self._current.get(key)
+            now = time.time()
+            if current and not force and now - current.checked_at < self.check_s:
+                current.users += 1
+                return current
+            with driver.session(**session_config(WRITE_ACCESS)) as session:
+                signature = self._signature(session, label, relationship)
+                name = self._name(label, relationship, signature, now)
+                if current and not force and current.name == name:
+                    current.checked_at = now
+                    current.users += 1
+                    return current
+                entry = None if force else self._catalog_entry(session, name)
+                reason = "adopted" if entry else (
+                    "initial" if current is None else "forced" if force else
+                    "changed" if current.signature != signature else "expired"
+                )
+                if force and current and current.name == name:
+                    if current.users:
+                        # Still in use here; the retry in run() covers the drop
+                        current.retired = True
+                    self._drop(session, name)
+                if entry is None:
+                    self._project(session, name, label, relationship)
+                    entry = self._catalog_entry(session, name) or {}
+                fresh = Projection(
+                    name=name,
+                    label=label,
+                    relationship=relationship,
+                    signature=signature,
+                    created_at=(entry.get("created_ms") or now * 1000) / 1000.0,
+                    checked_at=now,
+                    size_bytes=int(entry.get("size") or 0),
+                    users=1,
+                )
+                self._current[key] = fresh
+                busy = [fresh.name]
+                if current and current.name != name:
+                    current.retired = True
+                    if current.users:
+                        busy.append(current.name)
+                self._drop_others(session, label, relationship, busy)
+            record_gds_projection(key, fresh.created_at, fresh.size_bytes, reason)
+            return fresh
+
+    def release(self, driver, projection: Projection) -> None:
+        with self._key_lock(projection.key):
+            projection.users -= 1
+            if not (projection.retired and projection.users <= 0):
+                return
+        current = self._current.get(projection.key)
+        if current is not None and current.name == projection.name:
+            return
+        try:
+            with driver.session(**session_config(WRITE_ACCESS)) as session:
+                self._drop(session, projection.name)
+        except Exception:
+            pass
+
+    @contextmanager
+    def projection(self, driver, relationship: str, label: str = "KnowledgeEntity", force: bool = False) -> Iterator[str]:
+        """Yield a graph name to run algorithms against."""
+        if not self.enabled:
+            name = f"kg_tmp_{uuid.uuid4().hex[:8]}"
+            with driver.session(**session_config(WRITE_ACCESS)) as session:
+                self._project(session, name, label, relationship)
+            try:
+                yield name
+            finally:
+                with driver.session(**session_config(WRITE_ACCESS)) as session:
+                    self._drop(session, name)
+            return
+        proj = self.acquire(driver, label, relationship, force=force)
+        try:
+            yield proj.name
+        finally:
+            self.release(driver, proj)
+
+    def run(self, driver, relationship: str, fn: Callable[[Any, str], Any], label: str = "KnowledgeEntity") -> Any:
+        """fn(session, graph_name) on the current projection, retried once if the graph was dropped."""
+        for attempt in (0, 1):
+            try:
+                with self.projection(driver, relationship, label, force=attempt > 0) as name:
+                    with driver.session(**session_config(WRITE_ACCESS)) as session:
+                        return fn(session, name)
+            except Exception as e:
+                if attempt or not self.enabled or not _missing_graph(e):
+                    raise
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            current = list(self._current.values())
+        return [
+            {
+                "name": p.name,
+                "projection": p.key,
+                "nodes": p.signature[0],
+                "relationships": p.signature[1],
+                "age_s": round(now - p.created_at, 3),
+                "size_bytes": p.size_bytes,
+                "in_use": p.users,
+            }
+            for p in current
+        ]
+
+    def drop_all(self, driver) -> int:
+        """Forget every projection; the next call projects afresh. Returns how many were dropped."""
+        with self._lock:
+            current, self._current = list(self._current.values()), {}
+        dropped = 0
+        with driver.session(**session_config(WRITE_ACCESS)) as session:
+            for p in current:
+                p.retired = True
+                clear_gds_projection(p.key)
+                try:
+                    self._drop(session, p.name)
+                    dropped += 1
+                except Exception:
+                    pass
+        return dropped
+
+
+_manager: Optional[GdsProjectionManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_projection_manager() -> GdsProjectionManager:
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                cfg = get_config()
+                _manager = GdsProjectionManager(
+                    check_s=float(getattr(cfg, "GDS_PROJECTION_CHECK_S", 5.0)),
+                    max_age_s=float(getattr(cfg, "GDS_PROJECTION_MAX_AGE_S", 3600.0)),
+                    enabled=bool(getattr(cfg, "GDS_PROJECTIONS_ENABLED", True)),
+                )
+    return _manager
+
+
+def _reset_after_fork() -> None:
+    global _manager, _manager_lock
+    _manager = None
+    _manager_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
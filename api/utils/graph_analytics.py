@@ -0,0 +1,325 @@
+"""
+In-process PageRank and Louvain for deployments without Neo4j GDS.
+
+The graph is streamed from Neo4j as one record per node: the node's internal id, its `id`
+property and the internal ids of its outgoing neighbours. Streaming uses the session
+fetch size, so the client only ever holds one batch of records. The edges are then packed
+into an undirected CSR structure made of plain NumPy arrays:
+
+    indptr   int64 [n + 1]   row offsets
+    indices  int32 [2e]      neighbour of each entry (each edge is stored in both rows)
+    weights  float32 [2e]    only after Louvain aggregation; None means all 1.0
+
+The CSR is filled in chunks by counting sort, so peak memory is about the CSR itself plus
+the int32 edge list (roughly 24 bytes per edge; 10M edges is about 240 MB). Graphs over
+GRAPH_ANALYTICS_MAX_EDGES are refused with GraphTooLargeError. PageRank is power iteration
+with GDS defaults (damping 0.85, 20 iterations, scores scaled so they sum to n). Louvain is
+the usual local-moving and aggregation loop. Results are written back in batched UNWIND
+transactions keyed by internal node id.
+"""
+from __future__ import annotations
+
+import re
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+
+_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_FILL_CHUNK = 1 << 20
+_MATVEC_CHUNK = 1 << 21
+
+
+class GraphTooLargeError(RuntimeError):
+    """Raised when a projection would exceed GRAPH_ANALYTICS_MAX_EDGES"""
+
+
+def analytics_available() -> bool:
+    return np is not None
+
+
+def identifier(value: str, what: str) -> str:
+    if not _IDENT.match(value or ""):
+        raise ValueError(f"invalid {what}: {value!r}")
+    return value
+
+
+@dataclass
+class CsrGraph:
+    indptr: "np.ndarray"
+    indices: "np.ndarray"
+    weights: Optional["np.ndarray"]
+    node_ids: "np.ndarray"  # Neo4j internal ids, sorted ascending
+    entity_ids: List[Any]   # `id` property per node, same order
+
+    @property
+    def n(self) -> int:
+        return int(self.indptr.shape[0] - 1)
+
+    @property
+    def edges(self) -> int:
+        return int(self.indices.shape[0] // 2)
+
+    def degree(self) -> "np.ndarray":
+        if self.weights is None:
+            return np.diff(self.indptr).astype(np.float64)
+        return _row_sums(self.indptr, self.weights)
+
+
+def build_csr(n: int, src: "np.ndarray", dst: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """Symmetric CSR (indptr, indices) from directed edges given as dense indices; drops self-loops."""
+    keep = src != dst
+    if not keep.all():
+        src, dst = src[keep], dst[keep]
+    counts = np.bincount(src, minlength=n) + np.bincount(dst, minlength=n)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    indices = np.empty(int(indptr[-1]), dtype=np.int32)
+    cursor = indptr[:-1].copy()
+    for a, b in ((src, dst), (dst, src)):
+        for start in range(0, a.shape[0], _FILL_CHUNK):
+            rows = a[start:start + _FILL_CHUNK]
+            cols = b[start:start + _FILL_CHUNK]
+            order = np.argsort(rows, kind="stable")
+            rows, cols = rows[order], cols[order]
+            # rank of each entry within its row inside this chunk
+            first = np.searchsorted(rows, rows, side="left")
+            pos = cursor[rows] + (np.arange(rows.shape[0]) - first)
+            indices[pos] = cols
+            cursor += np.bincount(rows, minlength=n)
+    return indptr, indices
+
+
+def _row_sums(indptr: "np.ndarray", values: "np.ndarray") -> "np.ndarray":
+    out = np.zeros(indptr.shape[0] - 1, dtype=np.float64)
+    nonempty = np.flatnonzero(np.diff(indptr))
+    if values.shape[0] and nonempty.shape[0]:
+        out[nonempty] = np.add.reduceat(values.astype(np.float64), indptr[nonempty])
+    return out
+
+
+def _spmv(g: CsrGraph, x: "np.ndarray") -> "np.ndarray":
+    """y[i] = sum_j A[i, j] * x[j], chunked over rows so temporaries stay under _MATVEC_CHUNK entries."""
+    n = g.n
+    y = np.zeros(n, dtype=np.float64)
+    start = 0
+    while start < n:
+        limit = g.indptr[start] + _MATVEC_CHUNK
+        end = max(start + 1, int(np.searchsorted(g.indptr, limit, side="right")) - 1)
+        end = min(end, n)
+        lo, hi = g.indptr[start], g.indptr[end]
+        vals = x[g.indices[lo:hi]]
+        if g.weights is not None:
+            vals = vals * g.weights[lo:hi]
+        y[start:end] = _row_sums(g.indptr[start:end + 1] - lo, vals)
+        start = end
+    return y
+
+
+def load_graph(
+    driver: Any,
+    session_kwargs: Dict[str, Any],
+    *,
+    label: str = "KnowledgeEntity",
+    relationship: str = "SIMILAR_TO",
+    fetch_size: int = 10000,
+    max_edges: int = 20_000_000,
+) -> CsrGraph:
+    """Stream `label` nodes and their outgoing `relationship` edges into a CsrGraph."""
+    label = identifier(label, "label")
+    relationship = identifier(relationship, "relationship type")
+    node_ids = array("q")
+    entity_ids: List[Any] = []
+    src = array("i")
+    dst_nid = array("q")
+    with driver.session(fetch_size=int(fetch_size), **session_kwargs) as session:
+        result = session.run(
+            f"""
+            /* analytics.load.{label}.{relationship} */
+            MATCH (a:{label})
+            RETURN id(a) AS nid, a.id AS id,
+                   [(a)-[:{relationship}]->(b:{label}) | id(b)] AS out
+            ORDER BY nid
+            """
+        )
+        for i, rec in enumerate(result):
+            node_ids.append(rec["nid"])
+            entity_ids.append(rec["id"])
+            out = rec["out"]
+            if out:
+                dst_nid.extend(out)
+                src.extend([i] * len(out))
+                if len(dst_nid) > max_edges:
+                    raise GraphTooLargeError(
+                        f"{relationship} projection exceeds GRAPH_ANALYTICS_MAX_EDGES={max_edges}"
+                    )
+    nids = np.frombuffer(node_ids, dtype=np.int64) if len(node_ids) else np.zeros(0, dtype=np.int64)
+    src_a = np.frombuffer(src, dtype=np.int32) if len(src) else np.zeros(0, dtype=np.int32)
+    dst_a = np.searchsorted(nids, np.frombuffer(dst_nid, dtype=np.int64)).astype(np.int32) if len(dst_nid) else np.zeros(0, dtype=np.int32)
+    del dst_nid
+    indptr, indices = build_csr(len(entity_ids), src_a, dst_a)
+    return CsrGraph(indptr, indices, None, nids, entity_ids)
+
+
+def pagerank(g: CsrGraph, damping: float = 0.85, max_iter: int = 20, tol: float = 1e-7) -> "np.ndarray":
+    """Power-iteration PageRank on the undirected graph, scaled like GDS (scores sum to n)."""
+    n = g.n
+    if n == 0:
+        return np.zeros(0)
+    deg = g.degree()
+    dangling = deg == 0
+    inv = np.zeros(n)
+    inv[~dangling] = 1.0 / deg[~dangling]
+    r = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        leak = r[dangling].sum()
+        nxt = (1.0 - damping) / n + damping * (_spmv(g, r * inv) + leak / n)
+        delta = np.abs(nxt - r).sum()
+        r = nxt
+        if delta < tol:
+            break
+    return r * n
+
+
+def modularity(g: CsrGraph, comm: "np.ndarray") -> float:
+    deg = g.degree()
+    m2 = deg.sum()
+    if m2 == 0:
+        return 0.0
+    rows = np.repeat(np.arange(g.n), np.diff(g.indptr))
+    same = comm[rows] == comm[g.indices]
+    w = g.weights if g.weights is not None else np.ones(g.indices.shape[0])
+    internal = np.bincount(comm[rows][same], weights=w[same], minlength=int(comm.max()) + 1)
+    tot = np.bincount(comm, weights=deg, minlength=int(comm.max()) + 1)
+    return float((internal / m2 - (tot / m2) ** 2).sum())
+
+
+def _local_moving(g: CsrGraph, rng: "np.random.Generator", max_passes: int, min_gain: float) -> Tuple["np.ndarray", bool]:
+    # Per-node work is tiny, so plain Python lists/dicts beat per-node NumPy calls here
+    n = g.n
+    k = g.degree().tolist()
+    m2 = float(sum(k))
+    comm = list(range(n))
+    tot = list(k)
+    indptr = g.indptr.tolist()
+    indices, weights = g.indices, g.weights
+    improved = False
+    for _ in range(max_passes):
+        moved = 0
+        for i in rng.permutation(n).tolist():
+            s, e = indptr[i], indptr[i + 1]
+            if s == e:
+                continue
+            nbrs = indices[s:e].tolist()
+            ws = weights[s:e].tolist() if weights is not None else [1.0] * len(nbrs)
+            links: Dict[int, float] = {}
+            for nb, w in zip(nbrs, ws):
+                if nb != i:
+                    c = comm[nb]
+                    links[c] = links.get(c, 0.0) + w
+            if not links:
+                continue
+            ci, ki = comm[i], k[i]
+            tot[ci] -= ki
+            scale = ki / m2
+            best_c = ci
+            best = links.get(ci, 0.0) - scale * tot[ci] + min_gain
+            for c, w in links.items():
+                gain = w - scale * tot[c]
+                if gain > best:
+                    best, best_c = gain, c
+            if best_c != ci:
+                moved += 1
+            comm[i] = best_c
+            tot[best_c] += ki
+        if not moved:
+            break
+        improved = True
+    return np.asarray(comm, dtype=np.int64), improved
+
+
+def _aggregate(g: CsrGraph, comm: "np.ndarray", ncomm: int) -> CsrGraph:
+    rows = comm[np.repeat(np.arange(g.n), np.diff(g.indptr))]
+    cols = comm[g.indices]
+    w = g.weights if g.weights is not None else np.ones(g.indices.shape[0], dtype=np.float32)
+    key = rows.astype(np.int64) * ncomm + cols
+    uniq, inv = np.unique(key, return_inverse=True)
+    weights = np.bincount(inv, weights=w).astype(np.float32)
+    r = (uniq // ncomm).astype(np.int64)
+    c = (uniq % ncomm).astype(np.int32)
+    indptr = np.zeros(ncomm + 1, dtype=np.int64)
+    np.cumsum(np.bincount(r, minlength=ncomm), out=indptr[1:])
+    return CsrGraph(indptr, c, weights, np.arange(ncomm), list(range(ncomm)))
+
+
+def louvain(
+    g: CsrGraph,
+    max_levels: int = 10,
+    max_passes: int = 10,
+    min_gain: float = 1e-9,
+    seed: int = 42,
+) -> Tuple["np.ndarray", float, int]:
+    """Louvain modularity optimisation. Returns (community per node, modularity, levels)."""
+    rng = np.random.default_rng(seed)
+    membership = np.arange(g.n)
+    level_graph = g
+    levels = 0
+    for _ in range(max_levels):
+        comm, improved = _local_moving(level_graph, rng, max_passes, min_gain)
+        if not improved:
+            break
+        _, comm = np.unique(comm, return_inverse=True)
+        ncomm = int(comm.max()) + 1 if comm.shape[0] else 0
+        membership = comm[membership]
+        levels += 1
+        if ncomm == level_graph.n:
+            break
+        level_graph = _aggregate(level_graph, comm, ncomm)
+    return membership, modularity(g, membership) if g.n else 0.0, levels
+
+
+def write_node_property(
+    driver: Any,
+    session_kwargs: Dict[str, Any],
+    g: CsrGraph,
+    values: Sequence[Any],
+    prop: str,
+    *,
+    label: str = "KnowledgeEntity",
+    batch_size: int = 10000,
+) -> int:
+    """SET `prop` on every node in batched UNWIND write transactions; returns nodes written."""
+    prop = identifier(prop, "property name")
+    label = identifier(label, "label")
+    statement = (
+        f"/* analytics.write.{label}.{prop} */ "
+        f"UNWIND $rows AS row MATCH (n:{label}) WHERE id(n) = row.nid "
+        "SET n += row.props RETURN count(n) AS written"
+    )
+
+    def _tx(tx, rows):
+        rec = tx.run(statement, {"rows": rows}).single()
+        return int(rec["written"]) if rec else 0
+
+    written = 0
+    with driver.session(**session_kwargs) as session:
+        for start in range(0, g.n, batch_size):
+            rows = [
+                {"nid": int(nid), "props": {prop: _py(v)}}
+                for nid, v in zip(g.node_ids[start:start + batch_size], values[start:start + batch_size])
+            ]
+            written += session.execute_write(_tx, rows)
+    return written
+
+
+def _py(v: Any) -> Any:
+    return v.item() if hasattr(v, "item") else v
+
+
+def top_n(g: CsrGraph, scores: "np.ndarray", n: int) -> List[Dict[str, Any]]:
+    order = np.argsort(-scores, kind="stable")[: max(0, int(n))]
+    return [{"id": g.entity_ids[i], "score": float(scores[i])} for i in order]
@@ -0,0 +1,98 @@
+"""
+Level-by-level (frontier) BFS with paging.
+
+`MATCH path = (k)-[*1..depth]-(n)` enumerates every path before DISTINCT/LIMIT can apply,
+which explodes around hub nodes. Here each BFS level is one query that expands the whole
+current frontier (at most `fanout` neighbours per frontier node). Visited nodes are deduped
+client-side, and expansion stops as soon as `limit` nodes have been collected.
+
+Paging is stateless. A cursor records (depth, offset) into the BFS order. Each level is
+expanded in a deterministic order (by element id), so a continuation replays the levels
+before the cursor, one query per level, and resumes mid-level. Writes between pages can
+shift results, as with any offset-based paging.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+_REL_TYPE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# expand(frontier_element_ids, exclude_element_ids) -> neighbour dicts with an "eid" key
+Expand = Callable[[List[str], List[str]], List[Dict[str, Any]]]
+
+
+def rel_pattern(rel_types: Optional[Sequence[str]], default: str) -> str:
+    if not rel_types:
+        return default
+    bad = [t for t in rel_types if not _REL_TYPE.match(str(t))]
+    if bad:
+        raise ValueError(f"invalid relationship type(s): {', '.join(map(str, bad))}")
+    return "|".join(rel_types)
+
+
+def _scope(parts: Sequence[Any]) -> str:
+    return hashlib.sha1(json.dumps(list(parts), default=str).encode("utf-8")).hexdigest()[:12]
+
+
+def encode_cursor(scope: Sequence[Any], depth: int, offset: int) -> str:
+    raw = json.dumps({"s": _scope(scope), "d": depth, "o": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, scope: Sequence[Any]) -> Tuple[int, int]:
+    """(depth, offset) from a cursor; raises ValueError if malformed or issued for other parameters."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        depth, offset = int(data["d"]), int(data["o"])
+    except Exception:
+        raise ValueError("invalid cursor")
+    if data.get("s") != _scope(scope) or depth < 0 or offset < 0:
+        raise ValueError("cursor does not match this traversal")
+    return depth, offset
+
+
+def frontier_bfs(
+    start: Dict[str, Any],
+    expand: Expand,
+    *,
+    max_depth: int,
+    limit: int,
+    depth: int = 0,
+    offset: int = 0,
+) -> Tuple[List[Dict[str, Any]], Optional[Tuple[int, int]]]:
+    """Collect up to `limit` nodes in BFS order starting at position (depth, offset).
+
+    Returns (nodes, next_position). Each node carries its BFS `depth`; the start node is
+    depth 0. next_position is None once the traversal is exhausted. A page that ends exactly
+    on a level boundary returns the next level's position without expanding it, so the
+    following page can come back empty.
+    """
+    out: List[Dict[str, Any]] = []
+    visited = {start["eid"]}
+    prev: List[Dict[str, Any]] = []
+    level: List[Dict[str, Any]] = [start]
+    d = 0
+    while True:
+        if d >= depth:
+            first = offset if d == depth else 0
+            for i in range(first, len(level)):
+                if len(out) >= limit:
+                    return out, (d, i)
+                out.append({**level[i], "depth": d})
+        if d >= max_depth or not level:
+            return out, None
+        if len(out) >= limit:
+            return out, (d + 1, 0)
+        exclude = [n["eid"] for n in prev] + [n["eid"] for n in level]
+        nxt = []
+        for n in expand([n["eid"] for n in level], exclude):
+            if n["eid"] not in visited:
+                visited.add(n["eid"])
+                nxt.append(n)
+        prev, level = level, nxt
+        d += 1
@@ -1,6 +1,11 @@
 from __future__ import annotations
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Any, Dict, List, Tuple
-from .neo4j_client import get_client
+
+from ..config import get_config
+from ..metrics import record_consistency_check
+from .neo4j_client import READ_ACCESS, WRITE_ACCESS, get_client, request_bookmark_manager
 
 # Basic schema catalog for KG governance
 NODE_SCHEMAS: Dict[str, Dict[str, Any]] = {
@@ -52,41 +57,264 @@ def validate_facts(facts: List[Dict[str, Any]]) -> Tuple[bool, List[str]]:
     return (len(errors) == 0), errors
 
 
-def monitor_consistency(limit: int = 50) -> Dict[str, Any]:
-    """Run lightweight checks: orphan Entities (no rels), contradictory RELATED edges by predicate, dangling properties."""
+# Contradiction groups list at most this many objects (object_count has the full number)
+_MAX_CONTRADICTION_OBJECTS = 50
+
+_ORPHANS_QUERY = "/* kg.consistency.orphans */ MATCH (e:Entity) WHERE NOT (e)--() RETURN e.id AS id LIMIT $limit"
+# Only subjects with two or more outgoing edges can contradict. The degree check leaves the far
+# node unlabelled so it is answered from the node's relationship-type counts (a label on it would
+# expand every edge); the subquery still matches (o:Entity). Grouping per subject streams, so
+# LIMIT stops the scan early instead of aggregating every RELATED edge first.
+_CONTRADICTIONS_QUERY = """/* kg.consistency.contradictions */
+MATCH (s:Entity) WHERE COUNT { (s)-[:RELATED]->() } > 1
+CALL {
+    WITH s
+    MATCH (s)-[r:RELATED]->(o:Entity)
+    WITH r.type AS pred, collect(DISTINCT o.id) AS objs
+    WHERE size(objs) > 1
+    RETURN pred, objs
+}
+RETURN s.id AS sid, pred, objs[..$max_objs] AS objs, size(objs) AS object_count
+LIMIT $limit"""
+
+
+# ------------- Contradiction index -------------
+#
+# (:ContradictionKey {sid, pred, objects}) exists for every (subject, predicate) that points at
+# more than one distinct object. Writers that create RELATED edges run CONTRADICTION_INDEX_UPDATE
+# in the same statement. It write-locks each touched subject (so concurrent writers to one key
+# count one after another), recounts that key's objects from the subject's own edges, then
+# creates, updates or deletes the key. Listing open contradictions is then a lookup of
+# ContradictionKey nodes. A periodic reconcile_contradiction_index() rescans the graph to pick
+# up edges written by other paths; the (:ContradictionIndex) node records when it last ran.
+_CONTRADICTION_INDEX_ID = "default"
+
+# Needs `keys`, a list of {sid, pred} maps, in scope; yields one row with `indexed`
+CONTRADICTION_INDEX_UPDATE = """
+CALL {
+    WITH keys
+    UNWIND keys AS k
+    MATCH (s:Entity {id: k.sid})
+    SET s._cidxLock = true REMOVE s._cidxLock
+    WITH k, s
+    OPTIONAL MATCH (s)-[x:RELATED]->(o:Entity) WHERE x.type = k.pred
+    WITH k, count(DISTINCT o) AS n
+    OPTIONAL MATCH (c:ContradictionKey {sid: k.sid, pred: k.pred})
+    FOREACH (_ IN CASE WHEN n > 1 THEN [1] ELSE [] END |
+        MERGE (key:ContradictionKey {sid: k.sid, pred: k.pred})
+        SET key.objects = n, key.updatedAt = timestamp())
+    FOREACH (_ IN CASE WHEN n <= 1 AND c IS NOT NULL THEN [1] ELSE [] END | DELETE c)
+    RETURN count(*) AS indexed
+}
+"""
+
+_INDEXED_CONTRADICTIONS_QUERY = """/* kg.consistency.contradiction_index */
+MATCH (c:ContradictionKey)
+WITH c ORDER BY c.objects DESC, c.sid, c.pred LIMIT $limit
+CALL {
+    WITH c
+    MATCH (s:Entity {id: c.sid})-[x:RELATED]->(o:Entity) WHERE x.type = c.pred
+    RETURN collect(DISTINCT o.id)[..$max_objs] AS objs
+}
+RETURN c.sid AS sid, c.pred AS pred, objs, c.objects AS object_count"""
+
+
+def indexed_contradictions(limit: int = 50) -> Tuple[int, List[Dict[str, Any]]]:
+    """Open contradictions from the ContradictionKey index: (total keys, the `limit` largest groups).
+
+    The total is a label count, so this costs O(limit) however many keys are open.
+    """
     client = get_client()
-    res: Dict[str, Any] = {}
+    total = client.run_query("/* kg.consistency.contradiction_count */ MATCH (c:ContradictionKey) RETURN count(c) AS c")
+    rows = client.run_query(_INDEXED_CONTRADICTIONS_QUERY, {"limit": limit, "max_objs": _MAX_CONTRADICTION_OBJECTS})
+    groups = [
+        {"sid": r["sid"], "pred": r["pred"], "objs": list(r["objs"]), "object_count": r["object_count"]}
+        for r in rows
+    ]
+    return (int(total[0]["c"]) if total else 0), groups
 
-    # Orphan entities
-    orphan = client.run_query(
-        "MATCH (e:Entity) WHERE NOT (e)--() RETURN e.id AS id LIMIT $limit", {"limit": limit}
+
+def refresh_contradiction_keys(tx, keys: List[Dict[str, str]]) -> None:
+    """Recount the given {sid, pred} keys inside an open write transaction."""
+    if keys:
+        tx.run("WITH $keys AS keys " + CONTRADICTION_INDEX_UPDATE + " RETURN indexed", {"keys": keys})
+
+
+def contradiction_index_state() -> Dict[str, Any] | None:
+    rows = get_client().run_query(
+        "MATCH (i:ContradictionIndex {id: $id}) RETURN properties(i) AS i", {"id": _CONTRADICTION_INDEX_ID}
     )
-    res["orphans"] = [r["id"] for r in orphan]
-
-    # Contradictory relations: same subject+predicate => multiple objects
-    contra = client.run_query(
-        "MATCH (s:Entity)-[r:RELATED]->(o:Entity) "
-        "WITH s.id AS sid, r.type AS pred, collect(distinct o.id) AS objs "
-        "WHERE size(objs) > 1 RETURN sid, pred, objs LIMIT $limit",
-        {"limit": limit},
+    return dict(rows[0]["i"]) if rows else None
+
+
+def reconcile_contradiction_index(batch: int = 1000) -> Dict[str, Any]:
+    """Rebuild ContradictionKey nodes from a full scan (run periodically, e.g. by kg_integrity_watch).
+
+    Keys written by the write path after the scan started are kept as they are.
+    """
+    client = get_client()
+    started = int(time.time() * 1000)
+    client.run_query(
+        """/* kg.consistency.contradiction_reconcile */
+        MATCH (s:Entity) WHERE COUNT { (s)-[:RELATED]->() } > 1
+        CALL {
+            WITH s
+            MATCH (s)-[r:RELATED]->(o:Entity)
+            WITH r.type AS pred, count(DISTINCT o) AS n
+            WHERE n > 1
+            RETURN pred, n
+        }
+        CALL {
+            WITH s, pred, n
+            MERGE (c:ContradictionKey {sid: s.id, pred: pred})
+            SET c.objects = n, c.reconciledAt = $gen
+        } IN TRANSACTIONS OF $batch ROWS
+        """,
+        {"gen": started, "batch": batch},
+        access_mode=WRITE_ACCESS,
+    )
+    client.run_query(
+        """
+        MATCH (c:ContradictionKey)
+        WHERE coalesce(c.reconciledAt, 0) < $gen AND coalesce(c.updatedAt, 0) < $gen
+        CALL { WITH c DELETE c } IN TRANSACTIONS OF $batch ROWS
+        """,
+        {"gen": started, "batch": batch},
+        access_mode=WRITE_ACCESS,
+    )
+    rows = client.run_query(
+        """
+        MATCH (c:ContradictionKey) WITH count(c) AS keys
+        MERGE (i:ContradictionIndex {id: $id})
+        SET i.reconciled_at = $gen, i.keys = keys, i.took_ms = timestamp() - $gen
+        RETURN keys
+        """,
+        {"id": _CONTRADICTION_INDEX_ID, "gen": started},
+        access_mode=WRITE_ACCESS,
+    )
+    keys = int(rows[0]["keys"]) if rows else 0
+    return {"keys": keys, "reconciled_at": started, "took_ms": int(time.time() * 1000) - started}
+
+
+def _missing_prop_query(label: str, prop: str) -> str:
+    return (
+        f"/* kg.consistency.missing_props */ MATCH (n:{label}) WHERE n.{prop} IS NULL "
+        "WITH n LIMIT $limit RETURN count(n) AS c"
     )
-    res["contradictions"] = [r.data() for r in contra]
 
-    # Missing required properties per schema (sampled)
+
+def _is_timeout(exc: BaseException) -> bool:
+    return "TimedOut" in str(getattr(exc, "code", "") or "")
+
+
+def run_checks(
+    checks: Dict[str, Tuple[str, Dict[str, Any]]],
+    timeout: float | None = None,
+    parallelism: int | None = None,
+) -> Tuple[Dict[str, List[Any]], Dict[str, Dict[str, Any]]]:
+    """Run named read-only queries concurrently, each in its own session.
+
+    Each query gets `timeout` seconds (server-side transaction timeout, and the caller stops
+    waiting shortly after). Returns (rows per completed check, status per check), where status is
+    {"status": "ok" | "timeout" | "error", "ms": float, "error"?: str}; checks that did not
+    finish have no rows, so callers report partial results.
+    """
+    cfg = get_config()
+    timeout = float(cfg.CONSISTENCY_CHECK_TIMEOUT_S if timeout is None else timeout)
+    workers = max(1, min(len(checks), int(parallelism or cfg.CONSISTENCY_CHECK_PARALLELISM)))
+    client = get_client()
+    # Worker threads have no request context: pass this request's routing along explicitly
+    bookmarks = request_bookmark_manager()
+    rows: Dict[str, List[Any]] = {}
+    status: Dict[str, Dict[str, Any]] = {name: {"status": "timeout", "ms": None} for name in checks}
+    if not checks:
+        return rows, status
+
+    def _run(name: str) -> None:
+        query, params = checks[name]
+        t0 = time.perf_counter()
+        try:
+            rows[name] = client.run_query(
+                query, params, access_mode=READ_ACCESS, bookmark_manager=bookmarks, timeout=timeout or None
+            )
+            status[name] = {"status": "ok", "ms": round((time.perf_counter() - t0) * 1000, 1)}
+        except Exception as e:
+            status[name] = {
+                "status": "timeout" if _is_timeout(e) else "error",
+                "ms": round((time.perf_counter() - t0) * 1000, 1),
+                "error": str(e),
+            }
+        record_consistency_check(name, status[name]["status"], time.perf_counter() - t0)
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kg-consistency")
+    try:
+        futures = [pool.submit(_run, name) for name in checks]
+        # Queued checks only start when a worker frees up, so the wait covers every round
+        rounds = -(-len(checks) // workers)
+        wait(futures, timeout=(timeout + 1.0) * rounds if timeout else None)
+    finally:
+        # A check still running is abandoned (its server-side timeout ends it); do not block on it
+        pool.shutdown(wait=False, cancel_futures=True)
+    return dict(rows), dict(status)
+
+
+def _missing_checks(limit: int) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+    return {
+        f"missing_props:{label}.{prop}": (_missing_prop_query(label, prop), {"limit": limit})
+        for label, spec in NODE_SCHEMAS.items()
+        for prop in spec.get("required", [])
+    }
+
+
+def _missing_from(rows: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
     missing: List[Dict[str, Any]] = []
     for label, spec in NODE_SCHEMAS.items():
         for prop in spec.get("required", []):
-            rows = client.run_query(
-                f"MATCH (n:{label}) WHERE n.{prop} IS NULL RETURN n LIMIT $limit",
-                {"limit": limit},
-            )
-            if rows:
-                missing.append({"label": label, "property": prop, "count": len(rows)})
-    res["missing_props"] = missing
+            found = rows.get(f"missing_props:{label}.{prop}")
+            count = int(found[0]["c"]) if found else 0
+            if count:
+                missing.append({"label": label, "property": prop, "count": count})
+    return missing
+
+
+def monitor_consistency(limit: int = 50, timeout: float | None = None) -> Dict[str, Any]:
+    """Run lightweight checks: orphan Entities (no rels), contradictory RELATED edges by predicate, dangling properties.
 
+    Checks run concurrently (see `run_checks`) and return ids and counts only. A check that
+    times out or fails leaves its list empty; `partial` is then true and `checks` says which.
+    Contradictions come from the write-time ContradictionKey index once it has been reconciled
+    at least once, and from a graph scan before that.
+    """
+    indexed = contradiction_index_state() is not None
+    checks = {
+        "orphans": (_ORPHANS_QUERY, {"limit": limit}),
+        "contradictions": (
+            _INDEXED_CONTRADICTIONS_QUERY if indexed else _CONTRADICTIONS_QUERY,
+            {"limit": limit, "max_objs": _MAX_CONTRADICTION_OBJECTS},
+        ),
+        **_missing_checks(limit),
+    }
+    rows, status = run_checks(checks, timeout=timeout)
+    res: Dict[str, Any] = {
+        "orphans": [r["id"] for r in rows.get("orphans", [])],
+        "contradictions": [
+            {"sid": r["sid"], "pred": r["pred"], "objs": list(r["objs"]), "object_count": r["object_count"]}
+            for r in rows.get("contradictions", [])
+        ],
+        "missing_props": _missing_from(rows),
+    }
+    res["contradiction_source"] = "index" if indexed else "scan"
+    res["partial"] = any(st["status"] != "ok" for st in status.values())
+    res["checks"] = status
     return res
 
 
+def missing_required_props(limit: int = 50) -> List[Dict[str, Any]]:
+    """Missing required properties per schema (sampled: counts stop at `limit`)."""
+    rows, _ = run_checks(_missing_checks(limit))
+    return _missing_from(rows)
+
+
 def apply_constraints_and_indexes() -> Dict[str, Any]:
     """Advise to run scripts/neo4j/constraints.cypher and create_indexes.cypher.
     For convenience, we attempt existence checks for critical constraints.
@@ -0,0 +1,186 @@
+"""
+MinHash signatures and LSH banding for near-duplicate entity detection.
+
+Text is normalised before shingling: NFKD, accents and punctuation dropped, lowercased, and
+whitespace removed. So "OpenAI Inc" and "Open AI, Inc." both become "openaiinc". Shingles are
+the byte k-grams (k = 3) of its UTF-8 encoding; texts shorter than k are padded to one shingle.
+Each shingle x is hashed to 32 bits and signature row i is
+
+    min over shingles x of ((a_i * x + b_i) mod 2**64) >> 32
+
+(multiply-add-shift hashing with random 64-bit a_i, b_i). This is computed for a page of texts
+at once with NumPy: one (shingles x num_perm) matrix, capped at _CHUNK_SHINGLES rows per pass,
+and a segmented minimum. Repeated shingles cannot change a minimum, so no per-text set is built.
+The fraction of equal rows in two signatures estimates the Jaccard similarity of their
+shingle sets.
+
+LSH splits the signature into `bands` bands of num_perm / bands rows. Two texts become
+candidates when any band matches exactly, i.e. with probability 1 - (1 - s**r)**b for Jaccard
+s. The defaults (128 permutations, 32 bands of 4 rows) put the 50% point near s = 0.42, and
+candidates are then kept only above the caller's similarity threshold. Buckets larger than
+`max_bucket` (e.g. many entities named "unknown") are compared against their first member
+only, to keep candidate generation linear.
+
+Signatures depend only on the text and the (k, num_perm, seed) parameters named by
+`MinHasher.key`, so callers can persist them and re-hash only texts that changed.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import unicodedata
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+
+_NON_ALNUM = re.compile(r"[\W_]+", re.UNICODE)
+_MASK = 0xFFFFFFFF
+_BAND_MULT = 0x100000001B3
+_GRAM_MULT = 0x100000001B3
+_GRAM_MIX = 0x9E3779B97F4A7C15
+_CHUNK_SHINGLES = 1 << 16
+
+
+def minhash_available() -> bool:
+    return np is not None
+
+
+def normalize_for_shingles(text: str) -> str:
+    text = text or ""
+    if text.isascii():
+        return _NON_ALNUM.sub("", text.lower())
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub("", stripped.lower())
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, k: int = 3, seed: int = 1) -> None:
+        if np is None:
+            raise RuntimeError("MinHash needs numpy")
+        self.num_perm = int(num_perm)
+        self.k = int(k)
+        self.seed = int(seed)
+        rng = np.random.RandomState(self.seed)
+        self._a = rng.randint(0, 1 << 63, size=self.num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.randint(0, 1 << 63, size=self.num_perm, dtype=np.uint64)
+
+    @property
+    def key(self) -> str:
+        return f"mh2-k{self.k}-p{self.num_perm}-s{self.seed}"
+
+    def text_key(self, text: str) -> str:
+        """Identifies (parameters, normalised text); a stored signature is valid while this matches."""
+        digest = hashlib.sha1(normalize_for_shingles(text).encode("utf-8")).hexdigest()[:16]
+        return f"{self.key}:{digest}"
+
+    def signatures(self, texts: Sequence[str]) -> "np.ndarray":
+        """uint32 [len(texts), num_perm]; texts without any alphanumerics get an all-max row."""
+        encoded = [normalize_for_shingles(t).encode("utf-8") for t in texts]
+        encoded = [e.ljust(self.k, b"\0") if e else e for e in encoded]
+        out = np.full((len(encoded), self.num_perm), _MASK, dtype=np.uint32)
+        start = 0
+        while start < len(encoded):
+            end, size = start, 0
+            while end < len(encoded) and (end == start or size + len(encoded[end]) <= _CHUNK_SHINGLES):
+                size += len(encoded[end])
+                end += 1
+            self._minhash(encoded[start:end], out[start:end])
+            start = end
+        return out
+
+    def _minhash(self, encoded: List[bytes], out: "np.ndarray") -> None:
+        k = self.k
+        lengths = np.fromiter((len(e) for e in encoded), dtype=np.int64, count=len(encoded))
+        buf = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+        m = buf.shape[0] - k + 1
+        if m <= 0:
+            return
+        doc = np.repeat(np.arange(len(encoded), dtype=np.int64), lengths)
+        gram = np.zeros(m, dtype=np.uint64)
+        for j in range(k):
+            gram = gram * np.uint64(_GRAM_MULT) + buf[j:j + m]
+        # Keep k-grams that start and end inside the same text
+        inside = doc[:m] == doc[k - 1:]
+        x = (gram[inside] * np.uint64(_GRAM_MIX)) >> np.uint64(32)
+        d = doc[:m][inside]
+        # Permutation-major, so each segmented minimum runs over contiguous memory
+        values = ((self._a[:, None] * x[None, :] + self._b[:, None]) >> np.uint64(32)).astype(np.uint32)
+        starts = np.flatnonzero(np.concatenate(([True], d[1:] != d[:-1])))
+        out[d[starts]] = np.minimum.reduceat(values, starts, axis=1).T
+
+
+def similarity(a: "np.ndarray", b: "np.ndarray") -> float:
+    return float(np.mean(a == b))
+
+
+def band_hashes(sigs: "np.ndarray", bands: int) -> "np.ndarray":
+    """uint64 [n, bands]: one hash per band of rows."""
+    n, num_perm = sigs.shape
+    if bands < 1 or num_perm % bands:
+        raise ValueError(f"bands must divide num_perm ({num_perm}), got {bands}")
+    rows = sigs.reshape(n, bands, num_perm // bands).astype(np.uint64)
+    h = np.zeros((n, bands), dtype=np.uint64)
+    for r in range(rows.shape[2]):
+        h = (h ^ rows[:, :, r]) * np.uint64(_BAND_MULT)
+    return h
+
+
+def candidate_pairs(sigs: "np.ndarray", bands: int, max_bucket: int = 100) -> "np.ndarray":
+    """Unique index pairs (i < j) that share at least one LSH band, as int64 [m, 2]."""
+    if sigs.shape[0] < 2:
+        return np.zeros((0, 2), dtype=np.int64)
+    hb = band_hashes(sigs, bands)
+    found: List["np.ndarray"] = []
+    for b in range(bands):
+        order = np.argsort(hb[:, b], kind="stable")
+        col = hb[order, b]
+        breaks = np.flatnonzero(col[1:] != col[:-1]) + 1
+        starts = np.concatenate(([0], breaks))
+        ends = np.concatenate((breaks, [len(col)]))
+        for s, e in zip(starts[ends - starts > 1], ends[ends - starts > 1]):
+            members = order[s:e]
+            if e - s <= max_bucket:
+                found.append(np.asarray(list(combinations(members.tolist(), 2)), dtype=np.int64))
+            else:
+                found.append(np.stack([np.full(e - s - 1, members[0]), members[1:]], axis=1))
+    if not found:
+        return np.zeros((0, 2), dtype=np.int64)
+    pairs = np.concatenate(found)
+    pairs.sort(axis=1)
+    return np.unique(pairs, axis=0)
+
+
+def group_pairs(pairs: Sequence[Tuple[int, int]], scores: Sequence[float]) -> List[Tuple[List[int], float]]:
+    """Connected components of the accepted pairs, each with the lowest pair score that joined it."""
+    parent: Dict[int, int] = {}
+
+    def find(i: int) -> int:
+        parent.setdefault(i, i)
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in pairs:
+        ri, rj = find(int(i)), find(int(j))
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+    members: Dict[int, List[int]] = {}
+    low: Dict[int, float] = {}
+    for i in list(parent):
+        members.setdefault(find(i), []).append(i)
+    for (i, _), score in zip(pairs, scores):
+        root = find(int(i))
+        low[root] = min(low.get(root, 1.0), float(score))
+    return [(sorted(ids), low[root]) for root, ids in members.items()]
+
+
+def stored_signature(value, num_perm: int) -> Optional["np.ndarray"]:
+    if isinstance(value, (list, tuple)) and len(value) == num_perm:
+        return np.asarray(value, dtype=np.uint32)
+    return None
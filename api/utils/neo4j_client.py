@@ -1,35 +1,163 @@
-from neo4j import GraphDatabase
+from neo4j import GraphDatabase, Query
+from functools import wraps
+import atexit
+import os
+import re
+import threading
 import time
+from flask import g, has_request_context, request
 from ..config import get_config
-from ..metrics import record_database_operation
+from ..metrics import record_database_operation, record_neo4j_acquisition_wait, track_neo4j_pool
+from .query_log import observe_query
+
+
+READ_ACCESS = "READ"
+WRITE_ACCESS = "WRITE"
+BOOKMARKS_HEADER = "X-Neo4j-Bookmarks"
+_LEADING_COMMENT = re.compile(r"^\s*/\*.*?\*/", re.S)
 
 
 class Neo4jClient:
-    def __init__(self, uri: str, user: str, password: str):
-        self._driver = GraphDatabase.driver(uri, auth=(user, password))
+    def __init__(
+        self,
+        uri: str,
+        user: str,
+        password: str,
+        *,
+        shared: bool = False,
+        max_connection_pool_size: int | None = None,
+        connection_acquisition_timeout: float | None = None,
+        max_connection_lifetime: float | None = None,
+    ):
+        pool_opts = {}
+        if max_connection_pool_size is not None:
+            pool_opts["max_connection_pool_size"] = int(max_connection_pool_size)
+        if connection_acquisition_timeout is not None:
+            pool_opts["connection_acquisition_timeout"] = float(connection_acquisition_timeout)
+        if max_connection_lifetime is not None:
+            pool_opts["max_connection_lifetime"] = float(max_connection_lifetime)
+        self._driver = GraphDatabase.driver(uri, auth=(user, password), **pool_opts)
+        # Shared (process-wide) clients are owned by this module; callers' close() is a no-op
+        self._shared = shared
+        self._pid = os.getpid()
+
+    @property
+    def driver(self):
+        return self._driver
 
     def close(self):
+        if self._shared:
+            return
+        self.shutdown()
+
+    def shutdown(self):
+        """Close the underlying driver and its connection pool regardless of ownership."""
         if self._driver:
             self._driver.close()
 
-    def run_query(self, query: str, parameters: dict | None = None):
+    def verify_connectivity(self) -> None:
+        """Open (and return to the pool) a connection so the first request skips the handshake."""
+        self._driver.verify_connectivity()
+
+    def pool_stats(self) -> dict:
+        """Best-effort snapshot of the driver pool: connections in use and idle across all addresses."""
+        pool = getattr(self._driver, "_pool", None)
+        conns = getattr(pool, "connections", None)
+        lock = getattr(pool, "lock", None)
+        if conns is None or lock is None:
+            return {"in_use": 0, "idle": 0}
+        with lock:
+            all_conns = [c for dq in conns.values() for c in dq]
+        in_use = sum(1 for c in all_conns if getattr(c, "in_use", False))
+        return {"in_use": in_use, "idle": len(all_conns) - in_use}
+
+    def _session(self, access_mode: str | None = None, bookmark_manager=None, **config):
+        return self._driver.session(**session_config(access_mode, bookmark_manager), **config)
+
+    def run_query(
+        self,
+        query: str,
+        parameters: dict | None = None,
+        *,
+        access_mode: str | None = None,
+        bookmark_manager=None,
+        name: str | None = None,
+        timeout: float | None = None,
+    ):
+        """Run a statement in an auto-commit transaction and return all records.
+
+        `access_mode` (READ/WRITE) and `bookmark_manager` default to the current request's
+        routing (see `prefer_read_replicas` and `request_bookmark_manager`). `name` labels the
+        statement's fingerprint in metrics and the slow-query log. `timeout` (seconds) is
+        enforced server-side as the transaction timeout.
+        """
         t0 = time.time()
         ok = True
+        rows: list = []
         try:
-            with self._driver.session() as session:
-                return list(session.run(query, parameters or {}))
+            with self._session(access_mode, bookmark_manager) as session:
+                stmt = Query(query, timeout=timeout) if timeout else query
+                rows = list(session.run(stmt, parameters or {}))
+                return rows
         except Exception:
             ok = False
             raise
         finally:
-            record_database_operation("neo4j", "run_query", time.time() - t0, success=ok)
+            elapsed = time.time() - t0
+            record_database_operation("neo4j", "run_query", elapsed, success=ok)
+            observe_query(query, parameters, elapsed, len(rows), name=name, success=ok, profiler=self.profile_query)
+
+    def stream_query(
+        self,
+        query: str,
+        parameters: dict | None = None,
+        *,
+        fetch_size: int = 1000,
+        timeout: float | None = None,
+        access_mode: str | None = None,
+        bookmark_manager=None,
+        name: str | None = None,
+    ):
+        """Yield records as the server streams them, pulling `fetch_size` records per batch.
+
+        Nothing is buffered beyond the current batch, so memory stays flat for large reads.
+        `timeout` (seconds) is enforced server-side as the transaction timeout. The session is
+        held until the generator is exhausted or closed.
+        """
+        t0 = time.time()
+        ok = True
+        count = 0
+        try:
+            with self._session(access_mode, bookmark_manager, fetch_size=int(fetch_size)) as session:
+                result = session.run(Query(query, timeout=timeout), parameters or {})
+                for record in result:
+                    count += 1
+                    yield record
+        except Exception:
+            ok = False
+            raise
+        finally:
+            elapsed = time.time() - t0
+            record_database_operation("neo4j", "stream_query", elapsed, success=ok)
+            observe_query(query, parameters, elapsed, count, name=name, success=ok, profiler=self.profile_query)
+
+    def profile_query(self, query: str, parameters: dict | None = None) -> dict | None:
+        """Run `query` under PROFILE in a READ session and return the plan (rows, db hits per operator).
+
+        Used by the slow-query log for statements it has judged read-only; a READ session makes
+        the server reject anything that would write.
+        """
+        text = _LEADING_COMMENT.sub("", query, count=1).lstrip()
+        with self._driver.session(default_access_mode=READ_ACCESS) as session:
+            summary = session.run("PROFILE " + text, parameters or {}).consume()
+            return summary.profile
 
     def read_tx(self, fn, *args, **kwargs):
         """Execute a read transaction with a callback(tx, *args, **kwargs). Returns callback result."""
         t0 = time.time()
         ok = True
         try:
-            with self._driver.session(default_access_mode="READ") as session:
+            with self._session(READ_ACCESS) as session:
                 return session.execute_read(fn, *args, **kwargs)
         except Exception:
             ok = False
@@ -42,7 +170,7 @@ class Neo4jClient:
         t0 = time.time()
         ok = True
         try:
-            with self._driver.session(default_access_mode="WRITE") as session:
+            with self._session(WRITE_ACCESS) as session:
                 return session.execute_write(fn, *args, **kwargs)
         except Exception:
             ok = False
@@ -64,7 +192,7 @@ class Neo4jClient:
         t0 = time.time()
         ok = True
         try:
-            with self._driver.session(default_access_mode="WRITE") as session:
+            with self._session(WRITE_ACCESS) as session:
                 return session.execute_write(_runner)
         except Exception:
             ok = False
@@ -73,6 +201,151 @@ class Neo4jClient:
             record_database_operation("neo4j", "run_queries_atomic", time.time() - t0, success=ok)
 
 
-def get_client() -> Neo4jClient:
+# ---------------- Read routing and causal bookmarks ----------------
+#
+# With a neo4j:// URI the driver routes READ sessions to followers/read replicas and WRITE
+# sessions to the leader. Sessions sharing a bookmark manager are causally chained: a read that
+# follows a write waits until the serving member has applied that write (read-your-writes).
+# Within an HTTP request both defaults live on flask.g; clients carry bookmarks across requests
+# via the X-Neo4j-Bookmarks header (returned on responses, accepted on requests).
+
+
+def request_bookmark_manager():
+    """Bookmark manager for the current request, seeded from the X-Neo4j-Bookmarks header."""
+    if not has_request_context():
+        return None
+    bm = getattr(g, "neo4j_bookmark_manager", None)
+    if bm is None:
+        raw = request.headers.get(BOOKMARKS_HEADER, "")
+        initial = [b.strip() for b in raw.split(",") if b.strip()]
+        bm = GraphDatabase.bookmark_manager(initial_bookmarks=initial or None)
+        g.neo4j_bookmark_manager = bm
+    return bm
+
+
+def new_bookmark_manager(initial: list[str] | None = None):
+    """Standalone bookmark manager, e.g. one per WebSocket session."""
+    return GraphDatabase.bookmark_manager(initial_bookmarks=initial or None)
+
+
+def session_config(access_mode: str | None = None, bookmark_manager=None) -> dict:
+    """Session kwargs for the given (or request-default) access mode and bookmark manager."""
+    config = {}
+    if access_mode is None and has_request_context():
+        access_mode = getattr(g, "neo4j_access_mode", None)
+    if access_mode:
+        config["default_access_mode"] = access_mode
+    if bookmark_manager is None:
+        bookmark_manager = request_bookmark_manager()
+    if bookmark_manager is not None:
+        config["bookmark_manager"] = bookmark_manager
+    return config
+
+
+def prefer_read_replicas(fn):
+    """Mark a read-only handler: its sessions default to READ access unless a caller overrides it."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        g.neo4j_access_mode = READ_ACCESS
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def init_bookmarks(app) -> None:
+    """Return the request's latest bookmarks to the caller for use on its next request."""
+    @app.after_request
+    def _attach_bookmarks(response):
+        bm = g.get("neo4j_bookmark_manager")
+        if bm is not None:
+            try:
+                bookmarks = sorted(bm.get_bookmarks())
+                if bookmarks:
+                    response.headers[BOOKMARKS_HEADER] = ",".join(bookmarks)
+            except Exception:
+                pass
+        return response
+
+
+# ---------------- Process-wide shared client ----------------
+
+_shared_client: Neo4jClient | None = None
+_shared_lock = threading.Lock()
+
+
+def _instrument_acquisition(client: Neo4jClient) -> None:
+    """Wrap the driver pool's acquire() to observe how long sessions wait for a connection."""
+    pool = getattr(client.driver, "_pool", None)
+    acquire = getattr(pool, "acquire", None)
+    if acquire is None:
+        return
+
+    def _timed_acquire(*args, **kwargs):
+        t0 = time.time()
+        try:
+            return acquire(*args, **kwargs)
+        finally:
+            record_neo4j_acquisition_wait(time.time() - t0)
+
+    try:
+        pool.acquire = _timed_acquire
+    except Exception:
+        pass
+
+
+def _build_shared_client() -> Neo4jClient:
     cfg = get_config()
-    return Neo4jClient(cfg.NEO4J_URI, cfg.NEO4J_USER, cfg.NEO4J_PASSWORD)
+    client = Neo4jClient(
+        cfg.NEO4J_URI,
+        cfg.NEO4J_USER,
+        cfg.NEO4J_PASSWORD,
+        shared=True,
+        max_connection_pool_size=cfg.NEO4J_MAX_POOL_SIZE,
+        connection_acquisition_timeout=cfg.NEO4J_ACQUISITION_TIMEOUT,
+        max_connection_lifetime=cfg.NEO4J_MAX_CONNECTION_LIFETIME,
+    )
+    _instrument_acquisition(client)
+    track_neo4j_pool(lambda: client.pool_stats()["in_use"], lambda: client.pool_stats()["idle"])
+    return client
+
+
+def get_client() -> Neo4jClient:
+    """Return the process-wide pooled client, creating it lazily.
+
+    A client inherited across fork() is discarded (not closed: its sockets belong to the parent)
+    and rebuilt in the child.
+    """
+    global _shared_client
+    client = _shared_client
+    if client is not None and client._pid == os.getpid():
+        return client
+    with _shared_lock:
+        if _shared_client is None or _shared_client._pid != os.getpid():
+            _shared_client = _build_shared_client()
+        return _shared_client
+
+
+def warm_client() -> None:
+    """Create the shared client and open its first pooled connection."""
+    get_client().verify_connectivity()
+
+
+def close_client() -> None:
+    """Shut down the shared client's pool (e.g. on worker exit)."""
+    global _shared_client
+    with _shared_lock:
+        client, _shared_client = _shared_client, None
+    if client is not None and client._pid == os.getpid():
+        client.shutdown()
+
+
+def _reset_after_fork() -> None:
+    global _shared_client, _shared_lock
+    _shared_client = None
+    _shared_lock = threading.Lock()
+
+
+# Registered before the modules that write through the client (e.g. write_coalescer) import it,
+# so their exit flushes run first (atexit is LIFO) and the pool closes last
+atexit.register(close_client)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,214 @@
+"""
+Neo4j query fingerprints and a sampled slow-query log.
+
+Every Cypher statement is normalized (string/number literals replaced by `?`, comments and
+whitespace collapsed) and hashed into a stable fingerprint, so latency and row counts can be
+tracked per query shape rather than per client method. A human-readable name can be given at
+the call site (`run_query(..., name="kg.contradictions")`) or as a leading block comment
+(`/* kg.contradictions */ MATCH ...`).
+
+Statements slower than NEO4J_SLOW_QUERY_MS are sampled into a bounded in-memory ring buffer
+with parameter values redacted to their shape. With NEO4J_SLOW_QUERY_PROFILE enabled, slow
+read-only statements are re-run with PROFILE in a background thread and the compact plan is
+attached to the entry.
+"""
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..config import get_config
+from ..metrics import record_neo4j_query
+
+# Ad-hoc Cypher (/knowledge/query) would otherwise grow label cardinality without bound
+MAX_FINGERPRINT_LABELS = 500
+OTHER_FINGERPRINT = "other"
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_COMMENT = re.compile(r"//[^\n]*|/\*.*?\*/", re.S)
+_LEADING_NAME = re.compile(r"^\s*/\*\s*([\w.:-]+)\s*\*/")
+_NUMBER = re.compile(r"(?<![\w$`.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_LIST = re.compile(r"\[\s*\?(?:\s*,\s*\?)*\s*\]")
+_WS = re.compile(r"\s+")
+_WRITE = re.compile(r"\b(CREATE|MERGE|DELETE|DETACH|SET|REMOVE|DROP|FOREACH|LOAD\s+CSV|CALL)\b", re.I)
+_READ_PROCS = re.compile(r"\bCALL\s+db\.index\.(vector|fulltext)\.query\w*", re.I)
+
+_label_lock = threading.Lock()
+_labelled: set[str] = set()
+
+
+@lru_cache(maxsize=4096)
+def analyze(query: str) -> Tuple[str, str, str]:
+    """Return (fingerprint, normalized text, name from a leading block comment or "")."""
+    m = _LEADING_NAME.match(query)
+    name = m.group(1) if m else ""
+    text = _STRING.sub("?", query)
+    text = _COMMENT.sub(" ", text)
+    text = _NUMBER.sub("?", text)
+    text = _LIST.sub("[?]", text)
+    text = _WS.sub(" ", text).strip()
+    # The name is part of the identity so label cardinality stays bounded by the fingerprint cap
+    fingerprint = hashlib.sha1(f"{name}|{text}".encode("utf-8")).hexdigest()[:16]
+    return fingerprint, text, name
+
+
+def fingerprint(query: str) -> str:
+    return analyze(query)[0]
+
+
+def is_read_only(normalized: str) -> bool:
+    """Conservative check on normalized text: no clause or procedure call that could write."""
+    if normalized.upper().startswith(("EXPLAIN", "PROFILE")):
+        return False
+    return _WRITE.search(_READ_PROCS.sub(" ", normalized)) is None
+
+
+def redact(value: Any, depth: int = 0) -> Any:
+    """Replace parameter values with their shape so logs never hold user data or embeddings."""
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return "<number>"
+    if isinstance(value, str):
+        return f"<str:{len(value)}>"
+    if isinstance(value, (list, tuple)):
+        return f"<list:{len(value)}>"
+    if isinstance(value, dict):
+        if depth >= 2:
+            return f"<map:{len(value)}>"
+        return {str(k): redact(v, depth + 1) for k, v in value.items()}
+    return f"<{type(value).__name__}>"
+
+
+def _metric_label(fp: str) -> str:
+    if fp in _labelled:
+        return fp
+    with _label_lock:
+        if fp in _labelled or len(_labelled) < MAX_FINGERPRINT_LABELS:
+            _labelled.add(fp)
+            return fp
+    return OTHER_FINGERPRINT
+
+
+def _compact_plan(plan: Any) -> Optional[Dict[str, Any]]:
+    if not isinstance(plan, dict):
+        return None
+    return {
+        "operator": plan.get("operatorType"),
+        "rows": plan.get("rows"),
+        "db_hits": plan.get("dbHits"),
+        "children": [c for c in (_compact_plan(ch) for ch in plan.get("children") or []) if c],
+    }
+
+
+class SlowQueryLog:
+    """Bounded, thread-safe ring buffer of sampled slow statements (newest last)."""
+
+    def __init__(self, threshold_ms: float, sample_rate: float = 1.0, size: int = 200, profile: bool = False):
+        self.threshold_ms = float(threshold_ms)
+        self.sample_rate = max(0.0, min(1.0, float(sample_rate)))
+        self.profile = bool(profile)
+        self._entries: deque = deque(maxlen=max(1, int(size)))
+        self._lock = threading.Lock()
+
+    def consider(
+        self,
+        query: str,
+        parameters: Optional[dict],
+        duration_sec: float,
+        rows: int,
+        *,
+        name: str = "",
+        success: bool = True,
+        profiler: Optional[Callable[[str, dict], Any]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        duration_ms = duration_sec * 1000.0
+        if duration_ms < self.threshold_ms:
+            return None
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return None
+        fp, normalized, comment_name = analyze(query)
+        entry: Dict[str, Any] = {
+            "fingerprint": fp,
+            "name": name or comment_name,
+            "query": normalized,
+            "params": redact(parameters or {}),
+            "duration_ms": round(duration_ms, 3),
+            "rows": int(rows),
+            "success": bool(success),
+            "at": datetime.now(timezone.utc).isoformat(),
+            "profile": None,
+        }
+        with self._lock:
+            self._entries.append(entry)
+        if self.profile and profiler is not None and success and is_read_only(normalized):
+            entry["profile"] = "pending"
+            threading.Thread(
+                target=self._capture_profile, args=(entry, profiler, query, dict(parameters or {})), daemon=True
+            ).start()
+        return entry
+
+    @staticmethod
+    def _capture_profile(entry: Dict[str, Any], profiler: Callable[[str, dict], Any], query: str, params: dict) -> None:
+        try:
+            entry["profile"] = _compact_plan(profiler(query, params))
+        except Exception as e:
+            entry["profile"] = {"error": str(e)}
+
+    def entries(self, limit: Optional[int] = None, fingerprint: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Newest first, optionally filtered to one fingerprint."""
+        with self._lock:
+            items = list(self._entries)
+        items.reverse()
+        if fingerprint:
+            items = [e for e in items if e["fingerprint"] == fingerprint]
+        return items[:limit] if limit else items
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_slow_log: Optional[SlowQueryLog] = None
+
+
+def get_slow_query_log() -> SlowQueryLog:
+    global _slow_log
+    if _slow_log is None:
+        cfg = get_config()
+        _slow_log = SlowQueryLog(
+            cfg.NEO4J_SLOW_QUERY_MS,
+            cfg.NEO4J_SLOW_QUERY_SAMPLE_RATE,
+            cfg.NEO4J_SLOW_QUERY_LOG_SIZE,
+            cfg.NEO4J_SLOW_QUERY_PROFILE,
+        )
+    return _slow_log
+
+
+def observe_query(
+    query: str,
+    parameters: Optional[dict],
+    duration_sec: float,
+    rows: int,
+    *,
+    name: Optional[str] = None,
+    success: bool = True,
+    profiler: Optional[Callable[[str, dict], Any]] = None,
+) -> None:
+    """Record per-fingerprint metrics and offer the statement to the slow-query log. Never raises."""
+    try:
+        fp, _, comment_name = analyze(query)
+        label_name = name or comment_name
+        label = _metric_label(fp)
+        record_neo4j_query(label, label_name if label != OTHER_FINGERPRINT else "", duration_sec, rows)
+        get_slow_query_log().consider(
+            query, parameters, duration_sec, rows, name=label_name, success=success, profiler=profiler
+        )
+    except Exception:
+        pass
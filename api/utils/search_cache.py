@@ -0,0 +1,187 @@
+"""
+Result cache for repeated searches (`/knowledge/search`, `/substrate/search/semantic`).
+
+Entries are keyed by (mode, normalized query text or embedding hash, limit, threshold) and
+evicted LRU-first once their estimated JSON size exceeds SEARCH_CACHE_MAX_BYTES, or when older
+than SEARCH_CACHE_TTL_S. Every graph write that can change search results calls
+`invalidate_search_cache()`, which bumps a generation counter; entries cached under an older
+generation are treated as misses and dropped on access, so invalidation is O(1).
+
+The generation is per worker process: a write handled by another worker is only seen here
+once the TTL expires. Counters land in `search_cache_requests_total{cache,result}` and
+`search_cache_evictions_total{cache,reason}`.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple
+
+from ..config import get_config
+from ..metrics import record_search_cache, record_search_cache_bytes
+
+_MISSING = object()
+
+
+def normalize_query(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def embedding_key(embedding: Sequence[float]) -> str:
+    """Stable digest of an embedding at float32 precision."""
+    data = struct.pack(f"<{len(embedding)}f", *embedding)
+    return hashlib.sha1(data).hexdigest()
+
+
+def search_key(
+    mode: str,
+    *,
+    query: Optional[str] = None,
+    embedding: Optional[Sequence[float]] = None,
+    limit: int = 10,
+    threshold: Optional[float] = None,
+) -> Tuple[Hashable, ...]:
+    subject = embedding_key(embedding) if embedding is not None else normalize_query(query or "")
+    return (mode, subject, int(limit), None if threshold is None else float(threshold))
+
+
+class SearchCache:
+    def __init__(self, max_bytes: int, ttl_s: float, name: str = "search", enabled: bool = True) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttl_s = float(ttl_s)
+        self.name = name
+        self.enabled = enabled and self.max_bytes > 0 and self.ttl_s > 0
+        self.generation = 0
+        self.bytes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, int, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if not self.enabled:
+            return default
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                record_search_cache(self.name, "miss")
+                return default
+            value, expires, size, gen = entry
+            if gen != self.generation or expires <= now:
+                self._drop(key, size, "generation" if gen != self.generation else "ttl")
+                record_search_cache(self.name, "miss")
+                return default
+            self._entries.move_to_end(key)
+        record_search_cache(self.name, "hit")
+        return value
+
+    def put(self, key: Hashable, value: Any, generation: Optional[int] = None) -> bool:
+        """Cache `value`; pass the generation read before computing it so a write in between wins."""
+        if not self.enabled:
+            return False
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            gen = self.generation if generation is None else generation
+            if gen != self.generation:
+                return False
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            self._entries[key] = (value, time.monotonic() + self.ttl_s, size, gen)
+            self.bytes += size
+            while self.bytes > self.max_bytes and self._entries:
+                lru_key, (_, _, lru_size, _) = next(iter(self._entries.items()))
+                self._drop(lru_key, lru_size, "lru")
+            record_search_cache_bytes(self.name, self.bytes)
+        return True
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.generation += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            self.generation += 1
+            record_search_cache_bytes(self.name, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_s": self.ttl_s,
+                "generation": self.generation,
+            }
+
+    def _drop(self, key: Hashable, size: int, reason: str) -> None:
+        del self._entries[key]
+        self.bytes -= size
+        record_search_cache(self.name, "eviction", reason=reason)
+        record_search_cache_bytes(self.name, self.bytes)
+
+
+def _estimate_size(value: Any) -> int:
+    try:
+        return len(json.dumps(value, default=str, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return len(repr(value))
+
+
+_cache: Optional[SearchCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                cfg = get_config()
+                _cache = SearchCache(
+                    max_bytes=cfg.SEARCH_CACHE_MAX_BYTES,
+                    ttl_s=cfg.SEARCH_CACHE_TTL_S,
+                    enabled=cfg.SEARCH_CACHE_ENABLED,
+                )
+    return _cache
+
+
+def invalidate_search_cache() -> None:
+    """Call after any write that can change search results."""
+    c = _cache
+    if c is not None:
+        c.invalidate()
+
+
+def cached_search(key: Hashable, compute) -> Any:
+    """Return the cached result for `key`, or compute, cache and return it."""
+    cache = get_search_cache()
+    hit = cache.get(key, _MISSING)
+    if hit is not _MISSING:
+        return hit
+    gen = cache.generation
+    value = compute()
+    cache.put(key, value, generation=gen)
+    return value
+
+
+def _reset_after_fork() -> None:
+    global _cache, _cache_lock
+    _cache = None
+    _cache_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,125 @@
+"""
+Delta encoding for KnowledgeSnapshot content.
+
+A snapshot is either a keyframe (`encoding='full'`, full `content`) or a delta
+(`encoding='delta'`, `delta` + `base_version`) against the snapshot of the previous version.
+Deltas are line-based edit scripts serialized as compact JSON:
+
+    [[0, n]]        copy the next n lines of the base
+    [[1, n]]        skip the next n lines of the base
+    [[2, "text"]]   insert text
+
+Reconstructing version v walks forward from the nearest keyframe at or before v. Snapshots
+written before delta encoding have no `encoding` and are treated as keyframes.
+"""
+from __future__ import annotations
+
+import json
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+ENCODING_FULL = "full"
+ENCODING_DELTA = "delta"
+
+_COPY, _SKIP, _INSERT = 0, 1, 2
+
+
+def _lines(text: str) -> List[str]:
+    return (text or "").splitlines(keepends=True)
+
+
+def encode_delta(base: str, target: str) -> str:
+    a, b = _lines(base), _lines(target)
+    ops: List[list] = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b).get_opcodes():
+        if tag == "equal":
+            ops.append([_COPY, i2 - i1])
+            continue
+        if i2 > i1:
+            ops.append([_SKIP, i2 - i1])
+        if j2 > j1:
+            ops.append([_INSERT, "".join(b[j1:j2])])
+    return json.dumps(ops, separators=(",", ":"))
+
+
+def apply_delta(base: str, delta: str) -> str:
+    a = _lines(base)
+    out: List[str] = []
+    pos = 0
+    for op in json.loads(delta):
+        code = op[0]
+        if code == _COPY:
+            out.extend(a[pos:pos + op[1]])
+            pos += op[1]
+        elif code == _SKIP:
+            pos += op[1]
+        elif code == _INSERT:
+            out.append(op[1])
+        else:
+            raise ValueError(f"unknown delta op {code!r}")
+    if pos != len(a):
+        raise ValueError("delta does not match its base content")
+    return "".join(out)
+
+
+def plan_snapshot(
+    version: int,
+    content: Any,
+    previous_content: Any,
+    has_previous: bool,
+    keyframe_interval: int,
+) -> Dict[str, Any]:
+    """Decide how to store the snapshot of `version`.
+
+    Returns {"encoding", "content", "delta", "base_version"}. A keyframe is written when the
+    previous version has no snapshot to build on, every `keyframe_interval` versions, for
+    non-text content, or when the delta would not be smaller than the content itself.
+    """
+    full = {"encoding": ENCODING_FULL, "content": content, "delta": None, "base_version": None}
+    if not has_previous or keyframe_interval <= 1 or version % keyframe_interval == 0:
+        return full
+    if not isinstance(content, str) or not isinstance(previous_content, str):
+        return full
+    delta = encode_delta(previous_content, content)
+    if len(delta) >= len(content):
+        return full
+    return {"encoding": ENCODING_DELTA, "content": None, "delta": delta, "base_version": version - 1}
+
+
+def reconstruct(snapshots: Iterable[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], Optional[str], Optional[str]]]:
+    """Decode a chain of snapshot dicts ordered by version ascending.
+
+    Returns (snapshot, content, error) per snapshot; a delta whose base is missing or does not
+    apply gets content None and an error message instead of aborting the whole chain.
+    """
+    out = []
+    prev_version: Optional[int] = None
+    prev_content: Optional[str] = None
+    for s in snapshots:
+        version = s.get("version")
+        content: Optional[str] = None
+        error: Optional[str] = None
+        if (s.get("encoding") or ENCODING_FULL) == ENCODING_FULL:
+            content = s.get("content")
+        elif prev_content is None or s.get("base_version") != prev_version:
+            error = f"missing base version {s.get('base_version')}"
+        else:
+            try:
+                content = apply_delta(prev_content, s.get("delta") or "[]")
+            except Exception as e:
+                error = str(e)
+        out.append((s, content, error))
+        prev_version, prev_content = version, content
+    return out
+
+
+def encode_chain(contents: List[Tuple[int, Any]], keyframe_interval: int) -> List[Dict[str, Any]]:
+    """Re-encode a full-content chain [(version, content), ...] (ascending) into keyframes + deltas."""
+    out = []
+    prev_version: Optional[int] = None
+    prev_content: Any = None
+    for version, content in contents:
+        has_prev = prev_version is not None and prev_version == version - 1 and prev_content is not None
+        out.append({"version": version, **plan_snapshot(version, content, prev_content, has_prev, keyframe_interval)})
+        prev_version, prev_content = version, content
+    return out
@@ -0,0 +1,244 @@
+"""
+Write-behind coalescer for high-frequency, append-only Neo4j rows.
+
+Telemetry writers (metric snapshots, anomalies, task assignments, agent metrics, security
+incidents) each used to open a transaction for a single CREATE. Here rows are buffered per
+statement and written as one `UNWIND $rows AS row ...` statement when the buffer reaches
+NEO4J_COALESCE_MAX_BATCH rows or every NEO4J_COALESCE_FLUSH_MS, whichever comes first.
+
+Callers choose the semantics per write:
+- `wait=True` (default): block until the row's batch is committed; errors are re-raised. The
+  flusher is woken immediately, so concurrent callers share a commit (group commit).
+- `wait=False`: fire-and-forget. The row is written with the next timed/size flush and a
+  failed batch is dropped and counted in `neo4j_coalesced_rows_total{status="dropped"}`.
+
+Buffered rows are capped at NEO4J_COALESCE_MAX_BUFFERED; past that the submitting caller
+flushes inline (backpressure). Pending rows are flushed at interpreter exit. Rows must carry
+their own timestamps since they are written after the fact.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from ..config import get_config
+from ..metrics import record_coalescer_buffered, record_coalescer_flush
+from .neo4j_client import WRITE_ACCESS
+
+logger = logging.getLogger(__name__)
+
+
+class _Ticket:
+    """Completion signal shared by every row in one buffered batch."""
+
+    __slots__ = ("done", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class _Buffer:
+    __slots__ = ("kind", "statement", "client_factory", "rows", "ticket")
+
+    def __init__(self, kind: str, statement: str, client_factory: Callable[[], Any]) -> None:
+        self.kind = kind
+        self.statement = statement
+        self.client_factory = client_factory
+        self.rows: List[Dict[str, Any]] = []
+        self.ticket = _Ticket()
+
+
+class WriteCoalescer:
+    def __init__(
+        self,
+        flush_interval_ms: float = 200,
+        max_batch: int = 500,
+        max_buffered: int = 10000,
+        enabled: bool = True,
+    ) -> None:
+        self.flush_interval = max(0.001, float(flush_interval_ms) / 1000.0)
+        self.max_batch = max(1, int(max_batch))
+        self.max_buffered = max(self.max_batch, int(max_buffered))
+        self.enabled = enabled
+        self._buffers: Dict[str, _Buffer] = {}
+        self._buffered = 0
+        self._lock = threading.Lock()
+        # Serializes flushes so rows of one statement are written in submission order
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._pid = os.getpid()
+
+    def submit(
+        self,
+        kind: str,
+        statement: str,
+        row: Dict[str, Any],
+        *,
+        client_factory: Callable[[], Any],
+        wait: bool = True,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """Buffer `row` for `statement` (which must read its input from `UNWIND $rows AS row`).
+
+        `kind` labels metrics; `client_factory` returns the Neo4j client used to flush.
+        """
+        if not self.enabled or self._stopped:
+            self._write_now(kind, statement, [row], client_factory, raise_errors=wait)
+            return
+        self._ensure_thread()
+        with self._lock:
+            buf = self._buffers.get(statement)
+            if buf is None:
+                buf = self._buffers[statement] = _Buffer(kind, statement, client_factory)
+            buf.client_factory = client_factory
+            buf.rows.append(row)
+            ticket = buf.ticket
+            self._buffered += 1
+            full = len(buf.rows) >= self.max_batch
+            over = self._buffered >= self.max_buffered
+        record_coalescer_buffered(self._buffered)
+        if over:
+            self.flush()
+        elif full or wait:
+            self._wake.set()
+        if wait:
+            if not ticket.done.wait(timeout):
+                raise TimeoutError(f"coalesced write for {kind} not flushed within {timeout}s")
+            if ticket.error is not None:
+                raise ticket.error
+
+    def flush(self) -> int:
+        """Write every buffered row now. Returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                buffers = [b for b in self._buffers.values() if b.rows]
+                taken = []
+                for b in buffers:
+                    taken.append((b.kind, b.statement, b.client_factory, b.rows, b.ticket))
+                    b.rows = []
+                    b.ticket = _Ticket()
+                self._buffered = 0
+            record_coalescer_buffered(0)
+            written = 0
+            for kind, statement, factory, rows, ticket in taken:
+                try:
+                    self._write_now(kind, statement, rows, factory, raise_errors=True)
+                    written += len(rows)
+                except Exception as e:
+                    ticket.error = e
+                    logger.warning("Coalesced %s write of %d rows failed: %s", kind, len(rows), e)
+                finally:
+                    ticket.done.set()
+            return written
+
+    def stop(self, flush: bool = True) -> None:
+        """Stop the flusher thread; by default write out anything still buffered."""
+        self._stopped = True
+        self._wake.set()
+        t = self._thread
+        if t is not None and t is not threading.current_thread():
+            t.join(timeout=max(1.0, self.flush_interval * 5))
+        if flush:
+            self.flush()
+
+    # ------------------------- internals -------------------------
+    def _write_now(
+        self,
+        kind: str,
+        statement: str,
+        rows: List[Dict[str, Any]],
+        client_factory: Callable[[], Any],
+        raise_errors: bool,
+    ) -> None:
+        done = 0
+        try:
+            client = client_factory()
+            for i in range(0, len(rows), self.max_batch):
+                chunk = rows[i:i + self.max_batch]
+                # Inline flushes can run inside a read-routed request; pin them to the writer
+                client.run_query(statement, {"rows": chunk}, access_mode=WRITE_ACCESS)
+                done += len(chunk)
+                record_coalescer_flush(kind, len(chunk), success=True)
+        except Exception as e:
+            # Chunks before the failing one stay committed; the rest are lost
+            record_coalescer_flush(kind, len(rows) - done, success=False)
+            if raise_errors:
+                raise
+            logger.warning("Dropped %d coalesced %s rows: %s", len(rows) - done, kind, e)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="neo4j-write-coalescer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("write coalescer flush failed")
+
+
+_coalescer: Optional[WriteCoalescer] = None
+_coalescer_lock = threading.Lock()
+
+
+def get_coalescer() -> WriteCoalescer:
+    global _coalescer
+    if _coalescer is None:
+        with _coalescer_lock:
+            if _coalescer is None:
+                cfg = get_config()
+                _coalescer = WriteCoalescer(
+                    flush_interval_ms=cfg.NEO4J_COALESCE_FLUSH_MS,
+                    max_batch=cfg.NEO4J_COALESCE_MAX_BATCH,
+                    max_buffered=cfg.NEO4J_COALESCE_MAX_BUFFERED,
+                    enabled=cfg.NEO4J_COALESCE_ENABLED,
+                )
+    return _coalescer
+
+
+def coalesce_write(
+    kind: str,
+    statement: str,
+    row: Dict[str, Any],
+    *,
+    client_factory: Callable[[], Any],
+    wait: bool = True,
+) -> None:
+    """Append one row through the process-wide coalescer (see module docstring)."""
+    get_coalescer().submit(kind, statement, row, client_factory=client_factory, wait=wait)
+
+
+def _flush_at_exit() -> None:
+    c = _coalescer
+    if c is not None and c._pid == os.getpid():
+        try:
+            c.stop(flush=True)
+        except Exception:
+            pass
+
+
+def _reset_after_fork() -> None:
+    # Buffered rows belong to the parent; the child starts empty with its own flusher
+    global _coalescer, _coalescer_lock
+    _coalescer = None
+    _coalescer_lock = threading.Lock()
+
+
+atexit.register(_flush_at_exit)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
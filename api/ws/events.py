@@ -8,7 +8,7 @@ from flask import request, current_app
 from flask_socketio import SocketIO, join_room, leave_room, emit
 from flask_jwt_extended import decode_token
 
-from ..utils.neo4j_client import get_client
+from ..utils.neo4j_client import READ_ACCESS, WRITE_ACCESS, get_client, new_bookmark_manager
 from ..utils.rabbitmq import start_consumer
 from ..metrics import (
     record_websocket_connection,
@@ -50,13 +50,23 @@ class WebSocketManager:
         return wrapper
 
     # ------------------------- Persistence -------------------------
+    def _bookmarks(self):
+        """Per-connection bookmark manager: history reads in a session see that session's own writes."""
+        info = self.active.get(getattr(request, "sid", None))
+        return info.get("bookmarks") if info else None
+
     def _verify_conversation_access(self, conversation_id: str, user_id: Optional[str]) -> bool:
         if not user_id:
             return False
         cypher = (
             "MATCH (u:User {id: $uid})-[:OWNS]->(c:Conversation {id: $cid}) RETURN c LIMIT 1"
         )
-        rows = get_client().run_query(cypher, {"uid": str(user_id), "cid": conversation_id})
+        rows = get_client().run_query(
+            cypher,
+            {"uid": str(user_id), "cid": conversation_id},
+            access_mode=READ_ACCESS,
+            bookmark_manager=self._bookmarks(),
+        )
         return bool(rows)
 
     def _store_message(self, conversation_id: str, user_id: Optional[str], role: str, content: str, agent: Optional[str] = None) -> Dict[str, Any]:
@@ -67,7 +77,7 @@ class WebSocketManager:
             "MERGE (c)-[:HAS_MESSAGE]->(m) RETURN m"
         )
         params = {"cid": conversation_id, "role": role, "content": content, "agent": agent, "uid": user_id}
-        row = get_client().run_query(cypher, params)
+        row = get_client().run_query(cypher, params, access_mode=WRITE_ACCESS, bookmark_manager=self._bookmarks())
         m = row[0]["m"] if row else {}
         return {
             "id": m.get("id"),
@@ -84,7 +94,12 @@ class WebSocketManager:
             "MATCH (c:Conversation {id: $cid})-[:HAS_MESSAGE]->(m:Message) "
             "RETURN m ORDER BY m.created_at DESC LIMIT $lim"
         )
-        rows = get_client().run_query(cypher, {"cid": conversation_id, "lim": int(limit)})
+        rows = get_client().run_query(
+            cypher,
+            {"cid": conversation_id, "lim": int(limit)},
+            access_mode=READ_ACCESS,
+            bookmark_manager=self._bookmarks(),
+        )
         out = []
         for r in rows:
             m = r["m"]
@@ -138,6 +153,7 @@ class WebSocketManager:
                 "user_id": uid,
                 "connected_at": datetime.utcnow().isoformat(),
                 "rooms": set(),
+                "bookmarks": new_bookmark_manager(),
             }
             record_websocket_connection(True)
             emit("connected", {"connection_id": self.active[request.sid]["connection_id"], "user_id": uid})
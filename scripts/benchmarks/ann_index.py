@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Recall@k and query latency of the in-process ANN index (api.utils.ann_index) vs brute force.
+
+Runs on synthetic clustered embeddings by default, so no Neo4j is needed. With BENCH_LABEL
+set, the vectors are read from Neo4j instead (`<label>.embedding`) and queries are perturbed
+copies of stored vectors.
+
+Environment:
+  BENCH_N=100000       vectors (synthetic mode)
+  BENCH_DIM=384        dimensions (synthetic mode)
+  BENCH_QUERIES=200    queries
+  BENCH_K=10           neighbours per query
+  BENCH_NPROBE=1,4,8,16,32   nprobe values to sweep
+  BENCH_LABEL=         KnowledgeEntity or Entity to benchmark real embeddings
+  NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD (only with BENCH_LABEL)
+
+Usage:
+  python scripts/benchmarks/ann_index.py
+"""
+from __future__ import annotations
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+os.environ.setdefault("TESTING", "true")
+
+import numpy as np  # noqa: E402
+
+from api.utils.ann_index import AnnIndex, build_from_neo4j  # noqa: E402
+
+N = int(os.getenv("BENCH_N", "100000"))
+DIM = int(os.getenv("BENCH_DIM", "384"))
+QUERIES = int(os.getenv("BENCH_QUERIES", "200"))
+K = int(os.getenv("BENCH_K", "10"))
+NPROBES = [int(x) for x in os.getenv("BENCH_NPROBE", "1,4,8,16,32").split(",")]
+LABEL = os.getenv("BENCH_LABEL", "")
+
+
+def _synthetic(rng):
+    centers = rng.normal(size=(max(16, N // 500), DIM)).astype(np.float32)
+    vectors = centers[rng.integers(0, centers.shape[0], N)] + 0.35 * rng.normal(size=(N, DIM)).astype(np.float32)
+    ids = [f"v{i}" for i in range(N)]
+    t0 = time.perf_counter()
+    idx = AnnIndex().build(ids, vectors)
+    return idx, ids, vectors, time.perf_counter() - t0
+
+
+def main() -> int:
+    rng = np.random.default_rng(7)
+    if LABEL:
+        t0 = time.perf_counter()
+        idx = build_from_neo4j(LABEL)
+        build_s = time.perf_counter() - t0
+        ids = list(idx._base_ids)
+        vectors = np.asarray(idx._base)
+    else:
+        idx, ids, vectors, build_s = _synthetic(rng)
+    if not ids:
+        raise SystemExit("no vectors to index")
+    nlist = idx._centroids.shape[0] if idx._centroids is not None else 1
+    print(f"index: {len(ids)} x {vectors.shape[1]}, nlist={nlist}, build {build_s:.2f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        idx.save(tmp)
+        save_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        idx = AnnIndex.load(tmp)
+        print(f"save {save_s:.2f}s, mmap load {(time.perf_counter() - t0) * 1e3:.1f}ms")
+
+        unit = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        picks = rng.integers(0, len(ids), QUERIES)
+        queries = unit[picks] + 0.1 * rng.normal(size=(QUERIES, unit.shape[1])).astype(np.float32)
+
+        t0 = time.perf_counter()
+        truth = []
+        for q in queries:
+            scores = unit @ (q / np.linalg.norm(q))
+            top = np.argpartition(-scores, K)[:K]
+            truth.append({ids[i] for i in top})
+        brute_ms = (time.perf_counter() - t0) / QUERIES * 1e3
+        print(f"{'brute':>10}: recall@{K}=1.000  {brute_ms:.2f} ms/query")
+
+        for nprobe in NPROBES:
+            hits_total = 0
+            t0 = time.perf_counter()
+            results = [idx.search(q, k=K, nprobe=nprobe) for q in queries]
+            ms = (time.perf_counter() - t0) / QUERIES * 1e3
+            for res, exp in zip(results, truth):
+                hits_total += len({eid for eid, _ in res} & exp)
+            recall = hits_total / (QUERIES * K)
+            print(f"nprobe={nprobe:>3}: recall@{K}={recall:.3f}  {ms:.2f} ms/query  ({brute_ms / ms:.1f}x)")
+        del idx
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
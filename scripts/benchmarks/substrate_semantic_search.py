@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Requests/sec for POST /api/substrate/search/semantic: per-request substrate vs shared substrate.
+
+"before" reproduces the old handler behaviour (a new EnhancedConsciousnessSubstrate with its own
+driver per request, closed afterwards); "after" uses the app's long-lived substrate on the pooled
+driver. Both run in-process through the Flask test client so only the Neo4j path differs.
+
+Start a local Neo4j first, e.g.:
+  docker run -d --name neo4j-bench -p 7687:7687 -e NEO4J_AUTH=neo4j/password neo4j:5
+
+Environment:
+  NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD (defaults: bolt://localhost:7687, neo4j, password)
+  BENCH_REQUESTS=500   requests per mode
+  BENCH_SEED=200       KnowledgeEntity rows with random embeddings to seed (0 to skip)
+  BENCH_DIM=1536       embedding dimensions (must match the knowledge_embeddings index)
+
+Usage:
+  python scripts/benchmarks/substrate_semantic_search.py
+"""
+from __future__ import annotations
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+os.environ.setdefault("TESTING", "true")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from api.app import create_app  # noqa: E402
+from api.config import get_config  # noqa: E402
+from api.resources import substrate as substrate_mod  # noqa: E402
+from api.utils.consciousness_substrate import EnhancedConsciousnessSubstrate  # noqa: E402
+
+REQUESTS = int(os.getenv("BENCH_REQUESTS", "500"))
+SEED = int(os.getenv("BENCH_SEED", "200"))
+DIM = int(os.getenv("BENCH_DIM", "1536"))
+
+
+def _vec() -> list[float]:
+    return [random.uniform(-1.0, 1.0) for _ in range(DIM)]
+
+
+def _seed(ecs: EnhancedConsciousnessSubstrate) -> None:
+    with ecs.driver.session() as s:
+        s.run(
+            "CREATE VECTOR INDEX knowledge_embeddings IF NOT EXISTS FOR (n:KnowledgeEntity) ON (n.embedding) "
+            "OPTIONS {indexConfig: {`vector.dimensions`: $dim, `vector.similarity_function`: 'cosine'}}",
+            {"dim": DIM},
+        ).consume()
+    for i in range(SEED):
+        ecs.create_knowledge_entity(f"bench entity {i}", "bench", "bench", embedding=_vec())
+
+
+def _run(client, headers, label: str) -> float:
+    body = json.dumps({"embedding": _vec(), "limit": 10, "threshold": 0.0})
+    t0 = time.perf_counter()
+    for _ in range(REQUESTS):
+        r = client.post("/api/substrate/search/semantic", data=body, headers=headers)
+        if r.status_code != 200:
+            raise SystemExit(f"[{label}] unexpected status {r.status_code}: {r.data[:200]!r}")
+    elapsed = time.perf_counter() - t0
+    rps = REQUESTS / elapsed
+    print(f"{label:>7}: {REQUESTS} requests in {elapsed:.2f}s -> {rps:.1f} req/s")
+    return rps
+
+
+def main() -> int:
+    cfg = get_config()
+    app = create_app()
+    app.config.update(TESTING=True)
+    client = app.test_client()
+    with app.app_context():
+        token = create_access_token(identity="bench")
+        if SEED:
+            _seed(app.extensions["substrate"])
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+
+    # Before: one driver (bolt handshake + auth) per request
+    opened: list[EnhancedConsciousnessSubstrate] = []
+
+    def _per_request() -> EnhancedConsciousnessSubstrate:
+        for ecs in opened:
+            ecs.close()
+        opened.clear()
+        ecs = EnhancedConsciousnessSubstrate(cfg.NEO4J_URI, cfg.NEO4J_USER, cfg.NEO4J_PASSWORD)
+        opened.append(ecs)
+        return ecs
+
+    original = substrate_mod._ecs
+    substrate_mod._ecs = _per_request
+    try:
+        before = _run(client, headers, "before")
+    finally:
+        substrate_mod._ecs = original
+        for ecs in opened:
+            ecs.close()
+
+    # After: shared substrate on the pooled driver
+    after = _run(client, headers, "after")
+    print(f"speedup: {after / before:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Latency of /substrate/traverse: variable-length path expansion vs frontier BFS.
+
+Seeds a synthetic power-law graph (Barabasi-Albert preferential attachment) of
+:KnowledgeEntity:BenchTraverse nodes connected by SIMILAR_TO. Then, from the biggest hub and
+from random nodes at several depths, it times:
+  before  the old `MATCH path = (k)-[:SIMILAR_TO*1..depth]-(n) UNWIND nodes(path)` query
+  after   EnhancedConsciousnessSubstrate.traverse_frontier (one query per BFS level)
+The before query gets a per-run timeout (BENCH_TIMEOUT_S) because it can run for minutes on
+hubs at depth 3+.
+
+Start a local Neo4j first, e.g.:
+  docker run -d --name neo4j-bench -p 7687:7687 -e NEO4J_AUTH=neo4j/password neo4j:5
+
+Environment:
+  NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD (defaults: bolt://localhost:7687, neo4j, password)
+  BENCH_NODES=20000     nodes in the synthetic graph
+  BENCH_EDGES_PER=3     edges attached per new node
+  BENCH_DEPTHS=2,3,4    traversal depths
+  BENCH_LIMIT=50        nodes returned per traversal
+  BENCH_RUNS=5          starts per depth (hub + random)
+  BENCH_TIMEOUT_S=30    server-side timeout for the old query
+
+Usage:
+  python scripts/benchmarks/traverse_related.py
+"""
+from __future__ import annotations
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+os.environ.setdefault("TESTING", "true")
+
+from neo4j import Query  # noqa: E402
+
+from api.utils.consciousness_substrate import EnhancedConsciousnessSubstrate  # noqa: E402
+
+NODES = int(os.getenv("BENCH_NODES", "20000"))
+EDGES_PER = int(os.getenv("BENCH_EDGES_PER", "3"))
+DEPTHS = [int(x) for x in os.getenv("BENCH_DEPTHS", "2,3,4").split(",")]
+LIMIT = int(os.getenv("BENCH_LIMIT", "50"))
+RUNS = int(os.getenv("BENCH_RUNS", "5"))
+TIMEOUT_S = float(os.getenv("BENCH_TIMEOUT_S", "30"))
+
+OLD = (
+    "MATCH path = (k:KnowledgeEntity {{id: $id}})-[:SIMILAR_TO*1..{depth}]-(n) "
+    "WITH nodes(path) AS ns UNWIND ns AS node WITH DISTINCT node LIMIT $limit "
+    "RETURN node.id AS id, labels(node) AS labels, node AS props"
+)
+
+
+def _power_law_edges(rng: random.Random):
+    targets = list(range(EDGES_PER))
+    repeated: list[int] = []
+    for v in range(EDGES_PER, NODES):
+        for t in set(targets):
+            yield v, t
+        repeated.extend(targets)
+        repeated.extend([v] * EDGES_PER)
+        targets = [rng.choice(repeated) for _ in range(EDGES_PER)]
+
+
+def _seed(ecs: EnhancedConsciousnessSubstrate, rng: random.Random) -> str:
+    with ecs.driver.session() as s:
+        s.run("MATCH (n:BenchTraverse) CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS").consume()
+        s.run("CREATE INDEX bench_traverse_id IF NOT EXISTS FOR (n:BenchTraverse) ON (n.id)").consume()
+        for start in range(0, NODES, 10000):
+            s.run(
+                "UNWIND range($a, $b) AS i CREATE (:KnowledgeEntity:BenchTraverse {id: 'bt-' + toString(i)})",
+                {"a": start, "b": min(NODES, start + 10000) - 1},
+            ).consume()
+        edges = [{"a": f"bt-{a}", "b": f"bt-{b}"} for a, b in _power_law_edges(rng)]
+        for i in range(0, len(edges), 10000):
+            s.run(
+                "UNWIND $rows AS r MATCH (a:BenchTraverse {id: r.a}), (b:BenchTraverse {id: r.b}) "
+                "CREATE (a)-[:SIMILAR_TO]->(b)",
+                {"rows": edges[i:i + 10000]},
+            ).consume()
+        hub = s.run(
+            "MATCH (n:BenchTraverse) RETURN n.id AS id, COUNT { (n)--() } AS deg ORDER BY deg DESC LIMIT 1"
+        ).single()
+    print(f"seeded {NODES} nodes, {len(edges)} edges; hub {hub['id']} degree {hub['deg']}")
+    return hub["id"]
+
+
+def _time_old(ecs, start_id: str, depth: int) -> float:
+    t0 = time.perf_counter()
+    try:
+        with ecs.driver.session() as s:
+            s.run(Query(OLD.format(depth=depth), timeout=TIMEOUT_S), {"id": start_id, "limit": LIMIT}).consume()
+    except Exception:
+        return float("inf")
+    return time.perf_counter() - t0
+
+
+def _time_new(ecs, start_id: str, depth: int) -> float:
+    t0 = time.perf_counter()
+    ecs.traverse_frontier(start_id, max_depth=depth, rel_types=["SIMILAR_TO"], limit=LIMIT)
+    return time.perf_counter() - t0
+
+
+def _fmt(sec: float) -> str:
+    return "timeout" if sec == float("inf") else f"{sec * 1e3:8.1f}ms"
+
+
+def main() -> int:
+    rng = random.Random(42)
+    ecs = EnhancedConsciousnessSubstrate()
+    hub = _seed(ecs, rng)
+    starts = [hub] + [f"bt-{rng.randrange(NODES)}" for _ in range(RUNS - 1)]
+    for depth in DEPTHS:
+        for label, ids in (("hub", starts[:1]), ("random", starts[1:])):
+            if not ids:
+                continue
+            before = [_time_old(ecs, i, depth) for i in ids]
+            after = [_time_new(ecs, i, depth) for i in ids]
+            b, a = max(before), max(after)
+            ratio = "n/a" if b == float("inf") else f"{b / a:.1f}x"
+            print(f"depth={depth} {label:>6}: before {_fmt(b)}  after {_fmt(a)}  (worst of {len(ids)}; {ratio})")
+    with ecs.driver.session() as s:
+        s.run("MATCH (n:BenchTraverse) CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS").consume()
+        s.run("DROP INDEX bench_traverse_id IF EXISTS").consume()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Telemetry inserts/sec: one CREATE transaction per event vs the write-behind coalescer.
+
+"before" issues the old per-event statement (one auto-commit transaction per MetricSnapshot);
+"after" pushes the same rows through api.utils.write_coalescer fire-and-forget and flushes at
+the end, so the measured time includes every row being committed.
+
+Start a local Neo4j first, e.g.:
+  docker run -d --name neo4j-bench -p 7687:7687 -e NEO4J_AUTH=neo4j/password neo4j:5
+
+Environment:
+  NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD (defaults: bolt://localhost:7687, neo4j, password)
+  BENCH_EVENTS=5000    events per mode
+  BENCH_BATCH=500      coalescer max batch size
+
+Usage:
+  python scripts/benchmarks/write_coalescer.py
+"""
+from __future__ import annotations
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+os.environ.setdefault("TESTING", "true")
+
+from api.utils.neo4j_client import get_client  # noqa: E402
+from api.utils.write_coalescer import WriteCoalescer  # noqa: E402
+
+EVENTS = int(os.getenv("BENCH_EVENTS", "5000"))
+BATCH = int(os.getenv("BENCH_BATCH", "500"))
+TAG = f"bench-{uuid.uuid4().hex[:8]}"
+
+SINGLE = "CREATE (m:BenchMetricSnapshot {id: $id, at: timestamp(), tag: $tag, value: $value})"
+BATCHED = (
+    "UNWIND $rows AS row "
+    "CREATE (m:BenchMetricSnapshot {id: row.id, at: row.at, tag: row.tag, value: row.value})"
+)
+
+
+def _report(label: str, elapsed: float) -> float:
+    rate = EVENTS / elapsed
+    print(f"{label:>7}: {EVENTS} events in {elapsed:.2f}s -> {rate:.0f} events/s ({elapsed / EVENTS * 1e6:.0f} us/event)")
+    return rate
+
+
+def main() -> int:
+    client = get_client()
+    client.verify_connectivity()
+
+    t0 = time.perf_counter()
+    for i in range(EVENTS):
+        client.run_query(SINGLE, {"id": str(uuid.uuid4()), "tag": TAG, "value": float(i)})
+    before = _report("before", time.perf_counter() - t0)
+
+    coalescer = WriteCoalescer(flush_interval_ms=50, max_batch=BATCH, max_buffered=max(BATCH, EVENTS))
+    t0 = time.perf_counter()
+    for i in range(EVENTS):
+        row = {"id": str(uuid.uuid4()), "at": int(time.time() * 1000), "tag": TAG, "value": float(i)}
+        coalescer.submit("BenchMetricSnapshot", BATCHED, row, client_factory=get_client, wait=False)
+    coalescer.stop(flush=True)
+    after = _report("after", time.perf_counter() - t0)
+    print(f"speedup: {after / before:.1f}x")
+
+    client.run_query("MATCH (m:BenchMetricSnapshot {tag: $tag}) DETACH DELETE m", {"tag": TAG})
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Embed every Entity that has no embedding yet (api.services.embedding_enrichment).
+
+Runs the checkpointed enrichment job in this process. Entities are read in id order and
+embedded in EMBEDDING_BATCH_MAX-sized provider requests. Each batch is written back with one
+UNWIND, and the cursor is saved on (:EnrichmentJob {id}). A stopped or crashed run continues
+where it left off; --reset starts again from the first entity. Ctrl-C finishes the current
+batch and leaves the job paused. Provider load is capped at --tpm estimated tokens per minute.
+
+Environment: NEO4J_URI/NEO4J_USER/NEO4J_PASSWORD, EMBEDDING_PROVIDER (plus OPENAI_API_KEY and
+OPENAI_EMBEDDING_MODEL for openai), EMBEDDING_ENRICH_* (see documentation/configuration/ENVIRONMENT_CONFIG.md).
+
+Usage:
+  python scripts/maintenance/enrich_embeddings.py [--job default] [--limit 100000]
+      [--page 1000] [--tpm 1000000] [--reset]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from api.services.embedding_enrichment import run_enrichment  # noqa: E402
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    ap.add_argument("--job", default="default", help="job id; independent jobs keep separate cursors")
+    ap.add_argument("--limit", type=int, help="max entities to handle in this run (default: all)")
+    ap.add_argument("--page", type=int, help="rows per Neo4j page (default: EMBEDDING_ENRICH_PAGE)")
+    ap.add_argument("--tpm", type=float, help="token budget per minute, 0 = unlimited (default: EMBEDDING_ENRICH_TPM)")
+    ap.add_argument("--reset", action="store_true", help="start again from the first entity")
+    args = ap.parse_args()
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    result = run_enrichment(
+        args.job,
+        max_entities=args.limit,
+        reset=args.reset,
+        stop=stop,
+        tokens_per_minute=args.tpm,
+        page_size=args.page,
+    )
+    print(json.dumps(result))
+    return 1 if result.get("status") == "failed" else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
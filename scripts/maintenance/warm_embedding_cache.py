@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Warm the embedding cache (api.utils.embedding_cache) before traffic arrives.
+
+Pages through the texts the API embeds: Entity name/description/id, the same text that
+/knowledge/insert, detect_semantic_drift and enrich_embeddings use. Optionally it also reads
+extra texts (e.g. popular search queries) from a file with one text per line. Texts already
+in the cache are skipped. The rest are embedded in batches and written to both cache tiers.
+Run it on each host whose workers share EMBEDDING_CACHE_PATH.
+
+Environment: NEO4J_URI/NEO4J_USER/NEO4J_PASSWORD, EMBEDDING_PROVIDER (plus OPENAI_API_KEY and
+OPENAI_EMBEDDING_MODEL for openai), EMBEDDING_CACHE_* (see documentation/configuration/ENVIRONMENT_CONFIG.md).
+
+Usage:
+  python scripts/maintenance/warm_embedding_cache.py [--limit 50000] [--page 1000]
+      [--batch 100] [--queries popular_queries.txt] [--no-graph]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from typing import Iterator, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from api.utils.embeddings import warm_embedding_cache  # noqa: E402
+from api.utils.neo4j_client import get_client  # noqa: E402
+
+
+def _graph_texts(limit: int, page: int) -> Iterator[List[str]]:
+    client = get_client()
+    after = ""
+    seen = 0
+    while seen < limit:
+        rows = client.run_query(
+            """
+            MATCH (e:Entity) WHERE e.id > $after
+            WITH e ORDER BY e.id LIMIT $page
+            RETURN e.id AS id, coalesce(e.name, e.description, e.id) AS text
+            """,
+            {"after": after, "page": min(page, limit - seen)},
+        )
+        if not rows:
+            return
+        after = rows[-1]["id"]
+        seen += len(rows)
+        yield [r["text"] for r in rows if isinstance(r["text"], str)]
+
+
+def _file_texts(path: str, page: int) -> Iterator[List[str]]:
+    batch: List[str] = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            batch.append(line.rstrip("\n"))
+            if len(batch) >= page:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    ap.add_argument("--limit", type=int, default=50000, help="max Entity rows to read")
+    ap.add_argument("--page", type=int, default=1000, help="rows per Neo4j page")
+    ap.add_argument("--batch", type=int, default=100, help="texts per embeddings API request")
+    ap.add_argument("--queries", help="file with extra texts to warm, one per line")
+    ap.add_argument("--no-graph", action="store_true", help="only warm --queries")
+    args = ap.parse_args()
+
+    totals = {"texts": 0, "already_cached": 0, "embedded": 0}
+    sources = []
+    if not args.no_graph:
+        sources.append(_graph_texts(args.limit, args.page))
+    if args.queries:
+        sources.append(_file_texts(args.queries, args.page))
+    for pages in sources:
+        for texts in pages:
+            res = warm_embedding_cache(texts, batch_size=args.batch)
+            for k in totals:
+                totals[k] += res[k]
+    print(json.dumps(totals))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
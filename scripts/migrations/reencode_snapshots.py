@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Re-encode KnowledgeSnapshot chains as keyframes + deltas.
+
+Walks every KnowledgeEntity that has snapshots, decodes its chain (legacy full-content
+snapshots and already delta-encoded ones alike), re-encodes it with a keyframe every
+SNAPSHOT_KEYFRAME_INTERVAL versions and writes the changed snapshots back in one write
+transaction per entity. Each new chain is decoded and compared with the original content
+before anything is written; entities whose chain cannot be decoded are skipped and reported.
+Safe to re-run (e.g. after changing the keyframe interval).
+
+Environment:
+  NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD
+  SNAPSHOT_KEYFRAME_INTERVAL=20
+
+Usage:
+  python scripts/migrations/reencode_snapshots.py [--dry-run] [--batch-size 500]
+         [--keyframe-interval 20] [--entity-id <id>]
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from api.config import get_config  # noqa: E402
+from api.utils.neo4j_client import get_client  # noqa: E402
+from api.utils.snapshot_codec import encode_chain, reconstruct  # noqa: E402
+
+_FIELDS = ("encoding", "content", "delta", "base_version")
+
+
+def _stored_bytes(s: Dict[str, Any]) -> int:
+    return len(s.get("content") or "") + len(s.get("delta") or "")
+
+
+def _entity_ids(client, after: str, limit: int) -> List[str]:
+    rows = client.run_query(
+        "MATCH (k:KnowledgeEntity)-[:HAS_SNAPSHOT]->(:KnowledgeSnapshot) "
+        "WHERE k.id > $after RETURN DISTINCT k.id AS id ORDER BY id LIMIT $limit",
+        {"after": after, "limit": limit},
+    )
+    return [r["id"] for r in rows]
+
+
+def _reencode_entity(client, entity_id: str, interval: int, dry_run: bool) -> Dict[str, Any]:
+    def _tx(tx):
+        snaps = [
+            dict(r["s"]) | {"_id": r["sid"]}
+            for r in tx.run(
+                "MATCH (:KnowledgeEntity {id: $id})-[:HAS_SNAPSHOT]->(s:KnowledgeSnapshot) "
+                "RETURN s, s.id AS sid ORDER BY s.version ASC, s.created_at ASC",
+                {"id": entity_id},
+            )
+        ]
+        decoded = reconstruct(snaps)
+        errors = [err for _, _, err in decoded if err]
+        if errors:
+            return {"skipped": True, "error": errors[0], "snapshots": len(snaps)}
+
+        chain = encode_chain([(s.get("version"), content) for s, content, _ in decoded], interval)
+        check = reconstruct(chain)
+        if [c for _, c, _ in check] != [c for _, c, _ in decoded]:
+            return {"skipped": True, "error": "round-trip mismatch", "snapshots": len(snaps)}
+
+        changed = []
+        for old, new in zip(snaps, chain):
+            if any(old.get(f) != new.get(f) for f in _FIELDS):
+                changed.append({"id": old["_id"], **{f: new.get(f) for f in _FIELDS}})
+        if changed and not dry_run:
+            tx.run(
+                "UNWIND $rows AS row "
+                "MATCH (s:KnowledgeSnapshot {id: row.id}) "
+                "SET s.encoding = row.encoding, s.content = row.content, "
+                "s.delta = row.delta, s.base_version = row.base_version",
+                {"rows": changed},
+            ).consume()
+        return {
+            "skipped": False,
+            "snapshots": len(snaps),
+            "changed": len(changed),
+            "bytes_before": sum(_stored_bytes(s) for s in snaps),
+            "bytes_after": sum(_stored_bytes(s) for s in chain),
+        }
+
+    return client.write_tx(_tx)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    ap.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    ap.add_argument("--batch-size", type=int, default=500, help="entity ids fetched per page")
+    ap.add_argument("--keyframe-interval", type=int, default=get_config().SNAPSHOT_KEYFRAME_INTERVAL)
+    ap.add_argument("--entity-id", help="re-encode a single entity")
+    args = ap.parse_args()
+
+    client = get_client()
+    totals = {"entities": 0, "snapshots": 0, "changed": 0, "skipped": 0, "bytes_before": 0, "bytes_after": 0}
+    after = ""
+    while True:
+        ids = [args.entity_id] if args.entity_id else _entity_ids(client, after, args.batch_size)
+        if not ids:
+            break
+        for eid in ids:
+            res = _reencode_entity(client, eid, args.keyframe_interval, args.dry_run)
+            totals["entities"] += 1
+            totals["snapshots"] += res["snapshots"]
+            if res["skipped"]:
+                totals["skipped"] += 1
+                print(f"skip {eid}: {res['error']}", file=sys.stderr)
+                continue
+            for k in ("changed", "bytes_before", "bytes_after"):
+                totals[k] += res[k]
+        if args.entity_id:
+            break
+        after = ids[-1]
+        print(f"... {totals['entities']} entities, {totals['changed']} snapshots re-encoded", file=sys.stderr)
+
+    before, after_bytes = totals["bytes_before"], totals["bytes_after"]
+    ratio = (after_bytes / before) if before else 1.0
+    mode = "dry run" if args.dry_run else "done"
+    print(
+        f"{mode}: {totals['entities']} entities, {totals['snapshots']} snapshots, "
+        f"{totals['changed']} re-encoded, {totals['skipped']} skipped; "
+        f"stored content {before} -> {after_bytes} bytes ({ratio:.1%})"
+    )
+    return 1 if totals["skipped"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,7 +3,9 @@
 Periodic KG integrity monitor.
 
 Runs lightweight checks against Neo4j using api.utils.kg_schema.monitor_consistency
-and sends alerts via api.utils.alerts.send_alert when thresholds are exceeded.
+and sends alerts via api.utils.alerts.send_alert when thresholds are exceeded. It also
+rebuilds the write-time contradiction index from a full scan every CONTRADICTION_RECONCILE_S,
+and the incremental /kg_drift/quality aggregates every QUALITY_RECONCILE_S.
 
 Environment:
   INTERVAL_SECONDS=60 (poll interval)
@@ -12,6 +14,9 @@ Environment:
   THRESH_ORPHANS=0
   THRESH_CONTRADICTIONS=0
   THRESH_MISSING=0
+  CONSISTENCY_CHECK_TIMEOUT_S=10 (per-check timeout; slower checks are reported as incomplete)
+  CONTRADICTION_RECONCILE_S=86400 (full rescan of the write-time contradiction index; 0 = never)
+  QUALITY_RECONCILE_S=86400 (full rebuild of the quality aggregates; 0 = never)
   NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD (required)
 
 Usage:
@@ -27,7 +32,9 @@ if __name__ == "__main__":
     import sys
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
-from api.utils.kg_schema import monitor_consistency
+from api.config import get_config
+from api.services.knowledge_drift import quality_state, reconcile_quality
+from api.utils.kg_schema import contradiction_index_state, monitor_consistency, reconcile_contradiction_index
 from api.utils.alerts import send_alert
 
 INTERVAL = int(os.getenv("INTERVAL_SECONDS", "60"))
@@ -36,6 +43,28 @@ THRESH_CONTRADICTIONS = int(os.getenv("THRESH_CONTRADICTIONS", "0"))
 THRESH_MISSING = int(os.getenv("THRESH_MISSING", "0"))
 
 
+def reconcile_if_due() -> Dict[str, Any] | None:
+    """Rebuild the write-time contradiction index when it was never built or is CONTRADICTION_RECONCILE_S old."""
+    every = get_config().CONTRADICTION_RECONCILE_S
+    if every <= 0:
+        return None
+    state = contradiction_index_state() or {}
+    if time.time() * 1000 - int(state.get("reconciled_at") or 0) < every * 1000:
+        return None
+    return reconcile_contradiction_index()
+
+
+def reconcile_quality_if_due() -> Dict[str, Any] | None:
+    """Rebuild the quality aggregates when they were never built or are QUALITY_RECONCILE_S old."""
+    every = get_config().QUALITY_RECONCILE_S
+    if every <= 0:
+        return None
+    state = quality_state() or {}
+    if time.time() * 1000 - int(state.get("reconciled_at") or 0) < every * 1000:
+        return None
+    return reconcile_quality()
+
+
 def check_once() -> Dict[str, Any]:
     data = monitor_consistency(limit=500)
     orphans = data.get("orphans", [])
@@ -51,10 +80,16 @@ def check_once() -> Dict[str, Any]:
     if len(contradictions) > 5 * max(1, THRESH_CONTRADICTIONS):
         sev = "error"
 
+    # A check that timed out or failed reported nothing; say so rather than look clean
+    incomplete = sorted(name for name, st in (data.get("checks") or {}).items() if st.get("status") != "ok")
+    if incomplete and sev == "info":
+        sev = "warning"
+
     payload = {
         "orphans_count": len(orphans),
         "contradictions_count": len(contradictions),
         "missing_props": missing,
+        "incomplete_checks": incomplete,
     }
 
     if sev != "info":
@@ -67,6 +102,12 @@ def main():
     print(f"[kg_integrity_watch] Starting with interval={INTERVAL}s")
     while True:
         try:
+            rec = reconcile_if_due()
+            if rec:
+                print(f"[kg_integrity_watch] contradiction index reconciled: {rec}")
+            rec = reconcile_quality_if_due()
+            if rec:
+                print(f"[kg_integrity_watch] quality aggregates reconciled: {rec}")
             res = check_once()
             print(f"[kg_integrity_watch] {res}")
         except Exception as e:
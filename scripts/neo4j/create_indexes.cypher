@@ -11,3 +11,17 @@ OPTIONS {
     `vector.similarity_function`: 'cosine'
   }
 };
+
+// Change watermarks for incremental quality/drift assessment (/kg_drift/quality, /kg_drift/detect)
+CREATE INDEX entity_updated_at IF NOT EXISTS FOR (n:Entity) ON (n.updatedAt);
+CREATE INDEX related_last_updated IF NOT EXISTS FOR ()-[r:RELATED]-() ON (r.lastUpdated);
+
+// Merge journals (/kg_drift/curation/merge): one node per merge plan, looked up by id on every batch
+CREATE CONSTRAINT merge_journal_id_unique IF NOT EXISTS FOR (j:MergeJournal) REQUIRE j.id IS UNIQUE;
+
+// Contradiction index (api/utils/kg_schema.py): one key per (subject id, predicate), MERGEd on every edge write
+CREATE CONSTRAINT contradiction_key_unique IF NOT EXISTS FOR (c:ContradictionKey) REQUIRE (c.sid, c.pred) IS UNIQUE;
+
+// KG consensus (api/services/kg_consensus.py): every vote MERGEs its Conflict and Option, and resolve reads Option tallies
+CREATE CONSTRAINT conflict_key_unique IF NOT EXISTS FOR (c:Conflict) REQUIRE (c.sid, c.pred) IS UNIQUE;
+CREATE CONSTRAINT option_key_unique IF NOT EXISTS FOR (o:Option) REQUIRE (o.sid, o.pred, o.oid) IS UNIQUE;
@@ -0,0 +1,207 @@
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from neo4j.exceptions import ClientError  # noqa: E402
+
+from api.utils import ann_index  # noqa: E402
+from api.utils.ann_index import AnnIndex  # noqa: E402
+from api.utils.consciousness_substrate import EnhancedConsciousnessSubstrate  # noqa: E402
+
+
+def _clustered(n=3000, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(30, dim))
+    vectors = centers[rng.integers(0, 30, n)] + 0.3 * rng.normal(size=(n, dim))
+    return [f"e{i}" for i in range(n)], vectors.astype(np.float32), rng
+
+
+def test_ivf_recall_against_brute_force():
+    ids, vectors, rng = _clustered()
+    idx = AnnIndex(nprobe=8).build(ids, vectors)
+    assert idx._centroids is not None and len(idx) == len(ids)
+
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    found = 0
+    for q in unit[rng.integers(0, len(ids), 50)] + 0.05 * rng.normal(size=(50, 32)):
+        truth = {ids[i] for i in np.argsort(-(unit @ (q / np.linalg.norm(q))))[:10]}
+        hits = idx.search(q, k=10)
+        assert [s for _, s in hits] == sorted((s for _, s in hits), reverse=True)
+        found += len(truth & {eid for eid, _ in hits})
+    assert found / 500 >= 0.9
+
+
+def test_upsert_remove_and_threshold():
+    idx = AnnIndex()
+    idx.upsert("a", [1.0, 0.0, 0.0])
+    idx.upsert("b", [0.0, 1.0, 0.0])
+    assert idx.search([1.0, 0.1, 0.0], k=1)[0][0] == "a"
+    idx.upsert("a", [0.0, 0.0, 1.0])
+    assert [eid for eid, _ in idx.search([0.0, 0.0, 1.0], k=2, threshold=0.5)] == ["a"]
+    assert idx.remove("b") and "b" not in idx and len(idx) == 1
+    with pytest.raises(ValueError):
+        idx.upsert("c", [1.0, 0.0])
+
+
+def test_save_load_mmap_and_incremental_tail(tmp_path):
+    ids, vectors, _ = _clustered(n=1500)
+    idx = AnnIndex().build(ids, vectors)
+    idx.save(str(tmp_path))
+    idx.save(str(tmp_path))
+    assert len(list(tmp_path.glob("vectors-*.npy"))) == 1
+
+    loaded = AnnIndex.load(str(tmp_path))
+    assert isinstance(loaded._base, np.memmap) and len(loaded) == 1500
+    assert loaded.search(vectors[7], k=1)[0][0] == "e7"
+
+    loaded.upsert("e7", -vectors[7])
+    loaded.upsert("fresh", vectors[7])
+    loaded.remove("e8")
+    assert loaded.search(vectors[7], k=1)[0][0] == "fresh"
+    loaded.save(str(tmp_path))
+    again = AnnIndex.load(str(tmp_path))
+    assert len(again) == 1500 and "e8" not in again
+    assert again.search(vectors[7], k=1)[0][0] == "fresh"
+    assert AnnIndex.load(str(tmp_path / "missing")) is None
+
+
+def test_workers_persist_tail_segments_without_losing_updates(tmp_path):
+    ids, vectors, _ = _clustered(n=200, dim=8)
+    AnnIndex().build(ids, vectors).save(str(tmp_path))
+
+    # Two workers load the same generation and each exits with its own changes
+    a = AnnIndex.load(str(tmp_path))
+    b = AnnIndex.load(str(tmp_path))
+    a.upsert("from-a", vectors[1])
+    a.remove("e2")
+    b.upsert("from-b", vectors[3])
+    b.upsert("e1", -vectors[1])
+    a.save_tail(str(tmp_path))
+    b.save_tail(str(tmp_path))
+    assert len(list(tmp_path.glob("segment-*.npz"))) == 2
+
+    merged = AnnIndex.load(str(tmp_path))
+    assert "from-a" in merged and "from-b" in merged and "e2" not in merged
+    assert merged.search(vectors[1], k=1)[0][0] == "from-a"
+
+    merged.save(str(tmp_path))
+    assert not list(tmp_path.glob("segment-*.npz"))
+    again = AnnIndex.load(str(tmp_path))
+    assert len(again) == 201 and "from-b" in again and "e2" not in again
+
+
+def test_rebuild_drops_segment_changes_older_than_the_build(tmp_path):
+    ids, vectors, _ = _clustered(n=50, dim=8)
+    worker = AnnIndex().build(ids, vectors)
+    worker.save(str(tmp_path))
+    worker.upsert("stale", vectors[0])
+    worker.save_tail(str(tmp_path))
+
+    rebuilt = AnnIndex()
+    rebuilt.built_at = time.time()
+    rebuilt.build(ids, vectors).save(str(tmp_path))
+    assert "stale" not in AnnIndex.load(str(tmp_path))
+
+
+def test_save_all_writes_segments_unless_built_here(tmp_path, monkeypatch):
+    monkeypatch.setattr(ann_index, "index_path", lambda label: str(tmp_path / label))
+    built = AnnIndex().build(["x"], [[1.0, 0.0]])
+    loaded = AnnIndex()
+    loaded.upsert("y", [0.0, 1.0])
+    monkeypatch.setattr(ann_index, "_indexes", {"KnowledgeEntity": built, "Entity": loaded})
+    ann_index.save_all()
+    assert (tmp_path / "KnowledgeEntity" / "manifest.json").exists()
+    assert not list((tmp_path / "Entity").glob("manifest.json"))
+    assert "y" in AnnIndex.load(str(tmp_path / "Entity"))
+
+
+class _Session:
+    def __init__(self, hydrated):
+        self.hydrated = hydrated
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, cypher, params):
+        if "db.index.vector.queryNodes" in cypher:
+            raise ClientError("There is no such vector schema index: knowledge_embeddings")
+        self.hydrated.append(params["ids"])
+        return [{"id": i, "content": f"content {i}", "entity_type": "note"} for i in params["ids"] if i != "gone"]
+
+
+class _Driver:
+    def __init__(self):
+        self.hydrated = []
+
+    def session(self, **kwargs):
+        return _Session(self.hydrated)
+
+
+def test_semantic_search_falls_back_to_ann_index(monkeypatch):
+    idx = AnnIndex()
+    idx.upsert("k1", [1.0, 0.0])
+    idx.upsert("k2", [0.8, 0.6])
+    idx.upsert("gone", [0.9, 0.1])
+    idx.upsert("k3", [0.0, 1.0])
+    monkeypatch.setitem(ann_index._indexes, "KnowledgeEntity", idx)
+
+    ecs = EnhancedConsciousnessSubstrate()
+    ecs._driver = _Driver()
+    res = ecs.semantic_search([1.0, 0.0], limit=3, threshold=0.5)
+    assert [r["id"] for r in res] == ["k1", "k2"]
+    assert res[0]["content"] == "content k1" and res[0]["similarity"] == pytest.approx(1.0)
+    assert ecs._driver.hydrated == [["k1", "gone", "k2"]]
+    idx.dirty = False
+
+
+class _VectorIndexSession(_Session):
+    """Answers queryNodes the way Neo4j's cosine vector index does: score = (1 + cos) / 2."""
+
+    def __init__(self, vectors):
+        super().__init__([])
+        self.vectors = vectors
+
+    def run(self, cypher, params):
+        if "db.index.vector.queryNodes" not in cypher:
+            return super().run(cypher, params)
+        q = np.asarray(params["query_embedding"], dtype=np.float32)
+        q /= np.linalg.norm(q)
+        scored = []
+        for eid, v in self.vectors.items():
+            cos = float(np.dot(q, v / np.linalg.norm(v)))
+            scored.append((eid, (1 + cos) / 2))
+        scored.sort(key=lambda t: -t[1])
+        return [
+            {"id": eid, "content": f"content {eid}", "entity_type": "note", "score": score}
+            for eid, score in scored[: params["limit"]]
+            if score > params["threshold"]
+        ]
+
+
+def test_ann_fallback_ranks_and_filters_like_the_vector_index(monkeypatch):
+    rng = np.random.default_rng(3)
+    vectors = {f"k{i}": rng.normal(size=6).astype(np.float32) for i in range(40)}
+    idx = AnnIndex()
+    for eid, v in vectors.items():
+        idx.upsert(eid, v)
+    monkeypatch.setitem(ann_index._indexes, "KnowledgeEntity", idx)
+
+    primary = EnhancedConsciousnessSubstrate()
+    primary._driver = _Driver()
+    primary._driver.session = lambda **kwargs: _VectorIndexSession(vectors)
+    fallback = EnhancedConsciousnessSubstrate()
+    fallback._driver = _Driver()
+
+    query = rng.normal(size=6).tolist()
+    for threshold in (0.0, 0.6, 0.7, 0.9):
+        expected = primary.semantic_search(query, limit=10, threshold=threshold)
+        got = fallback.semantic_search(query, limit=10, threshold=threshold)
+        assert [r["id"] for r in got] == [r["id"] for r in expected]
+        assert [r["similarity"] for r in got] == pytest.approx([r["similarity"] for r in expected], abs=1e-5)
+    assert 0 < len(fallback.semantic_search(query, limit=40, threshold=0.7)) < 40
+    idx.dirty = False
@@ -12,7 +12,7 @@ def mock_mq_and_db(monkeypatch):
     monkeypatch.setattr(api.utils.rabbitmq, "publish_exchange_profiled", lambda *a, **k: None)
     # Stub Neo4j client
     class MockClient:
-        def run_query(self, cypher, params=None):
+        def run_query(self, cypher, params=None, **kwargs):
             return []
     monkeypatch.setattr("api.services.coordination.get_client", lambda: MockClient())
     monkeypatch.setattr("api.utils.audit.audit_event", lambda *a, **k: None)
@@ -0,0 +1,134 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from api.utils import embeddings
+from api.utils.embedding_batcher import EmbeddingBatcher, _Batch
+from api.utils.embedding_cache import EmbeddingCache, MemoryTier
+from api.utils.embedding_providers import OpenAIEmbeddingProvider
+
+
+def _run_concurrently(n, fn):
+    start = threading.Barrier(n)
+    out, errors = [None] * n, []
+
+    def worker(i):
+        start.wait()
+        try:
+            out[i] = fn(i)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return out, errors
+
+
+def test_concurrent_requests_share_provider_calls():
+    calls = []
+
+    def embed_many(texts):
+        calls.append(list(texts))
+        return [[float(t[1:])] for t in texts]
+
+    batcher = EmbeddingBatcher(max_batch=8, max_wait_ms=200)
+    out, errors = _run_concurrently(20, lambda i: batcher.embed(f"t{i % 10}", embed_many))
+    assert not errors
+    assert out == [[float(i % 10)] for i in range(20)]
+    assert sum(len(c) for c in calls) <= 20 and len(calls) < 20
+    assert all(len(c) <= 8 and len(set(c)) == len(c) for c in calls)
+
+
+def test_provider_error_reaches_every_waiter():
+    def embed_many(texts):
+        raise RuntimeError("rate limited")
+
+    batcher = EmbeddingBatcher(max_batch=4, max_wait_ms=200)
+    out, errors = _run_concurrently(4, lambda i: batcher.embed(f"x{i}", embed_many))
+    assert out == [None] * 4 and len(errors) == 4
+    assert all(str(e) == "rate limited" for e in errors)
+
+
+def test_get_embeddings_batches_dedupes_and_keeps_order(monkeypatch):
+    requests = []
+
+    class _Client:
+        def __init__(self):
+            self.embeddings = self
+
+        def create(self, model, input):
+            requests.append(list(input))
+            return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[float(len(t))]) for i, t in enumerate(input)])
+
+    cache = EmbeddingCache(MemoryTier(1 << 20), None)
+    provider = OpenAIEmbeddingProvider(model="m")
+    provider._client = _Client()
+    monkeypatch.setattr(embeddings, "get_embedding_provider", lambda: provider)
+    monkeypatch.setattr(embeddings, "get_embedding_cache", lambda: cache)
+    monkeypatch.setattr(embeddings.get_config(), "EMBEDDING_BATCH_MAX", 2)
+
+    texts = ["aaa", "b", "aaa", "cc", "dddd", " b "]
+    assert embeddings.get_embeddings(texts) == [[3.0], [1.0], [3.0], [2.0], [4.0], [1.0]]
+    assert requests == [["aaa", "b"], ["cc", "dddd"]]
+    assert embeddings.get_embeddings(["cc", "eeeee"]) == [[2.0], [5.0]]
+    assert requests[-1] == ["eeeee"]
+    with pytest.raises(ValueError):
+        embeddings.get_embeddings(["ok", "   "])
+
+
+def test_killed_leader_releases_followers_and_the_next_batch():
+    class Killed(BaseException):
+        pass
+
+    joined = threading.Event()
+
+    def leader_embed(texts):
+        joined.wait(5)
+        raise Killed()
+
+    batcher = EmbeddingBatcher(max_batch=8, max_wait_ms=50, follower_timeout=5)
+    leader_error = []
+
+    def lead():
+        try:
+            batcher.embed("a", leader_embed)
+        except Killed as e:
+            leader_error.append(e)
+
+    t = threading.Thread(target=lead)
+    t.start()
+    while batcher._open is None:
+        time.sleep(0.001)
+    follower = batcher._open
+    out, errors = [], []
+
+    def follow():
+        try:
+            out.append(batcher.embed("b", lambda texts: [[0.0]] * len(texts)))
+        except Exception as e:
+            errors.append(e)
+
+    f = threading.Thread(target=follow)
+    f.start()
+    while "b" not in follower.texts:
+        time.sleep(0.001)
+    joined.set()
+    t.join(5)
+    f.join(5)
+    assert leader_error and not out
+    assert len(errors) == 1 and "abandoned" in str(errors[0])
+    assert batcher._open is None
+    assert batcher.embed("c", lambda texts: [[1.0]] * len(texts)) == [1.0]
+
+
+def test_followers_time_out_by_default():
+    batcher = EmbeddingBatcher(max_batch=8, follower_timeout=0.05)
+    batcher._open = stuck = _Batch()
+    with pytest.raises(TimeoutError):
+        batcher.embed("x", lambda texts: [[0.0]] * len(texts))
+    assert "x" in stuck.texts
@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+from api.utils import embedding_cache as ec
+from api.utils import embeddings
+from api.utils.embedding_providers import OpenAIEmbeddingProvider
+
+
+class _FakeOpenAI:
+    def __init__(self):
+        self.inputs = []
+        self.embeddings = self
+
+    def create(self, model, input):
+        self.inputs.append(input)
+        data = [SimpleNamespace(index=i, embedding=[float(len(t)), 1.0, 0.5]) for i, t in enumerate(input)]
+        return SimpleNamespace(data=list(reversed(data)))
+
+
+def _openai(client):
+    provider = OpenAIEmbeddingProvider(model="text-embedding-3-small")
+    provider._client = client
+    return provider
+
+
+def _cache(tmp_path, memory_bytes=1 << 20, disk_bytes=1 << 20):
+    return ec.EmbeddingCache(ec.MemoryTier(memory_bytes), ec.DiskTier(str(tmp_path / "emb.sqlite3"), disk_bytes))
+
+
+def test_tiers_roundtrip_promote_and_persist(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put_many("m", ["hello  world"], [[0.25, -1.5, 3.0]])
+    assert cache.get_many("m", ["hello world", "other"]) == [[0.25, -1.5, 3.0], None]
+    assert cache.get_many("other-model", ["hello world"]) == [None]
+
+    reopened = _cache(tmp_path)  # a new worker: empty memory tier, same disk
+    assert len(reopened.memory) == 0
+    assert reopened.get_many("m", [" hello world "]) == [[0.25, -1.5, 3.0]]
+    assert len(reopened.memory) == 1
+    assert reopened.stats()["disk"]["entries"] == 1
+
+
+def test_size_based_eviction(tmp_path):
+    key_vec = 32 + 4 * 3
+    cache = _cache(tmp_path, memory_bytes=2 * key_vec, disk_bytes=3 * (12 + ec._ROW_OVERHEAD))
+    for i in range(5):
+        cache.put_many("m", [f"t{i}"], [[float(i)] * 3])
+    assert len(cache.memory) == 2 and cache.memory.bytes <= cache.memory.max_bytes
+    disk = cache.disk.stats()
+    assert disk["bytes"] <= disk["max_bytes"] and disk["entries"] < 5
+    assert cache.get_many("m", ["t4"]) == [[4.0] * 3]
+
+
+def test_get_query_embedding_and_warmup_hit_the_api_once(tmp_path, monkeypatch):
+    client, cache = _FakeOpenAI(), _cache(tmp_path)
+    monkeypatch.setattr(embeddings, "get_embedding_provider", lambda: _openai(client))
+    monkeypatch.setattr(embeddings, "get_embedding_cache", lambda: cache)
+
+    first = embeddings.get_query_embedding("graph  databases")
+    assert embeddings.get_query_embedding("graph databases") == first
+    assert client.inputs == [["graph databases"]]
+
+    res = embeddings.warm_embedding_cache(["graph databases", "a", "bb", "a", ""], batch_size=1)
+    assert res["texts"] == 3 and res["already_cached"] == 1 and res["embedded"] == 2
+    assert client.inputs[1:] == [["a"], ["bb"]]
+    assert embeddings.get_query_embedding("bb") == [2.0, 1.0, 0.5]
+    assert len(client.inputs) == 3
@@ -0,0 +1,170 @@
+import threading
+
+import pytest
+
+from api.services import embedding_enrichment as ee
+
+
+class _Client:
+    """Records every statement with its parameters and answers from canned rows by marker."""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.calls = []
+
+    def run_query(self, cypher, params=None, **kwargs):
+        self.calls.append((cypher, params or {}))
+        for marker, rows in self.answers.items():
+            if marker in cypher:
+                return rows(params) if callable(rows) else rows
+        return []
+
+    def params(self, marker):
+        return [p for c, p in self.calls if marker in c]
+
+    def checkpoints(self):
+        return [p["props"] for p in self.params("WHERE j.owner = $owner")]
+
+
+def _rows(*ids, blank=()):
+    return [{"id": i, "text": "   " if i in blank else f"entity {i}"} for i in ids]
+
+
+@pytest.fixture()
+def use(monkeypatch):
+    calls = []
+    monkeypatch.setattr(ee, "vector_search_enabled", lambda: True)
+    monkeypatch.setattr(ee, "cached_embeddings", lambda texts: [None] * len(texts))
+    monkeypatch.setattr(ee, "index_embeddings", lambda label, items: None)
+    monkeypatch.setattr(ee, "invalidate_search_cache", lambda: None)
+    monkeypatch.setattr(ee.get_config(), "EMBEDDING_BATCH_MAX", 3)
+
+    def embed(texts):
+        calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    monkeypatch.setattr(ee, "embed_uncached", embed)
+
+    def install(job=None, pages=(), status="running", claimed=True, **answers):
+        queue = [list(p) for p in pages]
+        client = _Client({
+            "MERGE (j:EnrichmentJob": [{"j": dict(job or {"id": "default"})}] if claimed else [],
+            "count(e) AS c": [{"c": 10}],
+            "LIMIT $limit": lambda params: queue.pop(0) if queue else [],
+            "WHERE j.owner = $owner": [{"status": status}] if status else [],
+            **answers,
+        })
+        client.embedded = calls
+        monkeypatch.setattr(ee, "get_client", lambda: client)
+        return client
+
+    return install
+
+
+def test_token_bucket_waits_for_refill():
+    now = [0.0]
+    slept = []
+
+    def sleep(s):
+        slept.append(s)
+        now[0] += s
+
+    bucket = ee.TokenBucket(600, clock=lambda: now[0], sleep=sleep)
+    assert bucket.acquire(600) == 0.0
+    # 10 tokens per second: 50 more tokens take 5 s
+    assert bucket.acquire(50) == pytest.approx(5.0)
+    assert all(s <= 1.0 for s in slept)
+    # Requests above one minute's budget are capped instead of blocking forever
+    now[0] += 120
+    assert bucket.acquire(10_000) == 0.0
+    assert ee.TokenBucket(0).acquire(10**9) == 0.0
+
+
+def test_run_resumes_after_the_cursor_in_provider_sized_batches(use):
+    client = use(job={"id": "default", "cursor": "e03", "embedded": 4, "skipped": 0, "tokens": 8},
+                 pages=[_rows("e04", "e05", "e06", "e07", "e08", "e09", blank={"e05"})])
+    res = ee.run_enrichment(page_size=10, tokens_per_minute=0)
+    assert client.params("count(e) AS c") == [{"after": "e03"}]
+    assert client.params("LIMIT $limit") == [{"after": "e03", "limit": 10}]
+    # The page is split into provider batches of EMBEDDING_BATCH_MAX = 3; e05 has no text
+    assert client.embedded == [["entity e04", "entity e06"], ["entity e07", "entity e08", "entity e09"]]
+    writes = [[i["id"] for i in p["items"]] for p in client.params("SET e.embedding")]
+    assert writes == [["e04", "e06"], ["e07", "e08", "e09"]]
+
+    # A checkpoint after every batch; a short page finishes the job
+    *batches, final = client.checkpoints()
+    assert [(c["cursor"], c["embedded"], c["skipped"]) for c in batches] == [("e06", 6, 1), ("e09", 9, 1)]
+    assert final["status"] == "done" and final["completed_at"] and final["tokens"] > 8
+    assert res["status"] == "done" and (res["updated"], res["handled"], res["skipped"]) == (5, 6, 1)
+
+
+def test_max_entities_pauses_the_job(use):
+    client = use(pages=[_rows("e00", "e01"), _rows("e02", "e03")])
+    res = ee.run_enrichment(max_entities=4, page_size=2, tokens_per_minute=0)
+    assert [p["limit"] for p in client.params("LIMIT $limit")] == [2, 2]
+    assert res["status"] == "paused" and res["updated"] == 4 and res["cursor"] == "e03"
+    assert client.checkpoints()[-1]["status"] == "paused"
+
+
+def test_failed_batch_keeps_the_cursor(use, monkeypatch):
+    monkeypatch.setattr(ee, "_BACKOFF_S", 0.0)
+    attempts = []
+
+    def down(texts):
+        attempts.append(texts)
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(ee, "embed_uncached", down)
+    client = use(pages=[_rows("e00", "e01", "e02")])
+    res = ee.run_enrichment(page_size=3, tokens_per_minute=0, sleep=lambda s: None)
+    assert len(attempts) == ee._RETRIES
+    assert res["status"] == "failed" and res["cursor"] == "" and "provider down" in res["error"]
+    assert not client.params("SET e.embedding")
+    assert client.checkpoints() == [{"status": "failed", "error": "provider down", "cursor": "", "embedded": 0, "skipped": 0, "tokens": 0}]
+
+
+def test_claim_stop_and_lost_ownership(use):
+    # A job another worker holds is reported, not run
+    client = use(claimed=False, **{"RETURN properties(j)": [{"j": {"id": "default", "status": "running", "cursor": "e04"}}]})
+    res = ee.run_enrichment(tokens_per_minute=0)
+    assert res["reason"] == "already_running" and res["cursor"] == "e04"
+    assert not client.params("LIMIT $limit")
+    assert ee.start_enrichment() is None
+    claim = client.params("MERGE (j:EnrichmentJob")[0]
+    assert claim["stale"] == claim["now"] - ee._HEARTBEAT_STALE_MS and not claim["reset"]
+
+    # "stopping" set by any worker pauses the owner after its current batch
+    client = use(pages=[_rows("e00", "e01", "e02", "e03")], status="stopping")
+    res = ee.run_enrichment(page_size=4, tokens_per_minute=0)
+    assert res["status"] == "paused" and res["cursor"] == "e02" and len(client.embedded) == 1
+
+    # A worker that lost the job stops without a final checkpoint
+    client = use(pages=[_rows("e00", "e01", "e02", "e03")], status=None)
+    res = ee.run_enrichment(page_size=4, tokens_per_minute=0)
+    assert res["status"] == "lost" and len(client.checkpoints()) == 1
+
+
+def test_background_job_stops_after_current_batch(use, monkeypatch):
+    client = use(pages=[_rows("e00", "e01", "e02", "e03", "e04")])
+    entered, gate = threading.Event(), threading.Event()
+    ok = ee.embed_uncached
+
+    def slow(texts):
+        entered.set()
+        gate.wait(5)
+        return ok(texts)
+
+    monkeypatch.setattr(ee, "embed_uncached", slow)
+    monkeypatch.setattr(ee.get_config(), "EMBEDDING_ENRICH_TPM", 0)
+    assert ee.start_enrichment()["id"] == "default"
+    assert entered.wait(5)
+    ee.stop_enrichment()
+    assert client.params("SET j.status = 'stopping'") == [{"id": "default"}]
+    gate.set()
+    for _ in range(500):
+        if any(c.get("status") for c in client.checkpoints()):
+            break
+        threading.Event().wait(0.01)
+    *batches, final = client.checkpoints()
+    assert [c["cursor"] for c in batches] == ["e02"]
+    assert final["status"] == "paused" and final["embedded"] == 3
@@ -0,0 +1,58 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from api.utils import embeddings  # noqa: E402
+from api.utils.embedding_cache import EmbeddingCache, MemoryTier  # noqa: E402
+from api.utils.embedding_providers import (  # noqa: E402
+    EmbeddingProvider,
+    HashingEmbeddingProvider,
+    build_embedding_provider,
+)
+
+
+def _cos(a, b):
+    return float(np.dot(a, b))
+
+
+def test_local_provider_is_deterministic_normalized_and_similarity_aware():
+    p = HashingEmbeddingProvider(dim=256)
+    texts = ["Neo4j graph database", "neo4j   GRAPH database", "graph databases like Neo4j", "banana bread recipe"]
+    a = np.array(p.embed(texts))
+    b = np.array(HashingEmbeddingProvider(dim=256).embed(texts[::-1]))[::-1]
+    assert a.shape == (4, 256) and np.allclose(a, b)
+    assert np.allclose(np.linalg.norm(a, axis=1), 1.0, atol=1e-5)
+    assert _cos(a[0], a[1]) == pytest.approx(1.0, abs=1e-6)
+    assert _cos(a[0], a[2]) > 0.5 > _cos(a[0], a[3])
+    assert not np.allclose(a, HashingEmbeddingProvider(dim=256, seed=1).embed(texts))
+    assert p.embed([""]) and p.model != HashingEmbeddingProvider(dim=128).model
+
+
+def test_local_provider_chunking_matches_single_pass(monkeypatch):
+    from api.utils import embedding_providers
+
+    texts = [f"entity number {i} " * (i % 7 + 1) for i in range(50)]
+    whole = HashingEmbeddingProvider(dim=64).embed(texts)
+    monkeypatch.setattr(embedding_providers, "_CHUNK_BYTES", 100)
+    assert np.allclose(HashingEmbeddingProvider(dim=64).embed(texts), whole)
+
+
+def test_local_provider_enables_vector_paths(monkeypatch):
+    provider, cache = build_embedding_provider("local"), EmbeddingCache(MemoryTier(1 << 20), None)
+    monkeypatch.setattr(embeddings, "get_embedding_provider", lambda: provider)
+    monkeypatch.setattr(embeddings, "get_embedding_cache", lambda: cache)
+    assert embeddings.vector_search_enabled()
+    vec = embeddings.get_query_embedding("offline embedding")
+    assert len(vec) == embeddings.get_config().EMBEDDING_DIM
+    with pytest.raises(ValueError):
+        build_embedding_provider("word2vec")
+
+
+def test_incomplete_provider_fails_at_construction():
+    class NoEmbed(EmbeddingProvider):
+        model = "partial"
+
+    with pytest.raises(TypeError):
+        NoEmbed()
+    with pytest.raises(TypeError):
+        EmbeddingProvider()
@@ -0,0 +1,104 @@
+import pytest
+
+from api.utils.gds_projections import GdsProjectionManager
+
+
+class _Result(list):
+    def single(self):
+        return self[0] if self else None
+
+    def consume(self):
+        return None
+
+
+class _Session:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, cypher, params=None):
+        params = params or {}
+        db = self.db
+        if "gds.projection.signature" in cypher:
+            return _Result([dict(nodes=db.nodes, rels=db.rels)])
+        if "gds.graph.project" in cypher:
+            if params["name"] in db.catalog:
+                raise RuntimeError(f"A graph with name '{params['name']}' already exists.")
+            db.projected.append(params["name"])
+            db.catalog[params["name"]] = {"size": 1000 + db.rels, "created_ms": 1_000}
+            return _Result([])
+        if "STARTS WITH $prefix" in cypher:
+            for name in [n for n in db.catalog if n.startswith(params["prefix"]) and n not in params["keep"]]:
+                del db.catalog[name]
+            return _Result([])
+        if "gds.graph.list($name)" in cypher:
+            entry = db.catalog.get(params["name"])
+            return _Result([dict(entry)] if entry else [])
+        if "gds.graph.drop" in cypher:
+            db.catalog.pop(params["name"], None)
+            return _Result([])
+        raise AssertionError(cypher)
+
+
+class _Driver:
+    def __init__(self, nodes=10, rels=20):
+        self.nodes, self.rels = nodes, rels
+        self.catalog = {}
+        self.projected = []
+
+    def session(self, **kwargs):
+        return _Session(self)
+
+
+def test_projection_reused_until_graph_changes():
+    db = _Driver()
+    mgr = GdsProjectionManager(check_s=0, max_age_s=3600)
+    with mgr.projection(db, "SIMILAR_TO") as first:
+        pass
+    with mgr.projection(db, "SIMILAR_TO") as again:
+        pass
+    assert first == again and db.projected == [first]
+
+    # A long-running call keeps the stale projection alive until it finishes
+    held = mgr.acquire(db, "KnowledgeEntity", "SIMILAR_TO")
+    db.rels += 1
+    with mgr.projection(db, "SIMILAR_TO") as refreshed:
+        assert refreshed != first and set(db.catalog) == {first, refreshed}
+    mgr.release(db, held)
+    assert set(db.catalog) == {refreshed}
+    [stats] = mgr.stats()
+    assert stats["name"] == refreshed and stats["relationships"] == 21 and stats["in_use"] == 0
+
+
+def test_other_worker_adopts_projection_and_run_retries_after_drop():
+    db = _Driver()
+    a, b = GdsProjectionManager(check_s=60), GdsProjectionManager(check_s=60)
+    with a.projection(db, "SIMILAR_TO") as name_a, b.projection(db, "SIMILAR_TO") as name_b:
+        assert name_a == name_b and len(db.projected) == 1
+
+    calls = []
+
+    def algo(session, name):
+        calls.append(name)
+        if name not in db.catalog:
+            raise RuntimeError(f"Graph with name `{name}` does not exist on database `neo4j`.")
+        return "ok"
+
+    db.catalog.clear()  # e.g. dropped by another worker or a restart
+    assert b.run(db, "SIMILAR_TO", algo) == "ok"
+    assert len(calls) == 2 and len(db.projected) == 2
+
+
+def test_disabled_manager_uses_throwaway_projection_and_validates_names():
+    db = _Driver()
+    mgr = GdsProjectionManager(enabled=False)
+    with mgr.projection(db, "SIMILAR_TO") as name:
+        assert name.startswith("kg_tmp_") and name in db.catalog
+    assert db.catalog == {}
+    with pytest.raises(ValueError):
+        GdsProjectionManager().acquire(db, "KnowledgeEntity", "SIMILAR_TO]->() DETACH DELETE n //")
@@ -0,0 +1,116 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from api.utils import graph_analytics as ga  # noqa: E402
+
+
+def _graph(n, edges):
+    src = np.array([a for a, _ in edges], dtype=np.int32)
+    dst = np.array([b for _, b in edges], dtype=np.int32)
+    indptr, indices = ga.build_csr(n, src, dst)
+    return ga.CsrGraph(indptr, indices, None, np.arange(100, 100 + n), [f"k{i}" for i in range(n)])
+
+
+def _two_cliques():
+    left = [(a, b) for a in range(5) for b in range(a + 1, 5)]
+    right = [(a + 5, b + 5) for a, b in left]
+    return _graph(10, left + right + [(4, 5), (3, 3)])
+
+
+def test_build_csr_chunked_matches_dense(monkeypatch):
+    rng = np.random.default_rng(3)
+    src, dst = rng.integers(0, 50, 400, dtype=np.int32), rng.integers(0, 50, 400, dtype=np.int32)
+    monkeypatch.setattr(ga, "_FILL_CHUNK", 7)
+    indptr, indices = ga.build_csr(50, src, dst)
+    dense = np.zeros((50, 50), dtype=int)
+    for a, b in zip(src, dst):
+        if a != b:
+            dense[a, b] += 1
+            dense[b, a] += 1
+    rebuilt = np.zeros_like(dense)
+    for r in range(50):
+        np.add.at(rebuilt[r], indices[indptr[r]:indptr[r + 1]], 1)
+    assert (rebuilt == dense).all()
+
+
+def test_pagerank_matches_dense_power_iteration(monkeypatch):
+    g = _graph(6, [(0, 1), (0, 2), (0, 3), (0, 4), (4, 5)])
+    monkeypatch.setattr(ga, "_MATVEC_CHUNK", 3)
+    scores = ga.pagerank(g, max_iter=100, tol=1e-12)
+    adj = np.zeros((6, 6))
+    for r in range(6):
+        adj[r, g.indices[g.indptr[r]:g.indptr[r + 1]]] = 1
+    r = np.full(6, 1 / 6)
+    for _ in range(100):
+        r = 0.15 / 6 + 0.85 * adj.T @ (r / adj.sum(axis=1))
+    assert np.allclose(scores, r * 6)
+    assert ga.top_n(g, scores, 2)[0] == {"id": "k0", "score": pytest.approx(scores[0])}
+
+
+def test_louvain_separates_cliques():
+    g = _two_cliques()
+    membership, q, levels = ga.louvain(g)
+    assert len(set(membership[:5])) == 1 and len(set(membership[5:])) == 1
+    assert membership[0] != membership[9]
+    assert q == pytest.approx(ga.modularity(g, membership)) and q > 0.4 and levels >= 1
+
+
+class _Result(list):
+    def single(self):
+        return self[0]
+
+
+class _Session:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, cypher, params=None):
+        if "UNWIND $rows" in cypher:
+            self.driver.batches.append(params["rows"])
+            return _Result([{"written": len(params["rows"])}])
+        return iter(self.driver.records)
+
+    def execute_write(self, fn, *args):
+        return fn(self, *args)
+
+
+class _Driver:
+    def __init__(self, records):
+        self.records = records
+        self.batches = []
+        self.session_kwargs = []
+
+    def session(self, **kwargs):
+        self.session_kwargs.append(kwargs)
+        return _Session(self)
+
+
+def test_load_graph_and_batched_write_back():
+    records = [
+        {"nid": 10, "id": "a", "out": [20, 30]},
+        {"nid": 20, "id": "b", "out": [30]},
+        {"nid": 30, "id": "c", "out": []},
+    ]
+    driver = _Driver(records)
+    g = ga.load_graph(driver, {}, fetch_size=2)
+    assert driver.session_kwargs[0]["fetch_size"] == 2
+    assert g.entity_ids == ["a", "b", "c"] and g.edges == 3
+    assert g.degree().tolist() == [2, 2, 2]
+
+    written = ga.write_node_property(driver, {}, g, np.array([7, 8, 9]), "communityId", batch_size=2)
+    assert written == 3
+    assert driver.batches == [
+        [{"nid": 10, "props": {"communityId": 7}}, {"nid": 20, "props": {"communityId": 8}}],
+        [{"nid": 30, "props": {"communityId": 9}}],
+    ]
+    with pytest.raises(ga.GraphTooLargeError):
+        ga.load_graph(_Driver(records), {}, max_edges=2)
+    with pytest.raises(ValueError):
+        ga.write_node_property(driver, {}, g, [1, 2, 3], "bad prop")
@@ -0,0 +1,83 @@
+import os
+import pytest
+from flask_jwt_extended import create_access_token
+
+from api.app import create_app
+from api.utils.graph_traversal import decode_cursor, encode_cursor, frontier_bfs, rel_pattern
+
+# hub "a" with many leaves, plus a chain a-b-c-d and a back edge d-a
+EDGES = [("a", f"leaf{i:02d}") for i in range(20)] + [("a", "b"), ("b", "c"), ("c", "d"), ("d", "a")]
+
+
+def _adjacency():
+    adj = {}
+    for x, y in EDGES:
+        adj.setdefault(x, set()).add(y)
+        adj.setdefault(y, set()).add(x)
+    return adj
+
+
+def _expander(fanout, calls):
+    adj = _adjacency()
+
+    def expand(frontier, exclude):
+        calls.append(list(frontier))
+        out = set()
+        for f in frontier:
+            out.update(sorted(n for n in adj[f] if n not in exclude)[:fanout])
+        return [{"eid": n} for n in sorted(out)]
+
+    return expand
+
+
+def test_bfs_levels_dedupe_and_early_stop():
+    calls = []
+    nodes, pos = frontier_bfs({"eid": "c"}, _expander(100, calls), max_depth=3, limit=100)
+    depth = {n["eid"]: n["depth"] for n in nodes}
+    assert depth["c"] == 0 and depth["b"] == 1 and depth["d"] == 1 and depth["a"] == 2
+    assert depth["leaf00"] == 3 and len(nodes) == len(depth) == 24 and pos is None
+
+    calls.clear()
+    nodes, pos = frontier_bfs({"eid": "c"}, _expander(100, calls), max_depth=3, limit=2)
+    assert [n["eid"] for n in nodes] == ["c", "b"] and pos == (1, 1)
+    assert len(calls) == 1  # stopped before expanding level 2
+
+
+def test_fanout_cap_and_cursor_paging_matches_single_pass():
+    full, _ = frontier_bfs({"eid": "a"}, _expander(5, []), max_depth=3, limit=1000)
+    assert len([n for n in full if n["depth"] == 1]) == 5
+
+    pages, position = [], (0, 0)
+    while position is not None:
+        page, position = frontier_bfs(
+            {"eid": "a"}, _expander(5, []), max_depth=3, limit=3, depth=position[0], offset=position[1]
+        )
+        pages.extend(page)
+    assert pages == full
+
+
+def test_cursor_roundtrip_and_validation():
+    scope = ("E1", "SIMILAR_TO", 3, 100)
+    token = encode_cursor(scope, 2, 7)
+    assert decode_cursor(token, scope) == (2, 7)
+    with pytest.raises(ValueError):
+        decode_cursor(token, ("E2", "SIMILAR_TO", 3, 100))
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor", scope)
+    assert rel_pattern(["SIMILAR_TO", "HAS_CONFLICT"], "X") == "SIMILAR_TO|HAS_CONFLICT"
+    with pytest.raises(ValueError):
+        rel_pattern(["SIMILAR_TO]-() DETACH DELETE n //"], "X")
+
+
+def test_traverse_endpoint_rejects_bad_input():
+    os.environ["TESTING"] = "true"
+    os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+    app = create_app()
+    app.config.update(TESTING=True, JWT_SECRET_KEY="test-jwt")
+    with app.app_context():
+        headers = {"Authorization": f"Bearer {create_access_token(identity='t')}"}
+    http = app.test_client()
+    r = http.post("/api/substrate/traverse", json={"start_id": "E1", "rel_types": ["A B"]}, headers=headers)
+    assert r.status_code == 400
+    r = http.post("/api/substrate/traverse", json={"start_id": "E1", "cursor": "garbage"}, headers=headers)
+    assert r.status_code == 400
@@ -0,0 +1,125 @@
+import pytest
+
+from api.metrics import api_registry
+from api.services import kg_consensus as kc
+
+
+class _Result(list):
+    def single(self):
+        return self[0] if self else None
+
+
+class _Client:
+    """Records every statement with its parameters and answers from canned rows by marker."""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.calls = []
+        self.txs = 0
+
+    def run_query(self, cypher, params=None, **kwargs):
+        return self.run(cypher, params, **kwargs)
+
+    def write_tx(self, fn, *args):
+        self.txs += 1
+        return fn(self, *args)
+
+    def run(self, cypher, params=None, **kwargs):
+        self.calls.append((cypher, params or {}, kwargs))
+        for marker, rows in self.answers.items():
+            if marker in cypher:
+                return _Result(rows(params) if callable(rows) else rows)
+        return _Result()
+
+    def params(self, marker):
+        return [p for c, p, _ in self.calls if marker in c]
+
+
+@pytest.fixture()
+def use(monkeypatch):
+    def install(**answers):
+        client = _Client(answers)
+        monkeypatch.setattr(kc, "get_client", lambda: client)
+        return client
+
+    return install
+
+
+def _vote(voter, oid, value, sid="s", pred="ceo"):
+    return {"sid": sid, "pred": pred, "oid": oid, "voter": voter, "value": value}
+
+
+def _score(oid, score, sid="s", pred="ceo"):
+    return {"sid": sid, "pred": pred, "oid": oid, "score": score}
+
+
+def _votes_counted(result):
+    return api_registry.get_sample_value("kg_consensus_votes_total", {"result": result}) or 0.0
+
+
+def test_votes_are_deduplicated_sorted_and_batched(use):
+    client = use(**{"kg.consensus.vote */": lambda params: [{"new": len(params["votes"]) - 1, "changed": 1}]})
+    before = _votes_counted("changed")
+    votes = [_vote("b0", "bob", 1)] + [_vote(f"a{i}", "alice", 1) for i in range(5)]
+    # a1's repeated vote collapses to its last value within the request
+    votes += [_vote("a1", "alice", -1)]
+    res = kc.apply_votes(votes, batch=2)
+
+    sent = [p["votes"] for p in client.params("kg.consensus.vote */")]
+    assert [len(chunk) for chunk in sent] == [2, 2, 2] and client.txs == 3
+    # Sorted by option, then voter, so concurrent batches lock options in the same order
+    assert [(v["oid"], v["voter"]) for chunk in sent for v in chunk] == [
+        ("alice", "a0"), ("alice", "a1"), ("alice", "a2"), ("alice", "a3"), ("alice", "a4"), ("bob", "b0"),
+    ]
+    assert sent[0][1]["value"] == -1
+    # Per-batch counts are summed; a missing count reads as zero
+    assert res == {"applied": 6, "new": 3, "changed": 3, "unchanged": 0, "batches": 3}
+    assert _votes_counted("changed") - before == 3
+
+
+def test_resolve_scans_votes_until_tallies_are_reconciled(use):
+    client = use(**{
+        "kg.consensus.vote_scan": [
+            _score("bob", 2), _score("alice", 2), _score("carol", 1),
+            _score("x", 1, pred="cto"), _score("y", -1, pred="cto"),
+        ],
+    })
+    conflicts = [{"sid": "s", "pred": "ceo"}, {"sid": "s", "pred": "cto"}, {"sid": "s", "pred": "ceo"}, {"sid": "t", "pred": "ceo"}]
+    res = kc.resolve_conflicts(conflicts, quorum=2)
+    assert res["source"] == "scan" and res["resolved"] == 1
+    # One read for every distinct key, one write for every winner
+    (scan,) = client.params("kg.consensus.vote_scan")
+    assert scan["keys"] == [{"sid": "s", "pred": "ceo"}, {"sid": "s", "pred": "cto"}, {"sid": "t", "pred": "ceo"}]
+    # Tie at 2 goes to the smallest object id
+    assert [r.get("winner") or r["reason"] for r in res["results"]] == ["alice", "quorum_not_met", "no_options"]
+    assert res["results"][1]["top"] == {"object_id": "x", "score": 1}
+    ((cypher, apply, kwargs),) = [c for c in client.calls if "kg.consensus.apply" in c[0]]
+    assert apply["winners"] == [{"sid": "s", "pred": "ceo", "oid": "alice"}] and kwargs["access_mode"] == "WRITE"
+
+
+def test_resolve_reads_tallies_once_reconciled(use):
+    client = use(**{
+        "MATCH (s:VoteTallyState": [{"s": {"id": "default", "reconciled_at": 1}}],
+        "kg.consensus.tallies": [_score("alice", 1), _score("bob", 3)],
+    })
+    res = kc.resolve_conflicts([{"sid": "s", "pred": "ceo"}], quorum=2)
+    assert res["source"] == "tally" and res["results"][0]["winner"] == "bob"
+    assert not client.params("kg.consensus.vote_scan")
+
+
+def test_confidence_strategy_ignores_quorum(use):
+    client = use(**{"kg.consensus.confidence": [_score("alice", 0.4), _score("bob", 0.9)]})
+    res = kc.resolve_conflicts([{"sid": "s", "pred": "ceo"}], strategy="confidence", quorum=5)
+    assert res["source"] == "confidence" and res["results"][0]["winner"] == "bob"
+    assert res["resolved"] == 1
+    assert not client.params("VoteTallyState")
+
+
+def test_reconcile_records_its_generation(use):
+    client = use(**{"RETURN options": [{"options": 4}]})
+    res = kc.reconcile_vote_tallies(batch=50)
+    assert res["options"] == 4
+    (rebuild,) = [c for c in client.calls if "kg.consensus.tally_reconcile" in c[0]]
+    assert rebuild[1] == {"batch": 50} and rebuild[2]["access_mode"] == "WRITE"
+    (state,) = client.params("MERGE (s:VoteTallyState")
+    assert state["gen"] == res["reconciled_at"]
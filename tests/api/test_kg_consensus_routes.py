@@ -0,0 +1,83 @@
+import os
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from api.app import create_app
+from api.resources import kg_consensus as routes
+
+
+@pytest.fixture()
+def app(monkeypatch, tmp_path):
+    log = tmp_path / "audit.log"
+    monkeypatch.setattr("api.utils.audit._LOG_PATH", str(log))
+    os.environ["TESTING"] = "true"
+    os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+    app = create_app()
+    app.config.update(TESTING=True, JWT_SECRET_KEY="test-jwt")
+    applied = []
+
+    def fake_apply(votes):
+        applied.extend(votes)
+        return {"applied": len(votes), "new": len(votes), "changed": 0, "unchanged": 0, "batches": 1}
+
+    monkeypatch.setattr(routes, "apply_votes", fake_apply)
+    app.applied, app.audit_log = applied, log
+    return app
+
+
+def _headers(app, identity, claims=None):
+    with app.app_context():
+        token = create_access_token(identity=identity, additional_claims=claims)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _votes(*voters):
+    return {"votes": [
+        {"subject_id": "s", "predicate": "ceo", "object_id": "alice", "value": 1, **({"voter_id": v} if v else {})}
+        for v in voters
+    ]}
+
+
+def test_bulk_votes_as_others_need_the_proxy_role(app):
+    http = app.test_client()
+    user = _headers(app, "u1")
+
+    # Own votes, with or without an explicit voter_id
+    r = http.post("/api/kg_consensus/conflicts/votes", json=_votes(None, "u1"), headers=user)
+    assert r.status_code == 200
+    assert {v["voter"] for v in app.applied} == {"u1"}
+
+    app.applied.clear()
+    r = http.post("/api/kg_consensus/conflicts/votes", json=_votes(None, "u2"), headers=user)
+    assert r.status_code == 403 and app.applied == []
+    assert '"kg.vote.bulk.denied"' in app.audit_log.read_text()
+
+    # Proxy votes are off by default, even for a token that carries a role claim
+    agent = _headers(app, "swarm", {"roles": ["agent-proxy"]})
+    assert http.post("/api/kg_consensus/conflicts/votes", json=_votes("a1"), headers=agent).status_code == 403
+
+
+def test_proxy_votes_are_audited_per_voter(app, monkeypatch):
+    monkeypatch.setattr(routes.get_config(), "CONSENSUS_PROXY_VOTE_ROLE", "agent-proxy")
+    agent = _headers(app, "swarm", {"roles": ["agent-proxy", "reader"]})
+    r = app.test_client().post("/api/kg_consensus/conflicts/votes", json=_votes("a1", "a2", "a1"), headers=agent)
+    assert r.status_code == 200
+    assert [v["voter"] for v in app.applied] == ["a1", "a2", "a1"]
+    proxied = [line for line in app.audit_log.read_text().splitlines() if '"kg.vote.proxy"' in line]
+    assert len(proxied) == 2 and '"votes": 2' in proxied[0]
+
+
+def test_tally_reconcile_is_admin_only_and_audited(app, monkeypatch):
+    http = app.test_client()
+    headers = _headers(app, "u1")
+    runs = []
+    monkeypatch.setattr(routes, "reconcile_vote_tallies", lambda: runs.append(1) or {"options": 4, "reconciled_at": 1, "took_ms": 2})
+    r = http.post("/api/kg_consensus/tallies/reconcile", headers=headers)
+    assert r.status_code == 403 and runs == []
+    assert '"kg.tallies.reconcile.denied"' in app.audit_log.read_text()
+
+    monkeypatch.setattr(routes, "get_jwt_identity", lambda: {"id": "ops", "role": "admin"})
+    r = http.post("/api/kg_consensus/tallies/reconcile", headers=headers)
+    assert r.status_code == 200 and r.get_json()["options"] == 4 and runs == [1]
+    assert '"kg.tallies.reconcile"' in app.audit_log.read_text()
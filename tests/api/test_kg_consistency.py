@@ -0,0 +1,115 @@
+import threading
+import time
+
+from api.utils import kg_schema
+from api.utils.neo4j_client import READ_ACCESS
+
+
+class _TimedOut(Exception):
+    code = "Neo.ClientError.Transaction.TransactionTimedOut"
+
+
+class _Client:
+    def __init__(self, slow=None, fail=None, index=None):
+        self.slow = slow
+        self.fail = fail
+        self.index = index
+        self.calls = []
+        self.release = threading.Event()
+
+    def run_query(self, cypher, params=None, **kwargs):
+        if "MATCH (i:ContradictionIndex" in cypher:
+            return [{"i": self.index}] if self.index else []
+        self.calls.append((cypher, kwargs))
+        if self.slow and self.slow in cypher:
+            self.release.wait(5)
+        if self.fail and self.fail in cypher:
+            raise _TimedOut("transaction timed out")
+        if "kg.consistency.orphans" in cypher:
+            return [{"id": "lonely"}]
+        if "kg.consistency.contradictions" in cypher:
+            return [{"sid": "a", "pred": "likes", "objs": ["b", "c"], "object_count": 2}]
+        if "kg.consistency.contradiction_index" in cypher:
+            return [{"sid": "x", "pred": "is", "objs": ["y", "z"], "object_count": 2}]
+        if "kg.consistency.contradiction_count" in cypher:
+            return [{"c": 7}]
+        if "MATCH (n:Task)" in cypher:
+            return [{"c": 3}]
+        return [{"c": 0}]
+
+
+def test_checks_run_concurrently_and_return_ids_and_counts(monkeypatch):
+    client = _Client()
+    monkeypatch.setattr(kg_schema, "get_client", lambda: client)
+    # Every check blocks until all of them have started, which only works if they run at once
+    checks = 2 + sum(len(spec["required"]) for spec in kg_schema.NODE_SCHEMAS.values())
+    barrier = threading.Barrier(checks, timeout=5)
+    run = client.run_query
+
+    def gated(cypher, params=None, **kwargs):
+        if "kg.consistency" in cypher:
+            barrier.wait()
+        return run(cypher, params, **kwargs)
+
+    monkeypatch.setattr(client, "run_query", gated)
+    res = kg_schema.monitor_consistency(limit=10, timeout=5)
+    assert res["orphans"] == ["lonely"]
+    assert res["contradictions"] == [{"sid": "a", "pred": "likes", "objs": ["b", "c"], "object_count": 2}]
+    assert res["missing_props"] == [{"label": "Task", "property": "id", "count": 3}]
+    assert not res["partial"] and all(st["status"] == "ok" for st in res["checks"].values())
+    assert res["contradiction_source"] == "scan"
+    assert len(client.calls) == checks
+    assert all(kw["access_mode"] == READ_ACCESS and kw["timeout"] == 5 for _, kw in client.calls)
+    # No check hands back whole nodes
+    assert not any("RETURN n " in c or c.rstrip().endswith("RETURN n") for c, _ in client.calls)
+
+
+def test_slow_and_failed_checks_give_partial_results(monkeypatch):
+    client = _Client(slow="kg.consistency.contradictions", fail="kg.consistency.orphans")
+    monkeypatch.setattr(kg_schema, "get_client", lambda: client)
+    t0 = time.monotonic()
+    res = kg_schema.monitor_consistency(limit=10, timeout=0.2)
+    client.release.set()
+    assert time.monotonic() - t0 < 3
+    assert res["partial"]
+    assert res["checks"]["contradictions"]["status"] == "timeout"
+    assert res["checks"]["orphans"]["status"] == "timeout" and "timed out" in res["checks"]["orphans"]["error"]
+    assert res["orphans"] == [] and res["contradictions"] == []
+    assert res["missing_props"] == [{"label": "Task", "property": "id", "count": 3}]
+
+
+def test_contradictions_come_from_index_once_reconciled(monkeypatch):
+    client = _Client(index={"id": "default", "reconciled_at": 1, "keys": 1})
+    monkeypatch.setattr(kg_schema, "get_client", lambda: client)
+    res = kg_schema.monitor_consistency(limit=10, timeout=5)
+    assert res["contradiction_source"] == "index"
+    assert res["contradictions"] == [{"sid": "x", "pred": "is", "objs": ["y", "z"], "object_count": 2}]
+    assert not any("kg.consistency.contradictions" in c for c, _ in client.calls)
+
+
+def test_indexed_contradictions_count_keys_and_list_the_largest(monkeypatch):
+    client = _Client()
+    monkeypatch.setattr(kg_schema, "get_client", lambda: client)
+    total, groups = kg_schema.indexed_contradictions(limit=3)
+    assert total == 7
+    assert groups == [{"sid": "x", "pred": "is", "objs": ["y", "z"], "object_count": 2}]
+    (_, _), (listing, _) = client.calls
+    assert "ORDER BY c.objects DESC" in listing and "LIMIT $limit" in listing
+
+
+def test_refresh_recounts_keys_in_the_callers_transaction():
+    class _Tx:
+        def __init__(self):
+            self.runs = []
+
+        def run(self, cypher, params=None):
+            self.runs.append((cypher, params))
+
+    tx = _Tx()
+    kg_schema.refresh_contradiction_keys(tx, [])
+    assert tx.runs == []
+    kg_schema.refresh_contradiction_keys(tx, [{"sid": "a", "pred": "likes"}])
+    (cypher, params), = tx.runs
+    assert params == {"keys": [{"sid": "a", "pred": "likes"}]}
+    # The subject is locked before its objects are recounted, and single-object keys are dropped
+    assert cypher.index("SET s._cidxLock") < cypher.index("count(DISTINCT o)") and "DELETE c" in cypher
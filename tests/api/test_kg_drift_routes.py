@@ -6,7 +6,8 @@ from api.extensions import db
 
 
 @pytest.fixture()
-def app(monkeypatch):
+def app(monkeypatch, tmp_path):
+    monkeypatch.setattr("api.utils.audit._LOG_PATH", str(tmp_path / "audit.log"))
     os.environ["FLASK_ENV"] = "development"
     os.environ["TESTING"] = "true"
     os.environ["DATABASE_URL"] = "sqlite:///:memory:"
@@ -152,7 +153,11 @@ def test_remediation_escalation_creates_request_and_no_edge_changes(app, client,
 
 def test_quality_snapshot_records_and_emits(app, client, monkeypatch):
     class MockClient:
-        def run_query(self, cypher, params=None):
+        def write_tx(self, fn, *args):
+            # Running-aggregate bookkeeping is covered in test_kg_quality_incremental
+            return {}
+
+        def run_query(self, cypher, params=None, **kwargs):
             if "count(e)" in cypher:
                 return [{"c": 10}]
             elif "count(r)" in cypher:
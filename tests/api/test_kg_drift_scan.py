@@ -0,0 +1,119 @@
+import pytest
+
+from api.services import knowledge_drift as kd
+
+
+class _Client:
+    """Records every statement with its parameters and answers from canned rows by marker."""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.calls = []
+
+    def run_query(self, cypher, params=None, **kwargs):
+        self.calls.append((cypher, params or {}))
+        for marker, rows in self.answers.items():
+            if marker in cypher:
+                return rows(params) if callable(rows) else rows
+        return []
+
+    def params(self, marker):
+        return [p for c, p in self.calls if marker in c]
+
+
+def _row(i, drifted=False):
+    return {"id": f"e{i:02d}", "emb": [0.5, 0.5] if drifted else [1.0, 0.0], "text": f"entity {i}", "ts": 100}
+
+
+# Fresh embeddings are the unit x axis: [0.5, 0.5] scores ~0.71, a 3-d vector is another model
+PAGES = [[_row(0, True), _row(1), _row(2)], [_row(3, True), {"id": "e04", "emb": [1.0, 0.0, 0.0], "text": "x"}]]
+
+
+@pytest.fixture()
+def use(monkeypatch):
+    monkeypatch.setattr(kd, "vector_search_enabled", lambda: True)
+    monkeypatch.setattr(kd, "get_embeddings", lambda texts: [[1.0, 0.0] for _ in texts])
+    monkeypatch.setattr(kd, "_now_ms", lambda: 5000)
+
+    def install(state=None, pages=(), **answers):
+        queue = [list(p) for p in pages]
+        client = _Client({
+            "MATCH (s:DriftScan": [{"s": dict(state)}] if state else [],
+            "e.id > $after": lambda params: queue.pop(0) if queue else [],
+            **answers,
+        })
+        monkeypatch.setattr(kd, "get_client", lambda: client)
+        return client
+
+    return install
+
+
+def _saved(client):
+    return [p["props"] for p in client.params("SET s += $props")]
+
+
+def test_similarities_and_histogram():
+    sims = kd._similarities([[1.0, 0.0], [0.0, 2.0], None, [1.0]], [[2.0, 0.0], [1.0, 0.0], [1.0, 0.0], [1.0, 0.0]])
+    assert sims[0] == pytest.approx(1.0) and sims[1] == pytest.approx(0.0)
+    assert sims[2:] == [None, None]
+    counts = kd._histogram([1.0, 0.99, 0.5, -0.2], bins=4)
+    assert counts == [1, 0, 1, 2]
+
+
+def test_scan_pages_from_the_watermark_and_saves_progress(use):
+    client = use(pages=PAGES)
+    res = kd.scan_semantic_drift(page_size=3, max_entities=5)
+    # The last page is cut to what is left of max_entities
+    assert client.params("e.id > $after") == [{"after": "", "limit": 3}, {"after": "e02", "limit": 2}]
+    assert res["scanned"] == 5 and not res["done"] and res["watermark"] == "e04"
+    assert [(s.details["entity_id"], s.severity) for s in res["signals"]] == [("e00", "medium"), ("e03", "medium")]
+    assert res["totals"] == {"scanned": 4, "breaches": 2, "skipped": 1}
+    assert res["histogram"]["counts"][-1] == 2 and sum(res["histogram"]["counts"]) == 4
+
+    # Progress is stored after every full page, so a crash loses at most one page
+    first, *_, last = _saved(client)
+    assert first["watermark"] == "e02" and first["scanned"] == 3
+    assert last["watermark"] == "e04" and "completed_at" not in last
+    assert first["started_at"] == last["started_at"] == 5000
+
+
+def test_scan_continues_stored_totals_and_closes_the_pass(use):
+    stored = {"id": "default", "watermark": "e04", "scanned": 4, "breaches": 2, "skipped": 1, "started_at": 10,
+              "histogram": [0] * (kd.SIMILARITY_BINS - 2) + [2, 2]}
+    client = use(state=stored, pages=[[_row(5), _row(6, True)]])
+    res = kd.scan_semantic_drift(page_size=3, max_entities=100)
+    assert client.params("e.id > $after") == [{"after": "e04", "limit": 3}]
+    # A short page ends the pass: the watermark resets and the totals become last_*
+    assert res["done"] and res["watermark"] is None
+    assert res["totals"] == {"scanned": 6, "breaches": 3, "skipped": 1}
+    assert sum(res["histogram"]["scan_counts"]) == 6
+    (saved,) = _saved(client)
+    assert saved["watermark"] == "" and saved["started_at"] == 10 and saved["completed_at"] == 5000
+    assert (saved["last_scanned"], saved["last_breaches"], saved["last_skipped"]) == (6, 3, 1)
+
+
+def test_scan_reset_and_disabled(use, monkeypatch):
+    client = use(state={"id": "default", "watermark": "e04", "scanned": 4})
+    res = kd.scan_semantic_drift(page_size=2, reset=True)
+    assert not client.params("MATCH (s:DriftScan")
+    assert client.params("e.id > $after") == [{"after": "", "limit": 2}]
+    assert res["done"] and res["totals"]["scanned"] == 0
+    monkeypatch.setattr(kd, "vector_search_enabled", lambda: False)
+    assert kd.scan_semantic_drift()["reason"] == "embeddings_disabled"
+
+
+def test_incremental_detect_advances_an_updated_at_and_id_watermark(use, monkeypatch):
+    rows = [dict(_row(6), ts=100), dict(_row(7, True), ts=200)]
+    client = use(state={"id": "recent", "updated_after": 100, "id_after": "e05"}, **{"e.updatedAt >= $ts": rows})
+    assert [s.details["entity_id"] for s in kd.detect_semantic_drift(sample_limit=4)] == ["e07"]
+    # Ties on updatedAt are broken by id, so equal timestamps are neither skipped nor repeated
+    assert client.params("e.updatedAt >= $ts") == [{"ts": 100, "id": "e05", "limit": 4}]
+    (saved,) = client.params("s.updated_after = $ts")
+    assert (saved["id"], saved["ts"], saved["after"]) == ("recent", 200, "e07")
+
+    # Nothing new, or a failed embedding call, leaves the watermark alone
+    client = use(state={"id": "recent"})
+    assert kd.detect_semantic_drift() == [] and not client.params("s.updated_after = $ts")
+    monkeypatch.setattr(kd, "get_embeddings", lambda texts: 1 / 0)
+    client = use(**{"e.updatedAt >= $ts": rows})
+    assert kd.detect_semantic_drift() == [] and not client.params("s.updated_after = $ts")
@@ -0,0 +1,183 @@
+import threading
+
+import pytest
+
+from api.metrics import api_registry
+from api.services import knowledge_drift as kd
+
+CLAIM = {"id": "j", "status": "running", "done": [], "batches": 0, "mergeAt": 1000}
+
+
+class _Result(list):
+    def single(self):
+        return self[0] if self else None
+
+
+class _Client:
+    """Records every statement with its parameters and answers from canned rows by marker."""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.calls = []
+        self.txs = 0
+
+    def run_query(self, cypher, params=None, **kwargs):
+        return self.run(cypher, params, **kwargs)
+
+    def write_tx(self, fn, *args):
+        self.txs += 1
+        return fn(self, *args)
+
+    def run(self, cypher, params=None, **kwargs):
+        self.calls.append((cypher, params or {}, kwargs))
+        for marker, rows in self.answers.items():
+            if marker in cypher:
+                return _Result(rows(params) if callable(rows) else rows)
+        return _Result()
+
+    def params(self, marker):
+        return [p for c, p, _ in self.calls if marker in c]
+
+
+def _pages(direction, sizes):
+    """Rewire answers: per duplicate, the sizes of successive batches; counted alternates 0.5/None."""
+    queues = {dup: list(ns) for dup, ns in sizes.items()}
+
+    def answer(params):
+        n = queues[params["dup"]].pop(0)
+        sid = "t" if direction == "out" else f"m-{params['dup']}"
+        return [{"counted": 0.5 if i % 2 == 0 else None, "pred": "knows", "sid": sid} for i in range(n)]
+
+    return answer
+
+
+@pytest.fixture()
+def use(monkeypatch):
+    monkeypatch.setattr(kd.get_config(), "MERGE_BATCH_SIZE", 3)
+
+    def install(claim=CLAIM, out=None, into=None, **answers):
+        client = _Client({
+            "MERGE (j:MergeJournal": [{"j": dict(claim)}] if claim else [],
+            "merge_rewire_out": _pages("out", out or {}),
+            "merge_rewire_in": _pages("in", into or {}),
+            "SET j += $props": [{"id": "j"}],
+            "SET j.status = 'done'": [{"moved_out": 8, "moved_in": 4, "batches": 9}],
+            **answers,
+        })
+        monkeypatch.setattr(kd, "get_client", lambda: client)
+        return client
+
+    return install
+
+
+def _batch_count(phase):
+    return api_registry.get_sample_value("kg_merge_batch_seconds_count", {"phase": phase}) or 0.0
+
+
+def _rewires(client):
+    return [("out" if "merge_rewire_out" in c else "in", p["dup"]) for c, p, _ in client.calls if "merge_rewire" in c]
+
+
+def test_merge_moves_edges_in_bounded_batches(use, monkeypatch):
+    removed, invalidated = [], []
+    monkeypatch.setattr(kd, "remove_embedding", lambda label, eid: removed.append((label, eid)))
+    monkeypatch.setattr(kd, "invalidate_search_cache", lambda: invalidated.append(1))
+    # Hub duplicate "d1": 7 outgoing and 3 incoming edges; "d2" has one of each
+    client = use(out={"d1": [3, 3, 1], "d2": [1]}, into={"d1": [3, 0], "d2": [1]})
+    before = _batch_count("out")
+    res = kd.merge_entities("t", ["d1", "d2", "d1", "t"], dry_run=False)
+    assert res["status"] == "done" and res["merged"] == 2 and not res["resumed"]
+    assert res["moved"] == {"out": 8, "in": 4} and res["batches"] == 9
+    assert res["journal"] == kd.merge_journal_id("t", ["d2", "d1"])
+
+    # A batch shorter than MERGE_BATCH_SIZE ends the duplicate's direction
+    assert _rewires(client) == [("out", "d1")] * 3 + [("in", "d1")] * 2 + [("out", "d2"), ("in", "d2")]
+    assert {(p["batch"], p["target"]) for p in client.params("merge_rewire")} == {(3, "t")}
+    assert _batch_count("out") - before == 4
+    # Every batch and every duplicate's mark is its own transaction
+    assert client.txs == 9
+    assert [p["dup"] for p in client.params("d.mergedInto")] == ["d1", "d2"]
+    # Merged duplicates leave the in-process ANN index
+    assert removed == [("Entity", "d1"), ("Entity", "d2")]
+    # and the search cache is cleared once, when the whole merge completes
+    assert invalidated == [1]
+
+    # Each batch journals its progress and the confidence of the counted edges it deleted;
+    # the shared quality state is never written
+    updates = [p for p in client.params("SET j += $props") if p["props"] == {"current": "d1"}]
+    assert [(u["out"], u["in"], u["qa_count"]) for u in updates] == [(3, 0, 2), (3, 0, 2), (1, 0, 1), (0, 3, 2), (0, 0, 0)]
+    assert updates[0]["qa_sum"] == pytest.approx(1.0)
+    assert not any("QualityState" in c for c, _, _ in client.calls)
+
+    # Every (subject, predicate) key that gained or lost an object is recounted
+    keys = {(k["sid"], k["pred"]) for p in client.params("ContradictionKey") for k in p.get("keys", [])}
+    assert keys == {("t", "knows"), ("d1", "knows"), ("d2", "knows"), ("m-d1", "knows"), ("m-d2", "knows")}
+
+
+def test_resumed_merge_skips_done_duplicates(use):
+    client = use(claim=dict(CLAIM, done=["d1"], batches=4, mergeAt=123), out={"d2": [1]}, into={"d2": [0]})
+    res = kd.merge_entities("t", ["d1", "d2"], dry_run=False)
+    assert res["status"] == "done" and res["resumed"]
+    assert _rewires(client) == [("out", "d2"), ("in", "d2")]
+    # Resumed batches are stamped at commit, not with the journal's mergeAt, so the quality
+    # delta pass still sees them
+    stamped = [c for c, p, _ in client.calls if "merge_rewire" in c or "d.mergedInto" in c]
+    assert stamped and all("$now" not in c and "timestamp()" in c for c in stamped)
+    assert [p["dup"] for p in client.params("d.mergedInto")] == ["d2"]
+
+
+def test_failed_batch_marks_the_journal_failed(use):
+    def boom(params):
+        raise RuntimeError("connection reset")
+
+    client = use(**{"merge_rewire_out": boom})
+    res = kd.merge_entities("t", ["d1"], dry_run=False)
+    assert res["status"] == "failed" and "connection reset" in res["error"]
+    (claim,) = client.params("MERGE (j:MergeJournal")
+    (failed,) = client.params("j.status = 'failed'")
+    assert failed["owner"] == claim["owner"] and failed["error"] == "connection reset"
+    assert not client.params("SET j.status = 'done'")
+
+
+def test_live_or_lost_journal_reports_in_progress(use):
+    client = use(claim=None)
+    assert kd.merge_entities("t", ["d1"], dry_run=False)["reason"] == "in_progress"
+    assert not _rewires(client)
+
+    # Another worker took the journal over between our batches
+    client = use(out={"d1": [3]}, **{"SET j += $props": []})
+    res = kd.merge_entities("t", ["d1"], dry_run=False)
+    assert res["status"] == "running" and res["reason"] == "in_progress"
+    assert not client.params("j.status = 'failed'")
+
+
+def test_merge_waves_keep_overlapping_plans_in_order():
+    footprints = [{"a", "b"}, {"c", "d"}, {"b", "e"}, None, {"f"}, {"c"}]
+    assert kd._merge_waves(footprints) == [[0, 1], [2], [3], [4, 5]]
+
+
+def test_disjoint_plans_run_in_parallel(monkeypatch):
+    class _Footprints:
+        def run_query(self, cypher, params=None, **kwargs):
+            return [{"id": f"n-{d}"} for d in params["dups"]]
+
+    monkeypatch.setattr(kd, "get_client", lambda: _Footprints())
+    monkeypatch.setattr(kd.get_config(), "MERGE_PARALLELISM", 2)
+    barrier = threading.Barrier(2, timeout=5)
+    calls = []
+
+    def fake_merge(target, dups, dry_run=True, user_id=None):
+        calls.append(target)
+        if target in ("a", "b"):
+            barrier.wait()
+        return {"merged": len(dups), "target": target}
+
+    monkeypatch.setattr(kd, "merge_entities", fake_merge)
+    plans = [
+        {"target_id": "a", "duplicate_ids": ["a1"]},
+        {"target_id": "b", "duplicate_ids": ["b1"]},
+        {"target_id": "a1", "duplicate_ids": ["c1"]},
+    ]
+    res = kd.merge_entities_batch(plans, dry_run=False)
+    assert res["waves"] == 2 and calls[-1] == "a1"
+    assert [r["target"] for r in res["results"]] == ["a", "b", "a1"]
@@ -0,0 +1,214 @@
+"""Cypher-level checks for the KG services against a live Neo4j.
+
+The unit tests next to this file check what each service sends and how it post-processes the
+rows; these run the statements themselves and compare incremental results with rebuilds.
+Each test writes entities under its own id prefix and removes them afterwards.
+"""
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from neo4j import GraphDatabase
+
+from api.config import get_config
+from api.services import embedding_enrichment as ee
+from api.services import kg_consensus as kc
+from api.services import knowledge_drift as kd
+from api.utils.neo4j_client import get_client
+
+
+def _neo4j_available() -> bool:
+    cfg = get_config()
+    try:
+        drv = GraphDatabase.driver(cfg.NEO4J_URI, auth=(cfg.NEO4J_USER, cfg.NEO4J_PASSWORD))
+        with drv.session() as s:
+            s.run("RETURN 1").single()
+        drv.close()
+        return True
+    except Exception:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not _neo4j_available(), reason="Neo4j not available for KG integration tests")
+
+
+@pytest.fixture()
+def graph():
+    client = get_client()
+    prefix = f"it-{uuid.uuid4().hex[:8]}-"
+    now = int(time.time() * 1000)
+
+    def entity(name, ts=None):
+        client.run_query(
+            "MERGE (e:Entity {id: $id}) SET e.updatedAt = $ts",
+            {"id": prefix + name, "ts": ts or now},
+        )
+
+    def relate(s, pred, o, confidence, ts=None):
+        client.run_query(
+            """
+            MATCH (s:Entity {id: $s}), (o:Entity {id: $o})
+            MERGE (s)-[r:RELATED {type: $pred}]->(o)
+            SET r.confidence = $confidence, r.lastUpdated = $ts
+            """,
+            {"s": prefix + s, "o": prefix + o, "pred": pred, "confidence": confidence, "ts": ts or now},
+        )
+
+    yield SimpleNamespace(prefix=prefix, now=now, entity=entity, relate=relate)
+    client.run_query("MATCH (e:Entity) WHERE e.id STARTS WITH $p DETACH DELETE e", {"p": prefix})
+    client.run_query("MATCH (j:MergeJournal) WHERE j.target STARTS WITH $p DELETE j", {"p": prefix})
+    client.run_query(
+        "MATCH (n) WHERE (n:Conflict OR n:Option) AND n.sid STARTS WITH $p DETACH DELETE n", {"p": prefix}
+    )
+    client.run_query("MATCH (v:Voter) WHERE v.id STARTS WITH $p DETACH DELETE v", {"p": prefix})
+
+
+def _core(m):
+    return {k: m[k] for k in ("entities", "relations", "orphans", "avg_confidence", "last_update_ms")}
+
+
+def test_quality_delta_pass_matches_a_rebuild(graph):
+    for name in ("a", "b", "c", "d"):
+        graph.entity(name)
+    graph.relate("a", "likes", "b", 0.8)
+    graph.relate("a", "likes", "c", 0.4)
+    assert kd.reconcile_quality()["status"] == "done"
+    kd.assess_quality()
+
+    later = graph.now + 1000
+    graph.relate("a", "likes", "c", 0.2, ts=later)
+    graph.entity("e", ts=later)
+    graph.relate("d", "knows", "b", 1.0, ts=later)
+    incremental = kd.assess_quality()
+    assert incremental["processed"]["relations"] >= 2 and incremental["processed"]["entities"] >= 1
+
+    assert kd.reconcile_quality()["status"] == "done"
+    assert _core(kd.assess_quality()) == _core(incremental)
+
+
+def test_merge_adjustments_reach_the_quality_aggregates(graph, monkeypatch):
+    monkeypatch.setattr(get_config(), "MERGE_BATCH_SIZE", 2)
+    for name in ("t", "d", "x", "y", "z"):
+        graph.entity(name)
+    graph.relate("d", "likes", "x", 0.8)
+    graph.relate("d", "likes", "y", 0.6)
+    graph.relate("t", "likes", "x", 0.2)
+    graph.relate("z", "knows", "d", 1.0)
+    assert kd.reconcile_quality()["status"] == "done"
+    kd.assess_quality()
+
+    # Resume a plan that failed long ago: its mergeAt is far behind the quality watermark
+    target, dups = graph.prefix + "t", [graph.prefix + "d"]
+    get_client().run_query(
+        "CREATE (:MergeJournal {id: $id, target: $t, duplicates: $d, status: 'failed', mergeAt: 1, started_at: 1,"
+        " done: [], moved_out: 0, moved_in: 0, batches: 0})",
+        {"id": kd.merge_journal_id(target, dups), "t": target, "d": dups},
+    )
+    res = kd.merge_entities(target, dups, dry_run=False)
+    assert res["status"] == "done" and res["moved"] == {"out": 2, "in": 1}
+    journal = kd.get_merge_journal(res["journal"])
+    assert journal["qa_removed_count"] == 3
+
+    incremental = kd.assess_quality()
+    assert kd.get_merge_journal(res["journal"])["qa_removed_count"] == 0
+    assert kd.reconcile_quality()["status"] == "done"
+    assert _core(kd.assess_quality()) == _core(incremental)
+
+
+def _tallies(sid):
+    rows = get_client().run_query(
+        "MATCH (o:Option {sid: $sid}) RETURN o.oid AS oid, o.score AS score, o.up AS up, o.down AS down",
+        {"sid": sid},
+    )
+    return {r["oid"]: (r["score"], r["up"], r["down"]) for r in rows}
+
+
+def test_vote_tallies_follow_changed_votes(graph):
+    sid = graph.prefix + "s"
+
+    def vote(voter, oid, value):
+        return {"sid": sid, "pred": "ceo", "oid": oid, "voter": graph.prefix + voter, "value": value}
+
+    res = kc.apply_votes([vote(f"a{i}", "alice", 1) for i in range(5)] + [vote("b0", "bob", 1)], batch=2)
+    assert res["new"] == 6 and res["batches"] == 3
+    res = kc.apply_votes([vote("a0", "alice", -1), vote("a1", "alice", 1), vote("b0", "bob", -1)])
+    assert (res["changed"], res["unchanged"]) == (2, 1)
+    incremental = _tallies(sid)
+    assert incremental == {"alice": (3, 4, 1), "bob": (-1, 0, 1)}
+
+    kc.reconcile_vote_tallies()
+    assert _tallies(sid) == incremental
+    res = kc.resolve_conflicts([{"sid": sid, "pred": "ceo"}], quorum=3)
+    assert res["source"] == "tally" and res["results"][0]["winner"] == "alice"
+
+
+def _embed(graph, vectors, ts):
+    get_client().run_query(
+        "UNWIND $rows AS row MERGE (e:Entity {id: row.id}) SET e.embedding = row.emb, e.name = row.id, e.updatedAt = $ts",
+        {"rows": [{"id": graph.prefix + name, "emb": emb} for name, emb in vectors.items()], "ts": ts},
+    )
+
+
+def _ours(graph, signals):
+    return [s.details["entity_id"][len(graph.prefix):] for s in signals if s.details["entity_id"].startswith(graph.prefix)]
+
+
+def test_drift_scan_and_incremental_detect_visit_each_entity_once(graph, monkeypatch):
+    monkeypatch.setattr(kd, "vector_search_enabled", lambda: True)
+    monkeypatch.setattr(kd, "get_embeddings", lambda texts: [[1.0, 0.0] for _ in texts])
+    # Equal updatedAt on every entity, so the incremental watermark has to break ties by id
+    _embed(graph, {f"e{i}": [0.5, 0.5] if i % 3 == 0 else [1.0, 0.0] for i in range(7)}, graph.now)
+    client = get_client()
+
+    scan_id = graph.prefix + "scan"
+    breaches = []
+    try:
+        for _ in range(10_000):
+            res = kd.scan_semantic_drift(page_size=2, max_entities=3, scan_id=scan_id)
+            breaches += _ours(graph, res["signals"])
+            if res["done"]:
+                break
+        assert breaches == ["e0", "e3", "e6"]
+    finally:
+        client.run_query("MATCH (s:DriftScan {id: $id}) DELETE s", {"id": scan_id})
+
+    # Start the shared incremental watermark just before our entities and put it back afterwards
+    saved = client.run_query("MATCH (s:DriftScan {id: 'recent'}) RETURN properties(s) AS s")
+    client.run_query(
+        "MERGE (s:DriftScan {id: 'recent'}) SET s.updated_after = $ts, s.id_after = ''", {"ts": graph.now - 1}
+    )
+    try:
+        seen = []
+        for _ in range(10):
+            seen += _ours(graph, kd.detect_semantic_drift(sample_limit=2, similarity_threshold=1.1))
+        assert sorted(seen) == [f"e{i}" for i in range(7)]
+    finally:
+        if saved:
+            client.run_query("MATCH (s:DriftScan {id: 'recent'}) SET s = $props", {"props": saved[0]["s"]})
+        else:
+            client.run_query("MATCH (s:DriftScan {id: 'recent'}) DELETE s")
+
+
+def test_enrichment_job_claims_are_exclusive(graph):
+    client = get_client()
+    job_id = graph.prefix + "job"
+    try:
+        first = ee._claim(client, job_id, "w1", reset=False)
+        assert first["status"] == "running" and first["owner"] == "w1"
+        assert ee._claim(client, job_id, "w2", reset=False) is None
+        assert ee._checkpoint(client, job_id, "w2", {"cursor": "x"}) is None
+        assert ee._checkpoint(client, job_id, "w1", {"cursor": "e05", "embedded": 5}) == "running"
+
+        # A stale owner can be replaced, and the new owner resumes from the cursor
+        client.run_query("MATCH (j:EnrichmentJob {id: $id}) SET j.heartbeat = 0", {"id": job_id})
+        resumed = ee._claim(client, job_id, "w2", reset=False)
+        assert resumed["owner"] == "w2" and resumed["cursor"] == "e05" and resumed["embedded"] == 5
+        assert ee._checkpoint(client, job_id, "w1", {"cursor": "e09"}) is None
+
+        # A completed job starts a new pass
+        ee._checkpoint(client, job_id, "w2", {"status": "done", "completed_at": graph.now})
+        again = ee._claim(client, job_id, "w3", reset=False)
+        assert again["cursor"] == "" and again["embedded"] == 0 and "completed_at" not in again
+    finally:
+        client.run_query("MATCH (j:EnrichmentJob {id: $id}) DELETE j", {"id": job_id})
@@ -0,0 +1,190 @@
+import json
+
+import pytest
+
+from api.services import knowledge_drift as kd
+
+NOW = 10**12
+STATE = {
+    "id": "default",
+    "reconciled_at": NOW,
+    "rel_watermark": 100_000,
+    "ent_watermark": 90_000,
+    "last_update_ms": 100_000,
+    "confidence_sum": 1.2,
+    "confidence_count": 2,
+    "missing_props": "[]",
+}
+GROUP = {"sid": "a", "pred": "likes", "objs": ["b", "c"], "object_count": 2}
+
+
+class _Result(list):
+    def single(self):
+        return self[0] if self else None
+
+
+class _Client:
+    """Records every statement with its parameters and answers from canned rows by marker."""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.calls = []
+        self.txs = 0
+
+    def run_query(self, cypher, params=None, **kwargs):
+        return self.run(cypher, params, **kwargs)
+
+    def write_tx(self, fn, *args):
+        self.txs += 1
+        return fn(self, *args)
+
+    def run(self, cypher, params=None, **kwargs):
+        self.calls.append((cypher, params or {}, kwargs))
+        for marker, rows in self.answers.items():
+            if marker in cypher:
+                return _Result(rows(params) if callable(rows) else rows)
+        return _Result()
+
+    def params(self, marker):
+        return [p for c, p, _ in self.calls if marker in c]
+
+    def names(self):
+        return [kw.get("name") for _, _, kw in self.calls if kw.get("name")]
+
+
+def _client(state, **answers):
+    return _Client({
+        "RETURN properties(q) AS q": [{"q": dict(state)}] if state else [],
+        "MATCH (e:Entity) RETURN count(e)": [{"c": 5}],
+        "RETURN count(r) AS c": [{"c": 3}],
+        "MATCH (e:QualityOrphan) RETURN count(e)": [{"c": 1}],
+        **answers,
+    })
+
+
+@pytest.fixture()
+def use(monkeypatch):
+    def install(client):
+        monkeypatch.setattr(kd, "get_client", lambda: client)
+        monkeypatch.setattr(kd, "_now_ms", lambda: NOW + 1000)
+        monkeypatch.setattr(kd, "indexed_contradictions", lambda limit: (1, [GROUP][:limit]))
+        return client
+
+    return install
+
+
+def test_delta_pass_folds_changed_rows_into_the_aggregates(use):
+    client = use(_client(
+        STATE,
+        **{
+            "kg.quality.delta.relations": [
+                {"sid": "a", "oid": "c", "ts": 100_500, "c": 0.2, "prev": 0.4},
+                {"sid": "d", "oid": "b", "ts": 101_000, "c": 1.0, "prev": None},
+            ],
+            "kg.quality.delta.entities": [{"id": "e", "ts": 95_000}],
+        },
+    ))
+    res = kd.assess_quality(limit=10)
+
+    # The lag window is re-read from 60 s before each watermark
+    assert client.params("kg.quality.delta.relations")[0]["after"] == 40_000
+    assert client.params("kg.quality.delta.entities")[0]["after"] == 30_000
+    # Orphan labels are re-checked for changed entities and both ends of changed edges only
+    assert client.params("kg.quality.delta.orphans") == [{"ids": ["a", "b", "c", "d", "e"]}]
+    (saved,) = client.params("SET q += $props")
+    assert saved["props"]["confidence_sum"] == pytest.approx(2.0)
+    assert saved["props"]["confidence_count"] == 3
+    assert (saved["props"]["rel_watermark"], saved["props"]["ent_watermark"]) == (101_000, 95_000)
+    assert "orphans" not in saved["props"] and "contradictions" not in saved["props"]
+
+    assert res["processed"] == {"relations": 2, "entities": 1}
+    assert res["avg_confidence"] == round(2.0 / 3, 4) and res["last_update_ms"] == 101_000
+    assert (res["entities"], res["relations"], res["orphans"]) == (5, 3, 1)
+    assert res["contradictions"] == [GROUP] and res["contradiction_count"] == 1
+    assert res["reconciled_at"] == NOW and not res["stale"] and res["source"] == "incremental"
+
+
+def test_delta_pass_pages_until_a_short_page(use, monkeypatch):
+    monkeypatch.setattr(kd, "_QUALITY_PAGE", 2)
+    pages = [[{"sid": "a", "oid": "b", "ts": 100_001 + i, "c": 0.5, "prev": None}] * n for i, n in enumerate((2, 2, 1))]
+    client = use(_client(STATE, **{"kg.quality.delta.relations": lambda params: pages.pop(0)}))
+    assert kd.assess_quality()["processed"] == {"relations": 5, "entities": 0}
+    assert client.txs == 3
+
+
+def test_delta_pass_subtracts_edges_merges_deleted(use):
+    # Nothing else changed; the pending journals alone still move the aggregates
+    client = use(_client(STATE, **{"kg.quality.delta.merges": [{"removed_sum": 0.4, "removed_count": 1}]}))
+    res = kd.assess_quality()
+    (saved,) = client.params("SET q += $props")
+    assert saved["props"]["confidence_sum"] == pytest.approx(0.8)
+    assert saved["props"]["confidence_count"] == 1
+    assert res["processed"] == {"relations": 0, "entities": 0}
+    assert client.params("kg.quality.delta.orphans") == []
+
+
+def test_get_never_rebuilds(use, monkeypatch):
+    missing = [{"label": "Task", "property": "id", "count": 2}]
+    monkeypatch.setattr(kd, "missing_required_props", lambda limit: missing)
+    client = use(_client(
+        None,
+        **{
+            "WHERE NOT (e)--() RETURN count(e)": [{"c": 2}],
+            "avg(coalesce(r.confidence": [{"avgc": 0.75}],
+            "max(coalesce(r.lastUpdated": [{"mx": 99_000}],
+        },
+    ))
+    res = kd.assess_quality()
+    assert client.txs == 0 and res["stale"] and res["reconciled_at"] is None
+    # Without aggregates the metrics come from the graph, not zeros
+    assert res["source"] == "full" and not any("QualityOrphan" in c for c, _, _ in client.calls)
+    assert (res["orphans"], res["avg_confidence"], res["last_update_ms"]) == (2, 0.75, 99_000)
+    assert res["missing_props"] == missing
+
+    monkeypatch.setattr(kd.get_config(), "QUALITY_RECONCILE_S", 1)
+    client = use(_client(dict(STATE, reconciled_at=NOW - 5000)))
+    res = kd.assess_quality()
+    assert res["stale"] and client.txs == 1
+    assert not any("IN TRANSACTIONS" in c for c, _, _ in client.calls)
+
+
+def test_reconcile_claims_stamps_and_rebuilds(use, monkeypatch):
+    monkeypatch.setattr(kd, "missing_required_props", lambda limit: [{"label": "Task", "property": "id", "count": 2}])
+    client = use(_client(
+        STATE,
+        **{
+            "RETURN q.id AS id": [{"id": "default"}],
+            "kg.quality.rebuild": [{"n": 2, "total": 1.2, "mx": 1000}],
+            "max(coalesce(e.updatedAt, 0))": [{"mx": 900}],
+        },
+    ))
+    res = kd.reconcile_quality()
+    assert res == {"status": "done", "reconciled_at": NOW + 1000, "took_ms": 0}
+    assert client.names() == [
+        "kg.quality.reconcile.relations", "kg.quality.reconcile.entities", "kg.quality.reconcile.orphans",
+    ]
+    (claim,) = client.params("RETURN q.id AS id")
+    assert claim["stale"] == claim["now"] - kd._QUALITY_RECONCILE_STALE_MS
+    (saved,) = client.params("SET q += $props")
+    props = saved["props"]
+    assert (props["confidence_sum"], props["confidence_count"]) == (1.2, 2)
+    assert (props["rel_watermark"], props["ent_watermark"]) == (1000, 900)
+    # The rebuilt sums already exclude merged-away edges, so pending journals are cleared unread
+    assert any("kg.quality.rebuild.merges" in c for c, _, _ in client.calls)
+    assert props["orphans"] is None and props["contradictions"] is None and props["reconciling_since"] is None
+    assert json.loads(props["missing_props"]) == [{"label": "Task", "property": "id", "count": 2}]
+
+
+def test_reconcile_runs_once_and_releases_its_claim_on_failure(use):
+    client = use(_client(STATE))
+    assert kd.reconcile_quality() == {"status": "running"}
+    assert len(client.calls) == 1
+
+    def boom(params):
+        raise RuntimeError("connection reset")
+
+    client = use(_client(STATE, **{"RETURN q.id AS id": [{"id": "default"}], "WHERE orphan <> (e:QualityOrphan)": boom}))
+    with pytest.raises(RuntimeError):
+        kd.reconcile_quality()
+    cypher, params, _ = client.calls[-1]
+    assert "SET q.reconciling_since = null" in cypher and params["now"] == NOW + 1000
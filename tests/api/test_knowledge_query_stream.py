@@ -0,0 +1,98 @@
+import json
+import os
+import types
+import pytest
+from flask_jwt_extended import create_access_token
+from api.app import create_app
+from api.extensions import db
+
+
+class FakeRecord:
+    def __init__(self, data):
+        self._data = data
+
+    def data(self):
+        return self._data
+
+
+class StreamingClient:
+    def __init__(self, n):
+        self.n = n
+        self.produced = 0
+        self.closed = False
+        self.kwargs = None
+
+    def stream_query(self, cypher, params=None, **kwargs):
+        self.kwargs = kwargs
+        try:
+            for i in range(self.n):
+                self.produced += 1
+                yield FakeRecord({"i": i})
+        finally:
+            self.closed = True
+
+
+@pytest.fixture()
+def app(monkeypatch, tmp_path):
+    monkeypatch.setattr("api.utils.audit._LOG_PATH", str(tmp_path / "audit.log"))
+    os.environ["FLASK_ENV"] = "development"
+    os.environ["TESTING"] = "true"
+    os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        DB_AUTO_CREATE=True,
+        JWT_SECRET_KEY="test-jwt",
+    )
+    from api.resources import knowledge as knowledge_mod
+    monkeypatch.setattr(knowledge_mod, "audit_event", lambda *args, **kwargs: None)
+    cfg = types.SimpleNamespace(KNOWLEDGE_QUERY_MAX_ROWS=5, KNOWLEDGE_QUERY_TIMEOUT=2.5, KNOWLEDGE_QUERY_FETCH_SIZE=100)
+    monkeypatch.setattr(knowledge_mod, "get_config", lambda: cfg)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+def auth_headers(app, **extra):
+    with app.app_context():
+        token = create_access_token(identity="test-user")
+    return {"Authorization": f"Bearer {token}", **extra}
+
+
+def test_query_ndjson_streams_rows_and_caps(app, client, monkeypatch):
+    from api.resources import knowledge as knowledge_mod
+    sc = StreamingClient(20)
+    monkeypatch.setattr(knowledge_mod, "get_client", lambda: sc)
+    resp = client.post(
+        "/api/knowledge/query",
+        json={"cypher": "MATCH (n) RETURN n.id AS i"},
+        headers=auth_headers(app, Accept="application/x-ndjson"),
+    )
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/x-ndjson"
+    lines = [json.loads(l) for l in resp.get_data(as_text=True).splitlines()]
+    assert [l["i"] for l in lines[:-1]] == [0, 1, 2, 3, 4]
+    assert lines[-1] == {"_meta": {"count": 5, "truncated": True}}
+    # The cursor is closed once the cap is hit rather than drained
+    assert sc.closed and sc.produced <= 6
+    assert sc.kwargs == {"fetch_size": 100, "timeout": 2.5}
+
+
+def test_query_json_mode_unchanged(app, client, monkeypatch):
+    from api.resources import knowledge as knowledge_mod
+    monkeypatch.setattr(knowledge_mod, "get_client", lambda: StreamingClient(3))
+    resp = client.post(
+        "/api/knowledge/query",
+        json={"cypher": "MATCH (n) RETURN n.id AS i"},
+        headers=auth_headers(app),
+    )
+    assert resp.status_code == 200
+    assert resp.get_json() == {"results": [{"i": 0}, {"i": 1}, {"i": 2}], "count": 3}
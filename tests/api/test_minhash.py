@@ -0,0 +1,79 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from api.services import knowledge_drift as kd
+from api.utils.minhash import MinHasher, candidate_pairs, group_pairs, normalize_for_shingles, similarity
+
+
+def test_signatures_estimate_name_similarity():
+    assert normalize_for_shingles("Open AI, Inc.") == normalize_for_shingles("OpenAI Inc") == "openaiinc"
+    assert normalize_for_shingles("Café Nero") == "cafenero"
+    names = ["OpenAI Inc", "Open AI, Inc.", "Microsoft Corp", "Microsoft Corporation", "Apple", "Alphabet Inc."]
+    hasher = MinHasher()
+    sigs = hasher.signatures(names)
+    assert sigs.shape == (6, 128) and sigs.dtype == np.uint32
+    assert similarity(sigs[0], sigs[1]) == 1.0
+    # 11 of 18 shingles shared; the estimate is within a few standard errors
+    assert similarity(sigs[2], sigs[3]) == pytest.approx(11 / 18, abs=0.15)
+    assert similarity(sigs[4], sigs[5]) < 0.2
+    # Chunking and page boundaries do not change a text's signature
+    assert (MinHasher().signatures(names[::-1])[::-1] == sigs).all()
+
+    pairs = candidate_pairs(sigs, bands=32)
+    assert {tuple(p) for p in pairs.tolist()} >= {(0, 1), (2, 3)}
+    groups = group_pairs([(0, 1), (1, 4), (2, 3)], [1.0, 0.6, 0.7])
+    assert sorted(groups) == [([0, 1, 4], 0.6), ([2, 3], 0.7)]
+
+
+class _Graph:
+    def __init__(self, entities):
+        self.entities = {e["id"]: dict(e) for e in entities}
+        self.writes = []
+
+    def run_query(self, cypher, params=None, **kwargs):
+        if "WHERE e.id > $after" in cypher:
+            rows = sorted((e for e in self.entities.values() if e["id"] > params["after"]), key=lambda e: e["id"])
+            return [
+                {
+                    "id": e["id"],
+                    "text": e.get("name") or e.get("description"),
+                    "sig": e.get("minhash"),
+                    "key": e.get("minhashKey"),
+                    "merged": "mergedInto" in e,
+                }
+                for e in rows[: params["page"]]
+            ]
+        if "SET e.minhash" in cypher:
+            self.writes.append(sorted(r["id"] for r in params["rows"]))
+            for row in params["rows"]:
+                self.entities[row["id"]].update(minhash=row["sig"], minhashKey=row["key"])
+            return []
+        raise AssertionError(cypher)
+
+
+def test_dedup_scan_groups_near_duplicates_and_reuses_signatures(monkeypatch):
+    g = _Graph([
+        {"id": "e1", "name": "OpenAI Inc"},
+        {"id": "e2", "name": "Open AI, Inc."},
+        {"id": "e3", "name": "Microsoft Corporation"},
+        {"id": "e4", "name": "Microsoft Corp"},
+        {"id": "e5", "description": "Apple"},
+        {"id": "e6", "name": "OpenAI", "mergedInto": "e1"},
+        {"id": "e7", "name": "!!"},
+    ])
+    monkeypatch.setattr(kd, "get_client", lambda: g)
+
+    first = kd.scan_dedup_candidates(threshold=0.5, page_size=2)
+    assert [c["ids"] for c in first["candidates"]] == [["e1", "e2"], ["e3", "e4"]]
+    assert first["candidates"][0]["similarity"] == 1.0 and first["candidates"][0]["key"] == "openaiinc"
+    assert first["stats"]["entities"] == 5 and first["stats"]["hashed"] == 5
+    assert "minhash" not in g.entities["e6"]
+
+    g.entities["e5"]["description"] = "Apple Inc"
+    second = kd.scan_dedup_candidates(threshold=0.5, page_size=2)
+    assert second["candidates"] == first["candidates"]
+    assert second["stats"]["hashed"] == 1 and second["stats"]["reused"] == 4
+    assert g.writes[-1] == ["e5"]
+
+    assert kd.find_dedup_candidates(limit=1) == first["candidates"][:1]
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+import pytest
+
+from api.utils import neo4j_client
+
+
+@pytest.fixture(autouse=True)
+def reset_shared_client():
+    neo4j_client._reset_after_fork()
+    yield
+    neo4j_client.close_client()
+
+
+def test_get_client_returns_shared_instance():
+    a = neo4j_client.get_client()
+    b = neo4j_client.get_client()
+    assert a is b
+    # Callers' close() must not tear down the shared pool
+    a.close()
+    assert neo4j_client.get_client() is a
+
+
+def test_get_client_rebuilds_after_fork(monkeypatch):
+    a = neo4j_client.get_client()
+    monkeypatch.setattr(a, "_pid", os.getpid() + 1)
+    b = neo4j_client.get_client()
+    assert b is not a
+
+
+def test_pool_stats_without_connections():
+    stats = neo4j_client.get_client().pool_stats()
+    assert stats == {"in_use": 0, "idle": 0}
+
+
+def test_shared_pool_is_closed_at_exit():
+    script = (
+        "import os\n"
+        "from api.utils import neo4j_client\n"
+        "class Client:\n"
+        "    _pid = os.getpid()\n"
+        "    def shutdown(self):\n"
+        "        print('closed')\n"
+        "neo4j_client._shared_client = Client()\n"
+    )
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "closed"
@@ -0,0 +1,59 @@
+import os
+import pytest
+
+from api.app import create_app
+from api.utils import neo4j_client
+from api.utils.neo4j_client import (
+    BOOKMARKS_HEADER,
+    READ_ACCESS,
+    WRITE_ACCESS,
+    prefer_read_replicas,
+    request_bookmark_manager,
+    session_config,
+)
+
+
+@pytest.fixture()
+def app():
+    os.environ["FLASK_ENV"] = "development"
+    os.environ["TESTING"] = "true"
+    os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+    app = create_app()
+    app.config.update(TESTING=True)
+
+    @app.route("/_bookmarks_probe")
+    def _probe():
+        request_bookmark_manager()
+        return "ok"
+
+    return app
+
+
+def test_session_config_outside_request_uses_driver_defaults():
+    assert session_config() == {}
+    assert session_config(READ_ACCESS) == {"default_access_mode": READ_ACCESS}
+
+
+def test_prefer_read_replicas_routes_reads_with_request_bookmarks(app):
+    with app.test_request_context(headers={BOOKMARKS_HEADER: "bm:1, bm:2"}):
+        cfg = prefer_read_replicas(lambda: session_config())()
+        assert cfg["default_access_mode"] == READ_ACCESS
+        assert set(cfg["bookmark_manager"].get_bookmarks()) == {"bm:1", "bm:2"}
+        # Explicit modes win over the handler default, and every session shares one manager
+        explicit = session_config(WRITE_ACCESS)
+        assert explicit["default_access_mode"] == WRITE_ACCESS
+        assert explicit["bookmark_manager"] is cfg["bookmark_manager"]
+
+
+def test_unannotated_request_keeps_driver_default_access_mode(app):
+    with app.test_request_context():
+        cfg = session_config()
+        assert "default_access_mode" not in cfg
+        assert cfg["bookmark_manager"] is neo4j_client.request_bookmark_manager()
+
+
+def test_response_returns_bookmarks(app):
+    client = app.test_client()
+    resp = client.get("/_bookmarks_probe", headers={BOOKMARKS_HEADER: "bm:9"})
+    assert resp.headers.get(BOOKMARKS_HEADER) == "bm:9"
+    assert BOOKMARKS_HEADER not in client.get("/_bookmarks_probe").headers
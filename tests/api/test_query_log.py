@@ -0,0 +1,78 @@
+import os
+import time
+import pytest
+from flask_jwt_extended import create_access_token
+
+from api.app import create_app
+from api.utils import query_log
+from api.utils.query_log import SlowQueryLog, analyze, fingerprint, is_read_only, redact
+
+
+def test_fingerprint_ignores_literals_and_whitespace():
+    a = fingerprint("MATCH (e:Entity {id: 'E:1'}) RETURN e LIMIT 10")
+    b = fingerprint("MATCH (e:Entity {id: \"E:2\"})\n  RETURN e   LIMIT 250")
+    assert a == b
+    assert a != fingerprint("MATCH (e:Entity {id: 'E:1'}) RETURN e.id LIMIT 10")
+    _, text, name = analyze("/* kg.lookup */ MATCH (n:Label2) WHERE n.x IN [1, 2, 3] RETURN n")
+    assert name == "kg.lookup"
+    assert text == "MATCH (n:Label2) WHERE n.x IN [?] RETURN n"
+
+
+def test_read_only_detection_and_redaction():
+    assert is_read_only("MATCH (n) RETURN n")
+    assert is_read_only("CALL db.index.vector.queryNodes(?, $k, $q) YIELD node RETURN node")
+    assert not is_read_only("MATCH (n) SET n.x = ? RETURN n")
+    assert not is_read_only("CALL gds.pageRank.stream(?)")
+    assert redact({"q": [0.1] * 1536, "name": "secret", "n": 3, "m": {"a": True}}) == {
+        "q": "<list:1536>",
+        "name": "<str:6>",
+        "n": "<number>",
+        "m": {"a": True},
+    }
+
+
+def test_slow_query_log_threshold_ring_and_profile():
+    log = SlowQueryLog(threshold_ms=100, size=2, profile=True)
+    profiled = []
+
+    def profiler(q, p):
+        profiled.append(q)
+        return {"operatorType": "ProduceResults", "rows": 1, "dbHits": 0, "children": []}
+
+    assert log.consider("MATCH (n) RETURN n", {}, 0.05, 1) is None
+    log.consider("MATCH (n) RETURN n", {"id": "x"}, 0.2, 1, profiler=profiler)
+    log.consider("MATCH (n) SET n.a = 1", {}, 0.3, 0, profiler=profiler)
+    log.consider("MATCH (m) RETURN m", {}, 0.4, 5, name="third")
+    entries = log.entries()
+    assert [e["duration_ms"] for e in entries] == [400.0, 300.0]
+    assert entries[0]["name"] == "third"
+    for _ in range(50):
+        if profiled:
+            break
+        time.sleep(0.01)
+    # Only the read-only statement is re-run under PROFILE
+    assert profiled == ["MATCH (n) RETURN n"]
+
+
+@pytest.fixture()
+def app(monkeypatch):
+    os.environ["TESTING"] = "true"
+    os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+    app = create_app()
+    app.config.update(TESTING=True, JWT_SECRET_KEY="test-jwt")
+    monkeypatch.setattr(query_log, "_slow_log", SlowQueryLog(threshold_ms=10))
+    return app
+
+
+def test_slow_queries_endpoint(app):
+    query_log.get_slow_query_log().consider("MATCH (n {id: 'a'}) RETURN n", {"id": "a"}, 0.5, 1)
+    with app.app_context():
+        token = create_access_token(identity="test-user")
+    client = app.test_client()
+    resp = client.get("/api/system/slow_queries", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data["count"] == 1
+    assert data["entries"][0]["query"] == "MATCH (n {id: ?}) RETURN n"
+    assert data["entries"][0]["params"] == {"id": "<str:1>"}
+    assert client.get("/api/system/slow_queries").status_code == 401
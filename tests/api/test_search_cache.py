@@ -0,0 +1,101 @@
+import os
+import pytest
+from flask_jwt_extended import create_access_token
+
+from api.app import create_app
+from api.utils import search_cache
+from api.utils.search_cache import SearchCache, search_key
+
+
+def test_lru_byte_budget_and_key_normalization():
+    cache = SearchCache(max_bytes=60, ttl_s=60)
+    a = search_key("knowledge.fulltext", query="  Graph   DB ", limit=5)
+    assert a == search_key("knowledge.fulltext", query="graph db", limit=5)
+    assert search_key("s", embedding=[0.1, 0.2], limit=5) == search_key("s", embedding=(0.1, 0.2), limit=5)
+    assert search_key("s", embedding=[0.1, 0.2], limit=5) != search_key("s", embedding=[0.1, 0.3], limit=5)
+
+    assert cache.put("a", ["x" * 20])
+    assert cache.put("b", ["y" * 20])
+    assert cache.get("a") == ["x" * 20]  # refresh a, so b is least recently used
+    assert cache.put("c", ["z" * 20])
+    assert cache.get("b") is None and cache.get("a") and cache.get("c")
+    assert cache.bytes <= 60
+    assert not cache.put("huge", ["w" * 100])
+
+
+def test_ttl_and_generation_invalidation(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(search_cache.time, "monotonic", lambda: now[0])
+    cache = SearchCache(max_bytes=1000, ttl_s=10)
+    cache.put("k", {"v": 1})
+    now[0] += 11
+    assert cache.get("k") is None and len(cache) == 0
+
+    cache.put("k", {"v": 1})
+    gen = cache.generation
+    cache.invalidate()
+    assert cache.get("k") is None
+    # A result computed before a write must not be cached after it
+    assert not cache.put("k", {"v": 2}, generation=gen)
+    assert cache.put("k", {"v": 3}, generation=cache.generation)
+    assert cache.get("k") == {"v": 3}
+
+
+class Row(dict):
+    def data(self):
+        return dict(self)
+
+
+class CountingClient:
+    def __init__(self):
+        self.searches = 0
+
+    def run_query(self, cypher, params=None):
+        if "fulltext.queryNodes" in cypher:
+            self.searches += 1
+            return [Row(entity={"id": "E1", "name": "graph"}, score=1.0)]
+        if "MERGE (s)-[r:RELATED" in cypher:
+            return [[{"type": params["pred"]}]]
+        return []
+
+
+@pytest.fixture()
+def app(monkeypatch, tmp_path):
+    monkeypatch.setattr("api.utils.audit._LOG_PATH", str(tmp_path / "audit.log"))
+    os.environ["TESTING"] = "true"
+    os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+    app = create_app()
+    app.config.update(TESTING=True, JWT_SECRET_KEY="test-jwt")
+    client = CountingClient()
+    monkeypatch.setattr("api.resources.knowledge.get_client", lambda: client)
+    monkeypatch.setattr("api.resources.knowledge.vector_search_enabled", lambda: False)
+    monkeypatch.setattr(search_cache, "_cache", SearchCache(max_bytes=1 << 20, ttl_s=300))
+    app.counting_client = client
+    return app
+
+
+def _headers(app):
+    with app.app_context():
+        token = create_access_token(identity="searcher")
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_knowledge_search_cached_until_write(app):
+    http = app.test_client()
+    headers = _headers(app)
+    first = http.post("/api/knowledge/search", json={"query": "Graph", "limit": 5}, headers=headers)
+    second = http.post("/api/knowledge/search", json={"query": " graph ", "limit": 5}, headers=headers)
+    assert first.status_code == 200 and first.get_json() == second.get_json()
+    assert app.counting_client.searches == 1
+
+    r = http.post(
+        "/api/knowledge/relations/update",
+        json={"subject_id": "E1", "predicate": "links", "object_id": "E2", "attributes": {"w": 1}},
+        headers=headers,
+    )
+    assert r.status_code == 200
+    http.post("/api/knowledge/search", json={"query": "graph", "limit": 5}, headers=headers)
+    assert app.counting_client.searches == 2
+
+    stats = http.get("/api/system/search_cache", headers=headers).get_json()
+    assert stats["entries"] == 1 and stats["generation"] == 1
@@ -0,0 +1,47 @@
+from api.utils.snapshot_codec import (
+    ENCODING_DELTA,
+    ENCODING_FULL,
+    apply_delta,
+    encode_chain,
+    encode_delta,
+    plan_snapshot,
+    reconstruct,
+)
+
+DOC = "".join(f"line {i}\n" for i in range(200))
+
+
+def test_delta_round_trip_is_compact():
+    edited = DOC.replace("line 50\n", "line fifty\n") + "tail without newline"
+    delta = encode_delta(DOC, edited)
+    assert apply_delta(DOC, delta) == edited
+    assert len(delta) < len(edited) // 10
+    assert apply_delta("", encode_delta("", "new")) == "new"
+
+
+def test_plan_snapshot_keyframes():
+    assert plan_snapshot(2, DOC + "x\n", DOC, False, 20)["encoding"] == ENCODING_FULL
+    assert plan_snapshot(20, DOC + "x\n", DOC, True, 20)["encoding"] == ENCODING_FULL
+    assert plan_snapshot(3, {"not": "text"}, DOC, True, 20)["encoding"] == ENCODING_FULL
+    # Small rewrites where the delta is not smaller than the content stay full
+    assert plan_snapshot(3, "b", "a", True, 20)["encoding"] == ENCODING_FULL
+    plan = plan_snapshot(3, DOC + "x\n", DOC, True, 20)
+    assert plan["encoding"] == ENCODING_DELTA and plan["base_version"] == 2 and plan["content"] is None
+
+
+def test_chain_reencode_and_reconstruct():
+    versions = [(v, DOC + "".join(f"edit {i}\n" for i in range(v))) for v in range(2, 12)]
+    chain = encode_chain(versions, keyframe_interval=5)
+    assert [c["encoding"] for c in chain] == ["full", "delta", "delta", "full"] + ["delta"] * 4 + ["full", "delta"]
+    assert [content for _, content, _ in reconstruct(chain)] == [c for _, c in versions]
+
+    # A delta whose base is missing is reported without breaking the next keyframe
+    broken = [chain[0], chain[2], chain[3]]
+    decoded = reconstruct(broken)
+    assert decoded[1][1] is None and "missing base" in decoded[1][2]
+    assert decoded[2][1] == versions[3][1]
+
+
+def test_legacy_snapshots_without_encoding_are_keyframes():
+    decoded = reconstruct([{"version": 2, "content": "a\n"}, {"version": 3, "content": "b\n"}])
+    assert [c for _, c, _ in decoded] == ["a\n", "b\n"]
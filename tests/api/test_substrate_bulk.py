@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+import pytest
+from flask_jwt_extended import create_access_token
+
+from api.app import create_app
+from api.utils import consciousness_substrate as cs
+from api.utils.consciousness_substrate import EnhancedConsciousnessSubstrate
+
+
+class FakeResult:
+    def __init__(self, created):
+        self.created = created
+
+    def single(self):
+        return {"created": self.created}
+
+
+class FakeTx:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def run(self, cypher, params):
+        rows = params["rows"]
+        self.driver.rows.extend(rows)
+        if any(r["content"] == "boom" for r in rows):
+            raise RuntimeError("constraint violated")
+        # Ids listed in driver.existing stand for entities already in the graph
+        return FakeResult([r["id"] for r in rows if r["id"] not in self.driver.existing])
+
+
+class FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute_write(self, fn, *args):
+        with self.driver.lock:
+            self.driver.sessions += 1
+        return fn(FakeTx(self.driver), *args)
+
+
+class FakeDriver:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = 0
+        self.rows = []
+        self.existing = set()
+
+    def session(self, **kwargs):
+        return FakeSession(self)
+
+
+def _ecs():
+    ecs = EnhancedConsciousnessSubstrate()
+    ecs._driver = FakeDriver()
+    return ecs
+
+
+@pytest.mark.parametrize("parallelism", [1, 3])
+def test_bulk_create_chunks_and_isolates_failures(parallelism):
+    ecs = _ecs()
+    rows = [{"content": f"c{i}", "entity_type": "note", "created_by": "t"} for i in range(25)]
+    rows[12]["content"] = "boom"
+    out = ecs.create_knowledge_entities_bulk(iter(rows), chunk_size=10, parallelism=parallelism, return_ids=True)
+    assert [c["chunk"] for c in out["chunks"]] == [0, 1, 2]
+    assert [c["offset"] for c in out["chunks"]] == [0, 10, 20]
+    assert [c["ok"] for c in out["chunks"]] == [True, False, True]
+    assert out["chunks"][1]["error"] == "constraint violated"
+    assert out["total"] == 25 and out["written"] == 15
+    assert out["failed_chunks"] == 1 and out["failed_rows"] == 10
+    assert len(out["chunks"][0]["ids"]) == 10
+    assert ecs._driver.sessions == 3
+
+
+def test_bulk_reload_skips_existing_entities(monkeypatch):
+    indexed = []
+    monkeypatch.setattr(cs, "index_embeddings", lambda label, items: indexed.extend(i for i, _ in items))
+    ecs = _ecs()
+    rows = [{"id": f"e{i}", "content": f"c{i}", "entity_type": "note", "created_by": "t", "embedding": [0.1]} for i in range(3)]
+    first = ecs.create_knowledge_entities_bulk(rows)
+    assert (first["written"], first["existing"]) == (3, 0)
+    prov_ids = [r["prov_id"] for r in ecs._driver.rows]
+    assert len(set(prov_ids)) == 3
+
+    # Reloading, even with changed content, creates nothing: no provenance, no index entries
+    ecs._driver.rows.clear()
+    ecs._driver.existing = {"e0", "e1", "e2"}
+    indexed.clear()
+    again = ecs.create_knowledge_entities_bulk(
+        [dict(rows[0], content="changed"), rows[1], rows[1], dict(rows[2], id="e3")], return_ids=True
+    )
+    assert (again["total"], again["written"], again["existing"]) == (4, 1, 3)
+    (chunk,) = again["chunks"]
+    assert chunk["ids"] == ["e3"] and chunk["existing_ids"] == ["e0", "e1", "e1"]
+    # A repeated id within a chunk is sent once; provenance ids depend on the entity only
+    assert [r["id"] for r in ecs._driver.rows] == ["e0", "e1", "e3"]
+    assert ecs._driver.rows[0]["prov_id"] == prov_ids[0]
+    assert indexed == ["e3"]
+
+
+@pytest.fixture()
+def app():
+    os.environ["TESTING"] = "true"
+    os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+    app = create_app()
+    app.config.update(TESTING=True, JWT_SECRET_KEY="test-jwt")
+    app.extensions["substrate"] = _ecs()
+    return app
+
+
+def _headers(app, **extra):
+    with app.app_context():
+        token = create_access_token(identity="loader")
+    return {"Authorization": f"Bearer {token}", **extra}
+
+
+def test_bulk_endpoint_ndjson_reports_rejected_rows(app):
+    lines = [
+        json.dumps({"content": "a", "entity_type": "note"}),
+        "{not json",
+        json.dumps({"entity_type": "note"}),
+        json.dumps({"content": "b", "entity_type": "note", "created_by": "x"}),
+    ]
+    resp = app.test_client().post(
+        "/api/substrate/entities/bulk?chunk_size=1",
+        data="\n".join(lines) + "\n",
+        headers=_headers(app, **{"Content-Type": "application/x-ndjson"}),
+    )
+    assert resp.status_code == 207
+    data = resp.get_json()
+    assert data["written"] == 2 and data["failed_chunks"] == 0
+    assert [r["row"] for r in data["rejected"]] == [1, 2]
+
+
+def test_bulk_endpoint_json_array_all_ok(app):
+    body = [{"content": f"c{i}", "entity_type": "note"} for i in range(5)]
+    resp = app.test_client().post("/api/substrate/entities/bulk?chunk_size=2", json=body, headers=_headers(app))
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data["written"] == 5
+    assert [c["count"] for c in data["chunks"]] == [2, 2, 1]
+    assert data["rejected"] == []
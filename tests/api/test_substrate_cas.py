@@ -0,0 +1,54 @@
+import os
+import pytest
+from flask_jwt_extended import create_access_token
+
+from api.app import create_app
+from api.utils.consciousness_substrate import VersionConflictError
+
+
+class FakeSubstrate:
+    def __init__(self, version=3):
+        self.version = version
+        self.calls = []
+
+    def update_knowledge_entity(self, entity_id, updates, updated_by, conflict_resolution="merge", expected_version=None):
+        self.calls.append(expected_version)
+        if expected_version is not None and expected_version != self.version:
+            raise VersionConflictError(entity_id, expected_version, self.version)
+        self.version += 1
+        return self.version
+
+
+@pytest.fixture()
+def app():
+    os.environ["TESTING"] = "true"
+    os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+    app = create_app()
+    app.config.update(TESTING=True, JWT_SECRET_KEY="test-jwt")
+    app.extensions["substrate"] = FakeSubstrate()
+    return app
+
+
+def _headers(app):
+    with app.app_context():
+        token = create_access_token(identity="test-user")
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_patch_expected_version_mismatch_returns_409(app):
+    client = app.test_client()
+    body = {"updates": {"content": "x"}, "updated_by": "tester", "expected_version": 2}
+    r = client.patch("/api/substrate/entity/K1", json=body, headers=_headers(app))
+    assert r.status_code == 409
+    assert r.get_json() == {
+        "error": "version_conflict",
+        "details": "Knowledge entity K1 is at version 3, expected 2",
+        "expected_version": 2,
+        "current_version": 3,
+    }
+
+    body["expected_version"] = 3
+    r = client.patch("/api/substrate/entity/K1", json=body, headers=_headers(app))
+    assert r.status_code == 200
+    assert r.get_json() == {"version": 4}
+    assert app.extensions["substrate"].calls == [2, 3]
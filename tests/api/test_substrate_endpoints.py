@@ -115,3 +115,41 @@ def test_semantic_search_best_effort(client, auth_header):
     if rs.status_code != 200:
         pytest.skip(f"semantic search unavailable: {rs.status_code}")
     assert "results" in rs.json
+
+
+def test_update_compare_and_set(client, auth_header):
+    payload = {"content": "CAS test", "entity_type": "note", "created_by": "tester"}
+    r = client.post("/api/substrate/entity", data=json.dumps(payload), headers={**auth_header, "Content-Type": "application/json"})
+    assert r.status_code == 201
+    entity_id = r.json["id"]
+    headers = {**auth_header, "Content-Type": "application/json"}
+
+    upd = {"updates": {"content": "CAS v2"}, "updated_by": "tester-A", "strategy": "latest_wins", "expected_version": 1}
+    r1 = client.patch(f"/api/substrate/entity/{entity_id}", data=json.dumps(upd), headers=headers)
+    assert r1.status_code == 200, r1.data
+    assert r1.json["version"] == 2
+
+    # Same expected version again: the entity has moved on
+    r2 = client.patch(f"/api/substrate/entity/{entity_id}", data=json.dumps(upd), headers=headers)
+    assert r2.status_code == 409
+    assert r2.json["error"] == "version_conflict"
+    assert r2.json["current_version"] == 2
+
+
+def test_temporal_reconstructs_delta_snapshots(client, auth_header):
+    doc = "".join(f"paragraph {i}\n" for i in range(100))
+    payload = {"content": doc, "entity_type": "doc", "created_by": "tester"}
+    headers = {**auth_header, "Content-Type": "application/json"}
+    r = client.post("/api/substrate/entity", data=json.dumps(payload), headers=headers)
+    entity_id = r.json["id"]
+    versions = []
+    for i in range(4):
+        doc = doc + f"appendix {i}\n"
+        versions.append(doc)
+        upd = {"updates": {"content": doc}, "updated_by": "tester", "strategy": "latest_wins"}
+        assert client.patch(f"/api/substrate/entity/{entity_id}", data=json.dumps(upd), headers=headers).status_code == 200
+
+    rt = client.get(f"/api/substrate/temporal/{entity_id}", headers=auth_header)
+    assert rt.status_code == 200
+    snaps = [t for t in rt.json["timeline"] if t["type"] == "snapshots"][0]["events"]
+    assert [s["content"] for s in snaps] == versions
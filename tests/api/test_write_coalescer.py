@@ -0,0 +1,79 @@
+import threading
+import time
+import pytest
+
+from api.utils.write_coalescer import WriteCoalescer
+
+STMT = "UNWIND $rows AS row CREATE (m:MetricSnapshot {id: row.id})"
+
+
+class RecordingClient:
+    def __init__(self, fail=False, delay=0.0):
+        self.calls = []
+        self.modes = []
+        self.fail = fail
+        self.delay = delay
+
+    def run_query(self, cypher, params=None, access_mode=None):
+        self.modes.append(access_mode)
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("neo4j down")
+        self.calls.append((cypher, list(params["rows"])))
+        return []
+
+
+def test_fire_and_forget_rows_coalesce_into_chunked_unwinds():
+    client = RecordingClient()
+    c = WriteCoalescer(flush_interval_ms=60000, max_batch=4, max_buffered=1000)
+    try:
+        for i in range(10):
+            c.submit("MetricSnapshot", STMT, {"id": i}, client_factory=lambda: client, wait=False)
+        c.flush()
+    finally:
+        c.stop(flush=False)
+    # A full buffer wakes the flusher early, so only the chunk bound is deterministic
+    assert all(1 <= len(rows) <= 4 for _, rows in client.calls)
+    assert len(client.calls) >= 3
+    assert [r["id"] for _, rows in client.calls for r in rows] == list(range(10))
+
+
+def test_waiting_writers_share_a_commit_and_see_errors():
+    # A slow commit lets later writers pile up behind the one in flight
+    client = RecordingClient(delay=0.05)
+    c = WriteCoalescer(flush_interval_ms=50, max_batch=100)
+    try:
+        threads = [
+            threading.Thread(
+                target=c.submit, args=("TaskAssignment", STMT, {"id": i}), kwargs={"client_factory": lambda: client}
+            )
+            for i in range(20)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+        assert sorted(r["id"] for _, rows in client.calls for r in rows) == list(range(20))
+        assert len(client.calls) < 20
+
+        failing = RecordingClient(fail=True)
+        with pytest.raises(RuntimeError):
+            c.submit("TaskAssignment", STMT, {"id": 99}, client_factory=lambda: failing, timeout=5)
+    finally:
+        c.stop()
+
+
+def test_buffer_cap_flushes_inline_and_disabled_writes_through():
+    client = RecordingClient()
+    c = WriteCoalescer(flush_interval_ms=60000, max_batch=2, max_buffered=3)
+    try:
+        for i in range(3):
+            c.submit("AnomalyEvent", STMT, {"id": i}, client_factory=lambda: client, wait=False)
+        assert sum(len(rows) for _, rows in client.calls) == 3
+    finally:
+        c.stop(flush=False)
+
+    direct = RecordingClient()
+    WriteCoalescer(enabled=False).submit("AnomalyEvent", STMT, {"id": 1}, client_factory=lambda: direct, wait=False)
+    assert direct.calls == [(STMT, [{"id": 1}])]
+    assert set(client.modes) == set(direct.modes) == {"WRITE"}